@@ -0,0 +1,48 @@
+"""replace chats.context_summary_message_id with context_summary_until
+
+Revision ID: c0nt3xt5unt1l
+Revises: c0nt3xtt0k3n5
+Create Date: 2026-01-14 12:00:00.000000
+
+Сообщения из Redis-буфера попадают в БД с задержкой и ещё не имеют id,
+поэтому граница rolling summary хранится как timestamp последнего
+покрытого сообщения, а не ChatMessage.id.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "c0nt3xt5unt1l"
+down_revision: Union[str, Sequence[str], None] = "c0nt3xtt0k3n5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Switch summary boundary from message id to timestamp."""
+    op.drop_column("chats", "context_summary_message_id")
+    op.add_column(
+        "chats",
+        sa.Column(
+            "context_summary_until",
+            sa.DateTime(timezone=True),
+            nullable=True,
+            comment="Timestamp of the last message covered by context_summary",
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Restore message id boundary (summaries are rebuilt on next overflow)."""
+    op.drop_column("chats", "context_summary_until")
+    op.add_column(
+        "chats",
+        sa.Column(
+            "context_summary_message_id",
+            sa.Integer(),
+            nullable=True,
+            comment="Last ChatMessage.id covered by context_summary",
+        ),
+    )
@@ -0,0 +1,67 @@
+"""add chat message token counts and rolling context summary
+
+Revision ID: c0nt3xtt0k3n5
+Revises: m3tr1c5r0llup
+Create Date: 2026-01-12 12:00:00.000000
+
+content_tokens считается при записи сообщения, чтобы сборщик контекста
+не токенизировал историю на каждом запросе.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "c0nt3xtt0k3n5"
+down_revision: Union[str, Sequence[str], None] = "m3tr1c5r0llup"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add token count and summary columns."""
+    op.add_column(
+        "chat_messages",
+        sa.Column(
+            "content_tokens",
+            sa.Integer(),
+            nullable=True,
+            comment="Token count of content (computed on write)",
+        ),
+    )
+    op.add_column(
+        "chat_history",
+        sa.Column(
+            "content_tokens",
+            sa.Integer(),
+            nullable=True,
+            comment="Token count of content (computed on write)",
+        ),
+    )
+    op.add_column(
+        "chats",
+        sa.Column(
+            "context_summary",
+            sa.Text(),
+            nullable=True,
+            comment="Rolling summary of turns that no longer fit the context",
+        ),
+    )
+    op.add_column(
+        "chats",
+        sa.Column(
+            "context_summary_message_id",
+            sa.Integer(),
+            nullable=True,
+            comment="Last ChatMessage.id covered by context_summary",
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Drop token count and summary columns."""
+    op.drop_column("chats", "context_summary_message_id")
+    op.drop_column("chats", "context_summary")
+    op.drop_column("chat_history", "content_tokens")
+    op.drop_column("chat_messages", "content_tokens")
@@ -0,0 +1,48 @@
+"""add subscriptions.cancelled_at
+
+Revision ID: c4nc3ll3d4t
+Revises: c0nt3xt5unt1l
+Create Date: 2026-01-15 12:00:00.000000
+
+Момент деактивации подписки — churn в daily_user_rollups считается по нему,
+а не по updated_at (тот меняется при любом последующем изменении).
+Для уже неактивных подписок заполняется из updated_at.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "c4nc3ll3d4t"
+down_revision: Union[str, Sequence[str], None] = "c0nt3xt5unt1l"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add cancelled_at and backfill it for inactive subscriptions."""
+    op.add_column(
+        "subscriptions",
+        sa.Column(
+            "cancelled_at",
+            sa.DateTime(timezone=True),
+            nullable=True,
+            comment="When the subscription was deactivated (churn event)",
+        ),
+    )
+    op.create_index(
+        op.f("ix_subscriptions_cancelled_at"),
+        "subscriptions",
+        ["cancelled_at"],
+        unique=False,
+    )
+    op.execute(
+        "UPDATE subscriptions SET cancelled_at = updated_at WHERE is_active = false"
+    )
+
+
+def downgrade() -> None:
+    """Drop cancelled_at."""
+    op.drop_index(op.f("ix_subscriptions_cancelled_at"), table_name="subscriptions")
+    op.drop_column("subscriptions", "cancelled_at")
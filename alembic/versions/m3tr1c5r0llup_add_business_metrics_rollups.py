@@ -0,0 +1,127 @@
+"""add business metrics rollup tables
+
+Revision ID: m3tr1c5r0llup
+Revises: f42418e04617
+Create Date: 2026-01-10 12:00:00.000000
+
+Дневные агрегаты для админ-дашбордов (costs, revenue, signups, activity, churn).
+Заполняются src/tasks/metrics_rollup_scheduler.py (первый запуск делает backfill).
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "m3tr1c5r0llup"
+down_revision: Union[str, Sequence[str], None] = "f42418e04617"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create daily rollup tables."""
+    op.create_table(
+        "daily_cost_rollups",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("day", sa.Date(), nullable=False, comment="UTC day"),
+        sa.Column(
+            "service", sa.String(length=50), nullable=False, comment="Service name"
+        ),
+        sa.Column(
+            "model",
+            sa.String(length=100),
+            nullable=False,
+            comment="Model ('' when not set)",
+        ),
+        sa.Column(
+            "total_cost", sa.Float(), nullable=False, comment="Sum of costs in USD"
+        ),
+        sa.Column(
+            "total_tokens", sa.BigInteger(), nullable=False, comment="Sum of tokens"
+        ),
+        sa.Column(
+            "request_count",
+            sa.Integer(),
+            nullable=False,
+            comment="Number of tracked requests",
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("day", "service", "model", name="uq_daily_cost_rollup"),
+    )
+    op.create_index(
+        op.f("ix_daily_cost_rollups_day"), "daily_cost_rollups", ["day"], unique=False
+    )
+
+    op.create_table(
+        "daily_revenue_rollups",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("day", sa.Date(), nullable=False, comment="UTC day"),
+        sa.Column(
+            "tier", sa.String(length=20), nullable=False, comment="Subscription tier"
+        ),
+        sa.Column(
+            "provider", sa.String(length=50), nullable=False, comment="Payment provider"
+        ),
+        sa.Column(
+            "revenue", sa.Float(), nullable=False, comment="Sum of payments in USD"
+        ),
+        sa.Column(
+            "payments_count",
+            sa.Integer(),
+            nullable=False,
+            comment="Number of completed payments",
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("day", "tier", "provider", name="uq_daily_revenue_rollup"),
+    )
+    op.create_index(
+        op.f("ix_daily_revenue_rollups_day"),
+        "daily_revenue_rollups",
+        ["day"],
+        unique=False,
+    )
+
+    op.create_table(
+        "daily_user_rollups",
+        sa.Column("day", sa.Date(), nullable=False, comment="UTC day"),
+        sa.Column(
+            "signups", sa.Integer(), nullable=False, comment="New users registered"
+        ),
+        sa.Column(
+            "active_users",
+            sa.Integer(),
+            nullable=False,
+            comment="Users with at least one request",
+        ),
+        sa.Column(
+            "churned_subscriptions",
+            sa.Integer(),
+            nullable=False,
+            comment="Subscriptions deactivated",
+        ),
+        sa.Column(
+            "assistant_messages",
+            sa.Integer(),
+            nullable=False,
+            comment="AI responses sent",
+        ),
+        sa.Column(
+            "refreshed_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            comment="Last rollup refresh",
+        ),
+        sa.PrimaryKeyConstraint("day"),
+    )
+
+
+def downgrade() -> None:
+    """Drop daily rollup tables."""
+    op.drop_table("daily_user_rollups")
+    op.drop_index(
+        op.f("ix_daily_revenue_rollups_day"), table_name="daily_revenue_rollups"
+    )
+    op.drop_table("daily_revenue_rollups")
+    op.drop_index(op.f("ix_daily_cost_rollups_day"), table_name="daily_cost_rollups")
+    op.drop_table("daily_cost_rollups")
@@ -6,7 +6,7 @@ FastAPI Server для Telegram Mini App
 import os
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, Request, HTTPException
+from fastapi import Depends, FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from loguru import logger
@@ -16,10 +16,21 @@ from slowapi.errors import RateLimitExceeded
 
 from config.config import validate_config, WEBAPP_URL
 from config.logging import setup_logging
-from src.database.engine import dispose_engine
+from src.database.engine import dispose_engine, get_pool_stats
+from src.services.futures_analysis.learning_calibrator import get_stage_timings
+from src.cache import get_redis_manager
+from src.cache.request_limit_store import get_request_limit_store
+from src.cache.chat_history_cache import get_chat_history_cache
+from src.cache.ad_counter_store import get_ad_counter_store
+from src.services.usage_recorder import get_usage_recorder
+from src.services.coin_registry import get_coin_registry
+from src.services.market_snapshot import get_market_snapshot_service
+from src.services.service_registry import close_services
 from src.api.router import router as api_router
+from src.api.api_key_auth import verify_api_key
 from src.api.security import SecurityMiddleware
-from src.services.forward_test.scheduler import ForwardTestScheduler
+from src.api.http_cache import HttpCacheMiddleware
+from src.utils.serialization import FastJSONResponse
 
 # Setup logging at module level (must run before app creation)
 # This ensures logging works when uvicorn imports the module
@@ -39,22 +50,59 @@ async def lifespan(app: FastAPI):
     # NOTE: Database tables managed by Alembic migrations
     # Run: alembic upgrade head
 
-    # NOTE: Security cleanup отключён - очистка происходит автоматически
-    # при каждом запросе в SecurityStorage.add_request() и is_banned()
+    # Initialize Redis (cache + request limit counters)
+    redis_mgr = get_redis_manager()
+    if await redis_mgr.initialize():
+        logger.info("Redis initialized")
+    else:
+        logger.warning("Redis unavailable - request limits fall back to PostgreSQL")
 
-    # Start Forward Test Scheduler (paper trading monitoring)
-    forward_test_scheduler = ForwardTestScheduler()
-    forward_test_scheduler.start()
-    logger.info("Forward Test Scheduler started (generation/monitor/aggregation)")
+    # Periodic write-back of Redis limit counters to PostgreSQL
+    limit_store = get_request_limit_store()
+    limit_store.start()
+
+    # Recent chat history in Redis, batched write-behind to PostgreSQL
+    chat_history_cache = get_chat_history_cache()
+    chat_history_cache.start()
+
+    # Cost tracking / points awards written in batches off the request path
+    usage_recorder = get_usage_recorder()
+    usage_recorder.start()
+
+    # Buffered ad counter increments flushed to Redis in batches
+    ad_counters = get_ad_counter_store()
+    ad_counters.start()
+
+    # Coin registry is synced by the bot scheduler; API only reads it
+    await get_coin_registry().ensure_loaded()
+
+    # Market overview snapshot rebuilt in background, shared with the bot via Redis
+    market_snapshot = get_market_snapshot_service()
+    market_snapshot.start()
+
+    # NOTE: Security cleanup не нужен - в Redis все ключи с TTL,
+    # in-memory fallback ограничен SECURITY_MAX_TRACKED_IPS (LRU)
+
+    # Forward test generation/monitor/aggregation runs in the job runner
+    # (src/tasks/job_runner.py), once per deployment instead of once per worker
 
     yield
 
     # Shutdown
     logger.info("Shutting down Syntra API Server...")
 
-    # Stop Forward Test Scheduler
-    forward_test_scheduler.stop()
-    logger.info("Forward Test Scheduler stopped")
+    # Flush request limit counters, queued chat messages, usage events and ad counters before closing Redis/DB
+    await limit_store.stop()
+    await chat_history_cache.stop()
+    await usage_recorder.stop()
+    await ad_counters.stop()
+    await market_snapshot.stop()
+
+    # Shared API clients (finishes background chat summaries first)
+    await close_services()
+
+    await redis_mgr.close()
+    logger.info("Redis connections closed")
 
     await dispose_engine()
     logger.info("Database connections closed")
@@ -70,7 +118,8 @@ rate_limit = os.getenv("API_RATE_LIMIT", "300/minute")
 limiter = Limiter(
     key_func=get_remote_address,
     default_limits=[rate_limit],  # Глобальный лимит на все endpoints
-    storage_uri="memory://",  # Используем in-memory storage (для production лучше Redis)
+    # memory:// по умолчанию; для общего лимита между воркерами: API_RATE_LIMIT_STORAGE=redis://...
+    storage_uri=os.getenv("API_RATE_LIMIT_STORAGE", "memory://"),
 )
 
 # Создаем FastAPI приложение
@@ -79,6 +128,8 @@ app = FastAPI(
     description="API для Telegram Mini App",
     version="1.0.0",
     lifespan=lifespan,
+    # orjson-backed rendering when installed (stdlib json otherwise)
+    default_response_class=FastJSONResponse,
 )
 
 # Добавляем limiter state в app
@@ -107,6 +158,11 @@ if os.getenv("ENVIRONMENT") == "development":
         allowed_origins.append(ngrok_url)
         logger.warning(f"⚠️ Development mode: Added ngrok URL to CORS: {ngrok_url}")
 
+# Response cache for polled read-only endpoints (market, stats): ETag/304,
+# pre-serialized + pre-compressed bodies in Redis. Innermost middleware, so
+# CORS and security checks (rate limits, bans) still run on cache hits
+app.add_middleware(HttpCacheMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=allowed_origins,
@@ -234,6 +290,27 @@ async def health():
     return {"status": "healthy"}
 
 
+# DB pool / statement metrics for monitoring (includes slow SQL text - API key only)
+@app.get("/health/db", dependencies=[Depends(verify_api_key)])
+async def health_db():
+    """
+    Database pool and prepared statement metrics
+
+    Headers:
+        X-API-Key: TRADING_BOT_API_KEY
+    """
+    return get_pool_stats()
+
+
+# Futures learning pipeline stage timings (no user data)
+@app.get("/health/learning", dependencies=[Depends(verify_api_key)])
+async def health_learning():
+    """
+    Learning calibration stage timings (prefetch, calibration, ev, class_stats)
+    """
+    return get_stage_timings()
+
+
 # Error handler for HTTPException (must be before generic Exception handler)
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
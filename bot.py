@@ -3,21 +3,46 @@ Syntra Trade Consultant - Main Bot Entry Point
 """
 
 import asyncio
+import multiprocessing
+import signal
 import sys
 import warnings
+from typing import Optional
 
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
-from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.fsm.storage.base import BaseStorage
 from aiogram.types import BotCommand
+from aiohttp import web
 from loguru import logger
 
-from config.config import BOT_TOKEN, validate_config
+from config.config import (
+    BOT_MODE,
+    BOT_TOKEN,
+    BOT_WORKER_CONCURRENCY,
+    BOT_WORKERS,
+    JOBS_MODE,
+    WEBHOOK_BASE_URL,
+    WEBHOOK_HOST,
+    WEBHOOK_PATH,
+    WEBHOOK_PORT,
+    WEBHOOK_SECRET,
+    validate_config,
+)
 from config.logging import setup_logging
 from config.sentry import init_sentry
 from src.database.engine import dispose_engine
 from src.cache import get_redis_manager
+from src.cache.request_limit_store import get_request_limit_store
+from src.cache.chat_history_cache import get_chat_history_cache
+from src.cache.ad_counter_store import get_ad_counter_store
+from src.services.usage_recorder import get_usage_recorder
+from src.services.market_snapshot import get_market_snapshot_service
+from src.services.service_registry import close_services
+from src.bot.fsm_storage import create_fsm_storage
+from src.bot.stream_renderer import get_edit_rate_limiter
+from src.bot.update_queue import UpdateQueue, UpdateWorker, create_webhook_app
 from src.bot.handlers import (
     start,
     help_cmd,
@@ -43,18 +68,10 @@ from src.bot.middleware.request_limit import RequestLimitMiddleware
 from src.bot.middleware.logging import LoggingMiddleware
 from src.bot.middleware.admin import AdminMiddleware
 from src.bot.middleware.language import LanguageMiddleware
-from src.services.retention_service import (
-    start_retention_service,
-    stop_retention_service,
-)
-from src.tasks.ton_scanner import start_ton_scanner
-from src.tasks.referral_scheduler import schedule_referral_tasks
-from src.tasks.broadcast_scheduler import schedule_broadcast_tasks
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from src.tasks.job_runner import JobRunner, create_job_runner
 
-# Background tasks references
-_ton_scanner_task = None
-_scheduler = None
+# Background jobs runner (JOBS_MODE=embedded)
+_job_runner: Optional[JobRunner] = None
 
 
 async def setup_bot_commands(bot: Bot) -> None:
@@ -75,15 +92,8 @@ async def setup_bot_commands(bot: Bot) -> None:
     logger.info("Bot commands menu initialized successfully")
 
 
-async def on_startup(bot: Bot, **kwargs) -> None:
-    """Actions to perform on bot startup"""
-    global _ton_scanner_task, _scheduler
-
-    logger.info("Starting Syntra Trade Consultant Bot...")
-
-    # NOTE: Database tables managed by Alembic migrations
-    # Run: alembic upgrade head
-
+async def start_process_services() -> None:
+    """Per-process services every process handling updates needs"""
     # Initialize Redis cache
     redis_mgr = get_redis_manager()
     redis_available = await redis_mgr.initialize()
@@ -92,53 +102,29 @@ async def on_startup(bot: Bot, **kwargs) -> None:
     else:
         logger.warning("Redis cache unavailable - bot will work without caching")
 
-    # Setup bot commands menu
-    await setup_bot_commands(bot)
-
-    # Start retention service
-    await start_retention_service(bot)
-    logger.info("Retention service started")
-
-    # Start TON blockchain scanner
-    _ton_scanner_task = asyncio.create_task(start_ton_scanner())
-    logger.info("TON blockchain scanner started")
-
-    # Start referral activation scheduler
-    _scheduler = AsyncIOScheduler()
-    schedule_referral_tasks(_scheduler)
-    schedule_broadcast_tasks(_scheduler, bot)
-    _scheduler.start()
-    logger.info("Referral activation scheduler started")
-    logger.info("Broadcast scheduler started")
-
-    # Get bot info
-    bot_info = await bot.get_me()
-    logger.info(f"Bot started: @{bot_info.username} (ID: {bot_info.id})")
+    # Periodic write-back of Redis limit counters to PostgreSQL
+    get_request_limit_store().start()
 
+    # Recent chat history in Redis, batched write-behind to PostgreSQL
+    get_chat_history_cache().start()
 
-async def on_shutdown(bot: Bot, **kwargs) -> None:
-    """Actions to perform on bot shutdown"""
-    global _ton_scanner_task, _scheduler
+    # Cost tracking / points awards written in batches off the request path
+    get_usage_recorder().start()
 
-    logger.info("Shutting down Syntra Trade Consultant Bot...")
+    # Buffered ad counter increments flushed to Redis in batches
+    get_ad_counter_store().start()
 
-    # Stop retention service
-    await stop_retention_service()
-    logger.info("Retention service stopped")
 
-    # Stop TON scanner
-    if _ton_scanner_task:
-        _ton_scanner_task.cancel()
-        try:
-            await _ton_scanner_task
-        except asyncio.CancelledError:
-            pass
-        logger.info("TON scanner stopped")
+async def stop_process_services() -> None:
+    """Flush per-process buffers and close Redis / database connections"""
+    # Flush request limit counters, queued chat messages, usage events and ad counters before closing Redis
+    await get_request_limit_store().stop()
+    await get_chat_history_cache().stop()
+    await get_usage_recorder().stop()
+    await get_ad_counter_store().stop()
 
-    # Stop referral scheduler
-    if _scheduler:
-        _scheduler.shutdown(wait=False)
-        logger.info("Referral scheduler stopped")
+    # Shared API clients (finishes background chat summaries first)
+    await close_services()
 
     # Close Redis connections
     redis_mgr = get_redis_manager()
@@ -149,42 +135,71 @@ async def on_shutdown(bot: Bot, **kwargs) -> None:
     await dispose_engine()
     logger.info("Database connections closed")
 
-    # Close bot session
-    await bot.session.close()
-    logger.info("Bot session closed")
 
+async def on_startup(bot: Bot, **kwargs) -> None:
+    """Actions to perform on bot startup (main process only)"""
+    global _job_runner
 
-async def main() -> None:
-    """Main bot function"""
+    logger.info("Starting Syntra Trade Consultant Bot...")
 
-    # Setup logging
-    setup_logging()
+    # NOTE: Database tables managed by Alembic migrations
+    # Run: alembic upgrade head
 
-    # Suppress aiogram ChatActionSender warning
-    warnings.filterwarnings(
-        "ignore", message="coroutine 'Event.wait' was never awaited"
-    )
+    await start_process_services()
 
-    # Initialize Sentry error monitoring
-    init_sentry()
+    # Market overview snapshot rebuilt in background, shared with the API via Redis
+    get_market_snapshot_service().start()
 
-    # Validate configuration
-    if not validate_config():
-        logger.error("Configuration validation failed. Please check your .env file.")
-        sys.exit(1)
+    # Setup bot commands menu
+    await setup_bot_commands(bot)
 
-    logger.info("Configuration validated successfully")
+    # Scheduled jobs, retention, TON scanner, forward test and learning jobs
+    # (JOBS_MODE=dedicated: they run in job_runner.py instead)
+    if JOBS_MODE == "embedded":
+        _job_runner = create_job_runner(bot)
+        await _job_runner.start()
+
+    # Get bot info
+    bot_info = await bot.get_me()
+    logger.info(f"Bot started: @{bot_info.username} (ID: {bot_info.id})")
 
-    # Initialize bot and dispatcher
-    bot = Bot(
+
+async def on_shutdown(bot: Bot, **kwargs) -> None:
+    """Actions to perform on bot shutdown"""
+    global _job_runner
+
+    logger.info("Shutting down Syntra Trade Consultant Bot...")
+
+    # Stop background jobs (hands the leader lease to a standby runner)
+    if _job_runner is not None:
+        await _job_runner.stop()
+        _job_runner = None
+
+    await get_market_snapshot_service().stop()
+    await stop_process_services()
+
+    # Close bot session
+    await bot.session.close()
+    logger.info("Bot session closed")
+
+
+def create_bot() -> Bot:
+    """Bot instance with default HTML parse mode"""
+    return Bot(
         token=BOT_TOKEN,
         default=DefaultBotProperties(
             parse_mode=ParseMode.HTML, link_preview_is_disabled=True
         ),
     )
 
-    # Create dispatcher with FSM storage
-    storage = MemoryStorage()
+
+def create_dispatcher(storage: BaseStorage) -> Dispatcher:
+    """
+    Dispatcher with all middlewares and routers
+
+    Args:
+        storage: FSM storage (Redis when shared between processes)
+    """
     dp = Dispatcher(storage=storage)
 
     # Register middleware (order matters!)
@@ -238,6 +253,11 @@ async def main() -> None:
     dp.include_router(vision.router)  # Vision handler for photos
     dp.include_router(chat.router)  # General chat handler (must be last)
 
+    return dp
+
+
+async def run_polling(bot: Bot, dp: Dispatcher) -> None:
+    """Single process long-polling Telegram"""
     # Register startup/shutdown handlers
     dp.startup.register(on_startup)
     dp.shutdown.register(on_shutdown)
@@ -257,6 +277,173 @@ async def main() -> None:
         await on_shutdown(bot)
 
 
+# How often the webhook process checks that its worker processes are alive
+WORKER_CHECK_INTERVAL = 5.0
+
+
+def _start_worker(context, index: int, workers: int) -> multiprocessing.Process:
+    """Spawn worker process `index` of `workers`"""
+    process = context.Process(
+        target=_run_worker_process, args=(index, workers), name=f"bot-worker-{index}"
+    )
+    process.start()
+    return process
+
+
+async def _supervise_workers(context, workers: list) -> None:
+    """
+    Restart worker processes that exited
+
+    Each worker alone reads its queue partitions, so a dead worker would
+    leave its users' updates piling up in Redis.
+    """
+    while True:
+        await asyncio.sleep(WORKER_CHECK_INTERVAL)
+        for index, process in enumerate(workers):
+            if process.is_alive():
+                continue
+            logger.error(f"Bot worker {index} exited (code {process.exitcode}), restarting")
+            process.join(0)
+            workers[index] = _start_worker(context, index, len(workers))
+
+
+async def run_webhook(bot: Bot, dp: Dispatcher) -> None:
+    """
+    Webhook receiver queueing updates for BOT_WORKERS worker processes
+
+    Background jobs (JOBS_MODE=embedded) run in this process only; workers
+    just handle updates.
+    """
+    await on_startup(bot)
+
+    queue = UpdateQueue()
+    local_worker = UpdateWorker(dp, bot, concurrency=BOT_WORKER_CONCURRENCY)
+    workers = []
+    local_consumer = None
+    supervisor = None
+    worker_count = queue.worker_count(BOT_WORKERS)
+
+    if worker_count > 0 and queue.redis.client is not None:
+        context = multiprocessing.get_context("spawn")
+        workers = [_start_worker(context, index, worker_count) for index in range(worker_count)]
+        supervisor = asyncio.create_task(_supervise_workers(context, workers))
+        logger.info(f"Started {worker_count} bot worker processes")
+    else:
+        # No workers (or no Redis to share a queue): handle updates here
+        local_consumer = asyncio.create_task(
+            local_worker.run(queue, list(range(queue.partitions)))
+        )
+
+    runner = web.AppRunner(create_webhook_app(queue, fallback=local_worker))
+    await runner.setup()
+    await web.TCPSite(runner, WEBHOOK_HOST, WEBHOOK_PORT).start()
+
+    await bot.set_webhook(
+        WEBHOOK_BASE_URL.rstrip("/") + WEBHOOK_PATH,
+        secret_token=WEBHOOK_SECRET,
+        allowed_updates=dp.resolve_used_update_types(),
+    )
+    logger.info(f"Webhook receiver listening on {WEBHOOK_HOST}:{WEBHOOK_PORT}{WEBHOOK_PATH}")
+
+    try:
+        await (supervisor if supervisor is not None else asyncio.Event().wait())
+    finally:
+        if supervisor is not None:
+            supervisor.cancel()
+        await runner.cleanup()
+        if local_consumer is not None:
+            local_consumer.cancel()
+        await local_worker.drain()
+        for process in workers:
+            process.terminate()
+        for process in workers:
+            await asyncio.to_thread(process.join, 30)
+        await dp.storage.close()
+        await on_shutdown(bot)
+
+
+async def worker_main(index: int, workers: int) -> None:
+    """Worker process: handle updates from this worker's queue partitions"""
+    setup_logging()
+    warnings.filterwarnings(
+        "ignore", message="coroutine 'Event.wait' was never awaited"
+    )
+    init_sentry()
+
+    bot = create_bot()
+    dp = create_dispatcher(await create_fsm_storage())
+    await start_process_services()
+
+    # The bot-wide message edit budget is shared by all workers
+    get_edit_rate_limiter().global_interval *= workers
+
+    queue = UpdateQueue()
+    worker = UpdateWorker(dp, bot, concurrency=BOT_WORKER_CONCURRENCY)
+    consumer = asyncio.create_task(worker.run(queue, queue.worker_partitions(index, workers)))
+    try:
+        await consumer
+    except asyncio.CancelledError:
+        pass
+    finally:
+        consumer.cancel()
+        await worker.drain()
+        await dp.storage.close()
+        await stop_process_services()
+        await bot.session.close()
+
+
+def _run_worker_process(index: int, workers: int) -> None:
+    """multiprocessing entry point (terminate() = SIGTERM = graceful stop)"""
+
+    async def run() -> None:
+        task = asyncio.current_task()
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, task.cancel)
+        await worker_main(index, workers)
+
+    try:
+        asyncio.run(run())
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+
+
+async def main() -> None:
+    """Main bot function"""
+
+    # Setup logging
+    setup_logging()
+
+    # Suppress aiogram ChatActionSender warning
+    warnings.filterwarnings(
+        "ignore", message="coroutine 'Event.wait' was never awaited"
+    )
+
+    # Initialize Sentry error monitoring
+    init_sentry()
+
+    # Validate configuration
+    if not validate_config():
+        logger.error("Configuration validation failed. Please check your .env file.")
+        sys.exit(1)
+
+    logger.info("Configuration validated successfully")
+
+    # Initialize bot and dispatcher (FSM state in Redis, shared by all processes)
+    bot = create_bot()
+    dp = create_dispatcher(await create_fsm_storage())
+
+    if BOT_MODE == "webhook":
+        if not WEBHOOK_BASE_URL:
+            logger.error("BOT_MODE=webhook requires WEBHOOK_BASE_URL")
+            sys.exit(1)
+        if not WEBHOOK_SECRET:
+            # Without it anyone who finds WEBHOOK_PATH could post forged updates
+            logger.error("BOT_MODE=webhook requires WEBHOOK_SECRET")
+            sys.exit(1)
+        await run_webhook(bot, dp)
+    else:
+        await run_polling(bot, dp)
+
+
 if __name__ == "__main__":
     try:
         asyncio.run(main())
@@ -110,6 +110,60 @@ class CacheTTL:
     COINMARKETCAP_GLOBAL = int(os.getenv("CACHE_TTL_COINMARKETCAP_GLOBAL", "600"))
     """Global metrics - 10 minutes"""
 
+    # ===========================
+    # Price source routing (crypto_tools.get_crypto_price)
+    # ===========================
+
+    PRICE_SOURCE_AFFINITY = int(os.getenv("CACHE_TTL_PRICE_SOURCE_AFFINITY", "86400"))
+    """Which source last answered for a coin - 24 hours (listings change rarely)"""
+
+    PRICE_SOURCE_NOT_FOUND = int(os.getenv("CACHE_TTL_PRICE_SOURCE_NOT_FOUND", "1800"))
+    """Source has no such coin - 30 minutes (new listings show up eventually)"""
+
+    PRICE_QUOTE = int(os.getenv("CACHE_TTL_PRICE_QUOTE", "60"))
+    """Resolved price result per coin (any source) - 1 minute"""
+
+    # ===========================
+    # HTTP response cache (public API, src/api/http_cache.py)
+    # ===========================
+
+    HTTP_MARKET = int(os.getenv("CACHE_TTL_HTTP_MARKET", "30"))
+    """Mini App market endpoints (overview, fear-greed, top-movers, coin) - 30 seconds"""
+
+    HTTP_MARKET_CHART = int(os.getenv("CACHE_TTL_HTTP_MARKET_CHART", "60"))
+    """Mini App price charts - 1 minute"""
+
+    HTTP_STATS = int(os.getenv("CACHE_TTL_HTTP_STATS", "60"))
+    """Stats API responses (per API key) - 1 minute"""
+
+    # ===========================
+    # Telegram webhook delivery (src/bot/update_queue.py)
+    # ===========================
+
+    BOT_UPDATE_DEDUP = int(os.getenv("CACHE_TTL_BOT_UPDATE_DEDUP", "3600"))
+    """Seen update_id markers (Telegram redelivers unacknowledged webhooks) - 1 hour"""
+
+    # ===========================
+    # Futures analysis (src/services/futures_analysis/scenario_cache.py)
+    # ===========================
+
+    FUTURES_SCENARIOS = int(os.getenv("CACHE_TTL_FUTURES_SCENARIOS", "900"))
+    """Max age of a shared per-candle scenario analysis (current price is refreshed per request) - 15 minutes"""
+
+    # ===========================
+    # Vision (src/cache/vision_analysis_cache.py)
+    # ===========================
+
+    VISION_ANALYSIS = int(os.getenv("CACHE_TTL_VISION_ANALYSIS", "900"))
+    """Chart analysis by photo file (market data in it goes stale) - 15 minutes"""
+
+    # ===========================
+    # Ads (src/cache/ad_counter_store.py)
+    # ===========================
+
+    AD_COUNTERS = int(os.getenv("CACHE_TTL_AD_COUNTERS", "7776000"))
+    """Per-user ad/engagement counters, refreshed on every write - 90 days idle"""
+
     # ===========================
     # Other APIs TTLs
     # ===========================
@@ -183,6 +237,62 @@ class CacheConfig:
     CACHE_LOG_MISSES = os.getenv("CACHE_LOG_MISSES", "true").lower() == "true"
     """Log cache misses (important for monitoring)"""
 
+    # Request limit counters
+    REQUEST_LIMITS_IN_REDIS = os.getenv("REQUEST_LIMITS_IN_REDIS", "true").lower() == "true"
+    """Keep daily request-limit counters in Redis (Postgres is used as fallback)"""
+
+    REQUEST_LIMIT_SYNC_INTERVAL = int(os.getenv("REQUEST_LIMIT_SYNC_INTERVAL", "60"))
+    """How often Redis limit counters are written back to Postgres (seconds)"""
+
+    REQUEST_LIMIT_KEY_GRACE = int(os.getenv("REQUEST_LIMIT_KEY_GRACE", "7200"))
+    """How long a day's counters outlive midnight so the last sync can run (seconds)"""
+
+    # Recent chat history ring buffer
+    CHAT_HISTORY_CACHE_ENABLED = os.getenv("CHAT_HISTORY_CACHE_ENABLED", "true").lower() == "true"
+    """Serve context building from a per-chat Redis list and persist messages write-behind"""
+
+    CHAT_HISTORY_CACHE_SIZE = int(os.getenv("CHAT_HISTORY_CACHE_SIZE", "50"))
+    """Messages kept per chat in Redis (>= largest tier chat_history_messages)"""
+
+    CHAT_HISTORY_CACHE_TTL = int(os.getenv("CHAT_HISTORY_CACHE_TTL", "259200"))
+    """Idle chat buffers expire after this many seconds (3 days)"""
+
+    CHAT_WRITE_BEHIND_INTERVAL = float(os.getenv("CHAT_WRITE_BEHIND_INTERVAL", "1.0"))
+    """Max delay before queued chat messages are written to Postgres (seconds)"""
+
+    CHAT_WRITE_BEHIND_BATCH = int(os.getenv("CHAT_WRITE_BEHIND_BATCH", "200"))
+    """Max messages per bulk INSERT"""
+
+    CHAT_WRITE_BEHIND_QUEUE_MAX = int(os.getenv("CHAT_WRITE_BEHIND_QUEUE_MAX", "10000"))
+    """Queue bound; writers wait (backpressure) when it is full"""
+
+    CHAT_WRITE_BEHIND_MAX_ATTEMPTS = int(os.getenv("CHAT_WRITE_BEHIND_MAX_ATTEMPTS", "5"))
+    """Flushes a conversation's messages are retried after a non-connection DB error before they are dropped"""
+
+    # Ad frequency counters
+    AD_COUNTERS_LOCAL_MAX = int(os.getenv("AD_COUNTERS_LOCAL_MAX", "10000"))
+    """Users kept in the per-process shadow of ad counters (LRU; source of truth without Redis)"""
+
+    AD_COUNTERS_FLUSH_INTERVAL = float(os.getenv("AD_COUNTERS_FLUSH_INTERVAL", "5.0"))
+    """Max delay before buffered counter increments (clicks, banner views) reach Redis (seconds)"""
+
+    AD_COUNTERS_FLUSH_BATCH = int(os.getenv("AD_COUNTERS_FLUSH_BATCH", "500"))
+    """Users with buffered increments that trigger an early flush"""
+
+    # HTTP response cache
+    HTTP_CACHE_ENABLED = os.getenv("HTTP_CACHE_ENABLED", "true").lower() == "true"
+    """Serve cacheable GET endpoints from pre-serialized responses in Redis"""
+
+    HTTP_CACHE_STALE_WHILE_REVALIDATE = int(os.getenv("HTTP_CACHE_STALE_WHILE_REVALIDATE", "60"))
+    """Seconds a stale response is still served while one request rebuilds it"""
+
+    HTTP_CACHE_COMPRESS_MIN_BYTES = int(os.getenv("HTTP_CACHE_COMPRESS_MIN_BYTES", "1024"))
+    """Smaller responses are stored/sent uncompressed"""
+
+    # Price lookups
+    PRICE_HEDGE_DELAY = float(os.getenv("PRICE_HEDGE_DELAY", "0.3"))
+    """Head start of the preferred price source before the others are queried in parallel (seconds)"""
+
 
 # Helper function to get TTL by data type
 def get_ttl(data_type: str) -> int:
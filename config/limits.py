@@ -269,6 +269,25 @@ def get_token_limits(tier: SubscriptionTier) -> Dict[str, int]:
     }
 
 
+def get_context_token_budget(tier: SubscriptionTier, model: str) -> int:
+    """
+    Get prompt token budget for tier + model
+
+    Args:
+        tier: Subscription tier
+        model: Model that will receive the prompt
+
+    Returns:
+        min(tier max_input_tokens, per-model budget)
+    """
+    from config.config import ModelConfig
+
+    model_budget = ModelConfig.CONTEXT_TOKEN_BUDGETS.get(
+        model, ModelConfig.DEFAULT_CONTEXT_TOKEN_BUDGET
+    )
+    return min(get_token_limits(tier)["max_input_tokens"], model_budget)
+
+
 def get_chat_history_limit(tier: SubscriptionTier) -> int:
     """
     Get chat history messages limit for a specific subscription tier
@@ -0,0 +1,75 @@
+"""
+Syntra Trade Consultant - Background Job Runner Entry Point
+
+Runs scheduled jobs (referrals, broadcasts, metrics rollup, coin registry,
+trial checks, retention, forward test, learning) and the TON scanner apart
+from the processes serving users. Used with JOBS_MODE=dedicated; start two
+instances for failover, only the Redis lease holder runs jobs.
+"""
+
+import asyncio
+import signal
+import sys
+
+from aiogram import Bot
+from aiogram.client.default import DefaultBotProperties
+from aiogram.enums import ParseMode
+from loguru import logger
+
+from config.config import BOT_TOKEN, validate_config
+from config.logging import setup_logging
+from config.sentry import init_sentry
+from src.cache import get_redis_manager
+from src.database.engine import dispose_engine
+from src.services.service_registry import close_services
+from src.services.usage_recorder import get_usage_recorder
+from src.tasks.job_runner import create_job_runner
+
+
+async def main() -> None:
+    """Run the job runner until SIGTERM / SIGINT"""
+    setup_logging()
+    init_sentry()
+
+    if not validate_config():
+        logger.error("Configuration validation failed. Please check your .env file.")
+        sys.exit(1)
+
+    redis_mgr = get_redis_manager()
+    if not await redis_mgr.initialize():
+        logger.warning("Redis unavailable - job runner will lead without a lease")
+
+    # Jobs record AI costs / points through the usage recorder
+    usage_recorder = get_usage_recorder()
+    usage_recorder.start()
+
+    # Bot is only used to send messages (broadcasts, retention, trial notices)
+    bot = Bot(
+        token=BOT_TOKEN,
+        default=DefaultBotProperties(parse_mode=ParseMode.HTML),
+    )
+    runner = create_job_runner(bot)
+
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop_event.set)
+
+    try:
+        await runner.start()
+        await stop_event.wait()
+    finally:
+        logger.info("Shutting down job runner...")
+        await runner.stop()
+        await usage_recorder.stop()
+        await close_services()
+        await redis_mgr.close()
+        await dispose_engine()
+        await bot.session.close()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except Exception as e:
+        logger.exception(f"Fatal error: {e}")
@@ -0,0 +1,115 @@
+"""
+Benchmark coin mention extraction on real chat messages
+
+Compares the compiled alias index in src.utils.coin_parser with the old
+per-alias regex loop on a corpus of user messages (taken from chat_messages
+or a text file, one message per line). Also checks both return the same coins.
+
+Usage:
+    python scripts/benchmark_coin_parser.py
+    python scripts/benchmark_coin_parser.py --limit 20000 --rounds 5
+    python scripts/benchmark_coin_parser.py --file messages.txt
+"""
+
+import argparse
+import asyncio
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from loguru import logger
+from sqlalchemy import select
+
+from src.utils.coin_parser import COIN_ID_MAPPING, extract_coin_from_text
+
+
+def legacy_extract_coin_from_text(text: str) -> List[str]:
+    """Previous implementation: one regex search per alias"""
+    if not text:
+        return []
+    text_lower = text.lower()
+    found_coins = []
+    for key, coin_id in COIN_ID_MAPPING.items():
+        pattern = r"\b" + re.escape(key) + r"\b"
+        if re.search(pattern, text_lower):
+            if coin_id not in found_coins:
+                found_coins.append(coin_id)
+    return found_coins
+
+
+async def _load_corpus_from_db(limit: int) -> List[str]:
+    """Latest user messages from chat_messages"""
+    from src.database.engine import get_session_maker
+    from src.database.models import ChatMessage
+
+    async with get_session_maker()() as session:
+        result = await session.execute(
+            select(ChatMessage.content)
+            .where(ChatMessage.role == "user")
+            .order_by(ChatMessage.id.desc())
+            .limit(limit)
+        )
+        return [row[0] for row in result if row[0]]
+
+
+def _load_corpus_from_file(path: str) -> List[str]:
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def _run(func, corpus: List[str], rounds: int) -> List[float]:
+    """Per-message latency in microseconds, averaged over the corpus per round"""
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for text in corpus:
+            func(text)
+        timings.append((time.perf_counter() - start) / len(corpus) * 1_000_000)
+    return timings
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--file", help="Text file with one message per line (instead of DB)"
+    )
+    parser.add_argument(
+        "--limit", type=int, default=10000, help="Messages to load from DB"
+    )
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.file:
+        corpus = _load_corpus_from_file(args.file)
+    else:
+        corpus = await _load_corpus_from_db(args.limit)
+    if not corpus:
+        raise RuntimeError("Empty corpus - nothing to benchmark")
+
+    logger.info(f"Corpus: {len(corpus)} messages, {len(COIN_ID_MAPPING)} aliases")
+
+    mismatches = sum(
+        set(legacy_extract_coin_from_text(text)) != set(extract_coin_from_text(text))
+        for text in corpus
+    )
+
+    print(f"\n{'implementation':<16} {'median us/msg':>14} {'min us/msg':>12}")
+    print("-" * 44)
+    for name, func in (
+        ("legacy", legacy_extract_coin_from_text),
+        ("compiled", extract_coin_from_text),
+    ):
+        timings = _run(func, corpus, args.rounds)
+        print(f"{name:<16} {statistics.median(timings):>14.2f} {min(timings):>12.2f}")
+
+    print(f"\nResult mismatches: {mismatches}/{len(corpus)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
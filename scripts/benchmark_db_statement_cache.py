@@ -0,0 +1,137 @@
+"""
+Benchmark prepared statement caching for the hottest CRUD queries
+
+Runs the same queries against engines created in different DB_CONNECTION_MODE
+settings (direct / pgbouncer / pgbouncer_prepared) and prints per-query latency
+(p50 / p95 / mean). Read-only - safe to run against production replicas.
+
+Usage:
+    python scripts/benchmark_db_statement_cache.py
+    python scripts/benchmark_db_statement_cache.py --modes direct pgbouncer --iterations 500
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from loguru import logger
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from config.config import DATABASE_URL
+from src.database.engine import CONNECTION_MODES, get_connect_args
+from src.database.models import Chat, RequestLimit, User
+from src.database.crud import get_user_by_telegram_id, get_chat_messages
+
+
+async def _pick_fixtures(session: AsyncSession) -> dict:
+    """Pick an existing user/chat so queries hit real rows"""
+    user = (await session.execute(select(User).limit(1))).scalar_one_or_none()
+    if user is None:
+        raise RuntimeError("No users in database - nothing to benchmark")
+
+    chat = (
+        await session.execute(select(Chat).where(Chat.user_id == user.id).limit(1))
+    ).scalar_one_or_none()
+
+    return {"user": user, "chat_id": chat.id if chat else None}
+
+
+def _queries(fixtures: dict) -> dict:
+    """Top CRUD calls on the chat/limit hot path"""
+    user = fixtures["user"]
+    queries = {
+        "get_user_by_telegram_id": lambda s: get_user_by_telegram_id(
+            s, user.telegram_id
+        ),
+        "limit_record_select": lambda s: s.execute(
+            select(RequestLimit).where(RequestLimit.user_id == user.id)
+        ),
+    }
+    if user.telegram_id is None:
+        queries.pop("get_user_by_telegram_id")
+    if fixtures["chat_id"] is not None:
+        queries["get_chat_messages"] = lambda s: get_chat_messages(
+            s, fixtures["chat_id"], limit=20
+        )
+    return queries
+
+
+async def benchmark_mode(mode: str, iterations: int) -> dict:
+    """Run all queries in one connection mode, return timings per query (ms)"""
+    engine = create_async_engine(
+        DATABASE_URL, pool_size=1, max_overflow=0, connect_args=get_connect_args(mode)
+    )
+    session_maker = async_sessionmaker(
+        engine, class_=AsyncSession, expire_on_commit=False
+    )
+    results = {}
+
+    try:
+        async with session_maker() as session:
+            fixtures = await _pick_fixtures(session)
+
+        # Single session = single connection, so cached statements get reused
+        async with session_maker() as session:
+            for name, query in _queries(fixtures).items():
+                await query(session)  # Warm-up (prepare)
+                timings = []
+                for _ in range(iterations):
+                    start = time.perf_counter()
+                    await query(session)
+                    timings.append((time.perf_counter() - start) * 1000)
+                await session.rollback()
+                results[name] = timings
+    finally:
+        await engine.dispose()
+
+    return results
+
+
+def _report(all_results: dict) -> None:
+    """Print latency table"""
+    print(f"\n{'query':<28} {'mode':<20} {'p50 ms':>8} {'p95 ms':>8} {'mean ms':>8}")
+    print("-" * 76)
+    query_names = sorted({q for res in all_results.values() for q in res})
+    for query_name in query_names:
+        for mode, results in all_results.items():
+            timings = results.get(query_name)
+            if not timings:
+                continue
+            p95 = (
+                statistics.quantiles(timings, n=20)[18]
+                if len(timings) >= 20
+                else max(timings)
+            )
+            print(
+                f"{query_name:<28} {mode:<20} {statistics.median(timings):>8.3f} "
+                f"{p95:>8.3f} {statistics.mean(timings):>8.3f}"
+            )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--modes", nargs="+", default=["direct", "pgbouncer"], choices=CONNECTION_MODES
+    )
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    all_results = {}
+    for mode in args.modes:
+        logger.info(
+            f"Benchmarking mode={mode} ({args.iterations} iterations per query)..."
+        )
+        all_results[mode] = await benchmark_mode(mode, args.iterations)
+
+    _report(all_results)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,126 @@
+"""
+Benchmark cold start of the API server and the bot
+
+Imports api_server / bot in fresh interpreters (what uvicorn and
+`python bot.py` do before serving) and reports wall time, which heavy
+libraries were imported on the way (with their cumulative import time from
+-X importtime) and how many registry services were created at import.
+Heavy libraries should only load on first use (see
+src/services/service_registry.py).
+
+Usage:
+    python scripts/benchmark_startup.py
+    python scripts/benchmark_startup.py --runs 10 --modules api_server
+    python scripts/benchmark_startup.py --top 15
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+HEAVY_LIBRARIES = ("aiogram", "openai", "pandas", "numpy", "ta", "tiktoken", "PIL")
+
+# Runs in the child: import time of the module and registry state after it
+_CHILD = """
+import time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+from src.services import service_registry
+print("STARTUP", elapsed, len(service_registry._instances))
+"""
+
+
+def _parse_importtime(stderr: str) -> List[Tuple[str, int]]:
+    """-X importtime output -> [(module, cumulative us)]"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        try:
+            cumulative_us = int(cumulative.strip())
+        except ValueError:
+            continue  # header
+        rows.append((name.strip(), cumulative_us))
+    return rows
+
+
+def _run_once(module: str, importtime: bool) -> Tuple[float, int, str]:
+    """Import module in a fresh interpreter -> (seconds, services created, stderr)"""
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += ["-c", _CHILD.format(module=module)]
+    # Imports must not need real credentials
+    env = {"OPENAI_API_KEY": "benchmark", "DEEPSEEK_API_KEY": "benchmark", **os.environ}
+    result = subprocess.run(
+        command, cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, check=False
+    )
+    for line in result.stdout.splitlines():
+        if line.startswith("STARTUP "):
+            _, elapsed, created = line.split()
+            return float(elapsed), int(created), result.stderr
+    raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+
+def benchmark(module: str, runs: int, top: int) -> None:
+    timings = []
+    created = 0
+    for _ in range(runs):
+        elapsed, created, _ = _run_once(module, importtime=False)
+        timings.append(elapsed)
+
+    _, _, stderr = _run_once(module, importtime=True)
+    rows = _parse_importtime(stderr)
+    first_import: Dict[str, int] = {}
+    for name, cumulative_us in rows:
+        first_import.setdefault(name, cumulative_us)
+
+    print(f"\n== {module} ({runs} runs)")
+    print(
+        f"median {statistics.median(timings):.2f}s  min {min(timings):.2f}s  max {max(timings):.2f}s"
+    )
+    print(f"registry services created at import: {created}")
+
+    print(f"\n{'library':<12} {'import s':>9}")
+    for library in HEAVY_LIBRARIES:
+        cumulative_us = first_import.get(library)
+        value = f"{cumulative_us / 1e6:.3f}" if cumulative_us is not None else "-"
+        print(f"{library:<12} {value:>9}")
+
+    if top:
+        print("\nSlowest project imports (cumulative s):")
+        project = [
+            (name, cumulative_us)
+            for name, cumulative_us in first_import.items()
+            if name.split(".")[0] in ("src", "config")
+        ]
+        for name, cumulative_us in sorted(project, key=lambda row: -row[1])[:top]:
+            print(f"  {cumulative_us / 1e6:>7.3f}  {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--modules", nargs="+", default=["api_server", "bot"])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=10,
+        help="Slowest project imports to list (0 to skip)",
+    )
+    args = parser.parse_args()
+
+    for module in args.modules:
+        benchmark(module, args.runs, args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -88,7 +88,7 @@ async def get_banner(
 
         # Get banner (will return None if shouldn't show)
         user_lang = user.language or "ru"
-        banner = ads_service.get_webapp_banner(
+        banner = await ads_service.get_webapp_banner(
             user_id=user.id,
             language=user_lang,
             last_dismissed=None,  # TODO: Store dismiss time in DB
@@ -137,7 +137,7 @@ async def track_ad_click(
     """
     try:
         ads_service = get_ads_service()
-        ads_service.track_click(user.id, request.ad_type)
+        await ads_service.track_click(user.id, request.ad_type)
 
         logger.info(
             f"Ad click tracked: user={user.id}, type={request.ad_type}, "
@@ -216,7 +216,7 @@ async def get_ad_stats(
     """
     try:
         ads_service = get_ads_service()
-        stats = ads_service.get_user_ad_stats(user.id)
+        stats = await ads_service.get_user_ad_stats(user.id)
 
         return {
             "success": True,
@@ -11,16 +11,14 @@ from datetime import datetime
 from src.database.models import User
 from src.database.engine import get_session
 from src.api.auth import get_current_user
-from src.services.binance_service import BinanceService
-from src.services.coingecko_service import CoinGeckoService
-from src.services.technical_indicators import TechnicalIndicators
+from src.services.service_registry import lazy_service
 
 # Create router
 router = APIRouter(prefix="/analytics", tags=["analytics"])
 
 # Initialize services
-binance_service = BinanceService()
-coingecko_service = CoinGeckoService()
+binance_service = lazy_service("binance")
+coingecko_service = lazy_service("coingecko")
 
 
 @router.get("/{symbol}")
@@ -88,7 +86,9 @@ async def get_symbol_analytics(
             # Extract close prices
             closes = [float(k[4]) for k in klines]
 
-            # Calculate indicators
+            # Calculate indicators (pandas/ta loaded on first use)
+            from src.services.technical_indicators import TechnicalIndicators
+
             tech_indicators = TechnicalIndicators(closes)
 
             # RSI
@@ -9,22 +9,24 @@ from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Dict, Any, AsyncGenerator
 from pydantic import BaseModel
-import json
+import asyncio
 import base64
 from loguru import logger
 
 from src.database.models import User, PointsTransactionType
 from src.database.engine import get_session
+from src.database.limit_manager import RequestType, consume_limit, refund_limit
 from src.api.auth import get_current_user
-from src.services.openai_service import OpenAIService
+from src.services.service_registry import lazy_service
 from src.services.ads_service import get_ads_service
 from src.services.posthog_service import track_limit_hit
-from src.services.points_service import PointsService
+from src.services.usage_recorder import get_usage_recorder
+from src.cache.chat_history_cache import get_chat_history_cache
 from src.utils.i18n import i18n
+from src.utils.image_pipeline import prepare_image
+from src.utils.serialization import dumps
 from src.database.crud import (
     get_chat_history,
-    check_request_limit,
-    increment_request_count,
     get_chat_message_by_id,
     delete_chat_message,
     get_previous_user_message,
@@ -37,7 +39,7 @@ from src.database.crud import (
 router = APIRouter(prefix="/chat", tags=["chat"])
 
 # Initialize OpenAI service
-openai_service = OpenAIService()
+openai_service = lazy_service("openai")
 
 
 def create_rate_limit_response(
@@ -136,14 +138,15 @@ async def chat_stream(
             chat_id = request.chat_id
             logger.debug(f"Using provided chat {chat_id} for user {user.id}")
 
-        # Check rate limit
-        can_send, current_count, limit = await check_request_limit(session, user)
+        # Check and take one request in one atomic step (refunded if generation fails)
+        request_type = RequestType.VISION if request.image else RequestType.TEXT
+        can_send, current_count, limit = await consume_limit(session, user, request_type)
         if not can_send:
             # 📊 Track limit hit
             user_tier = "free"
             if hasattr(user, 'subscription') and user.subscription:
                 user_tier = user.subscription.tier
-            track_limit_hit(user.id, user_tier, "text", current_count, limit)
+            track_limit_hit(user.id, user_tier, request_type.value, current_count, limit)
 
             raise HTTPException(
                 status_code=429,
@@ -159,6 +162,7 @@ async def chat_stream(
             """
             token_count = 0
             full_response = ""
+            generated = False
 
             # Get user's tier (with fallback to FREE) - needed for ads and model routing
             user_tier = "free"
@@ -182,15 +186,18 @@ async def chat_stream(
                             detail=f"Invalid image data: {str(e)}"
                         )
 
+                    # Resize/crop to the tile grid OpenAI bills for
+                    prepared = await asyncio.to_thread(prepare_image, image_bytes, "auto")
+
                     # Stream image analysis
                     logger.info(f"Starting image analysis stream for user {user.id}")
                     async for chunk in openai_service.stream_image_analysis(
                         session=session,
                         user_id=user.id,
-                        image_bytes=image_bytes,
+                        image_bytes=prepared.image_bytes,
                         user_language=user.language or "ru",
                         user_prompt=request.message if request.message else None,
-                        detail="auto",  # Let OpenAI decide detail level
+                        detail=prepared.detail,  # "auto" resolved by image size
                     ):
                         # Format as SSE event
                         event_data = {
@@ -198,7 +205,7 @@ async def chat_stream(
                             "content": chunk
                         }
                         token_count += len(chunk)
-                        yield f"data: {json.dumps(event_data)}\n\n"
+                        yield f"data: {dumps(event_data)}\n\n"
                 else:
                     # Stream regular text completion
                     logger.info(f"Starting text completion stream for user {user.id}")
@@ -219,7 +226,7 @@ async def chat_stream(
                         }
                         full_response += chunk
                         token_count += len(chunk)
-                        yield f"data: {json.dumps(event_data)}\n\n"
+                        yield f"data: {dumps(event_data)}\n\n"
 
                     # Auto-generate chat title if this is the first message in a new chat
                     if not request.image and full_response:
@@ -238,8 +245,7 @@ async def chat_stream(
                             logger.error(f"Failed to auto-generate chat title: {title_error}")
                             # Don't fail the stream if title generation fails
 
-                # Increment request count AFTER successful completion
-                await increment_request_count(session, user.id)
+                generated = True
 
                 # 💎 Award $SYNTRA points for AI request
                 transaction_type = (
@@ -247,7 +253,7 @@ async def chat_stream(
                     if request.image
                     else PointsTransactionType.EARN_TEXT_REQUEST
                 )
-                await PointsService.earn_points(
+                await get_usage_recorder().record_points(
                     session=session,
                     user_id=user.id,
                     transaction_type=transaction_type,
@@ -259,12 +265,12 @@ async def chat_stream(
                     },
                     transaction_id=f"chat:{user.id}:{chat_id}:{datetime.now(timezone.utc).timestamp()}",
                 )
-                logger.info(f"💎 Awarded points for {transaction_type} to user {user.id}")
+                logger.info(f"💎 Queued points award for {transaction_type} to user {user.id}")
 
                 # Check if we should add native ad to response
                 # Умная стратегия: первые 24ч и 7 сообщений — без рекламы
                 ads_service = get_ads_service()
-                should_add_ad, ad_text = ads_service.maybe_add_chat_ad(
+                should_add_ad, ad_text = await ads_service.maybe_add_chat_ad(
                     user_id=user.id,
                     user_message=request.message,
                     user_language=user.language or "ru",
@@ -278,23 +284,27 @@ async def chat_stream(
                         "type": "token",
                         "content": ad_text
                     }
-                    yield f"data: {json.dumps(ad_event)}\n\n"
+                    yield f"data: {dumps(ad_event)}\n\n"
                     logger.info(f"Native ad added to response for user {user.id}")
 
                 # Send completion event WITH chat_id (important for frontend state!)
                 logger.info(
                     f"Chat stream completed for user {user.id}: ~{token_count} characters generated, chat_id={chat_id}"
                 )
-                yield f"data: {json.dumps({'type': 'done', 'chat_id': chat_id})}\n\n"
+                yield f"data: {dumps({'type': 'done', 'chat_id': chat_id})}\n\n"
 
             except Exception as e:
+                # Give the request back if the user got no answer
+                if not generated:
+                    await refund_limit(session, user.id, request_type)
+
                 # Send error event
                 logger.error(f"Error in chat stream for user {user.id}: {str(e)}")
                 error_data = {
                     "type": "error",
                     "error": str(e)
                 }
-                yield f"data: {json.dumps(error_data)}\n\n"
+                yield f"data: {dumps(error_data)}\n\n"
 
         return StreamingResponse(
             event_generator(),
@@ -346,8 +356,8 @@ async def chat_message(
             chat_id = request.chat_id
             logger.debug(f"Using provided chat {chat_id} for user {user.id}")
 
-        # Check rate limit
-        can_send, current_count, limit = await check_request_limit(session, user)
+        # Check and take one request in one atomic step
+        can_send, current_count, limit = await consume_limit(session, user, RequestType.TEXT)
         if not can_send:
             raise HTTPException(
                 status_code=429,
@@ -361,16 +371,21 @@ async def chat_message(
 
         # Collect full response from stream
         full_response = ""
-        async for chunk in openai_service.stream_completion(
-            session=session,
-            user_id=user.id,
-            user_message=request.message,
-            user_language=user.language or "ru",
-            user_tier=user_tier,  # 🚨 Pass tier for context/memory
-            use_tools=True,
-            chat_id=chat_id,  # 🚨 Pass chat_id for multiple chats support
-        ):
-            full_response += chunk
+        try:
+            async for chunk in openai_service.stream_completion(
+                session=session,
+                user_id=user.id,
+                user_message=request.message,
+                user_language=user.language or "ru",
+                user_tier=user_tier,  # 🚨 Pass tier for context/memory
+                use_tools=True,
+                chat_id=chat_id,  # 🚨 Pass chat_id for multiple chats support
+            ):
+                full_response += chunk
+        except Exception:
+            # Give the request back - the user got no answer
+            await refund_limit(session, user.id, RequestType.TEXT)
+            raise
 
         # Auto-generate chat title if this is the first message in a new chat
         try:
@@ -389,7 +404,7 @@ async def chat_message(
             # Don't fail the request if title generation fails
 
         # 💎 Award $SYNTRA points for AI request
-        await PointsService.earn_points(
+        await get_usage_recorder().record_points(
             session=session,
             user_id=user.id,
             transaction_type=PointsTransactionType.EARN_TEXT_REQUEST,
@@ -400,11 +415,11 @@ async def chat_message(
             },
             transaction_id=f"chat:{user.id}:{chat_id}:{datetime.now(timezone.utc).timestamp()}",
         )
-        logger.info(f"💎 Awarded points for text request to user {user.id}")
+        logger.info(f"💎 Queued points award for text request to user {user.id}")
 
         return {
             "response": full_response,
-            "tokens_used": openai_service.count_tokens(full_response),
+            "tokens_used": await openai_service.count_tokens_async(full_response),
             "chat_id": chat_id,
         }
 
@@ -441,6 +456,8 @@ async def get_history(
         }
     """
     try:
+        # Messages may still be queued for write-behind
+        await get_chat_history_cache().flush_conversation(user_id=user.id)
         messages = await get_chat_history(session, user.id, limit=limit)
 
         return ChatHistoryResponse(
@@ -534,8 +551,8 @@ async def regenerate_message(
                 detail="No previous user message found. Cannot regenerate."
             )
 
-        # 4. Check rate limit
-        can_send, current_count, limit = await check_request_limit(session, user)
+        # 4. Check and take one request in one atomic step (refunded if generation fails)
+        can_send, current_count, limit = await consume_limit(session, user, RequestType.TEXT)
         if not can_send:
             raise HTTPException(
                 status_code=429,
@@ -545,6 +562,7 @@ async def regenerate_message(
         # 5. Delete the old assistant response
         deleted = await delete_chat_message(session, request.message_id, user.id)
         if not deleted:
+            await refund_limit(session, user.id, RequestType.TEXT)
             raise HTTPException(
                 status_code=500,
                 detail="Failed to delete old message"
@@ -586,22 +604,25 @@ async def regenerate_message(
                         "content": chunk
                     }
                     token_count += len(chunk)
-                    yield f"data: {json.dumps(event_data)}\n\n"
+                    yield f"data: {dumps(event_data)}\n\n"
 
                 # Send completion event
                 logger.info(
                     f"Regenerate stream completed for user {user.id}: ~{token_count} characters generated"
                 )
-                yield f"data: {json.dumps({'type': 'done'})}\n\n"
+                yield f"data: {dumps({'type': 'done'})}\n\n"
 
             except Exception as e:
+                # Give the request back - the user got no new answer
+                await refund_limit(session, user.id, RequestType.TEXT)
+
                 # Send error event
                 logger.error(f"Error in regenerate stream for user {user.id}: {str(e)}")
                 error_data = {
                     "type": "error",
                     "error": str(e)
                 }
-                yield f"data: {json.dumps(error_data)}\n\n"
+                yield f"data: {dumps(error_data)}\n\n"
 
         return StreamingResponse(
             event_generator(),
@@ -21,6 +21,7 @@ from src.database.crud import (
     get_chat_messages,
     get_or_create_default_chat,
 )
+from src.cache.chat_history_cache import get_chat_history_cache
 
 # Create router
 router = APIRouter(prefix="/chats", tags=["chats"])
@@ -280,7 +281,8 @@ async def get_chat_messages_endpoint(
             detail=f"Chat not found or access denied (chat_id: {chat_id})"
         )
 
-    # Get messages
+    # Get messages (persist ones still queued for write-behind first)
+    await get_chat_history_cache().flush_conversation(chat_id=chat_id)
     messages = await get_chat_messages(session, chat_id, limit=limit)
 
     # Convert to response format
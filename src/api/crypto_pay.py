@@ -29,7 +29,7 @@ from src.services.crypto_pay_service import (
     CryptoPayService,
     CRYPTO_PAY_ASSETS,
 )
-from src.services.telegram_stars_service import TelegramStarsService
+from src.services.service_registry import lazy_service
 from src.database.crud import get_referral_stats
 
 # Router for authenticated endpoints
@@ -39,7 +39,7 @@ router = APIRouter(prefix="/cryptopay", tags=["CryptoPay"])
 webhook_router = APIRouter(tags=["CryptoPay Webhook"])
 
 # Stars service for pricing
-stars_service = TelegramStarsService()
+stars_service = lazy_service("telegram_stars")
 
 
 # ===========================
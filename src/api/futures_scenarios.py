@@ -34,9 +34,10 @@ from datetime import datetime
 
 from loguru import logger
 
-from src.services.futures_analysis_service import futures_analysis_service
+from src.services.service_registry import lazy_service
 from src.api.api_key_auth import verify_api_key
 
+futures_analysis_service = lazy_service("futures_analysis")
 
 router = APIRouter()
 
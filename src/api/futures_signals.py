@@ -38,22 +38,24 @@ from src.database.engine import get_session
 from src.database.models import User, SubscriptionTier
 from src.database.limit_manager import (
     RequestType,
-    check_limit,
-    increment_limit,
+    consume_limit,
+    refund_limit,
     get_usage_stats,
 )
 from src.services.futures_request_router import (
     futures_request_router,
     FuturesRequestValidation,
 )
-from src.services.futures_analysis_service import futures_analysis_service
+from src.services.service_registry import lazy_service
 from src.database.crud import (
     create_chat,
     get_chat_by_id,
     add_chat_message_to_chat,
     update_chat_title,
 )
+from src.cache.chat_history_cache import get_chat_history_cache
 
+futures_analysis_service = lazy_service("futures_analysis")
 
 router = APIRouter(prefix="/futures-signals", tags=["Futures Signals"])
 
@@ -210,7 +212,11 @@ async def check_user_access(
     session: AsyncSession
 ) -> tuple[bool, int, int, Optional[str]]:
     """
-    Check if user has access to futures signals.
+    Check if user has access to futures signals and take one request.
+
+    The request is taken atomically (two concurrent calls can't both get
+    the last one) and must be given back with refund_limit() if no signal
+    is generated.
 
     Returns:
         (has_access, current_count, limit, error_message)
@@ -225,8 +231,8 @@ async def check_user_access(
     if tier not in (SubscriptionTier.PREMIUM, SubscriptionTier.VIP):
         return False, 0, 0, f"Futures signals available for Premium/VIP only (current: {tier.value})"
 
-    # Check limit
-    has_remaining, current_count, limit = await check_limit(
+    # Check limit and take one request
+    has_remaining, current_count, limit = await consume_limit(
         session, user, RequestType.FUTURES
     )
 
@@ -294,6 +300,25 @@ async def analyze_futures_signal(
                 }
             )
 
+    try:
+        response = await _generate_signal(request, user, session, current_count, limit)
+    except BaseException:
+        await refund_limit(session, user.id, RequestType.FUTURES)
+        raise
+    if not isinstance(response, SignalGeneratedResponse):
+        # Not a signal request / clarification needed - nothing was generated
+        await refund_limit(session, user.id, RequestType.FUTURES)
+    return response
+
+
+async def _generate_signal(
+    request: FuturesSignalRequest,
+    user: User,
+    session: AsyncSession,
+    current_count: int,
+    limit: int,
+):
+    """Steps 2-9 of /analyze (the request is already taken from the limit)"""
     # 2. Validate request via GPT-4o-mini router
     language = request.language or "ru"
 
@@ -372,8 +397,7 @@ async def analyze_futures_signal(
                 }
             )
 
-        # 7. Increment limit ONLY after successful validation
-        await increment_limit(session, user.id, RequestType.FUTURES)
+        # 7. Keep the request taken in step 1 (refunded on every other outcome)
         limits_remaining = limit - current_count - 1
 
         logger.info(
@@ -438,6 +462,7 @@ async def analyze_futures_signal(
             )
 
             await session.commit()
+            await get_chat_history_cache().invalidate(chat_id=chat_id)
             logger.info(f"[Futures Signals] Saved messages to chat {chat_id}")
 
         except Exception as e:
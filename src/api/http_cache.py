@@ -0,0 +1,247 @@
+# coding: utf-8
+"""
+HTTP response cache for read-only API endpoints
+
+Mini App clients poll the market endpoints and get the same JSON within a
+TTL window, and stats dashboards poll /api/stats/*. Instead of rebuilding
+and re-serializing per request, HttpCacheMiddleware keeps the serialized
+body in Redis (plus gzip/brotli variants for larger bodies) and answers:
+
+- 304 Not Modified when If-None-Match carries the current strong ETag;
+- cached bytes (pre-compressed if the client accepts it) while fresh;
+- stale bytes for up to HTTP_CACHE_STALE_WHILE_REVALIDATE seconds while
+  a single request (Redis NX claim) rebuilds the entry.
+
+Responses carry matching Cache-Control (max-age + stale-while-revalidate)
+so browsers and proxies can skip the request altogether. Only 200 JSON
+responses are stored. Rules that depend on auth (stats API key) include a
+hash of the header in the key, so unauthenticated requests still reach
+the route and get its 401. Without Redis, ETags/304 still work on freshly
+built responses.
+"""
+
+import base64
+import gzip
+import hashlib
+import time
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from fastapi import Request, Response
+from loguru import logger
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from config.cache_config import CacheConfig, CacheTTL
+from src.cache import CacheKeyBuilder, get_redis_manager
+
+# Brotli is optional (gzip only if not installed)
+try:
+    import brotli
+
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+
+class HttpCacheRule(NamedTuple):
+    """Cacheable endpoint (exact path or path prefix)"""
+
+    path: str
+    ttl: int
+    prefix: bool = False
+    private: bool = False
+    vary_headers: Tuple[str, ...] = ()
+
+
+HTTP_CACHE_RULES: Tuple[HttpCacheRule, ...] = (
+    HttpCacheRule("/api/market/overview", CacheTTL.HTTP_MARKET),
+    HttpCacheRule("/api/market/fear-greed", CacheTTL.HTTP_MARKET),
+    HttpCacheRule("/api/market/top-movers", CacheTTL.HTTP_MARKET),
+    HttpCacheRule("/api/market/coin/", CacheTTL.HTTP_MARKET, prefix=True),
+    HttpCacheRule("/api/market/chart/", CacheTTL.HTTP_MARKET_CHART, prefix=True),
+    HttpCacheRule(
+        "/api/stats/",
+        CacheTTL.HTTP_STATS,
+        prefix=True,
+        private=True,
+        vary_headers=("x-api-key",),
+    ),
+)
+
+# Seconds one request may spend rebuilding a stale entry before another may try
+_REVALIDATE_CLAIM_SECONDS = 15
+
+
+class CachedResponse(NamedTuple):
+    """Serialized response with its pre-compressed variants"""
+
+    etag: str
+    created: float
+    content_type: str
+    body: bytes
+    encoded: Dict[str, bytes]  # content-encoding -> compressed body
+
+    @classmethod
+    def build(cls, body: bytes, content_type: str) -> "CachedResponse":
+        encoded = {}
+        if len(body) >= CacheConfig.HTTP_CACHE_COMPRESS_MIN_BYTES:
+            encoded["gzip"] = gzip.compress(body, compresslevel=6)
+            if BROTLI_AVAILABLE:
+                encoded["br"] = brotli.compress(body, quality=5)
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        return cls(etag, time.time(), content_type, body, encoded)
+
+    def to_redis(self) -> Dict[str, str]:
+        mapping = {
+            "etag": self.etag,
+            "created": repr(self.created),
+            "content_type": self.content_type,
+            "body": self.body.decode("utf-8"),
+        }
+        for encoding, data in self.encoded.items():
+            mapping[encoding] = base64.b64encode(data).decode("ascii")
+        return mapping
+
+    @classmethod
+    def from_redis(cls, mapping: Dict[str, str]) -> Optional["CachedResponse"]:
+        if not mapping or "etag" not in mapping:
+            return None
+        encoded = {
+            encoding: base64.b64decode(mapping[encoding])
+            for encoding in ("gzip", "br")
+            if encoding in mapping
+        }
+        return cls(
+            mapping["etag"],
+            float(mapping["created"]),
+            mapping["content_type"],
+            mapping["body"].encode("utf-8"),
+            encoded,
+        )
+
+
+def match_rule(path: str) -> Optional[HttpCacheRule]:
+    """Cache rule for a request path, if any"""
+    for rule in HTTP_CACHE_RULES:
+        if path == rule.path or (rule.prefix and path.startswith(rule.path)):
+            return rule
+    return None
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def _pick_encoding(accept_encoding: str, entry: CachedResponse) -> Optional[str]:
+    accepted = {
+        part.split(";")[0].strip().lower() for part in accept_encoding.split(",")
+    }
+    for encoding in ("br", "gzip"):
+        if encoding in accepted and encoding in entry.encoded:
+            return encoding
+    return None
+
+
+class HttpCacheMiddleware(BaseHTTPMiddleware):
+    """
+    Serve cacheable GET endpoints from Redis with ETag/304 and compression
+    """
+
+    def _cache_key(self, rule: HttpCacheRule, request: Request) -> str:
+        params = {
+            "path": request.url.path,
+            "query": (
+                "&".join(sorted(request.url.query.split("&")))
+                if request.url.query
+                else ""
+            ),
+        }
+        for header in rule.vary_headers:
+            value = request.headers.get(header, "")
+            params[header] = hashlib.sha256(value.encode()).hexdigest()[:16]
+        return CacheKeyBuilder.build_hashed("http_cache", "response", params)
+
+    def _respond(
+        self,
+        request: Request,
+        rule: HttpCacheRule,
+        entry: CachedResponse,
+        cache_status: str,
+    ) -> Response:
+        age = max(0, int(time.time() - entry.created))
+        headers = {
+            "ETag": entry.etag,
+            "Cache-Control": (
+                f"{'private' if rule.private else 'public'}, max-age={max(0, rule.ttl - age)}, "
+                f"stale-while-revalidate={CacheConfig.HTTP_CACHE_STALE_WHILE_REVALIDATE}"
+            ),
+            "Vary": ", ".join(
+                ("Accept-Encoding",) + tuple(h.title() for h in rule.vary_headers)
+            ),
+            "Age": str(age),
+            "X-Cache": cache_status,
+        }
+
+        if _etag_matches(request.headers.get("if-none-match"), entry.etag):
+            return Response(status_code=304, headers=headers)
+
+        encoding = _pick_encoding(request.headers.get("accept-encoding", ""), entry)
+        if encoding:
+            headers["Content-Encoding"] = encoding
+            return Response(
+                entry.encoded[encoding], media_type=entry.content_type, headers=headers
+            )
+        return Response(entry.body, media_type=entry.content_type, headers=headers)
+
+    async def dispatch(self, request: Request, call_next):
+        if not CacheConfig.HTTP_CACHE_ENABLED or request.method not in ("GET", "HEAD"):
+            return await call_next(request)
+
+        rule = match_rule(request.url.path)
+        if rule is None:
+            return await call_next(request)
+
+        client = get_redis_manager().client
+        key = self._cache_key(rule, request)
+
+        if client is not None:
+            try:
+                entry = CachedResponse.from_redis(await client.hgetall(key))
+                if entry is not None:
+                    if time.time() - entry.created < rule.ttl:
+                        return self._respond(request, rule, entry, "HIT")
+                    # Stale: one request rebuilds, the rest get the stale copy
+                    claimed = await client.set(
+                        f"{key}:revalidate", "1", nx=True, ex=_REVALIDATE_CLAIM_SECONDS
+                    )
+                    if not claimed:
+                        return self._respond(request, rule, entry, "STALE")
+            except Exception as e:
+                logger.warning(f"HTTP cache read failed for {request.url.path}: {e}")
+
+        response = await call_next(request)
+        content_type = response.headers.get("content-type", "")
+        if response.status_code != 200 or not content_type.startswith(
+            "application/json"
+        ):
+            return response
+
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        entry = CachedResponse.build(body, content_type)
+
+        if client is not None:
+            try:
+                async with client.pipeline(transaction=True) as pipe:
+                    pipe.delete(key)
+                    pipe.hset(key, mapping=entry.to_redis())
+                    pipe.expire(
+                        key, rule.ttl + CacheConfig.HTTP_CACHE_STALE_WHILE_REVALIDATE
+                    )
+                    pipe.delete(f"{key}:revalidate")
+                    await pipe.execute()
+            except Exception as e:
+                logger.warning(f"HTTP cache write failed for {request.url.path}: {e}")
+
+        return self._respond(request, rule, entry, "MISS")
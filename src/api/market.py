@@ -11,8 +11,8 @@ from datetime import datetime
 from src.database.models import User
 from src.database.engine import get_session
 from src.api.auth import get_current_user
-from src.services.fear_greed_service import FearGreedService
-from src.services.coingecko_service import CoinGeckoService
+from src.services.service_registry import lazy_service
+from src.services.market_snapshot import get_market_snapshot_service
 from src.database.crud import (
     get_user_watchlist,
     add_to_watchlist as add_to_watchlist_db,
@@ -23,8 +23,8 @@ from src.database.crud import (
 router = APIRouter(prefix="/market", tags=["market"])
 
 # Initialize services
-fear_greed_service = FearGreedService()
-coingecko_service = CoinGeckoService()
+fear_greed_service = lazy_service("fear_greed")
+coingecko_service = lazy_service("coingecko")
 
 
 @router.get("/overview")
@@ -32,7 +32,7 @@ async def get_market_overview() -> Dict[str, Any]:
     """
     Get comprehensive market overview (public endpoint)
 
-    Combines Fear & Greed Index with global market data
+    Combines Fear & Greed Index with global market data (from the shared market snapshot)
 
     Returns:
         {
@@ -53,9 +53,14 @@ async def get_market_overview() -> Dict[str, Any]:
         }
     """
     try:
-        # Fetch Fear & Greed in parallel with Global Data
-        fear_greed_data = await fear_greed_service.get_current()
-        global_data = await coingecko_service.get_global_market_data()
+        # Shared market snapshot (refreshed in background), direct fetch if unavailable
+        snapshot = await get_market_snapshot_service().get_snapshot()
+        if snapshot:
+            fear_greed_data = snapshot.get("fear_greed")
+            global_data = snapshot.get("global")
+        else:
+            fear_greed_data = await fear_greed_service.get_current()
+            global_data = await coingecko_service.get_global_market_data()
 
         if not fear_greed_data or not global_data:
             # Return partial data if one service fails
@@ -69,7 +74,7 @@ async def get_market_overview() -> Dict[str, Any]:
                 "emoji": fear_greed_data.get("emoji", "😐") if fear_greed_data else "😐",
             },
             "global": {},
-            "updated_at": datetime.utcnow().isoformat() + "Z"
+            "updated_at": snapshot["generated_at"] if snapshot else datetime.utcnow().isoformat() + "Z"
         }
 
         # Parse global market data
@@ -19,7 +19,7 @@ from src.database.models import User, SubscriptionTier
 from src.database.engine import get_session
 from src.api.auth import get_current_user
 from src.database.crud import get_referral_stats
-from src.services.telegram_stars_service import TelegramStarsService
+from src.services.service_registry import lazy_service
 from src.services.ton_payment_service import get_ton_payment_service
 from src.services.nowpayments_service import get_nowpayments_service
 from src.services.posthog_service import track_payment_started
@@ -32,7 +32,7 @@ from loguru import logger
 router = APIRouter(prefix="/payment", tags=["payment"])
 
 # Initialize payment services
-stars_service = TelegramStarsService()
+stars_service = lazy_service("telegram_stars")
 ton_service = get_ton_payment_service(is_testnet=False)  # Production mainnet
 nowpayments_service = get_nowpayments_service()
 
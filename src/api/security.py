@@ -12,17 +12,22 @@ Provides security middleware, input validation, and protection against common at
 
 import os
 import re
+import time
 import hashlib
 import ipaddress
 from datetime import datetime, timedelta, UTC
 from typing import Optional, Dict, Set, Tuple
-from collections import defaultdict
+from collections import OrderedDict
 import asyncio
 
 from fastapi import Request, HTTPException
+from redis.exceptions import RedisError
 from starlette.middleware.base import BaseHTTPMiddleware
 from loguru import logger
 
+from src.cache.cache_keys import CacheKeyBuilder
+from src.cache.redis_manager import RedisManager, get_redis_manager
+
 
 # =============================================================================
 # CONFIGURATION
@@ -107,48 +112,146 @@ SUSPICIOUS_PATTERNS = [
 COMPILED_PATTERNS = [re.compile(p, re.IGNORECASE) for p in SUSPICIOUS_PATTERNS]
 
 
+# Лимиты по группам роутов: group -> (path prefixes, per minute, per hour)
+# Переопределяются через env: RATE_LIMIT_GROUPS="auth=10/100,chat=30/600"
+# Лимит 0 (или меньше) отключает это окно для группы
+ROUTE_GROUP_LIMITS: Dict[str, Tuple[Tuple[str, ...], int, int]] = {
+    "auth": (("/api/auth",), 20, 200),
+    "chat": (("/api/chat",), MAX_REQUESTS_PER_MINUTE, MAX_REQUESTS_PER_HOUR),
+    "webhooks": (("/api/webhooks", "/api/cryptopay/webhook"), 300, 10000),
+    "default": (("",), MAX_REQUESTS_PER_MINUTE, MAX_REQUESTS_PER_HOUR),
+}
+
+# Максимум IP, которые in-memory storage держит одновременно (защита памяти при флуде)
+MAX_TRACKED_IPS = int(os.getenv("SECURITY_MAX_TRACKED_IPS", "100000"))
+
+RATE_WINDOWS = (("minute", 60.0), ("hour", 3600.0))
+
+
+def _load_route_group_limits() -> Dict[str, Tuple[Tuple[str, ...], int, int]]:
+    """Apply RATE_LIMIT_GROUPS env overrides (group=per_minute/per_hour)"""
+    limits = dict(ROUTE_GROUP_LIMITS)
+    raw = os.getenv("RATE_LIMIT_GROUPS", "")
+    for item in filter(None, (part.strip() for part in raw.split(","))):
+        try:
+            group, values = item.split("=")
+            per_minute, per_hour = (int(v) for v in values.split("/"))
+        except ValueError:
+            logger.warning(f"Invalid RATE_LIMIT_GROUPS entry: {item!r}")
+            continue
+        prefixes = limits.get(group, ((f"/api/{group}",), 0, 0))[0]
+        limits[group] = (prefixes, per_minute, per_hour)
+    return limits
+
+
+ROUTE_GROUP_LIMITS = _load_route_group_limits()
+
+
+def get_route_group(path: str) -> Tuple[str, int, int]:
+    """
+    Resolve route group for path.
+    Returns (group, per_minute, per_hour); longest matching prefix wins.
+    """
+    best = ("default", MAX_REQUESTS_PER_MINUTE, MAX_REQUESTS_PER_HOUR)
+    best_len = -1
+    for group, (prefixes, per_minute, per_hour) in ROUTE_GROUP_LIMITS.items():
+        for prefix in prefixes:
+            if path.startswith(prefix) and len(prefix) > best_len:
+                best = (group, per_minute, per_hour)
+                best_len = len(prefix)
+    return best
+
+
+def gcra_update(
+    tat: Optional[float], now: float, limit: int, period: float
+) -> Tuple[bool, float, float]:
+    """
+    GCRA (Generic Cell Rate Algorithm) step - O(1) state per key.
+
+    Allows bursts up to `limit` requests, then one request per period/limit.
+    A limit <= 0 means the window is disabled (always allowed).
+
+    Args:
+        tat: Stored theoretical arrival time (None if key is new)
+        now: Current time (seconds)
+        limit: Requests per period
+        period: Period length (seconds)
+
+    Returns:
+        (allowed, new_tat, retry_after_seconds)
+    """
+    if limit <= 0:
+        return True, max(tat or now, now), 0.0
+    interval = period / limit
+    tat = max(tat or now, now)
+    new_tat = tat + interval
+    allow_at = new_tat - period
+    if now < allow_at:
+        return False, tat, allow_at - now
+    return True, new_tat, 0.0
+
+
 # =============================================================================
-# IN-MEMORY STORAGE (для production использовать Redis)
+# IN-MEMORY STORAGE (single worker / tests; Redis storage below for production)
 # =============================================================================
 
 class SecurityStorage:
     """
     In-memory storage for rate limiting and IP tracking.
-    For production, replace with Redis for distributed systems.
+
+    Keeps one GCRA timestamp per (IP, group, window), so memory is O(1) per key
+    and bounded by MAX_TRACKED_IPS (least recently seen keys are evicted).
+    Limits are per process - RedisSecurityStorage shares them across workers.
     """
 
-    def __init__(self):
-        self.request_counts: Dict[str, list] = defaultdict(list)  # IP -> [timestamps]
-        self.suspicious_counts: Dict[str, int] = defaultdict(int)  # IP -> count
+    def __init__(self, max_keys: int = MAX_TRACKED_IPS):
+        self.max_keys = max_keys
+        self.rate_state: "OrderedDict[str, float]" = OrderedDict()  # key -> TAT
+        self.suspicious_counts: "OrderedDict[str, int]" = OrderedDict()  # IP -> count
         self.banned_ips: Dict[str, datetime] = {}  # IP -> ban_until
         self.lock = asyncio.Lock()
 
-    async def add_request(self, ip: str) -> Tuple[int, int]:
-        """Add request and return (requests_last_minute, requests_last_hour)"""
-        now = datetime.now(UTC)
+    def _remember(self, store: OrderedDict, key: str, value) -> None:
+        """Insert/update key keeping LRU order and size bound"""
+        store[key] = value
+        store.move_to_end(key)
+        while len(store) > self.max_keys:
+            store.popitem(last=False)
+
+    async def check_rate_limit(
+        self, ip: str, group: str, per_minute: int, per_hour: int
+    ) -> Tuple[bool, Optional[str], float]:
+        """
+        Register request and check limits.
+        Returns (allowed, exceeded_window, retry_after_seconds).
+        """
+        now = time.time()
+        limits = dict(zip((w for w, _ in RATE_WINDOWS), (per_minute, per_hour)))
 
         async with self.lock:
-            # Удаляем старые записи
-            self.request_counts[ip] = [
-                ts for ts in self.request_counts[ip]
-                if now - ts < timedelta(hours=1)
-            ]
-
-            # Добавляем новый запрос
-            self.request_counts[ip].append(now)
-
-            # Считаем запросы
-            minute_ago = now - timedelta(minutes=1)
-            requests_minute = sum(1 for ts in self.request_counts[ip] if ts > minute_ago)
-            requests_hour = len(self.request_counts[ip])
-
-            return requests_minute, requests_hour
+            new_tats = {}
+            for window, period in RATE_WINDOWS:
+                if limits[window] <= 0:
+                    continue  # Window disabled for this group
+                key = f"{group}:{window}:{ip}"
+                allowed, new_tat, retry_after = gcra_update(
+                    self.rate_state.get(key), now, limits[window], period
+                )
+                if not allowed:
+                    return False, window, retry_after
+                new_tats[key] = new_tat
+
+            for key, new_tat in new_tats.items():
+                self._remember(self.rate_state, key, new_tat)
+
+            return True, None, 0.0
 
     async def add_suspicious_action(self, ip: str) -> int:
         """Add suspicious action and return total count"""
         async with self.lock:
-            self.suspicious_counts[ip] += 1
-            return self.suspicious_counts[ip]
+            count = self.suspicious_counts.get(ip, 0) + 1
+            self._remember(self.suspicious_counts, ip, count)
+            return count
 
     async def ban_ip(self, ip: str, duration_seconds: int = BAN_DURATION_SECONDS):
         """Ban IP for specified duration"""
@@ -165,36 +268,218 @@ class SecurityStorage:
             if datetime.now(UTC) > self.banned_ips[ip]:
                 # Бан истёк
                 del self.banned_ips[ip]
-                self.suspicious_counts[ip] = 0  # Сбрасываем счётчик
+                self.suspicious_counts.pop(ip, None)  # Сбрасываем счётчик
                 return False
 
             return True
 
+    async def unban_ip(self, ip: str):
+        """Remove IP from ban list"""
+        async with self.lock:
+            self.banned_ips.pop(ip, None)
+            self.suspicious_counts.pop(ip, None)
+
+    async def get_stats(self) -> Dict:
+        """Get storage statistics"""
+        async with self.lock:
+            return {
+                "backend": "memory",
+                "tracked_keys": len(self.rate_state),
+                "banned_ips": len(self.banned_ips),
+                "banned_list": list(self.banned_ips.keys()),
+                "suspicious_ips": [
+                    {"ip": ip, "count": count}
+                    for ip, count in self.suspicious_counts.items()
+                    if count > 0
+                ],
+            }
+
     async def cleanup(self):
         """Периодическая очистка старых данных"""
         async with self.lock:
-            now = datetime.now(UTC)
-            hour_ago = now - timedelta(hours=1)
-
-            # Очищаем старые запросы
-            for ip in list(self.request_counts.keys()):
-                self.request_counts[ip] = [
-                    ts for ts in self.request_counts[ip]
-                    if ts > hour_ago
-                ]
-                if not self.request_counts[ip]:
-                    del self.request_counts[ip]
+            now = time.time()
+
+            # GCRA ключ не нужен, когда TAT уже в прошлом (лимит полностью восстановлен)
+            for key in [k for k, tat in self.rate_state.items() if tat <= now]:
+                del self.rate_state[key]
 
             # Очищаем истёкшие баны
+            now_dt = datetime.now(UTC)
             for ip in list(self.banned_ips.keys()):
-                if now > self.banned_ips[ip]:
+                if now_dt > self.banned_ips[ip]:
                     del self.banned_ips[ip]
-                    if ip in self.suspicious_counts:
-                        del self.suspicious_counts[ip]
+                    self.suspicious_counts.pop(ip, None)
 
 
-# Глобальное хранилище
+# =============================================================================
+# REDIS STORAGE (shared across uvicorn workers)
+# =============================================================================
+
+# GCRA over several windows in one round trip; state is committed only if
+# every window allows the request.
+#   KEYS[i] = TAT key per window
+#   ARGV[1] = now (ms), ARGV[2i], ARGV[2i+1] = limit, period (ms) for KEYS[i]
+# Returns {allowed, denied_window_index, retry_after_ms}
+_GCRA_SCRIPT = """
+local now = tonumber(ARGV[1])
+local new_tats = {}
+for i = 1, #KEYS do
+    local limit = tonumber(ARGV[i * 2])
+    local period = tonumber(ARGV[i * 2 + 1])
+    local tat = tonumber(redis.call('GET', KEYS[i]) or now)
+    if tat < now then tat = now end
+    local new_tat = tat + period / limit
+    local allow_at = new_tat - period
+    if now < allow_at then
+        return {0, i, math.ceil(allow_at - now)}
+    end
+    new_tats[i] = new_tat
+end
+for i = 1, #KEYS do
+    redis.call('SET', KEYS[i], string.format('%.0f', new_tats[i]), 'PX', math.ceil(new_tats[i] - now))
+end
+return {1, 0, 0}
+"""
+
+
+class RedisSecurityStorage:
+    """
+    Redis-backed storage: GCRA limits and bans are shared by all workers.
+
+    Every key has a TTL, so Redis memory is bounded by active IPs only.
+    """
+
+    def __init__(self, redis_manager: Optional[RedisManager] = None):
+        self._redis_manager = redis_manager
+        self._script = None
+        self._script_client = None
+
+    @property
+    def redis(self) -> RedisManager:
+        if self._redis_manager is None:
+            self._redis_manager = get_redis_manager()
+        return self._redis_manager
+
+    def is_available(self) -> bool:
+        return self.redis.client is not None
+
+    def _client(self):
+        client = self.redis.client
+        if client is None:
+            raise RedisError("Redis is not available")
+        if client is not self._script_client:
+            self._script = client.register_script(_GCRA_SCRIPT)
+            self._script_client = client
+        return client
+
+    @staticmethod
+    def _key(kind: str, *parts: str) -> str:
+        return CacheKeyBuilder.build("security", kind, list(parts))
+
+    async def check_rate_limit(
+        self, ip: str, group: str, per_minute: int, per_hour: int
+    ) -> Tuple[bool, Optional[str], float]:
+        """
+        Register request and check limits.
+        Returns (allowed, exceeded_window, retry_after_seconds).
+        """
+        self._client()
+        now_ms = int(time.time() * 1000)
+        windows, keys, args = [], [], [now_ms]
+        for (window, period), limit in zip(RATE_WINDOWS, (per_minute, per_hour)):
+            if limit <= 0:
+                continue  # Window disabled for this group
+            windows.append(window)
+            keys.append(self._key("rate", group, window, ip))
+            args.extend([limit, int(period * 1000)])
+
+        if not keys:
+            return True, None, 0.0
+
+        allowed, window_idx, retry_ms = await self._script(keys=keys, args=args)
+        if int(allowed) == 1:
+            return True, None, 0.0
+        return False, windows[int(window_idx) - 1], int(retry_ms) / 1000
+
+    async def add_suspicious_action(self, ip: str) -> int:
+        """Add suspicious action and return total count (decays after ban duration)"""
+        client = self._client()
+        key = self._key("suspicious", ip)
+        pipe = client.pipeline(transaction=True)
+        pipe.incr(key)
+        pipe.expire(key, BAN_DURATION_SECONDS)
+        count, _ = await pipe.execute()
+        return int(count)
+
+    async def ban_ip(self, ip: str, duration_seconds: int = BAN_DURATION_SECONDS):
+        """Ban IP for specified duration (visible to all workers)"""
+        client = self._client()
+        pipe = client.pipeline(transaction=True)
+        pipe.set(self._key("ban", ip), "1", ex=duration_seconds)
+        pipe.delete(self._key("suspicious", ip))
+        await pipe.execute()
+        logger.warning(f"IP {ip} banned for {duration_seconds} seconds")
+
+    async def is_banned(self, ip: str) -> bool:
+        """Check if IP is banned"""
+        client = self._client()
+        return await client.exists(self._key("ban", ip)) > 0
+
+    async def unban_ip(self, ip: str):
+        """Remove IP from ban list"""
+        client = self._client()
+        await client.delete(self._key("ban", ip), self._key("suspicious", ip))
+
+    async def get_stats(self) -> Dict:
+        """Get storage statistics (SCAN - admin use only)"""
+        client = self._client()
+        ban_prefix = self._key("ban", "")
+        banned = [
+            key[len(ban_prefix):]
+            async for key in client.scan_iter(match=f"{ban_prefix}*")
+        ]
+        suspicious_prefix = self._key("suspicious", "")
+        suspicious = []
+        async for key in client.scan_iter(match=f"{suspicious_prefix}*"):
+            count = await client.get(key)
+            if count:
+                suspicious.append({"ip": key[len(suspicious_prefix):], "count": int(count)})
+        return {
+            "backend": "redis",
+            "banned_ips": len(banned),
+            "banned_list": banned,
+            "suspicious_ips": suspicious,
+        }
+
+    async def cleanup(self):
+        """No-op: Redis keys expire on their own"""
+
+
+# Глобальные хранилища
 security_storage = SecurityStorage()
+redis_security_storage = RedisSecurityStorage()
+
+
+def get_security_storage():
+    """Redis storage when available (shared across workers), in-memory otherwise"""
+    if redis_security_storage.is_available():
+        return redis_security_storage
+    return security_storage
+
+
+async def _storage_call(method: str, *args):
+    """
+    Call storage method, falling back to in-memory storage on Redis errors
+    (security checks must not take the API down with Redis).
+    """
+    storage = get_security_storage()
+    try:
+        return await getattr(storage, method)(*args)
+    except RedisError as e:
+        if storage is security_storage:
+            raise
+        logger.warning(f"Redis security storage error ({method}): {e} - using in-memory")
+        return await getattr(security_storage, method)(*args)
 
 
 # =============================================================================
@@ -306,7 +591,7 @@ class SecurityMiddleware(BaseHTTPMiddleware):
             return await call_next(request)
 
         # Проверяем бан
-        if await security_storage.is_banned(client_ip):
+        if await _storage_call("is_banned", client_ip):
             logger.warning(f"Blocked banned IP: {client_ip}")
             raise HTTPException(
                 status_code=403,
@@ -320,38 +605,44 @@ class SecurityMiddleware(BaseHTTPMiddleware):
                 f"Blocked suspicious User-Agent from {client_ip}: "
                 f"{sanitize_log_content(user_agent)}"
             )
-            await security_storage.add_suspicious_action(client_ip)
+            await _storage_call("add_suspicious_action", client_ip)
             raise HTTPException(
                 status_code=403,
                 detail="Access denied."
             )
 
-        # Rate limiting
-        requests_minute, requests_hour = await security_storage.add_request(client_ip)
+        # Rate limiting (GCRA, per route group)
+        group, per_minute, per_hour = get_route_group(request.url.path)
+        allowed, window, retry_after = await _storage_call(
+            "check_rate_limit", client_ip, group, per_minute, per_hour
+        )
+        retry_headers = {"Retry-After": str(max(1, int(retry_after + 0.999)))}
 
-        if requests_minute > MAX_REQUESTS_PER_MINUTE:
+        if not allowed and window == "minute":
             logger.warning(
-                f"Rate limit exceeded (minute) for {client_ip}: "
-                f"{requests_minute} requests"
+                f"Rate limit exceeded (minute, group={group}) for {client_ip}: "
+                f"limit {per_minute}/min"
             )
-            suspicious_count = await security_storage.add_suspicious_action(client_ip)
+            suspicious_count = await _storage_call("add_suspicious_action", client_ip)
 
             if suspicious_count >= SUSPICIOUS_ACTIONS_THRESHOLD:
-                await security_storage.ban_ip(client_ip)
+                await _storage_call("ban_ip", client_ip)
 
             raise HTTPException(
                 status_code=429,
-                detail="Too many requests. Please slow down."
+                detail="Too many requests. Please slow down.",
+                headers=retry_headers,
             )
 
-        if requests_hour > MAX_REQUESTS_PER_HOUR:
+        if not allowed:
             logger.warning(
-                f"Rate limit exceeded (hour) for {client_ip}: "
-                f"{requests_hour} requests"
+                f"Rate limit exceeded (hour, group={group}) for {client_ip}: "
+                f"limit {per_hour}/hour"
             )
             raise HTTPException(
                 status_code=429,
-                detail="Hourly request limit exceeded. Please try again later."
+                detail="Hourly request limit exceeded. Please try again later.",
+                headers=retry_headers,
             )
 
         # Проверяем URL на подозрительные паттерны
@@ -365,10 +656,10 @@ class SecurityMiddleware(BaseHTTPMiddleware):
                 f"Suspicious URL pattern from {client_ip}: "
                 f"pattern='{matched_pattern}', url={sanitize_log_content(full_url)}"
             )
-            suspicious_count = await security_storage.add_suspicious_action(client_ip)
+            suspicious_count = await _storage_call("add_suspicious_action", client_ip)
 
             if suspicious_count >= SUSPICIOUS_ACTIONS_THRESHOLD:
-                await security_storage.ban_ip(client_ip)
+                await _storage_call("ban_ip", client_ip)
 
             raise HTTPException(
                 status_code=400,
@@ -396,10 +687,10 @@ class SecurityMiddleware(BaseHTTPMiddleware):
                             f"Suspicious body pattern from {client_ip}: "
                             f"pattern='{matched_pattern}'"
                         )
-                        suspicious_count = await security_storage.add_suspicious_action(client_ip)
+                        suspicious_count = await _storage_call("add_suspicious_action", client_ip)
 
                         if suspicious_count >= SUSPICIOUS_ACTIONS_THRESHOLD:
-                            await security_storage.ban_ip(client_ip)
+                            await _storage_call("ban_ip", client_ip)
 
                         raise HTTPException(
                             status_code=400,
@@ -487,32 +778,18 @@ def sanitize_html(s: str) -> str:
 
 async def get_security_stats() -> Dict:
     """Get current security statistics"""
-    async with security_storage.lock:
-        return {
-            "active_ips": len(security_storage.request_counts),
-            "banned_ips": len(security_storage.banned_ips),
-            "banned_list": list(security_storage.banned_ips.keys()),
-            "suspicious_ips": [
-                {"ip": ip, "count": count}
-                for ip, count in security_storage.suspicious_counts.items()
-                if count > 0
-            ],
-        }
+    return await _storage_call("get_stats")
 
 
 async def manual_ban_ip(ip: str, duration_seconds: int = BAN_DURATION_SECONDS):
     """Manually ban an IP address"""
-    await security_storage.ban_ip(ip, duration_seconds)
+    await _storage_call("ban_ip", ip, duration_seconds)
 
 
 async def unban_ip(ip: str):
     """Remove IP from ban list"""
-    async with security_storage.lock:
-        if ip in security_storage.banned_ips:
-            del security_storage.banned_ips[ip]
-        if ip in security_storage.suspicious_counts:
-            del security_storage.suspicious_counts[ip]
-        logger.info(f"IP {ip} unbanned")
+    await _storage_call("unban_ip", ip)
+    logger.info(f"IP {ip} unbanned")
 
 
 # =============================================================================
@@ -13,6 +13,7 @@ Endpoints:
     GET /api/stats/conversion           - Conversion funnel
 
 Auth: X-API-Key header (SYNTRA_STATS_API_KEY)
+DB: read-only analytics pool (read replica when configured)
 """
 
 import os
@@ -22,7 +23,7 @@ from fastapi import APIRouter, HTTPException, Depends, Header, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from loguru import logger
 
-from src.database.engine import get_session
+from src.database.engine import get_analytics_session
 from src.services.stats import StatsService
 from src.services.stats.schemas import (
     TradingOverviewResponse,
@@ -93,7 +94,7 @@ async def get_trading_overview(
     symbol: Optional[str] = Query(None, description="Filter by symbol"),
     archetype: Optional[str] = Query(None, description="Filter by archetype"),
     origin: Optional[str] = Query(None, description="Filter by origin: ai_scenario, manual"),
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_analytics_session),
     _api_key: str = Depends(verify_stats_api_key),
 ):
     """Get trading overview statistics."""
@@ -122,7 +123,7 @@ async def get_outcomes_distribution(
     period: str = Query("90d", description="Period"),
     from_ts: Optional[int] = Query(None),
     to_ts: Optional[int] = Query(None),
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_analytics_session),
     _api_key: str = Depends(verify_stats_api_key),
 ):
     """Get outcomes distribution."""
@@ -148,7 +149,7 @@ async def get_symbols_stats(
     period: str = Query("90d", description="Period"),
     from_ts: Optional[int] = Query(None),
     to_ts: Optional[int] = Query(None),
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_analytics_session),
     _api_key: str = Depends(verify_stats_api_key),
 ):
     """Get per-symbol statistics."""
@@ -182,7 +183,7 @@ async def get_archetypes_list(
     min_sample: int = Query(10, description="Minimum sample size"),
     page: int = Query(0, ge=0, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Items per page"),
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_analytics_session),
     _api_key: str = Depends(verify_stats_api_key),
 ):
     """Get list of archetypes with stats."""
@@ -212,7 +213,7 @@ async def get_archetype_detail(
     period: str = Query("90d", description="Period"),
     from_ts: Optional[int] = Query(None),
     to_ts: Optional[int] = Query(None),
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_analytics_session),
     _api_key: str = Depends(verify_stats_api_key),
 ):
     """Get detailed stats for an archetype."""
@@ -244,7 +245,7 @@ async def get_archetype_detail(
     description="Returns status of all EV gates (enabled/warning/disabled)"
 )
 async def get_gates_status(
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_analytics_session),
     _api_key: str = Depends(verify_stats_api_key),
 ):
     """Get status of all EV gates."""
@@ -272,7 +273,7 @@ async def get_paper_overview(
     from_ts: Optional[int] = Query(None),
     to_ts: Optional[int] = Query(None),
     archetype: Optional[str] = Query(None, description="Filter by archetype"),
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_analytics_session),
     _api_key: str = Depends(verify_stats_api_key),
 ):
     """Get paper trading overview."""
@@ -299,7 +300,7 @@ async def get_paper_archetypes(
     from_ts: Optional[int] = Query(None),
     to_ts: Optional[int] = Query(None),
     min_sample: int = Query(10, description="Minimum paper trades"),
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_analytics_session),
     _api_key: str = Depends(verify_stats_api_key),
 ):
     """Get paper vs real comparison by archetype."""
@@ -331,7 +332,7 @@ async def get_conversion_funnel(
     period: str = Query("90d", description="Period"),
     from_ts: Optional[int] = Query(None),
     to_ts: Optional[int] = Query(None),
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_analytics_session),
     _api_key: str = Depends(verify_stats_api_key),
 ):
     """Get conversion funnel statistics."""
@@ -17,23 +17,19 @@ from loguru import logger
 
 from config.config import ModelConfig
 from src.api.api_key_auth import verify_api_key
-from src.services.coingecko_service import CoinGeckoService
-from src.services.fear_greed_service import FearGreedService
-from src.services.openai_service import OpenAIService
-from src.services.binance_service import BinanceService
-from src.services.technical_indicators import TechnicalIndicators
-from src.services.candlestick_patterns import CandlestickPatterns
+from src.services.service_registry import lazy_service
+from src.services.market_snapshot import get_market_snapshot_service
 
 
 router = APIRouter(tags=["weekly-analytics"])
 
 # Инициализация сервисов
-coingecko_service = CoinGeckoService()
-fear_greed_service = FearGreedService()
-openai_service = OpenAIService()
-binance_service = BinanceService()
-technical_indicators = TechnicalIndicators()
-candlestick_patterns = CandlestickPatterns()
+coingecko_service = lazy_service("coingecko")
+fear_greed_service = lazy_service("fear_greed")
+openai_service = lazy_service("openai")
+binance_service = lazy_service("binance")
+technical_indicators = lazy_service("technical_indicators")
+candlestick_patterns = lazy_service("candlestick_patterns")
 
 
 # Промпт для AI анализа рынка (с характером Syntra AI)
@@ -220,8 +216,14 @@ async def get_weekly_overview(
     try:
         logger.info("📊 Генерация еженедельного обзора рынка")
 
+        # Общий снапшот рынка (обновляется в фоне); без него - прямые запросы
+        snapshot = await get_market_snapshot_service().get_snapshot()
+
         # 1. Получаем глобальные данные рынка (доминация BTC/ETH/Alts)
-        global_data = await coingecko_service.get_global_market_data()
+        if snapshot and snapshot.get("global"):
+            global_data = snapshot["global"]
+        else:
+            global_data = await coingecko_service.get_global_market_data()
         if not global_data:
             raise HTTPException(status_code=503, detail="Не удалось получить данные рынка")
 
@@ -232,8 +234,9 @@ async def get_weekly_overview(
 
         # 2. Получаем цены BTC/ETH с недельным изменением
         # get_extended_market_data возвращает плоскую структуру с price_change_7d
-        extended_btc = await coingecko_service.get_extended_market_data("bitcoin")
-        extended_eth = await coingecko_service.get_extended_market_data("ethereum")
+        extended = snapshot.get("extended", {}) if snapshot else {}
+        extended_btc = extended.get("bitcoin") or await coingecko_service.get_extended_market_data("bitcoin")
+        extended_eth = extended.get("ethereum") or await coingecko_service.get_extended_market_data("ethereum")
 
         btc_price = 0.0
         btc_weekly_change = 0.0
@@ -268,8 +271,12 @@ async def get_weekly_overview(
                     eth_price = batch_prices["ethereum"].get("usd", 0)
 
         # 3. Получаем Fear & Greed (текущий + история)
-        fear_greed_current_data = await fear_greed_service.get_current()
-        fear_greed_historical = await fear_greed_service.get_historical(limit=7)
+        if snapshot and snapshot.get("fear_greed"):
+            fear_greed_current_data = snapshot["fear_greed"]
+            fear_greed_historical = snapshot.get("fear_greed_history")
+        else:
+            fear_greed_current_data = await fear_greed_service.get_current()
+            fear_greed_historical = await fear_greed_service.get_historical(limit=7)
 
         fear_greed_current = 50  # Default
         fear_greed_emoji = "😐"
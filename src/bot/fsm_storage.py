@@ -0,0 +1,47 @@
+# coding: utf-8
+"""
+FSM storage for the dispatcher
+
+With MemoryStorage, FSM state (broadcast wizard, admin flows, /futures
+input) lives in one process: it's lost on restart and invisible to other
+bot workers. RedisStorage shares it between all processes; MemoryStorage
+remains the fallback when Redis is disabled or unreachable.
+"""
+
+from aiogram.fsm.storage.base import BaseStorage
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.fsm.storage.redis import DefaultKeyBuilder, RedisStorage
+from loguru import logger
+
+from config.cache_config import CacheConfig
+from config.config import FSM_STORAGE
+
+
+async def create_fsm_storage() -> BaseStorage:
+    """
+    Create FSM storage (Redis if configured and reachable)
+
+    Returns:
+        RedisStorage or MemoryStorage
+    """
+    if FSM_STORAGE != "redis" or not CacheConfig.CACHE_ENABLED:
+        logger.info("FSM storage: memory")
+        return MemoryStorage()
+
+    storage = RedisStorage.from_url(
+        CacheConfig.REDIS_URL,
+        connection_kwargs={
+            "socket_connect_timeout": CacheConfig.REDIS_SOCKET_CONNECT_TIMEOUT,
+            "socket_timeout": CacheConfig.REDIS_SOCKET_TIMEOUT,
+        },
+        key_builder=DefaultKeyBuilder(prefix=f"{CacheConfig.CACHE_NAMESPACE}:fsm"),
+    )
+    try:
+        await storage.redis.ping()
+    except Exception as e:
+        logger.warning(f"FSM storage: Redis unavailable ({e}), falling back to memory")
+        await storage.close()
+        return MemoryStorage()
+
+    logger.info("FSM storage: redis")
+    return storage
@@ -49,6 +49,7 @@ from src.database.crud import (
     get_expired_subscriptions,
     get_all_payments,
 )
+from src.database.engine import analytics_session
 from src.database.models import User, Subscription, Payment, SubscriptionTier, PaymentStatus, Referral, ReferralBalance
 from src.services.unit_economics_service import (
     get_unit_economics_dashboard,
@@ -233,16 +234,17 @@ async def cmd_admin(message: Message, session: AsyncSession):
 
     try:
         async with ChatActionSender.typing(bot=message.bot, chat_id=message.chat.id):
-            # Get detailed statistics
-            stats = await get_detailed_user_stats(session, days=7)
+            async with analytics_session() as analytics:
+                # Get detailed statistics
+                stats = await get_detailed_user_stats(analytics, days=7)
 
-            # Get costs for today
-            today_start = datetime.combine(date.today(), datetime.min.time())
-            today_costs = await get_total_costs(session, start_date=today_start)
+                # Get costs for today
+                today_start = datetime.combine(date.today(), datetime.min.time())
+                today_costs = await get_total_costs(analytics, start_date=today_start)
 
-            # Get costs for last 7 days
-            week_start = datetime.now(UTC) - timedelta(days=7)
-            week_costs = await get_total_costs(session, start_date=week_start)
+                # Get costs for last 7 days
+                week_start = datetime.now(UTC) - timedelta(days=7)
+                week_costs = await get_total_costs(analytics, start_date=week_start)
 
             # Format message
             response = "🔐 <b>Админ-панель Syntra</b>\n\n"
@@ -319,16 +321,17 @@ async def admin_refresh_callback(callback: CallbackQuery, session: AsyncSession)
     user_id = callback.from_user.id
 
     try:
-        # Get detailed statistics
-        stats = await get_detailed_user_stats(session, days=7)
+        async with analytics_session() as analytics:
+            # Get detailed statistics
+            stats = await get_detailed_user_stats(analytics, days=7)
 
-        # Get costs for today
-        today_start = datetime.combine(date.today(), datetime.min.time())
-        today_costs = await get_total_costs(session, start_date=today_start)
+            # Get costs for today
+            today_start = datetime.combine(date.today(), datetime.min.time())
+            today_costs = await get_total_costs(analytics, start_date=today_start)
 
-        # Get costs for last 7 days
-        week_start = datetime.now(UTC) - timedelta(days=7)
-        week_costs = await get_total_costs(session, start_date=week_start)
+            # Get costs for last 7 days
+            week_start = datetime.now(UTC) - timedelta(days=7)
+            week_costs = await get_total_costs(analytics, start_date=week_start)
 
         # Format message
         response = "🔐 <b>Админ-панель Syntra</b>\n\n"
@@ -405,10 +408,11 @@ async def admin_stats_period_callback(callback: CallbackQuery, session: AsyncSes
             period_name = "за все время"
             days = 365
 
-        # Get statistics
-        stats = await get_detailed_user_stats(session, days=days)
-        costs = await get_total_costs(session, start_date=start_date)
-        costs_by_service = await get_costs_by_service(session, start_date=start_date)
+        async with analytics_session() as analytics:
+            # Get statistics
+            stats = await get_detailed_user_stats(analytics, days=days)
+            costs = await get_total_costs(analytics, start_date=start_date)
+            costs_by_service = await get_costs_by_service(analytics, start_date=start_date)
 
         # Format message
         response = f"📊 <b>Статистика {period_name}</b>\n\n"
@@ -632,15 +636,16 @@ async def admin_costs_period_callback(callback: CallbackQuery, session: AsyncSes
             period_name = "за все время"
             days = 7
 
-        # Get costs data
-        total_costs = await get_total_costs(session, start_date=start_date)
-        costs_by_service = await get_costs_by_service(session, start_date=start_date)
-        top_users = await get_top_users_by_cost(session, limit=5, start_date=start_date)
+        async with analytics_session() as analytics:
+            # Get costs data
+            total_costs = await get_total_costs(analytics, start_date=start_date)
+            costs_by_service = await get_costs_by_service(analytics, start_date=start_date)
+            top_users = await get_top_users_by_cost(analytics, limit=5, start_date=start_date)
 
-        if period != "all" and days <= 30:
-            daily_costs = await get_costs_by_day(session, days=days)
-        else:
-            daily_costs = []
+            if period != "all" and days <= 30:
+                daily_costs = await get_costs_by_day(analytics, days=days)
+            else:
+                daily_costs = []
 
         # Format message
         response = f"💰 <b>Расходы {period_name}</b>\n\n"
@@ -759,13 +764,19 @@ async def admin_charts_period_callback(callback: CallbackQuery, session: AsyncSe
             period_name = "за все время"
             days = 365
 
-        # Get business metrics
-        mrr_data = await get_mrr(session)
-        profit_data = await get_profit_loss(session, start_date=start_date)
-        churn_data = await get_churn_rate(session, days=days)
-        subscription_stats = await get_subscription_stats(session)
-        revenue_data = await get_revenue_stats(session, start_date=start_date)
-        user_stats = await get_detailed_user_stats(session, days=days)
+        async with analytics_session() as analytics:
+            # Get business metrics
+            mrr_data = await get_mrr(analytics)
+            profit_data = await get_profit_loss(analytics, start_date=start_date)
+            churn_data = await get_churn_rate(analytics, days=days)
+            subscription_stats = await get_subscription_stats(analytics)
+            revenue_data = await get_revenue_stats(analytics, start_date=start_date)
+            user_stats = await get_detailed_user_stats(analytics, days=days)
+
+            # Revenue share paid out to referrers
+            stmt_revshare = select(func.sum(ReferralBalance.earned_total_usd))
+            result_revshare = await analytics.execute(stmt_revshare)
+            total_revshare = float(result_revshare.scalar() or 0)
 
         # Calculate additional metrics
         total_users = user_stats["total_users"]
@@ -773,11 +784,6 @@ async def admin_charts_period_callback(callback: CallbackQuery, session: AsyncSe
         conversion_rate = (paying_users / total_users * 100) if total_users > 0 else 0
         arpu = (mrr_data["total_mrr"] / paying_users) if paying_users > 0 else 0
 
-        # Get revenue share data
-        stmt_revshare = select(func.sum(ReferralBalance.earned_total_usd))
-        result_revshare = await session.execute(stmt_revshare)
-        total_revshare = float(result_revshare.scalar() or 0)
-
         # Format response
         response = f"📈 <b>Бизнес-метрики {period_name}</b>\n\n"
 
@@ -1532,6 +1538,7 @@ async def admin_sub_set_callback(
                 subscription.tier = SubscriptionTier.FREE
                 subscription.is_active = False
                 subscription.expires_at = None
+                subscription.cancelled_at = datetime.now(UTC)
                 await session.commit()
         else:
             # Activate/upgrade subscription
@@ -1960,14 +1967,15 @@ async def cmd_admin_margin(message: Message, session: AsyncSession):
                 check_margin_alerts,
             )
 
-            # Get global margin analytics for last 30 days
-            analytics = await get_global_margin_analytics(session, days=30)
+            async with analytics_session() as ro_session:
+                # Get global margin analytics for last 30 days
+                analytics = await get_global_margin_analytics(ro_session, days=30)
 
-            # Get margin by tier
-            tier_margins = await get_margin_by_tier(session, days=30)
+                # Get margin by tier
+                tier_margins = await get_margin_by_tier(ro_session, days=30)
 
-            # Check margin alerts (users with <30% margin)
-            alerts = await check_margin_alerts(session, threshold_percent=30.0)
+                # Check margin alerts (users with <30% margin)
+                alerts = await check_margin_alerts(ro_session, threshold_percent=30.0)
 
             # Format message
             response = "💰 <b>Real-time Margin Analytics</b>\n"
@@ -2644,9 +2652,10 @@ async def admin_subs_stats_callback(callback: CallbackQuery, session: AsyncSessi
     user_id = callback.from_user.id
 
     try:
-        # Get subscription stats
-        sub_stats = await get_subscription_stats(session)
-        mrr_data = await get_mrr(session)
+        async with analytics_session() as analytics:
+            # Get subscription stats
+            sub_stats = await get_subscription_stats(analytics)
+            mrr_data = await get_mrr(analytics)
 
         # Format response
         response = "📈 <b>Статистика подписок</b>\n\n"
@@ -3314,7 +3323,8 @@ async def admin_unit_economics_callback(callback: CallbackQuery, session: AsyncS
     Main Unit Economics dashboard
     """
     try:
-        dashboard = await get_unit_economics_dashboard(session, days=30)
+        async with analytics_session() as analytics:
+            dashboard = await get_unit_economics_dashboard(analytics, days=30)
 
         response = "📊 <b>Unit Economics Dashboard</b>\n"
         response += f"<i>Период: последние 30 дней</i>\n\n"
@@ -3364,7 +3374,8 @@ async def admin_ue_tiers_callback(callback: CallbackQuery, session: AsyncSession
     Margin by subscription tiers
     """
     try:
-        tiers_data = await get_tier_margin_with_fees(session, days=30)
+        async with analytics_session() as analytics:
+            tiers_data = await get_tier_margin_with_fees(analytics, days=30)
 
         response = "💎 <b>Unit Economics по тарифам</b>\n"
         response += f"<i>Период: последние 30 дней</i>\n\n"
@@ -3407,7 +3418,8 @@ async def admin_ue_free_callback(callback: CallbackQuery, session: AsyncSession)
     Free tier economics
     """
     try:
-        free_data = await get_free_tier_economics(session, days=30)
+        async with analytics_session() as analytics:
+            free_data = await get_free_tier_economics(analytics, days=30)
 
         response = "🆓 <b>Free Tier Экономика</b>\n"
         response += f"<i>Период: последние 30 дней</i>\n\n"
@@ -3447,7 +3459,8 @@ async def admin_ue_trial_callback(callback: CallbackQuery, session: AsyncSession
     Trial economics
     """
     try:
-        trial_data = await get_trial_economics(session, days=30)
+        async with analytics_session() as analytics:
+            trial_data = await get_trial_economics(analytics, days=30)
 
         response = "🎁 <b>Trial Экономика</b>\n"
         response += f"<i>7 дней бесплатного PREMIUM</i>\n\n"
@@ -3492,7 +3505,8 @@ async def admin_ue_referral_callback(callback: CallbackQuery, session: AsyncSess
     Referral economics
     """
     try:
-        ref_data = await get_referral_economics(session, days=30)
+        async with analytics_session() as analytics:
+            ref_data = await get_referral_economics(analytics, days=30)
 
         response = "🤝 <b>Реферальная Экономика</b>\n"
         response += f"<i>Период: последние 30 дней</i>\n\n"
@@ -3537,7 +3551,8 @@ async def admin_ue_scenarios_callback(callback: CallbackQuery, session: AsyncSes
     Margin scenarios at different usage percentages
     """
     try:
-        scenarios = await get_margin_scenarios(session)
+        async with analytics_session() as analytics:
+            scenarios = await get_margin_scenarios(analytics)
 
         response = "📈 <b>Сценарии маржи</b>\n"
         response += f"<i>При разном % использования лимитов</i>\n\n"
@@ -10,7 +10,6 @@ AI automatically decides when to:
 
 No manual parsing needed! OpenAI Function Calling handles everything.
 """
-from datetime import datetime
 from loguru import logger
 
 from aiogram import Router, F
@@ -18,9 +17,10 @@ from aiogram.types import Message
 from aiogram.utils.chat_action import ChatActionSender
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.bot.stream_renderer import StreamRenderer
 from src.services.openai_service_two_step import two_step_service
 from src.services.ads_service import enhance_response_with_ad
-from src.services.points_service import PointsService
+from src.services.usage_recorder import get_usage_recorder
 from src.database.crud import get_or_create_user
 from src.database.models import PointsTransactionType
 from src.utils.i18n import i18n
@@ -30,10 +30,6 @@ from config.prompts import enhance_response_with_character
 
 router = Router(name="chat")
 
-# Streaming configuration
-STREAM_UPDATE_INTERVAL = 1.5  # Update message every 1.5 seconds
-MIN_CHARS_FOR_UPDATE = 100  # Or every 100 characters
-
 
 @router.message(F.text & ~F.text.startswith("/") & (F.chat.type == "private"))
 async def handle_text_message(
@@ -93,11 +89,11 @@ async def handle_text_message(
         # - Fetch news
         # - Compare coins
         # - Get market data
-        full_response = ""
-        last_update_time = datetime.now()
-        last_update_length = 0
+        renderer = StreamRenderer(thinking_msg)
 
-        async with ChatActionSender.typing(bot=message.bot, chat_id=message.chat.id):
+        # Chunks go into the renderer's buffer; its task pushes the edits,
+        # so slow Telegram edits don't hold up reading the stream
+        async with renderer, ChatActionSender.typing(bot=message.bot, chat_id=message.chat.id):
             # Use two-step service for better personality (tier-aware)
             async for chunk in two_step_service.stream_two_step_completion(
                 session=session,
@@ -106,30 +102,9 @@ async def handle_text_message(
                 user_language=user_language,
                 user_tier=user_tier,  # 🚨 Pass tier for context/memory
             ):
-                full_response += chunk
-
-                # Update message periodically
-                now = datetime.now()
-                time_since_update = (now - last_update_time).total_seconds()
-                chars_since_update = len(full_response) - last_update_length
-
-                should_update = (
-                    time_since_update >= STREAM_UPDATE_INTERVAL
-                    or chars_since_update >= MIN_CHARS_FOR_UPDATE
-                )
+                renderer.feed(chunk)
 
-                if should_update and full_response.strip():
-                    try:
-                        # Convert markdown to Telegram HTML
-                        html_response = convert_to_telegram_html(full_response)
-                        await thinking_msg.edit_text(
-                            html_response, parse_mode="HTML"
-                        )
-                        last_update_time = now
-                        last_update_length = len(full_response)
-                    except Exception as e:
-                        # Ignore edit errors (message not modified, rate limits, etc.)
-                        logger.debug(f"Message edit error (ignored): {e}")
+        full_response = renderer.text
 
         # Final update with complete response
         if full_response.strip():
@@ -137,7 +112,7 @@ async def handle_text_message(
             enhanced_response = enhance_response_with_character(full_response)
             # Add native ad if appropriate (based on context and frequency)
             # Умная стратегия: первые 24ч и 7 сообщений — без рекламы
-            enhanced_response = enhance_response_with_ad(
+            enhanced_response = await enhance_response_with_ad(
                 response=enhanced_response,
                 user_id=db_user.id,
                 user_message=user_text,
@@ -149,7 +124,7 @@ async def handle_text_message(
             html_response = convert_to_telegram_html(enhanced_response)
 
             try:
-                await thinking_msg.edit_text(html_response, parse_mode="HTML")
+                await renderer.edit(html_response)
                 logger.info(
                     f"[TOOLS] Response sent to user {user.id} "
                     f"({len(html_response)} chars, enhanced: {enhanced_response != full_response})"
@@ -157,7 +132,7 @@ async def handle_text_message(
 
                 # 💎 Award points for successful text request
                 try:
-                    points_transaction = await PointsService.earn_points(
+                    await get_usage_recorder().record_points(
                         session=session,
                         user_id=db_user.id,
                         transaction_type=PointsTransactionType.EARN_TEXT_REQUEST,
@@ -165,11 +140,6 @@ async def handle_text_message(
                         metadata={"message_id": message.message_id, "language": user_language},
                         transaction_id=f"text_req:{db_user.id}:{message.message_id}",
                     )
-                    if points_transaction:
-                        logger.info(
-                            f"💎 Awarded {points_transaction.amount} points to user {db_user.id} "
-                            f"for text request (balance: {points_transaction.balance_after})"
-                        )
                 except Exception as points_error:
                     # Don't fail the request if points fail
                     logger.error(f"Failed to award points: {points_error}")
@@ -13,19 +13,17 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from config.config import ModelConfig
 from config.prompt_selector import get_price_analysis_prompt
-from src.services.openai_service import OpenAIService
-from src.services.coingecko_service import CoinGeckoService
-from src.services.cryptopanic_service import CryptoPanicService
-from src.services.points_service import PointsService
+from src.services.service_registry import lazy_service
+from src.services.usage_recorder import get_usage_recorder
 from src.database.models import PointsTransactionType
 from src.utils.coin_parser import normalize_coin_name, extract_coin_from_text
 
 router = Router(name="crypto")
 
 # Initialize services
-openai_service = OpenAIService()
-coingecko_service = CoinGeckoService()
-cryptopanic_service = CryptoPanicService()
+openai_service = lazy_service("openai")
+coingecko_service = lazy_service("coingecko")
+cryptopanic_service = lazy_service("cryptopanic")
 
 
 @router.message(Command("price"))
@@ -289,7 +287,7 @@ async def cmd_analyze(
 
         # 💎 Award points for successful chart/analysis request
         try:
-            points_transaction = await PointsService.earn_points(
+            await get_usage_recorder().record_points(
                 session=session,
                 user_id=user.id,
                 transaction_type=PointsTransactionType.EARN_CHART_REQUEST,
@@ -304,11 +302,6 @@ async def cmd_analyze(
                 },
                 transaction_id=f"chart_req:{user.id}:{message.message_id}",
             )
-            if points_transaction:
-                logger.info(
-                    f"💎 Awarded {points_transaction.amount} points to user {user.id} "
-                    f"for chart/analysis request (balance: {points_transaction.balance_after})"
-                )
         except Exception as points_error:
             # Don't fail the request if points fail
             logger.error(f"Failed to award points: {points_error}")
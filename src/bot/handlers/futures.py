@@ -24,18 +24,21 @@ from aiogram.utils.chat_action import ChatActionSender
 from loguru import logger
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.bot.stream_renderer import StreamRenderer
 from src.database.crud import get_or_create_user
 from src.database.models import User, SubscriptionTier
 from src.database.limit_manager import (
     RequestType,
     check_limit,
-    increment_limit,
+    consume_limit,
+    refund_limit,
     get_usage_stats,
 )
 from src.services.futures_request_router import futures_request_router
-from src.services.futures_analysis_service import futures_analysis_service
+from src.services.service_registry import lazy_service
 from src.utils.i18n import i18n
 
+futures_analysis_service = lazy_service("futures_analysis")
 
 # ==============================================================================
 # FSM STATES
@@ -348,8 +351,9 @@ async def process_futures_input(
         last_name=user.last_name,
     )
 
-    # Re-check limit (could have changed)
-    has_remaining, current_count, limit = await check_limit(
+    # Re-check limit (could have changed) and take one request; it's
+    # refunded below on every outcome that doesn't deliver scenarios
+    has_remaining, current_count, limit = await consume_limit(
         session, db_user, RequestType.FUTURES
     )
 
@@ -371,6 +375,9 @@ async def process_futures_input(
         i18n.get("futures.analyzing", language),
         parse_mode="HTML"
     )
+    # Status edits and the final reply share the bot-wide edit budget
+    progress = StreamRenderer(thinking_msg, markdown=False)
+    delivered = False
 
     try:
         # Validate request via GPT-4o-mini router
@@ -380,9 +387,9 @@ async def process_futures_input(
 
         # Not a futures request
         if not validation.is_futures_request:
-            await thinking_msg.edit_text(
-                i18n.get("futures.not_signal_request", language),
-                parse_mode="HTML"
+            await refund_limit(session, db_user.id, RequestType.FUTURES)
+            await progress.edit(
+                i18n.get("futures.not_signal_request", language)
             )
             # Don't clear state - let user try again
             return
@@ -392,13 +399,13 @@ async def process_futures_input(
             questions = validation.clarifying_questions or []
             questions_text = "\n".join([f"• {q}" for q in questions])
 
-            await thinking_msg.edit_text(
+            await refund_limit(session, db_user.id, RequestType.FUTURES)
+            await progress.edit(
                 i18n.get(
                     "futures.need_clarification",
                     language,
                     questions=questions_text
-                ),
-                parse_mode="HTML"
+                )
             )
             # Don't clear state - wait for clarified input
             return
@@ -414,19 +421,16 @@ async def process_futures_input(
         if validation.timeframe_was_default:
             default_msg = futures_request_router.get_default_message(validation, language)
             if default_msg:
-                await thinking_msg.edit_text(
-                    f"{i18n.get('futures.generating', language)}\n\n{default_msg}",
-                    parse_mode="HTML"
+                await progress.edit(
+                    f"{i18n.get('futures.generating', language)}\n\n{default_msg}"
                 )
             else:
-                await thinking_msg.edit_text(
-                    i18n.get("futures.generating", language),
-                    parse_mode="HTML"
+                await progress.edit(
+                    i18n.get("futures.generating", language)
                 )
         else:
-            await thinking_msg.edit_text(
-                i18n.get("futures.generating", language),
-                parse_mode="HTML"
+            await progress.edit(
+                i18n.get("futures.generating", language)
             )
 
         logger.info(f"[Futures] Generating: {ticker} {timeframe} {mode} for user {user.id}")
@@ -445,19 +449,18 @@ async def process_futures_input(
 
         if not is_valid:
             logger.error(f"[Futures] Validation failed: {validation_error}")
-            await thinking_msg.edit_text(
+            await refund_limit(session, db_user.id, RequestType.FUTURES)
+            await progress.edit(
                 i18n.get(
                     "futures.generation_failed",
                     language,
                     error=validation_error
-                ),
-                parse_mode="HTML"
+                )
             )
             await state.set_state(FuturesStates.waiting_for_input)
             return
 
-        # Increment limit ONLY after successful validation
-        await increment_limit(session, db_user.id, RequestType.FUTURES)
+        # Keep the request taken above (refunded on every other outcome)
         limits_remaining = limit - current_count - 1
 
         # Format and send response
@@ -471,7 +474,8 @@ async def process_futures_input(
             language=language
         )
 
-        await thinking_msg.edit_text(response_text, parse_mode="HTML")
+        await progress.edit(response_text)
+        delivered = True
 
         logger.info(
             f"[Futures] Success! User {user.id}: {ticker} {timeframe}, "
@@ -483,9 +487,10 @@ async def process_futures_input(
 
     except Exception as e:
         logger.exception(f"[Futures] Error processing request: {e}")
-        await thinking_msg.edit_text(
-            i18n.get("futures.error", language),
-            parse_mode="HTML"
+        if not delivered:
+            await refund_limit(session, db_user.id, RequestType.FUTURES)
+        await progress.edit(
+            i18n.get("futures.error", language)
         )
         await state.set_state(FuturesStates.waiting_for_input)
 
@@ -27,7 +27,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database.models import SubscriptionTier
 from src.database.crud import get_subscription, update_subscription, get_referral_stats
-from src.services.telegram_stars_service import TelegramStarsService
+from src.services.service_registry import lazy_service
 from src.services.crypto_pay_service import get_crypto_pay_service, CRYPTO_PAY_ASSETS
 from src.utils.i18n import i18n
 
@@ -35,7 +35,7 @@ from src.utils.i18n import i18n
 router = Router(name="premium")
 
 # Initialize payment service
-payment_service = TelegramStarsService()
+payment_service = lazy_service("telegram_stars")
 
 
 @router.message(Command("premium"))
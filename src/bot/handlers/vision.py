@@ -2,7 +2,9 @@
 """
 Handler for photo/image analysis (Vision functionality)
 """
+import asyncio
 from io import BytesIO
+from typing import Any, Dict, Optional, Tuple
 
 from aiogram import Router, F
 from aiogram.types import Message, BufferedInputFile
@@ -13,18 +15,20 @@ from openai import BadRequestError
 
 from config.config import ModelConfig
 from config.prompt_selector import get_question_vision_prompt
-from src.services.openai_service import OpenAIService
-from src.services.coingecko_service import CoinGeckoService
-from src.services.points_service import PointsService
+from src.bot.stream_renderer import StreamRenderer
+from src.cache.vision_analysis_cache import get_vision_analysis_cache
+from src.services.service_registry import lazy_service
+from src.services.usage_recorder import get_usage_recorder
 from src.database.models import PointsTransactionType
 from src.utils.coin_parser import normalize_coin_name, extract_coin_from_text
 from src.utils.i18n import i18n
+from src.utils.image_pipeline import make_detection_image, prepare_image
 
 router = Router(name="vision")
 
 # Initialize services
-openai_service = OpenAIService()
-coingecko_service = CoinGeckoService()
+openai_service = lazy_service("openai")
+coingecko_service = lazy_service("coingecko")
 
 
 @router.message(F.photo & (F.chat.type == "private"))
@@ -72,74 +76,52 @@ async def handle_photo(
         )
         return
 
+    # Same photo recently analysed -> reuse the analysis (looked up before
+    # the download, so a hit costs no Vision/CoinGecko calls)
+    vision_cache = get_vision_analysis_cache()
+    content_id = photo.file_unique_id
+    cache_params = {
+        "language": user_language,
+        "detail": ModelConfig.VISION_DETAIL_LEVEL,
+        "user_prompt": message.caption,
+    }
+
     try:
+        cached = await vision_cache.get(content_id, **cache_params)
+
         # Show typing indicator while downloading and preparing
         async with ChatActionSender.upload_photo(
             bot=message.bot, chat_id=message.chat.id
         ):
-            # Download photo
-            file = await message.bot.get_file(file_id)
-            photo_bytes = BytesIO()
-            await message.bot.download_file(file.file_path, destination=photo_bytes)
-
-            # Get image bytes
-            image_bytes = photo_bytes.getvalue()
-
-            # Step 1: Try to detect coin from image or caption
-            coin_id = None
-            market_data = None
-
-            # First, check if user provided coin name in caption
-            if message.caption:
-                detected_coins = extract_coin_from_text(message.caption)
-                if detected_coins:
-                    coin_id = detected_coins[0]
-                    logger.info(f"Detected coin from caption: {coin_id}")
-
-            # If not found in caption, try to detect from image
-            if not coin_id:
-                logger.info("Attempting to detect coin from image...")
-                detected_name = await openai_service.detect_coin_from_image(
-                    image_bytes, user_language
+            if cached is not None:
+                cached_analysis = cached["analysis"]
+                coin_id, market_data = cached["coin_id"], cached["market_data"]
+            else:
+                cached_analysis = None
+
+                # Download photo
+                file = await message.bot.get_file(file_id)
+                photo_bytes = BytesIO()
+                await message.bot.download_file(
+                    file.file_path, destination=photo_bytes
                 )
-                if detected_name:
-                    coin_id = normalize_coin_name(detected_name)
-                    if coin_id:
-                        logger.info(f"Normalized coin ID: {coin_id}")
 
-            # Step 2: Get market data if coin was detected
-            if coin_id:
-                logger.info(f"Fetching market data for {coin_id}...")
-                price_data = await coingecko_service.get_price(
-                    coin_id, include_24h_change=True
-                )
+                # Get image bytes
+                image_bytes = photo_bytes.getvalue()
 
-                if price_data and coin_id in price_data:
-                    market_data = {
-                        "name": coin_id.replace("-", " ").title(),
-                        "current_price": price_data[coin_id].get("usd", 0),
-                        "price_change_percentage_24h": price_data[coin_id].get(
-                            "usd_24h_change", 0
-                        ),
-                    }
-
-                    # Try to get additional data
-                    coin_details = await coingecko_service.get_coin_data(coin_id)
-                    if coin_details:
-                        market_data["total_volume"] = (
-                            coin_details.get("market_data", {})
-                            .get("total_volume", {})
-                            .get("usd", 0)
-                        )
-                        market_data["market_cap"] = (
-                            coin_details.get("market_data", {})
-                            .get("market_cap", {})
-                            .get("usd", 0)
-                        )
-
-                    logger.info(
-                        f"Market data fetched: ${market_data['current_price']:,.2f}"
-                    )
+                # Steps 1-2 (coin + market data) run while the analysis image
+                # is resized/cropped in a worker thread
+                prepared, (coin_id, market_data) = await asyncio.gather(
+                    asyncio.to_thread(
+                        prepare_image, image_bytes, ModelConfig.VISION_DETAIL_LEVEL
+                    ),
+                    _detect_coin_and_market_data(message, image_bytes, user_language),
+                )
+                logger.info(
+                    f"Vision image prepared: {prepared.width}x{prepared.height}, "
+                    f"{len(image_bytes)} -> {len(prepared.image_bytes)} bytes, "
+                    f"{prepared.tokens} tokens{' (cropped)' if prepared.cropped else ''}"
+                )
 
             # Step 3: Build custom prompt if user provided caption
             user_prompt = None
@@ -189,59 +171,36 @@ async def handle_photo(
         response_header = initial_msg.split("\n\n")[0] + "\n\n" + market_data_str
 
         # Step 5: Stream analysis with real-time updates
-        import time
+        # (analysis is HTML already, the renderer only coalesces edits)
+        renderer = StreamRenderer(thinking_msg, header=response_header, markdown=False)
 
-        full_analysis = ""
-        last_update_time = time.time()
-        last_update_length = 0
+        if cached_analysis is not None:
+            full_analysis = cached_analysis
+            image_tokens = prompt_tokens = output_tokens = 0
+        else:
+            async with renderer, ChatActionSender.typing(bot=message.bot, chat_id=message.chat.id):
+                async for chunk in openai_service.stream_image_analysis(
+                    session=session,
+                    user_id=db_user.id,
+                    image_bytes=prepared.image_bytes,
+                    user_language=user_language,
+                    user_prompt=user_prompt,
+                    detail=prepared.detail,
+                    market_data=market_data,
+                ):
+                    renderer.feed(chunk)
 
-        STREAM_UPDATE_INTERVAL = 1.5  # Update message every 1.5 seconds
-        MIN_CHARS_FOR_UPDATE = 100  # Or every 100 characters
+            full_analysis = renderer.text
+            await vision_cache.set(
+                content_id, full_analysis, coin_id, market_data, **cache_params
+            )
 
-        async with ChatActionSender.typing(bot=message.bot, chat_id=message.chat.id):
-            async for chunk in openai_service.stream_image_analysis(
-                session=session,
-                user_id=db_user.id,
-                image_bytes=image_bytes,
-                user_language=user_language,
-                user_prompt=user_prompt,
-                detail=ModelConfig.VISION_DETAIL_LEVEL,
-                market_data=market_data,
-            ):
-                full_analysis += chunk
-
-                # Update message periodically or when enough new text
-                current_time = time.time()
-                chars_since_update = len(full_analysis) - last_update_length
-
-                if (current_time - last_update_time >= STREAM_UPDATE_INTERVAL) or (
-                    chars_since_update >= MIN_CHARS_FOR_UPDATE
-                ):
-                    try:
-                        # Build current response
-                        current_response = response_header + full_analysis
-
-                        # Update message
-                        await thinking_msg.edit_text(
-                            current_response, parse_mode="HTML"
-                        )
-
-                        last_update_time = current_time
-                        last_update_length = len(full_analysis)
-                    except Exception as e:
-                        # Ignore rate limit or other editing errors
-                        logger.debug(f"Error updating message during streaming: {e}")
-                        pass
+            # Note: stats are tracked in stream_image_analysis for cost tracking
+            image_tokens = prepared.tokens
+            prompt_tokens = await openai_service.count_tokens_async(user_prompt or "")
+            output_tokens = await openai_service.count_tokens_async(full_analysis)
 
         # Final update with complete analysis
-        # Note: stats are tracked in stream_image_analysis for cost tracking
-        from src.utils.vision_tokens import calculate_image_tokens
-
-        image_tokens = calculate_image_tokens(
-            image_bytes, ModelConfig.VISION_DETAIL_LEVEL
-        )
-        prompt_tokens = openai_service.count_tokens(user_prompt or "")
-        output_tokens = openai_service.count_tokens(full_analysis)
         total_tokens = image_tokens + prompt_tokens + output_tokens
         cost = openai_service.calculate_vision_cost(
             image_tokens + prompt_tokens, output_tokens
@@ -266,17 +225,18 @@ async def handle_photo(
 
         final_response = response_header + full_analysis
 
-        await thinking_msg.edit_text(final_response, parse_mode="HTML")
+        await renderer.edit(final_response)
 
         logger.info(
             f"Vision streaming analysis sent to user {telegram_id}. "
             f"Coin: {coin_id or 'unknown'}, "
             f"Tokens: {total_tokens}, Cost: ${cost:.4f}"
+            f"{' (cached)' if cached_analysis is not None else ''}"
         )
 
         # 💎 Award points for successful vision request
         try:
-            points_transaction = await PointsService.earn_points(
+            await get_usage_recorder().record_points(
                 session=session,
                 user_id=db_user.id,
                 transaction_type=PointsTransactionType.EARN_VISION_REQUEST,
@@ -286,15 +246,11 @@ async def handle_photo(
                     "coin": coin_id,
                     "tokens": total_tokens,
                     "cost": cost,
+                    "cached": cached_analysis is not None,
                     "language": user_language,
                 },
                 transaction_id=f"vision_req:{db_user.id}:{message.message_id}",
             )
-            if points_transaction:
-                logger.info(
-                    f"💎 Awarded {points_transaction.amount} points to user {db_user.id} "
-                    f"for vision request (balance: {points_transaction.balance_after})"
-                )
         except Exception as points_error:
             # Don't fail the request if points fail
             logger.error(f"Failed to award points: {points_error}")
@@ -315,6 +271,76 @@ async def handle_photo(
         await message.answer(i18n.get("vision.error_general", user_language))
 
 
+async def _detect_coin_and_market_data(
+    message: Message, image_bytes: bytes, user_language: str
+) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+    """
+    Detect coin (caption first, then image) and fetch its market data
+
+    Returns:
+        (coin_id, market_data) - either may be None
+    """
+    # Step 1: Try to detect coin from image or caption
+    coin_id = None
+    market_data = None
+
+    # First, check if user provided coin name in caption
+    if message.caption:
+        detected_coins = extract_coin_from_text(message.caption)
+        if detected_coins:
+            coin_id = detected_coins[0]
+            logger.info(f"Detected coin from caption: {coin_id}")
+
+    # If not found in caption, try to detect from image
+    if not coin_id:
+        logger.info("Attempting to detect coin from image...")
+        # Low detail is enough to read the ticker: send a thumbnail
+        detection_image = await asyncio.to_thread(make_detection_image, image_bytes)
+        detected_name = await openai_service.detect_coin_from_image(
+            detection_image, user_language
+        )
+        if detected_name:
+            coin_id = normalize_coin_name(detected_name)
+            if coin_id:
+                logger.info(f"Normalized coin ID: {coin_id}")
+
+    # Step 2: Get market data if coin was detected
+    if coin_id:
+        logger.info(f"Fetching market data for {coin_id}...")
+        price_data = await coingecko_service.get_price(
+            coin_id, include_24h_change=True
+        )
+
+        if price_data and coin_id in price_data:
+            market_data = {
+                "name": coin_id.replace("-", " ").title(),
+                "current_price": price_data[coin_id].get("usd", 0),
+                "price_change_percentage_24h": price_data[coin_id].get(
+                    "usd_24h_change", 0
+                ),
+            }
+
+            # Try to get additional data
+            coin_details = await coingecko_service.get_coin_data(coin_id)
+            if coin_details:
+                market_data["total_volume"] = (
+                    coin_details.get("market_data", {})
+                    .get("total_volume", {})
+                    .get("usd", 0)
+                )
+                market_data["market_cap"] = (
+                    coin_details.get("market_data", {})
+                    .get("market_cap", {})
+                    .get("usd", 0)
+                )
+
+            logger.info(
+                f"Market data fetched: ${market_data['current_price']:,.2f}"
+            )
+
+    return coin_id, market_data
+
+
 @router.message(F.document)
 async def handle_document(message: Message, user_language: str = "ru"):
     """
@@ -16,8 +16,7 @@ from aiogram.types import TelegramObject, Message, InlineKeyboardMarkup, InlineK
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database.limit_manager import (
-    check_limit,
-    increment_limit,
+    consume_limit,
     detect_request_type,
     RequestType,
 )
@@ -89,8 +88,8 @@ class RequestLimitMiddleware(BaseMiddleware):
 
         logger.info(f"[REQUEST_LIMIT] Detected request type: {request_type.value}")
 
-        # Check if user has requests left for this type
-        has_requests, current_count, limit = await check_limit(
+        # Check and increment in one atomic step (no race between parallel messages)
+        has_requests, current_count, limit = await consume_limit(
             session, db_user, request_type
         )
 
@@ -131,13 +130,6 @@ class RequestLimitMiddleware(BaseMiddleware):
             # Block further processing
             return None
 
-        # User has requests - increment counter
-        logger.info(
-            f"[REQUEST_LIMIT] Incrementing {request_type.value} counter "
-            f"for user {db_user.telegram_id}"
-        )
-        await increment_limit(session, db_user.id, request_type)
-
         # Calculate remaining requests
         remaining = limit - current_count - 1  # -1 for current request
 
@@ -0,0 +1,221 @@
+# coding: utf-8
+"""
+Streaming replies into a Telegram message
+
+Handlers used to await message.edit_text() inside the LLM token loop, so
+a slow (or rate limited) Telegram edit stalled reading the OpenAI stream,
+and every preview re-converted the whole reply to HTML.
+
+StreamRenderer decouples the two: the handler feed()s chunks into a buffer
+and returns immediately, while a background task pushes coalesced edits -
+everything received while waiting for the edit budget goes out in one
+edit. Edits of all messages share EditRateLimiter, a per-chat and
+bot-wide budget (Telegram allows ~1 edit/sec per chat, ~30/sec per bot).
+Markdown previews are converted incrementally (IncrementalHTMLConverter).
+
+Usage:
+    renderer = StreamRenderer(thinking_msg)
+    async with renderer:
+        async for chunk in stream:
+            renderer.feed(chunk)
+    await renderer.edit(convert_to_telegram_html(final_text))
+"""
+
+import asyncio
+import time
+from typing import Dict, List, Optional
+
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+from aiogram.types import Message
+from loguru import logger
+
+from config.config import RateLimits
+from src.utils.markdown_converter import IncrementalHTMLConverter
+
+# Prune per-chat budget entries once this many chats are tracked
+_MAX_TRACKED_CHATS = 1000
+
+
+class EditRateLimiter:
+    """
+    Per-chat and bot-wide budget for message edits
+    """
+
+    def __init__(self, per_chat_interval: float, edits_per_second: float):
+        self.per_chat_interval = per_chat_interval
+        self.global_interval = 1.0 / edits_per_second if edits_per_second > 0 else 0.0
+        self._chat_next: Dict[int, float] = {}
+        self._global_next = 0.0
+
+    async def acquire(self, chat_id: int) -> None:
+        """Wait until the chat and the bot may send another edit, then reserve it"""
+        while True:
+            now = time.monotonic()
+            wait = max(self._chat_next.get(chat_id, 0.0), self._global_next) - now
+            if wait <= 0:
+                break
+            await asyncio.sleep(wait)
+
+        self._global_next = now + self.global_interval
+        self._chat_next[chat_id] = now + self.per_chat_interval
+
+        if len(self._chat_next) > _MAX_TRACKED_CHATS:
+            self._chat_next = {
+                chat: next_at
+                for chat, next_at in self._chat_next.items()
+                if next_at > now
+            }
+
+    def defer(self, chat_id: int, seconds: float) -> None:
+        """Push the chat's next edit back (Telegram flood control)"""
+        next_at = time.monotonic() + seconds
+        self._chat_next[chat_id] = max(self._chat_next.get(chat_id, 0.0), next_at)
+
+
+class StreamRenderer:
+    """
+    Render a growing reply into one Telegram message
+
+    Args:
+        message: Message to edit (usually the "thinking..." placeholder)
+        header: Text shown above the streamed content
+        markdown: Convert streamed Markdown to HTML (False = text is HTML already)
+        parse_mode: Telegram parse mode for edits
+        limiter: Edit budget (defaults to the bot-wide one)
+    """
+
+    def __init__(
+        self,
+        message: Message,
+        header: str = "",
+        markdown: bool = True,
+        parse_mode: Optional[str] = "HTML",
+        limiter: Optional[EditRateLimiter] = None,
+    ):
+        self.message = message
+        self.header = header
+        self.parse_mode = parse_mode
+        self._converter = IncrementalHTMLConverter() if markdown else None
+        self._limiter = limiter or get_edit_rate_limiter()
+        self._chunks: List[str] = []
+        self._dirty = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._inflight: Optional[asyncio.Task] = None
+        self._last_sent: Optional[str] = None
+
+    @property
+    def text(self) -> str:
+        """Raw text received so far"""
+        return "".join(self._chunks)
+
+    def feed(self, chunk: str) -> None:
+        """Append a streamed chunk (never waits for Telegram)"""
+        if chunk:
+            self._chunks.append(chunk)
+            self._dirty.set()
+
+    def _render(self) -> str:
+        text = self.text
+        if not text.strip():
+            return ""
+        if self._converter is not None:
+            text = self._converter.render(text)
+        return self.header + text
+
+    async def _send(self, text: str) -> None:
+        """Preview edit; failures only cost this preview"""
+        try:
+            await self.message.edit_text(text, parse_mode=self.parse_mode)
+            self._last_sent = text
+        except TelegramRetryAfter as e:
+            self._limiter.defer(self.message.chat.id, e.retry_after)
+            logger.debug(f"Stream edit throttled for {e.retry_after}s")
+        except Exception as e:
+            # Message not modified, unclosed tag in an unfinished tail, etc.
+            logger.debug(f"Stream edit error (ignored): {e}")
+
+    async def _run(self) -> None:
+        """Consumer: one edit per budget slot with everything buffered so far"""
+        while True:
+            await self._dirty.wait()
+            await self._limiter.acquire(self.message.chat.id)
+            self._dirty.clear()
+
+            text = self._render()
+            if not text or text == self._last_sent:
+                continue
+            # Shielded so stop() never abandons an edit halfway
+            self._inflight = asyncio.ensure_future(self._send(text))
+            await asyncio.shield(self._inflight)
+
+    def start(self) -> None:
+        """Start pushing previews"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop pushing previews (waits for an edit already in flight)"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._inflight is not None:
+            await self._inflight
+            self._inflight = None
+
+    async def __aenter__(self) -> "StreamRenderer":
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.stop()
+
+    async def edit(self, text: str, **kwargs) -> None:
+        """
+        Edit the message right away within the edit budget
+
+        For final replies and progress messages: errors other than flood
+        control propagate, an unchanged text is skipped.
+
+        Args:
+            text: New message text
+            **kwargs: Extra edit_text arguments (reply_markup, ...)
+        """
+        if text == self._last_sent and not kwargs:
+            return
+
+        chat_id = self.message.chat.id
+        await self._limiter.acquire(chat_id)
+        try:
+            await self.message.edit_text(text, parse_mode=self.parse_mode, **kwargs)
+        except TelegramRetryAfter as e:
+            self._limiter.defer(chat_id, e.retry_after)
+            await self._limiter.acquire(chat_id)
+            await self.message.edit_text(text, parse_mode=self.parse_mode, **kwargs)
+        except TelegramBadRequest as e:
+            if "message is not modified" not in str(e):
+                raise
+        self._last_sent = text
+
+
+# Global edit budget (shared by all handlers of this bot process)
+_edit_rate_limiter: Optional[EditRateLimiter] = None
+
+
+def get_edit_rate_limiter() -> EditRateLimiter:
+    """
+    Get global edit rate limiter (singleton)
+
+    Returns:
+        EditRateLimiter instance
+    """
+    global _edit_rate_limiter
+    if _edit_rate_limiter is None:
+        _edit_rate_limiter = EditRateLimiter(
+            RateLimits.TELEGRAM_EDIT_INTERVAL_PER_CHAT,
+            RateLimits.TELEGRAM_EDITS_PER_SECOND,
+        )
+    return _edit_rate_limiter
@@ -0,0 +1,272 @@
+# coding: utf-8
+"""
+Webhook update delivery for horizontally scaled bot workers
+
+In polling mode one process (one event loop) handles every update. In
+webhook mode (BOT_MODE=webhook) the main process only receives updates:
+
+    Telegram -> webhook receiver -> Redis lists (partitioned by user) -> workers
+
+- The receiver checks the secret token (WEBHOOK_SECRET is required,
+  requests are rejected while it is unset), drops update_ids it has already
+  queued (Telegram redelivers webhooks that weren't acknowledged in time)
+  and LPUSHes the raw update into one of BOT_UPDATE_PARTITIONS lists,
+  chosen by user (chat for updates without a user).
+- Each partition is read by exactly one worker process, and a worker runs
+  a user's updates one after another, so every user's updates are handled
+  in the order Telegram sent them while different users run concurrently.
+- Without Redis the receiver handles updates itself (same ordering rules)
+  up to the worker's concurrency, and answers 503 beyond it so Telegram
+  retries later.
+"""
+
+import asyncio
+import hmac
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set
+
+from aiogram import Bot, Dispatcher
+from aiohttp import web
+from loguru import logger
+
+from config.cache_config import CacheTTL
+from config.config import BOT_UPDATE_PARTITIONS, WEBHOOK_PATH, WEBHOOK_SECRET
+from src.cache import CacheKeyBuilder, get_redis_manager
+from src.utils.serialization import dumps, loads
+
+# Seconds a worker blocks on BRPOP (must stay below the Redis socket timeout)
+_POP_TIMEOUT = 2
+
+
+def update_order_key(update: Dict[str, Any]) -> int:
+    """
+    Id whose updates must be handled in order: user, else chat, else update_id
+    """
+    for field, event in update.items():
+        if field == "update_id" or not isinstance(event, dict):
+            continue
+        user = event.get("from") or event.get("user")
+        if isinstance(user, dict) and "id" in user:
+            return user["id"]
+        chat = event.get("chat") or (event.get("message") or {}).get("chat")
+        if isinstance(chat, dict) and "id" in chat:
+            return chat["id"]
+    return update.get("update_id", 0)
+
+
+class UpdateQueue:
+    """
+    Redis-backed queue of raw Telegram updates, partitioned by user
+    """
+
+    def __init__(self, redis_manager=None, partitions: int = BOT_UPDATE_PARTITIONS):
+        self._redis_manager = redis_manager
+        self.partitions = max(1, partitions)
+        # Rotates BRPOP key order so the first partition isn't always served first
+        self._pop_offset = 0
+
+    @property
+    def redis(self):
+        """Redis manager (resolved lazily so tests can swap the global one)"""
+        if self._redis_manager is None:
+            self._redis_manager = get_redis_manager()
+        return self._redis_manager
+
+    def _queue_key(self, partition: int) -> str:
+        return CacheKeyBuilder.build("bot_updates", "queue", str(partition))
+
+    def _seen_key(self, update_id: int) -> str:
+        return CacheKeyBuilder.build("bot_updates", "seen", str(update_id))
+
+    def partition(self, update: Dict[str, Any]) -> int:
+        """Partition an update belongs to"""
+        return abs(update_order_key(update)) % self.partitions
+
+    def worker_count(self, requested: int) -> int:
+        """
+        Number of worker processes to run for `requested` (BOT_WORKERS)
+
+        Each partition is read by exactly one worker, so workers beyond the
+        partition count would have nothing to read.
+        """
+        if requested > self.partitions:
+            logger.warning(
+                f"BOT_WORKERS={requested} exceeds BOT_UPDATE_PARTITIONS={self.partitions}, "
+                f"starting {self.partitions} workers"
+            )
+        return max(0, min(requested, self.partitions))
+
+    def worker_partitions(self, index: int, workers: int) -> List[int]:
+        """Partitions read by worker `index` of `workers`"""
+        return [p for p in range(self.partitions) if p % workers == index]
+
+    async def push(self, update: Dict[str, Any]) -> bool:
+        """
+        Queue a raw update
+
+        Returns:
+            False if this update_id was already queued
+
+        Raises:
+            ConnectionError: Redis is unavailable (caller handles the update itself)
+        """
+        client = self.redis.client
+        if client is None:
+            raise ConnectionError("Redis unavailable")
+
+        seen_key = self._seen_key(update["update_id"])
+        if not await client.set(seen_key, "1", nx=True, ex=CacheTTL.BOT_UPDATE_DEDUP):
+            return False
+        try:
+            await client.lpush(self._queue_key(self.partition(update)), dumps(update))
+        except Exception:
+            # Let Telegram's redelivery through
+            await client.delete(seen_key)
+            raise
+        return True
+
+    async def pop(
+        self, partitions: List[int], timeout: int = _POP_TIMEOUT
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Oldest update from the given partitions (blocks up to `timeout` seconds)
+
+        Returns:
+            Raw update dict, or None if nothing arrived
+        """
+        client = self.redis.client
+        if client is None or not partitions:
+            await asyncio.sleep(timeout)
+            return None
+
+        offset = self._pop_offset % len(partitions)
+        self._pop_offset = offset + 1
+        ordered = partitions[offset:] + partitions[:offset]
+        item = await client.brpop(
+            [self._queue_key(p) for p in ordered], timeout=timeout
+        )
+        if item is None:
+            return None
+        return loads(item[1])
+
+
+class UpdateWorker:
+    """
+    Feeds raw updates to the dispatcher, concurrently across users and in
+    arrival order for each user
+
+    Args:
+        dispatcher: Dispatcher with all routers and middlewares
+        bot: Bot instance passed to handlers
+        concurrency: Max updates in progress when reading from the queue
+    """
+
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, concurrency: int):
+        self.dispatcher = dispatcher
+        self.bot = bot
+        self._slots = asyncio.Semaphore(max(1, concurrency))
+        self._order_locks: Dict[int, asyncio.Lock] = {}
+        self._pending: Dict[int, int] = defaultdict(int)
+        self._tasks: Set[asyncio.Task] = set()
+
+    def submit(self, update: Dict[str, Any]) -> asyncio.Task:
+        """Start handling an update (after earlier updates of the same user)"""
+        key = update_order_key(update)
+        # asyncio.Lock wakes waiters in FIFO order, so submission order is kept
+        lock = self._order_locks.setdefault(key, asyncio.Lock())
+        self._pending[key] += 1
+
+        task = asyncio.create_task(self._handle(key, lock, update))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def try_submit(self, update: Dict[str, Any]) -> bool:
+        """
+        Start handling an update if a concurrency slot is free
+
+        Returns:
+            False if all slots are busy (update not taken)
+        """
+        if self._slots.locked():
+            return False
+        await self._slots.acquire()
+        self.submit(update).add_done_callback(lambda _: self._slots.release())
+        return True
+
+    async def _handle(
+        self, key: int, lock: asyncio.Lock, update: Dict[str, Any]
+    ) -> None:
+        try:
+            async with lock:
+                await self.dispatcher.feed_raw_update(self.bot, update)
+        except Exception as e:
+            logger.exception(f"Update {update.get('update_id')} failed: {e}")
+        finally:
+            self._pending[key] -= 1
+            if not self._pending[key]:
+                del self._pending[key]
+                self._order_locks.pop(key, None)
+
+    async def run(self, queue: UpdateQueue, partitions: List[int]) -> None:
+        """Consume the given queue partitions until cancelled"""
+        logger.info(f"Update worker reading {len(partitions)} queue partitions")
+        while True:
+            await self._slots.acquire()
+            try:
+                update = await queue.pop(partitions)
+            except Exception as e:
+                self._slots.release()
+                logger.warning(f"Update queue read failed: {e}")
+                await asyncio.sleep(1)
+                continue
+
+            if update is None:
+                self._slots.release()
+                continue
+            self.submit(update).add_done_callback(lambda _: self._slots.release())
+
+    async def drain(self, timeout: float = 30) -> None:
+        """Wait for updates in progress (on shutdown)"""
+        if self._tasks:
+            await asyncio.wait(set(self._tasks), timeout=timeout)
+
+
+def create_webhook_app(queue: UpdateQueue, fallback: UpdateWorker) -> web.Application:
+    """
+    aiohttp app receiving Telegram webhooks at WEBHOOK_PATH
+
+    Args:
+        queue: Queue updates are pushed to
+        fallback: Handles updates in this process when Redis is unavailable
+    """
+
+    async def receive_update(request: web.Request) -> web.Response:
+        secret = request.headers.get("X-Telegram-Bot-Api-Secret-Token", "")
+        if not WEBHOOK_SECRET or not hmac.compare_digest(
+            secret.encode(), WEBHOOK_SECRET.encode()
+        ):
+            return web.Response(status=401)
+
+        try:
+            update = loads(await request.read())
+        except ValueError:
+            return web.Response(status=400)
+        if not isinstance(update, dict) or "update_id" not in update:
+            return web.Response(status=400)
+
+        try:
+            if not await queue.push(update):
+                logger.debug(f"Duplicate update {update['update_id']} dropped")
+        except Exception as e:
+            if not await fallback.try_submit(update):
+                logger.warning(
+                    f"Update queue unavailable ({e}), receiver busy: asking for redelivery"
+                )
+                return web.Response(status=503)
+            logger.warning(f"Update queue unavailable ({e}), handling in receiver")
+        return web.Response()
+
+    app = web.Application()
+    app.router.add_post(WEBHOOK_PATH, receive_update)
+    return app
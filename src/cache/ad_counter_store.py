@@ -0,0 +1,377 @@
+# coding: utf-8
+"""
+Per-user ad frequency and engagement counters
+
+Ad state used to live in a process-local dict that grew with every user
+ever seen, was never evicted and differed per worker, so frequency caps
+(ads per day, bot push interval) didn't hold across workers.
+
+Now the counters live in Redis:
+
+- syntra:ads:user:{user_id} - hash with one-letter fields (see FIELDS),
+  TTL CacheTTL.AD_COUNTERS, refreshed on every write;
+- syntra:ads:today:{date}   - hash user_id -> ads shown today, expires
+  after midnight UTC, so daily counters reset by expiry, no scan needed.
+
+Decisions that need fresh numbers (record_message, get) are one
+pipelined round trip; fire-and-forget increments (add: clicks, banner
+views, messages without an ad) are buffered and written in one pipeline
+every AD_COUNTERS_FLUSH_INTERVAL, or sooner together with the next read
+for that user.
+
+A bounded LRU of compact AdCounters objects shadows what this process has
+seen. It is the source of truth when Redis is unavailable.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, UTC
+from typing import Dict, Optional
+
+from loguru import logger
+
+from config.cache_config import CacheConfig, CacheTTL
+from src.cache.cache_keys import CacheKeyBuilder
+from src.cache.redis_manager import RedisManager, get_redis_manager
+
+# AdCounters attribute -> hash field
+FIELDS: Dict[str, str] = {
+    "total_messages": "m",
+    "messages_since_ad": "s",
+    "total_impressions": "i",
+    "total_clicks": "c",
+    "last_in_chat_ad": "a",  # unix seconds
+    "last_bot_push": "p",  # unix seconds
+    "has_seen_ad": "h",  # 0/1
+}
+
+# Daily hash outlives midnight a little so late readers still see it
+_DAILY_GRACE_SECONDS = 3600
+
+
+class AdCounters:
+    """Ad counters of one user (compact: no per-instance __dict__)"""
+
+    __slots__ = (
+        "total_messages",
+        "messages_since_ad",
+        "total_impressions",
+        "total_clicks",
+        "last_in_chat_ad",
+        "last_bot_push",
+        "has_seen_ad",
+        "ads_today",
+        "day",
+    )
+
+    def __init__(self, day: date):
+        self.total_messages = 0
+        self.messages_since_ad = 0
+        self.total_impressions = 0
+        self.total_clicks = 0
+        self.last_in_chat_ad: Optional[int] = None
+        self.last_bot_push: Optional[int] = None
+        self.has_seen_ad = 0
+        self.ads_today = 0
+        self.day = day
+
+    @classmethod
+    def from_redis(
+        cls, raw: Dict[str, str], ads_today: Optional[str], day: date
+    ) -> "AdCounters":
+        counters = cls(day)
+        for attr, field in FIELDS.items():
+            if field in raw:
+                setattr(counters, attr, int(raw[field]))
+        counters.ads_today = int(ads_today or 0)
+        return counters
+
+    def apply(self, increments: Dict[str, int], values: Dict[str, int]) -> None:
+        """Apply increments/overwrites (same arguments as the Redis write)"""
+        for attr, delta in increments.items():
+            setattr(self, attr, (getattr(self, attr) or 0) + delta)
+        for attr, value in values.items():
+            setattr(self, attr, value)
+
+
+def _today() -> date:
+    return datetime.now(UTC).date()
+
+
+class AdCounterStore:
+    """
+    Redis hashes of ad counters with a bounded local shadow
+
+    Usage:
+        >>> store = get_ad_counter_store()
+        >>> counters = await store.record_message(user.id)
+        >>> store.add(user.id, total_clicks=1)
+    """
+
+    def __init__(
+        self,
+        redis_manager: Optional[RedisManager] = None,
+        max_local: int = CacheConfig.AD_COUNTERS_LOCAL_MAX,
+    ):
+        self._redis_manager = redis_manager
+        self.max_local = max_local
+        self._local: "OrderedDict[int, AdCounters]" = OrderedDict()
+        # user_id -> {attribute: delta} not yet written to Redis
+        self._pending: Dict[int, Dict[str, int]] = {}
+        self._wakeup = asyncio.Event()
+        self._flush_task: Optional[asyncio.Task] = None
+
+    @property
+    def redis(self) -> RedisManager:
+        """Redis manager (resolved lazily so tests can swap the global one)"""
+        if self._redis_manager is None:
+            self._redis_manager = get_redis_manager()
+        return self._redis_manager
+
+    @staticmethod
+    def user_key(user_id: int) -> str:
+        return CacheKeyBuilder.build("ads", "user", str(user_id))
+
+    @staticmethod
+    def daily_key(day: date) -> str:
+        return CacheKeyBuilder.build("ads", "today", day.isoformat())
+
+    @staticmethod
+    def _daily_expire_at(day: date) -> int:
+        next_midnight = datetime(day.year, day.month, day.day, tzinfo=UTC) + timedelta(
+            days=1
+        )
+        return int(next_midnight.timestamp()) + _DAILY_GRACE_SECONDS
+
+    # ===========================
+    # Local shadow
+    # ===========================
+
+    def _local_counters(
+        self, user_id: int, create: bool = True
+    ) -> Optional[AdCounters]:
+        """Shadow entry (LRU), with the daily counter reset on a new day"""
+        counters = self._local.get(user_id)
+        if counters is None:
+            if not create:
+                return None
+            counters = AdCounters(_today())
+            self._remember(user_id, counters)
+        else:
+            self._local.move_to_end(user_id)
+
+        today = _today()
+        if counters.day != today:
+            counters.ads_today = 0
+            counters.day = today
+        return counters
+
+    def _remember(self, user_id: int, counters: AdCounters) -> None:
+        self._local[user_id] = counters
+        self._local.move_to_end(user_id)
+        while len(self._local) > self.max_local:
+            self._local.popitem(last=False)
+
+    # ===========================
+    # Public API
+    # ===========================
+
+    async def get(self, user_id: int) -> AdCounters:
+        """Current counters (buffered increments for the user included)"""
+        return await self._write(user_id, {}, {}, read=True)
+
+    async def record_message(self, user_id: int) -> AdCounters:
+        """Count a chat message and return the updated counters (one round trip)"""
+        return await self._write(
+            user_id, {"total_messages": 1, "messages_since_ad": 1}, {}, read=True
+        )
+
+    async def record_in_chat_ad(self, user_id: int) -> None:
+        """In-chat ad shown: reset the message gap, bump today's and total impressions"""
+        await self._write(
+            user_id,
+            {"total_impressions": 1},
+            {
+                "messages_since_ad": 0,
+                "last_in_chat_ad": int(time.time()),
+                "has_seen_ad": 1,
+            },
+            ads_today=1,
+        )
+
+    async def record_bot_push(self, user_id: int) -> None:
+        """Promotional push sent"""
+        await self._write(
+            user_id, {"total_impressions": 1}, {"last_bot_push": int(time.time())}
+        )
+
+    def add(self, user_id: int, **increments: int) -> None:
+        """
+        Buffer counter increments (written with the next flush)
+
+        Args:
+            user_id: User's database ID
+            **increments: AdCounters attribute -> delta
+        """
+        if self.redis.client is None:
+            self._local_counters(user_id).apply(increments, {})
+            return
+
+        pending = self._pending.setdefault(user_id, {})
+        for attr, delta in increments.items():
+            pending[attr] = pending.get(attr, 0) + delta
+        local = self._local_counters(user_id, create=False)
+        if local is not None:
+            local.apply(increments, {})
+
+        if len(self._pending) >= CacheConfig.AD_COUNTERS_FLUSH_BATCH:
+            self._wakeup.set()
+
+    # ===========================
+    # Redis I/O
+    # ===========================
+
+    async def _write(
+        self,
+        user_id: int,
+        increments: Dict[str, int],
+        values: Dict[str, int],
+        ads_today: int = 0,
+        read: bool = False,
+    ) -> Optional[AdCounters]:
+        """Apply increments/overwrites in one pipeline, optionally reading back"""
+        client = self.redis.client
+        day = _today()
+        if client is None:
+            counters = self._local_counters(user_id)
+            counters.apply(increments, values)
+            counters.ads_today += ads_today
+            return counters
+
+        pending = self._pending.pop(user_id, {})
+        merged = dict(pending)
+        for attr, delta in increments.items():
+            merged[attr] = merged.get(attr, 0) + delta
+        # Overwritten fields make buffered increments of them moot
+        for attr in values:
+            merged.pop(attr, None)
+
+        key = self.user_key(user_id)
+        daily_key = self.daily_key(day)
+        try:
+            async with client.pipeline(transaction=False) as pipe:
+                for attr, delta in merged.items():
+                    pipe.hincrby(key, FIELDS[attr], delta)
+                if values:
+                    pipe.hset(
+                        key, mapping={FIELDS[attr]: v for attr, v in values.items()}
+                    )
+                pipe.expire(key, CacheTTL.AD_COUNTERS)
+                if ads_today:
+                    pipe.hincrby(daily_key, str(user_id), ads_today)
+                    pipe.expireat(daily_key, self._daily_expire_at(day))
+                if read:
+                    pipe.hgetall(key)
+                    pipe.hget(daily_key, str(user_id))
+                results = await pipe.execute()
+        except Exception as e:
+            logger.warning(
+                f"Ad counters Redis error for user {user_id}, using local state: {e}"
+            )
+            counters = self._local_counters(user_id)
+            # Shadow already has the buffered increments applied
+            counters.apply(increments, values)
+            counters.ads_today += ads_today
+            return counters
+
+        if read:
+            counters = AdCounters.from_redis(results[-2] or {}, results[-1], day)
+            self._remember(user_id, counters)
+            return counters
+
+        local = self._local_counters(user_id, create=False)
+        if local is not None:
+            local.apply(increments, values)
+            local.ads_today += ads_today
+        return local
+
+    async def flush(self) -> int:
+        """
+        Write buffered increments of all users in one pipeline
+
+        Returns:
+            Number of users written
+        """
+        client = self.redis.client
+        if client is None or not self._pending:
+            return 0
+
+        pending, self._pending = self._pending, {}
+        try:
+            async with client.pipeline(transaction=False) as pipe:
+                for user_id, increments in pending.items():
+                    key = self.user_key(user_id)
+                    for attr, delta in increments.items():
+                        pipe.hincrby(key, FIELDS[attr], delta)
+                    pipe.expire(key, CacheTTL.AD_COUNTERS)
+                await pipe.execute()
+        except Exception as e:
+            # Engagement counters are best-effort: drop rather than double-count
+            logger.warning(f"Ad counters flush failed for {len(pending)} users: {e}")
+            return 0
+
+        logger.debug(f"Ad counters flushed for {len(pending)} users")
+        return len(pending)
+
+    async def _flush_loop(self) -> None:
+        """Background loop: flush every interval or when enough users are buffered"""
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(), timeout=CacheConfig.AD_COUNTERS_FLUSH_INTERVAL
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Ad counters flush error: {e}")
+
+    def start(self) -> None:
+        """Start background flush (call from startup hooks)"""
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+            logger.info(
+                f"Ad counter store started (flush every {CacheConfig.AD_COUNTERS_FLUSH_INTERVAL}s)"
+            )
+
+    async def stop(self) -> None:
+        """Stop background flush and write what is still buffered"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+
+        await self.flush()
+
+
+# Global store instance
+_ad_counter_store: Optional[AdCounterStore] = None
+
+
+def get_ad_counter_store() -> AdCounterStore:
+    """
+    Get global ad counter store (singleton)
+
+    Returns:
+        AdCounterStore instance
+    """
+    global _ad_counter_store
+    if _ad_counter_store is None:
+        _ad_counter_store = AdCounterStore()
+    return _ad_counter_store
@@ -0,0 +1,591 @@
+# coding: utf-8
+"""
+Redis ring buffer for recent chat history + write-behind persistence
+
+Every chat turn used to read the last N messages from Postgres and write
+user/assistant messages in separate commits. Now:
+
+- each conversation (Chat or legacy per-user history) has a capped Redis
+  list of compact message records, appended write-through;
+- context building reads that list (no DB read on warm chats);
+- Postgres rows are written by a background task in bulk INSERTs.
+
+A cold conversation (no Redis list yet) is loaded from Postgres once,
+after flushing its queued messages, and then cached. Every process (bot
+workers, API) has its own write-behind queue, so queued messages are also
+counted per conversation in Redis; while any process still has some
+queued, a cold read is answered from Postgres but not cached (the cached
+list would miss those messages). Without Redis or before start()
+everything goes straight to Postgres as before.
+
+A batch that fails because the DB is unreachable is retried as a whole on
+the next flush. Any other failure is isolated per conversation, so one bad
+message (a value a column rejects) is dropped after
+CHAT_WRITE_BEHIND_MAX_ATTEMPTS flushes instead of blocking the queue.
+"""
+
+import asyncio
+import json
+from datetime import datetime, UTC
+from typing import Dict, List, NamedTuple, Optional
+
+from loguru import logger
+from redis.exceptions import RedisError
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config.cache_config import CacheConfig
+from src.cache.cache_keys import CacheKeyBuilder
+from src.cache.redis_manager import RedisManager, get_redis_manager
+from src.database.engine import is_connection_error
+from src.database.models import Chat, ChatHistory, ChatMessage
+from src.utils.text_tokens import count_tokens_async
+
+# Legacy chat_history cap per user (same as crud.add_chat_message)
+LEGACY_HISTORY_MAX = 100
+
+# First element of every list: lets an empty-but-cached chat be told apart
+# from a missing key (LRANGE returns [] for both)
+_MARKER = "{}"
+
+# Fill list for a cold conversation unless someone else already did or
+# some process still has messages of it queued for Postgres:
+#   KEYS[1] = list, KEYS[2] = queued counter,
+#   ARGV[1] = max size, ARGV[2] = ttl, ARGV[3..] = records
+_POPULATE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return 0
+end
+if tonumber(redis.call('GET', KEYS[2]) or '0') > 0 then
+    return 0
+end
+redis.call('RPUSH', KEYS[1], unpack(ARGV, 3))
+redis.call('LTRIM', KEYS[1], -tonumber(ARGV[1]) - 1, -1)
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+
+# Messages persisted (or dropped): KEYS[1] = queued counter, ARGV[1] = count
+_DONE_SCRIPT = """
+local left = redis.call('DECRBY', KEYS[1], ARGV[1])
+if left <= 0 then
+    redis.call('DEL', KEYS[1])
+end
+return left
+"""
+
+
+class CachedChatMessage(NamedTuple):
+    """Compact chat message record (duck-types ChatMessage for context building)"""
+
+    role: str
+    content: str
+    content_tokens: Optional[int]
+    timestamp: datetime
+
+    def encode(self) -> str:
+        """Serialize for Redis"""
+        return json.dumps(
+            {
+                "r": self.role,
+                "c": self.content,
+                "t": self.content_tokens,
+                "ts": self.timestamp.timestamp(),
+            },
+            ensure_ascii=False,
+        )
+
+    @classmethod
+    def decode(cls, raw: str) -> Optional["CachedChatMessage"]:
+        """Deserialize Redis record (None for the marker)"""
+        data = json.loads(raw)
+        if "r" not in data:
+            return None
+        return cls(
+            data["r"], data["c"], data.get("t"), datetime.fromtimestamp(data["ts"], UTC)
+        )
+
+    @classmethod
+    def from_row(cls, row) -> "CachedChatMessage":
+        """Build record from ChatMessage / ChatHistory row"""
+        timestamp = row.timestamp
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=UTC)
+        return cls(row.role, row.content, row.content_tokens, timestamp)
+
+
+class _PendingMessage(NamedTuple):
+    """Message waiting for write-behind persistence"""
+
+    key: str
+    chat_id: Optional[int]
+    user_id: Optional[int]
+    record: CachedChatMessage
+    tokens_used: Optional[int]
+    model: Optional[str]
+
+
+class ChatHistoryCache:
+    """
+    Per-conversation Redis ring buffer with write-behind Postgres persistence
+    """
+
+    def __init__(self, redis_manager: Optional[RedisManager] = None):
+        self._redis_manager = redis_manager
+        self.size = CacheConfig.CHAT_HISTORY_CACHE_SIZE
+        self.ttl = CacheConfig.CHAT_HISTORY_CACHE_TTL
+
+        self._queue: asyncio.Queue = asyncio.Queue(
+            maxsize=CacheConfig.CHAT_WRITE_BEHIND_QUEUE_MAX
+        )
+        self._pending: Dict[str, List[_PendingMessage]] = {}
+        # Failed messages, written before the queue on the next flush
+        self._retry: List[_PendingMessage] = []
+        # id(message) -> failed flushes (data errors only)
+        self._attempts: Dict[int, int] = {}
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._writer_task: Optional[asyncio.Task] = None
+
+        self._scripts: Dict[str, object] = {}
+        self._script_client = None
+
+    # ===========================
+    # KEYS / STATE
+    # ===========================
+
+    @property
+    def redis(self) -> RedisManager:
+        """Redis manager (resolved lazily so tests can swap the global one)"""
+        if self._redis_manager is None:
+            self._redis_manager = get_redis_manager()
+        return self._redis_manager
+
+    @staticmethod
+    def conversation_key(
+        chat_id: Optional[int] = None, user_id: Optional[int] = None
+    ) -> str:
+        """Redis key of a Chat (chat_id) or legacy per-user history (user_id)"""
+        if chat_id:
+            return CacheKeyBuilder.build("chat_history", "chat", chat_id)
+        return CacheKeyBuilder.build("chat_history", "user", user_id)
+
+    @staticmethod
+    def queued_key(key: str) -> str:
+        """Redis counter of a conversation's messages queued in any process"""
+        return f"{key}:queued"
+
+    def is_available(self) -> bool:
+        """Cache is on, Redis is up and the write-behind task is running"""
+        return (
+            CacheConfig.CHAT_HISTORY_CACHE_ENABLED
+            and self.redis.is_available()
+            and self._writer_task is not None
+            and not self._writer_task.done()
+        )
+
+    def _get_script(self, source: str):
+        """Register Lua script (re-register if Redis client changed)"""
+        client = self.redis.client
+        if self._script_client is not client:
+            self._scripts = {}
+            self._script_client = client
+        if source not in self._scripts:
+            self._scripts[source] = client.register_script(source)
+        return self._scripts[source]
+
+    # ===========================
+    # READ
+    # ===========================
+
+    async def get_recent(
+        self,
+        session: AsyncSession,
+        limit: int,
+        chat_id: Optional[int] = None,
+        user_id: Optional[int] = None,
+    ) -> List:
+        """
+        Get last `limit` messages of conversation, oldest first
+
+        Args:
+            session: Database session (used only on cache miss)
+            limit: Number of messages
+            chat_id: Chat ID (new chat system)
+            user_id: User ID (legacy chat_history, when chat_id is None)
+
+        Returns:
+            List of CachedChatMessage (or ORM rows when the cache is off)
+        """
+        if not self.is_available() or limit > self.size:
+            return await self._load_from_db(session, chat_id, user_id, limit)
+
+        key = self.conversation_key(chat_id, user_id)
+        try:
+            client = self.redis.client
+            pipe = client.pipeline(transaction=False)
+            pipe.lrange(key, -limit - 1, -1)
+            pipe.expire(key, self.ttl)
+            raw_records, _ = await pipe.execute()
+        except RedisError as e:
+            logger.warning(f"Chat history cache read failed for {key}: {e}")
+            return await self._load_from_db(session, chat_id, user_id, limit)
+
+        if raw_records:
+            records = [
+                r for r in map(CachedChatMessage.decode, raw_records) if r is not None
+            ]
+            return records[-limit:]
+
+        # Cold conversation: persist its queued messages, load from DB, cache
+        await self.flush_conversation(chat_id, user_id)
+        rows = await self._load_from_db(session, chat_id, user_id, self.size)
+        records = [CachedChatMessage.from_row(row) for row in rows]
+
+        # Messages queued after the flush above aren't in the DB result yet
+        last_ts = records[-1].timestamp if records else None
+        for pending in self._pending.get(key, []):
+            if last_ts is None or pending.record.timestamp > last_ts:
+                records.append(pending.record)
+        records = records[-self.size :]
+
+        try:
+            await self._get_script(_POPULATE_SCRIPT)(
+                keys=[key, self.queued_key(key)],
+                args=[self.size, self.ttl, _MARKER, *[r.encode() for r in records]],
+            )
+        except RedisError as e:
+            logger.warning(f"Chat history cache populate failed for {key}: {e}")
+
+        return records[-limit:]
+
+    @staticmethod
+    async def _load_from_db(
+        session: AsyncSession,
+        chat_id: Optional[int],
+        user_id: Optional[int],
+        limit: int,
+    ) -> List:
+        """Load last messages from Postgres (oldest first)"""
+        from src.database.crud import get_chat_history, get_chat_messages
+
+        if chat_id:
+            return await get_chat_messages(session, chat_id, limit=limit)
+        return await get_chat_history(session, user_id, limit=limit)
+
+    # ===========================
+    # WRITE
+    # ===========================
+
+    async def append(
+        self,
+        session: AsyncSession,
+        role: str,
+        content: str,
+        chat_id: Optional[int] = None,
+        user_id: Optional[int] = None,
+        tokens_used: Optional[int] = None,
+        model: Optional[str] = None,
+    ) -> None:
+        """
+        Append message: Redis write-through, Postgres write-behind
+
+        Args:
+            session: Database session (used only when the cache is off)
+            role: Message role (user, assistant)
+            content: Message content
+            chat_id: Chat ID (new chat system)
+            user_id: User ID (legacy chat_history, when chat_id is None)
+            tokens_used: Tokens used (for AI responses)
+            model: AI model used
+        """
+        if not self.is_available():
+            from src.database.crud import add_chat_message, add_chat_message_to_chat
+
+            if chat_id:
+                await add_chat_message_to_chat(
+                    session,
+                    chat_id=chat_id,
+                    role=role,
+                    content=content,
+                    tokens_used=tokens_used,
+                    model=model,
+                )
+            else:
+                await add_chat_message(
+                    session,
+                    user_id=user_id,
+                    role=role,
+                    content=content,
+                    tokens_used=tokens_used,
+                    model=model,
+                )
+            return
+
+        key = self.conversation_key(chat_id, user_id)
+        record = CachedChatMessage(
+            role, content, await count_tokens_async(content), datetime.now(UTC)
+        )
+
+        # Only extend lists that exist; cold chats are filled on first read
+        # (not while the queued counter says some process has unsaved messages)
+        try:
+            pipe = self.redis.client.pipeline(transaction=True)
+            pipe.rpushx(key, record.encode())
+            pipe.ltrim(key, -self.size - 1, -1)
+            pipe.expire(key, self.ttl)
+            pipe.incr(self.queued_key(key))
+            pipe.expire(self.queued_key(key), self.ttl)
+            await pipe.execute()
+        except RedisError as e:
+            logger.warning(f"Chat history cache append failed for {key}: {e}")
+            await self.invalidate(chat_id=chat_id, user_id=user_id)
+
+        pending = _PendingMessage(
+            key, chat_id, None if chat_id else user_id, record, tokens_used, model
+        )
+        self._pending.setdefault(key, []).append(pending)
+        await self._queue.put(pending)  # Waits when the queue is full (backpressure)
+        if self._queue.qsize() >= CacheConfig.CHAT_WRITE_BEHIND_BATCH:
+            self._wakeup.set()
+
+    async def flush_conversation(
+        self, chat_id: Optional[int] = None, user_id: Optional[int] = None
+    ) -> None:
+        """Persist queued messages of one conversation (before reading/deleting rows in DB)"""
+        if self.conversation_key(chat_id, user_id) in self._pending:
+            await self.flush()
+
+    async def invalidate(
+        self, chat_id: Optional[int] = None, user_id: Optional[int] = None
+    ) -> None:
+        """Drop cached list (after deletes/edits done directly in Postgres)"""
+        if not self.redis.is_available():
+            return
+        try:
+            await self.redis.client.delete(self.conversation_key(chat_id, user_id))
+        except RedisError as e:
+            logger.warning(f"Chat history cache invalidate failed: {e}")
+
+    # ===========================
+    # WRITE-BEHIND
+    # ===========================
+
+    async def flush(self) -> int:
+        """
+        Persist all queued messages now
+
+        Returns:
+            Number of messages written
+        """
+        async with self._flush_lock:
+            written = 0
+            while self._retry or not self._queue.empty():
+                batch = self._retry[: CacheConfig.CHAT_WRITE_BEHIND_BATCH]
+                del self._retry[: len(batch)]
+                while (
+                    not self._queue.empty()
+                    and len(batch) < CacheConfig.CHAT_WRITE_BEHIND_BATCH
+                ):
+                    batch.append(self._queue.get_nowait())
+                try:
+                    retry = await self._persist_batch(batch)
+                except Exception:
+                    # DB unreachable: keep batch first in line for the next flush
+                    self._retry[:0] = batch
+                    raise
+
+                retry_ids = {id(item) for item in retry}
+                done: Dict[str, int] = {}
+                for item in batch:
+                    if id(item) in retry_ids:
+                        continue
+                    self._attempts.pop(id(item), None)
+                    items = self._pending.get(item.key)
+                    if items:
+                        items.remove(item)
+                        if not items:
+                            del self._pending[item.key]
+                    done[item.key] = done.get(item.key, 0) + 1
+                    written += 1
+                await self._mark_done(done)
+                if retry:
+                    self._retry[:0] = retry
+                    break  # Next flush
+            return written
+
+    async def _mark_done(self, done: Dict[str, int]) -> None:
+        """Decrement queued counters of persisted/dropped messages"""
+        if not done or not self.redis.is_available():
+            return
+        try:
+            script = self._get_script(_DONE_SCRIPT)
+            for key, count in done.items():
+                await script(keys=[self.queued_key(key)], args=[count])
+        except RedisError as e:
+            # Counters expire with the list TTL; until then cold reads aren't cached
+            logger.warning(f"Chat history queued counter update failed: {e}")
+
+    async def _persist_batch(
+        self, batch: List[_PendingMessage]
+    ) -> List[_PendingMessage]:
+        """
+        Persist batch; if that fails with the DB reachable, retry per
+        conversation: constraint errors (e.g. chat deleted meanwhile) drop
+        the conversation, other errors retry it on the next flush up to
+        CHAT_WRITE_BEHIND_MAX_ATTEMPTS times
+
+        Returns:
+            Messages to retry on the next flush
+
+        Raises:
+            Exception: DB unreachable (nothing was written)
+        """
+        try:
+            await self._persist(batch)
+            return []
+        except Exception as e:
+            if is_connection_error(e):
+                raise
+
+        groups: Dict[str, List[_PendingMessage]] = {}
+        for item in batch:
+            groups.setdefault(item.key, []).append(item)
+
+        retry: List[_PendingMessage] = []
+        for key, items in groups.items():
+            try:
+                await self._persist(items)
+            except IntegrityError as e:
+                logger.warning(
+                    f"Chat write-behind: dropped {len(items)} messages for {key}: {e.orig}"
+                )
+            except Exception as e:
+                if is_connection_error(e):
+                    retry.extend(items)
+                    continue
+                keep = []
+                for item in items:
+                    attempts = self._attempts.get(id(item), 0) + 1
+                    self._attempts[id(item)] = attempts
+                    if attempts < CacheConfig.CHAT_WRITE_BEHIND_MAX_ATTEMPTS:
+                        keep.append(item)
+                dropped = len(items) - len(keep)
+                if dropped:
+                    logger.error(
+                        f"Chat write-behind: dropped {dropped} messages for {key} "
+                        f"after {CacheConfig.CHAT_WRITE_BEHIND_MAX_ATTEMPTS} failed flushes: {e}"
+                    )
+                retry.extend(keep)
+        return retry
+
+    @staticmethod
+    async def _persist(batch: List[_PendingMessage]) -> None:
+        """Bulk INSERT one batch in a single transaction"""
+        from src.database.engine import get_session_maker
+
+        chat_updates: Dict[int, datetime] = {}
+        legacy_users = set()
+        rows = []
+        for item in batch:
+            common = dict(
+                role=item.record.role,
+                content=item.record.content,
+                timestamp=item.record.timestamp,
+                content_tokens=item.record.content_tokens,
+                tokens_used=item.tokens_used,
+                model=item.model,
+            )
+            if item.chat_id:
+                rows.append(ChatMessage(chat_id=item.chat_id, **common))
+                chat_updates[item.chat_id] = item.record.timestamp
+            else:
+                rows.append(ChatHistory(user_id=item.user_id, **common))
+                legacy_users.add(item.user_id)
+
+        async with get_session_maker()() as session:
+            session.add_all(rows)
+            for chat_id, updated_at in chat_updates.items():
+                await session.execute(
+                    update(Chat).where(Chat.id == chat_id).values(updated_at=updated_at)
+                )
+            for user_id in legacy_users:
+                keep = (
+                    select(ChatHistory.id)
+                    .where(ChatHistory.user_id == user_id)
+                    .order_by(ChatHistory.timestamp.desc())
+                    .limit(LEGACY_HISTORY_MAX)
+                )
+                await session.execute(
+                    delete(ChatHistory)
+                    .where(ChatHistory.user_id == user_id)
+                    .where(ChatHistory.id.not_in(keep.scalar_subquery()))
+                )
+            await session.commit()
+
+        logger.debug(f"Chat write-behind: persisted {len(batch)} messages")
+
+    async def _writer_loop(self) -> None:
+        """Background loop: flush every interval or when a batch is full"""
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(), timeout=CacheConfig.CHAT_WRITE_BEHIND_INTERVAL
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(
+                    f"Chat write-behind flush failed "
+                    f"({self._queue.qsize() + len(self._retry)} queued): {e}"
+                )
+
+    def start(self) -> None:
+        """Start write-behind task (call after Redis is initialized)"""
+        if not CacheConfig.CHAT_HISTORY_CACHE_ENABLED:
+            return
+        if self._writer_task is None or self._writer_task.done():
+            self._writer_task = asyncio.create_task(self._writer_loop())
+            logger.info(
+                f"Chat history cache started (size={self.size}, "
+                f"flush every {CacheConfig.CHAT_WRITE_BEHIND_INTERVAL}s)"
+            )
+
+    async def stop(self) -> None:
+        """Stop write-behind task and persist everything still queued"""
+        if self._writer_task is not None:
+            self._writer_task.cancel()
+            try:
+                await self._writer_task
+            except asyncio.CancelledError:
+                pass
+            self._writer_task = None
+
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(
+                f"Final chat write-behind flush failed, "
+                f"{self._queue.qsize() + len(self._retry)} messages lost: {e}"
+            )
+
+
+# Global cache instance
+_chat_history_cache: Optional[ChatHistoryCache] = None
+
+
+def get_chat_history_cache() -> ChatHistoryCache:
+    """
+    Get global chat history cache (singleton)
+
+    Returns:
+        ChatHistoryCache instance
+    """
+    global _chat_history_cache
+    if _chat_history_cache is None:
+        _chat_history_cache = ChatHistoryCache()
+    return _chat_history_cache
@@ -5,8 +5,7 @@ Redis Manager for centralized cache management
 Provides async Redis client with connection pooling, graceful degradation,
 and comprehensive error handling.
 """
-import json
-from typing import Any, Optional, Union
+from typing import Any, List, Optional, Union
 from contextlib import asynccontextmanager
 
 from redis.asyncio import Redis, ConnectionPool
@@ -14,6 +13,7 @@ from redis.exceptions import RedisError, ConnectionError as RedisConnectionError
 from loguru import logger
 
 from config.cache_config import CacheConfig, CacheTTL
+from src.utils.serialization import dumps, loads
 
 
 class RedisManager:
@@ -166,12 +166,12 @@ class RedisManager:
 
             # Deserialize JSON
             try:
-                deserialized = json.loads(value)
+                deserialized = loads(value)
                 self._stats["hits"] += 1
                 if CacheConfig.CACHE_LOG_HITS:
                     logger.debug(f"Cache HIT: {key}")
                 return deserialized
-            except json.JSONDecodeError:
+            except ValueError:
                 # Value is not JSON, return as-is
                 self._stats["hits"] += 1
                 if CacheConfig.CACHE_LOG_HITS:
@@ -190,6 +190,51 @@ class RedisManager:
             logger.error(f"Unexpected error in Redis GET for key '{key}': {e}")
             return default
 
+    async def get_many(
+        self, keys: List[str], default: Any = None
+    ) -> List[Optional[Union[str, dict, list]]]:
+        """
+        Get several values in one round trip (MGET)
+
+        Args:
+            keys: Cache keys
+            default: Value for keys that are not found
+
+        Returns:
+            Values (deserialized from JSON) in the same order as keys
+        """
+        if not keys:
+            return []
+        if not self._is_available:
+            return [default] * len(keys)
+
+        try:
+            raw_values = await self._client.mget(keys)  # type: ignore
+        except RedisError as e:
+            self._stats["errors"] += 1
+            logger.warning(f"Redis MGET error for {len(keys)} keys: {e}")
+            if CacheConfig.CACHE_RAISE_ON_ERROR:
+                raise
+            return [default] * len(keys)
+        except Exception as e:
+            self._stats["errors"] += 1
+            logger.error(f"Unexpected error in Redis MGET for {len(keys)} keys: {e}")
+            return [default] * len(keys)
+
+        values = []
+        for value in raw_values:
+            if value is None:
+                self._stats["misses"] += 1
+                values.append(default)
+                continue
+
+            self._stats["hits"] += 1
+            try:
+                values.append(loads(value))
+            except ValueError:
+                values.append(value)
+        return values
+
     async def set(
         self,
         key: str,
@@ -221,13 +266,8 @@ class RedisManager:
             ttl = CacheTTL.DEFAULT
 
         try:
-            # Serialize to JSON
-            if isinstance(value, (dict, list, tuple)):
-                serialized = json.dumps(value, ensure_ascii=False)
-            elif isinstance(value, str):
-                serialized = value
-            else:
-                serialized = json.dumps(value)
+            # Serialize to JSON (strings are stored as-is)
+            serialized = value if isinstance(value, str) else dumps(value)
 
             # Set with TTL
             await self._client.setex(key, ttl, serialized)  # type: ignore
@@ -396,6 +436,18 @@ class RedisManager:
         """Check if Redis is available"""
         return self._is_available
 
+    @property
+    def client(self) -> Optional[Redis]:
+        """
+        Raw Redis client for atomic operations (Lua scripts, pipelines)
+
+        Returns:
+            Redis client, or None if Redis is unavailable
+        """
+        if not self._is_available:
+            return None
+        return self._client
+
 
 # Global Redis manager instance
 _redis_manager: Optional[RedisManager] = None
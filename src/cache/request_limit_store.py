@@ -0,0 +1,517 @@
+# coding: utf-8
+"""
+Redis-backed daily request-limit counters
+
+Keeps per-user daily counters (text/chart/vision/futures + legacy count) in a
+Redis hash and checks/increments them atomically with Lua scripts, so
+concurrent requests from one user can't race past their limit and the hot
+path does no Postgres writes.
+
+Counters are written back to the RequestLimit table periodically (for
+analytics/admin views). If Redis is unavailable every method returns None
+and callers fall back to the Postgres implementation.
+"""
+
+import asyncio
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+from loguru import logger
+from redis.exceptions import RedisError
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config.cache_config import CacheConfig
+from src.cache.cache_keys import CacheKeyBuilder
+from src.cache.redis_manager import RedisManager, get_redis_manager
+from src.database.models import RequestLimit
+
+# Counter columns mirrored in Redis (same names as RequestLimit columns)
+COUNTER_FIELDS: Tuple[str, ...] = (
+    "text_count",
+    "chart_count",
+    "vision_count",
+    "futures_count",
+    "count",  # Legacy field
+)
+LEGACY_LIMIT_FIELD = "limit"
+DEFAULT_LEGACY_LIMIT = 5
+
+# Check-and-increment:
+#   KEYS[1] = counters hash, KEYS[2] = dirty set
+#   ARGV[1] = field to check, ARGV[2] = limit (-1 = don't check)
+#   ARGV[3] = user_id (dirty set member), ARGV[4] = dirty set expire-at
+#   ARGV[5..] = fields to increment
+# Returns {status, count_before, field1, value1, ...}
+#   status: -1 = counters not seeded yet, 0 = limit reached, 1 = incremented
+_CONSUME_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return {-1, 0}
+end
+local current = tonumber(redis.call('HGET', KEYS[1], ARGV[1]) or '0')
+local limit = tonumber(ARGV[2])
+local status = 0
+if limit < 0 or current < limit then
+    for i = 5, #ARGV do
+        redis.call('HINCRBY', KEYS[1], ARGV[i], 1)
+    end
+    redis.call('SADD', KEYS[2], ARGV[3])
+    redis.call('EXPIREAT', KEYS[2], ARGV[4])
+    status = 1
+end
+local result = {status, current}
+local fields = redis.call('HGETALL', KEYS[1])
+for i = 1, #fields do
+    result[#result + 1] = fields[i]
+end
+return result
+"""
+
+# Seed counters for the day (no-op if another request seeded them first):
+#   KEYS[1] = counters hash, ARGV[1] = expire-at, ARGV[2..] = field/value pairs
+_SEED_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    redis.call('HSET', KEYS[1], unpack(ARGV, 2))
+    redis.call('EXPIREAT', KEYS[1], ARGV[1])
+end
+return redis.call('HGETALL', KEYS[1])
+"""
+
+# Overwrite fields and mark the user dirty:
+#   KEYS[1] = counters hash, KEYS[2] = dirty set
+#   ARGV[1] = user_id, ARGV[2] = dirty set expire-at, ARGV[3..] = field/value pairs
+_SET_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+redis.call('HSET', KEYS[1], unpack(ARGV, 3))
+redis.call('SADD', KEYS[2], ARGV[1])
+redis.call('EXPIREAT', KEYS[2], ARGV[2])
+return 1
+"""
+
+
+# Give back a consumed request (generation failed):
+#   KEYS[1] = counters hash, KEYS[2] = dirty set
+#   ARGV[1] = user_id, ARGV[2] = dirty set expire-at, ARGV[3..] = fields to decrement
+# Counters never go below zero. Returns 0 if the hash is gone (nothing to refund).
+_REFUND_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+for i = 3, #ARGV do
+    if tonumber(redis.call('HGET', KEYS[1], ARGV[i]) or '0') > 0 then
+        redis.call('HINCRBY', KEYS[1], ARGV[i], -1)
+    end
+end
+redis.call('SADD', KEYS[2], ARGV[1])
+redis.call('EXPIREAT', KEYS[2], ARGV[2])
+return 1
+"""
+
+
+def _pairs_to_dict(flat: Sequence) -> Dict[str, int]:
+    """Convert flat [field, value, ...] reply into {field: int}"""
+    return {str(flat[i]): int(flat[i + 1]) for i in range(0, len(flat) - 1, 2)}
+
+
+class RequestLimitStore:
+    """
+    Atomic daily request counters in Redis with periodic Postgres write-back
+
+    Key layout:
+        syntra:limits:counters:{date}_{user_id}  - hash of counters for the day
+        syntra:limits:dirty:{date}               - user ids changed since last sync
+
+    Counter hashes expire shortly after the day boundary (plus a grace period
+    so the final sync can still read them).
+
+    Usage:
+        >>> store = get_request_limit_store()
+        >>> allowed, count_before = await store.consume(
+        ...     session, user.id, "text_count", limit=10, fields=("text_count", "count")
+        ... )
+    """
+
+    def __init__(self, redis_manager: Optional[RedisManager] = None):
+        """
+        Initialize store
+
+        Args:
+            redis_manager: Redis manager (defaults to global instance)
+        """
+        self._redis_manager = redis_manager
+        self._scripts_client = None
+        self._consume = None
+        self._seed = None
+        self._set = None
+        self._refund = None
+        self._sync_task: Optional[asyncio.Task] = None
+
+    # ===========================
+    # Helpers
+    # ===========================
+
+    @property
+    def redis(self) -> RedisManager:
+        """Redis manager (resolved lazily so tests can swap the global one)"""
+        if self._redis_manager is None:
+            self._redis_manager = get_redis_manager()
+        return self._redis_manager
+
+    def is_available(self) -> bool:
+        """Check if Redis counters can be used"""
+        return CacheConfig.REQUEST_LIMITS_IN_REDIS and self.redis.client is not None
+
+    def _client(self):
+        """Get Redis client and (re)register Lua scripts for it"""
+        if not CacheConfig.REQUEST_LIMITS_IN_REDIS:
+            return None
+        client = self.redis.client
+        if client is None:
+            return None
+        if client is not self._scripts_client:
+            self._consume = client.register_script(_CONSUME_SCRIPT)
+            self._seed = client.register_script(_SEED_SCRIPT)
+            self._set = client.register_script(_SET_SCRIPT)
+            self._refund = client.register_script(_REFUND_SCRIPT)
+            self._scripts_client = client
+        return client
+
+    @staticmethod
+    def counters_key(user_id: int, day: date) -> str:
+        """Build counters hash key"""
+        return CacheKeyBuilder.build("limits", "counters", [day.isoformat(), user_id])
+
+    @staticmethod
+    def dirty_key(day: date) -> str:
+        """Build dirty set key"""
+        return CacheKeyBuilder.build("limits", "dirty", day.isoformat())
+
+    @staticmethod
+    def _expire_at(day: date) -> int:
+        """Unix timestamp when the day's keys expire (next midnight + grace)"""
+        next_midnight = datetime.combine(day + timedelta(days=1), time.min)
+        return int(next_midnight.timestamp()) + CacheConfig.REQUEST_LIMIT_KEY_GRACE
+
+    @staticmethod
+    def to_record(user_id: int, day: date, counters: Dict[str, int]) -> RequestLimit:
+        """
+        Build a detached RequestLimit snapshot from Redis counters
+
+        Lets callers that expect a RequestLimit model keep working; the object
+        is not attached to any session.
+        """
+        return RequestLimit(
+            user_id=user_id,
+            date=day,
+            **{field: counters.get(field, 0) for field in COUNTER_FIELDS},
+            limit=counters.get(LEGACY_LIMIT_FIELD, DEFAULT_LEGACY_LIMIT),
+        )
+
+    async def _seed_counters(
+        self, session: Optional[AsyncSession], user_id: int, day: date
+    ) -> Dict[str, int]:
+        """
+        Seed today's counters from Postgres (read-only) if they're not in Redis
+
+        Happens once per user per day, or after Redis lost its data.
+        """
+        record = None
+        if session is not None:
+            stmt = select(RequestLimit).where(
+                RequestLimit.user_id == user_id, RequestLimit.date == day
+            )
+            result = await session.execute(stmt)
+            record = result.scalar_one_or_none()
+
+        args = [self._expire_at(day)]
+        for field in COUNTER_FIELDS:
+            args.extend([field, getattr(record, field, 0) if record else 0])
+        args.extend(
+            [LEGACY_LIMIT_FIELD, record.limit if record else DEFAULT_LEGACY_LIMIT]
+        )
+
+        reply = await self._seed(keys=[self.counters_key(user_id, day)], args=args)
+        return _pairs_to_dict(reply)
+
+    # ===========================
+    # Public API
+    # ===========================
+
+    async def get_counters(
+        self, session: Optional[AsyncSession], user_id: int
+    ) -> Optional[Dict[str, int]]:
+        """
+        Get today's counters for user
+
+        Args:
+            session: Database session (used only to seed a cold key)
+            user_id: User ID (database ID)
+
+        Returns:
+            Dict of counters, or None if Redis is unavailable
+        """
+        client = self._client()
+        if client is None:
+            return None
+
+        day = date.today()
+        try:
+            raw = await client.hgetall(self.counters_key(user_id, day))
+            if raw:
+                return {str(k): int(v) for k, v in raw.items()}
+            return await self._seed_counters(session, user_id, day)
+        except RedisError as e:
+            logger.warning(f"Redis limit counters unavailable for user {user_id}: {e}")
+            return None
+
+    async def consume(
+        self,
+        session: Optional[AsyncSession],
+        user_id: int,
+        check_field: str,
+        limit: Optional[int],
+        fields: Iterable[str],
+    ) -> Optional[Tuple[bool, int, Dict[str, int]]]:
+        """
+        Atomically check a counter against limit and increment fields
+
+        Args:
+            session: Database session (used only to seed a cold key)
+            user_id: User ID (database ID)
+            check_field: Counter compared with limit
+            limit: Daily limit (None = increment unconditionally)
+            fields: Counters to increment if allowed
+
+        Returns:
+            Tuple of (allowed, count_before, counters after the call),
+            or None if Redis is unavailable
+        """
+        client = self._client()
+        if client is None:
+            return None
+
+        day = date.today()
+        expire_at = self._expire_at(day)
+        keys = [self.counters_key(user_id, day), self.dirty_key(day)]
+        args = [
+            check_field,
+            -1 if limit is None else limit,
+            user_id,
+            expire_at,
+            *fields,
+        ]
+
+        try:
+            reply = await self._consume(keys=keys, args=args)
+            if int(reply[0]) == -1:
+                await self._seed_counters(session, user_id, day)
+                reply = await self._consume(keys=keys, args=args)
+        except RedisError as e:
+            logger.warning(f"Redis limit consume failed for user {user_id}: {e}")
+            return None
+
+        return int(reply[0]) == 1, int(reply[1]), _pairs_to_dict(reply[2:])
+
+    async def refund(self, user_id: int, fields: Iterable[str]) -> Optional[bool]:
+        """
+        Decrement fields by one (undo a consume() whose request failed)
+
+        Args:
+            user_id: User ID (database ID)
+            fields: Counters incremented by the consume() being undone
+
+        Returns:
+            True if refunded, False if today's counters are gone,
+            or None if Redis is unavailable
+        """
+        client = self._client()
+        if client is None:
+            return None
+
+        day = date.today()
+        keys = [self.counters_key(user_id, day), self.dirty_key(day)]
+        try:
+            reply = await self._refund(
+                keys=keys, args=[user_id, self._expire_at(day), *fields]
+            )
+        except RedisError as e:
+            logger.warning(f"Redis limit refund failed for user {user_id}: {e}")
+            return None
+
+        return int(reply) == 1
+
+    async def set_fields(
+        self,
+        session: Optional[AsyncSession],
+        user_id: int,
+        values: Dict[str, int],
+    ) -> Optional[Dict[str, int]]:
+        """
+        Overwrite counter fields (admin reset, legacy limit update)
+
+        Args:
+            session: Database session (used only to seed a cold key)
+            user_id: User ID (database ID)
+            values: Field -> new value
+
+        Returns:
+            Counters after the update, or None if Redis is unavailable
+        """
+        counters = await self.get_counters(session, user_id)
+        if counters is None:
+            return None
+
+        day = date.today()
+        args = [user_id, self._expire_at(day)]
+        for field, value in values.items():
+            args.extend([field, value])
+
+        try:
+            await self._set(
+                keys=[self.counters_key(user_id, day), self.dirty_key(day)], args=args
+            )
+        except RedisError as e:
+            logger.warning(f"Redis limit update failed for user {user_id}: {e}")
+            return None
+
+        counters.update(values)
+        return counters
+
+    # ===========================
+    # Postgres write-back
+    # ===========================
+
+    async def sync_to_db(self, batch_size: int = 500) -> int:
+        """
+        Write dirty counters back to RequestLimit (today and yesterday)
+
+        Counters are merged with GREATEST() so increments made through the
+        Postgres fallback while Redis was down are never lost.
+
+        Returns:
+            Number of user/day rows written
+        """
+        from src.database.engine import get_session_maker
+
+        client = self._client()
+        if client is None:
+            return 0
+
+        today = date.today()
+        synced = 0
+
+        for day in (today - timedelta(days=1), today):
+            dirty_key = self.dirty_key(day)
+            while True:
+                try:
+                    members = await client.spop(dirty_key, batch_size)
+                    if not members:
+                        break
+                    user_ids = [int(m) for m in members]
+                    pipe = client.pipeline(transaction=False)
+                    for user_id in user_ids:
+                        pipe.hgetall(self.counters_key(user_id, day))
+                    replies = await pipe.execute()
+                except RedisError as e:
+                    logger.warning(f"Request limit sync: Redis error: {e}")
+                    return synced
+
+                rows = []
+                for user_id, raw in zip(user_ids, replies):
+                    if not raw:
+                        continue
+                    counters = {str(k): int(v) for k, v in raw.items()}
+                    rows.append(
+                        {
+                            "user_id": user_id,
+                            "date": day,
+                            **{f: counters.get(f, 0) for f in COUNTER_FIELDS},
+                            "limit": counters.get(
+                                LEGACY_LIMIT_FIELD, DEFAULT_LEGACY_LIMIT
+                            ),
+                        }
+                    )
+                if not rows:
+                    continue
+
+                try:
+                    stmt = pg_insert(RequestLimit).values(rows)
+                    update_cols = {
+                        f: func.greatest(getattr(RequestLimit, f), stmt.excluded[f])
+                        for f in COUNTER_FIELDS
+                    }
+                    update_cols["limit"] = stmt.excluded.limit
+                    stmt = stmt.on_conflict_do_update(
+                        constraint="uix_user_date", set_=update_cols
+                    )
+
+                    session_maker = get_session_maker()
+                    async with session_maker() as session:
+                        await session.execute(stmt)
+                        await session.commit()
+                    synced += len(rows)
+                except Exception as e:
+                    logger.error(f"Request limit sync: DB write failed: {e}")
+                    # Put users back so the next run retries them
+                    try:
+                        await client.sadd(dirty_key, *user_ids)
+                    except RedisError:
+                        pass
+                    return synced
+
+        if synced:
+            logger.debug(f"Request limit sync: wrote {synced} counter rows to Postgres")
+        return synced
+
+    async def _sync_loop(self) -> None:
+        """Background loop: periodic write-back"""
+        interval = CacheConfig.REQUEST_LIMIT_SYNC_INTERVAL
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.sync_to_db()
+            except Exception as e:
+                logger.error(f"Request limit sync loop error: {e}")
+
+    def start(self) -> None:
+        """Start periodic write-back (call after Redis is initialized)"""
+        if self._sync_task is None or self._sync_task.done():
+            self._sync_task = asyncio.create_task(self._sync_loop())
+            logger.info(
+                f"Request limit sync started (interval={CacheConfig.REQUEST_LIMIT_SYNC_INTERVAL}s)"
+            )
+
+    async def stop(self) -> None:
+        """Stop write-back loop and flush pending counters"""
+        if self._sync_task is not None:
+            self._sync_task.cancel()
+            try:
+                await self._sync_task
+            except asyncio.CancelledError:
+                pass
+            self._sync_task = None
+
+        try:
+            await self.sync_to_db()
+        except Exception as e:
+            logger.error(f"Final request limit sync failed: {e}")
+
+
+# Global store instance
+_request_limit_store: Optional[RequestLimitStore] = None
+
+
+def get_request_limit_store() -> RequestLimitStore:
+    """
+    Get global request limit store (singleton)
+
+    Returns:
+        RequestLimitStore instance
+    """
+    global _request_limit_store
+    if _request_limit_store is None:
+        _request_limit_store = RequestLimitStore()
+    return _request_limit_store
@@ -0,0 +1,101 @@
+# coding: utf-8
+"""
+Recent Vision analyses keyed by exact image content
+
+Users often send the same chart again (re-sent, forwarded). The analysis is
+stored under the photo's Telegram file_unique_id, which identifies the file
+content, plus everything else that shapes the answer (caption, language,
+detail), so a repeat within CacheTTL.VISION_ANALYSIS is answered without
+another Vision call. The detected coin follows from the image and caption,
+so it's stored with the analysis rather than keyed on: a hit skips the
+download, coin detection and the market data fetch too.
+
+A perceptual hash isn't used as the key: two different charts of the same
+pair can share a dHash, and serving one's analysis for the other would be
+wrong. A chart that moved by a candle is a different file and is analysed
+again.
+"""
+
+import hashlib
+from typing import Any, Dict, Optional
+
+from loguru import logger
+
+from config.cache_config import CacheTTL
+from config.config import VISION_ANALYSIS_CACHE_ENABLED
+from src.cache.cache_keys import CacheKeyBuilder
+from src.cache.redis_manager import get_redis_manager
+
+
+class VisionAnalysisCache:
+    """
+    Redis cache of finished chart analyses
+    """
+
+    def __init__(self, redis_manager=None):
+        self._redis_manager = redis_manager
+
+    @property
+    def redis(self):
+        """Redis manager (resolved lazily so tests can swap the global one)"""
+        if self._redis_manager is None:
+            self._redis_manager = get_redis_manager()
+        return self._redis_manager
+
+    def key(
+        self,
+        content_id: str,
+        language: str,
+        detail: str,
+        user_prompt: Optional[str] = None,
+    ) -> str:
+        prompt_hash = hashlib.sha1((user_prompt or "").encode()).hexdigest()[:12]
+        return CacheKeyBuilder.build(
+            "vision",
+            "analysis",
+            f"{content_id}:{language}:{detail}:{prompt_hash}",
+        )
+
+    async def get(
+        self, content_id: Optional[str], **params
+    ) -> Optional[Dict[str, Any]]:
+        """Cached {"analysis", "coin_id", "market_data"} or None"""
+        if not VISION_ANALYSIS_CACHE_ENABLED or not content_id:
+            return None
+        cached = await self.redis.get(self.key(content_id, **params))
+        if isinstance(cached, dict) and cached.get("analysis"):
+            logger.debug(f"Vision analysis cache HIT: {content_id}")
+            return {
+                "analysis": cached["analysis"],
+                "coin_id": cached.get("coin_id"),
+                "market_data": cached.get("market_data"),
+            }
+        return None
+
+    async def set(
+        self,
+        content_id: Optional[str],
+        analysis: str,
+        coin_id: Optional[str] = None,
+        market_data: Optional[Dict[str, Any]] = None,
+        **params,
+    ) -> None:
+        """Store finished analysis with the coin and market data it was built on"""
+        if not VISION_ANALYSIS_CACHE_ENABLED or not content_id or not analysis:
+            return
+        await self.redis.set(
+            self.key(content_id, **params),
+            {"analysis": analysis, "coin_id": coin_id, "market_data": market_data},
+            ttl=CacheTTL.VISION_ANALYSIS,
+        )
+
+
+_vision_analysis_cache: Optional[VisionAnalysisCache] = None
+
+
+def get_vision_analysis_cache() -> VisionAnalysisCache:
+    """Get global vision analysis cache"""
+    global _vision_analysis_cache
+    if _vision_analysis_cache is None:
+        _vision_analysis_cache = VisionAnalysisCache()
+    return _vision_analysis_cache
@@ -12,6 +12,14 @@ from sqlalchemy import select, update, delete, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload, joinedload
 
+from src.cache.chat_history_cache import get_chat_history_cache
+from src.cache.request_limit_store import get_request_limit_store
+from src.database.rollups import (
+    aggregate_costs,
+    aggregate_revenue,
+    aggregate_user_activity,
+)
+from src.utils.text_tokens import count_tokens_async
 from src.database.models import (
     User,
     Chat,
@@ -328,12 +336,13 @@ async def add_chat_message(
             f"(exceeded limit of {MAX_MESSAGES_PER_USER})"
         )
 
-    # Создаем новое сообщение
+    # Создаем новое сообщение (токены считаем один раз при записи)
     message = ChatHistory(
         user_id=user_id,
         role=role,
         content=content,
         tokens_used=tokens_used,
+        content_tokens=await count_tokens_async(content),
         model=model,
     )
     session.add(message)
@@ -381,9 +390,13 @@ async def clear_chat_history(session: AsyncSession, user_id: int) -> int:
     Returns:
         Number of deleted messages
     """
+    chat_cache = get_chat_history_cache()
+    await chat_cache.flush_conversation(user_id=user_id)
+
     stmt = delete(ChatHistory).where(ChatHistory.user_id == user_id)
     result = await session.execute(stmt)
     await session.commit()
+    await chat_cache.invalidate(user_id=user_id)
 
     deleted_count = result.rowcount
     logger.info(f"Cleared {deleted_count} messages for user {user_id}")
@@ -437,6 +450,7 @@ async def delete_chat_message(
 
     deleted = result.rowcount > 0
     if deleted:
+        await get_chat_history_cache().invalidate(user_id=user_id)
         logger.info(f"Deleted message {message_id} for user {user_id}")
     return deleted
 
@@ -525,8 +539,19 @@ async def increment_request_count(session: AsyncSession, user_id: int) -> Reques
         user_id: User ID (database ID)
 
     Returns:
-        Updated RequestLimit model
+        Updated RequestLimit model (detached snapshot when counters are in Redis)
     """
+    store = get_request_limit_store()
+    result = await store.consume(
+        session, user_id, check_field="count", limit=None, fields=("count",)
+    )
+    if result is not None:
+        _, _, counters = result
+        logger.info(
+            f"User {user_id} request count: {counters.get('count', 0)}/{counters.get('limit')}"
+        )
+        return store.to_record(user_id, date.today(), counters)
+
     limit_record = await get_or_create_request_limit(session, user_id)
     limit_record.count += 1
     await session.commit()
@@ -554,6 +579,15 @@ async def check_request_limit(
     # Get user's limit based on subscription tier
     user_limit = user.get_request_limit()
 
+    # Redis counters (no DB writes on the hot path)
+    store = get_request_limit_store()
+    counters = await store.get_counters(session, user.id)
+    if counters is not None:
+        if counters.get("limit") != user_limit:
+            await store.set_fields(session, user.id, {"limit": user_limit})
+        current_count = counters.get("count", 0)
+        return current_count < user_limit, current_count, user_limit
+
     # Get or create request limit record
     limit_record = await get_or_create_request_limit(session, user.id)
 
@@ -584,6 +618,9 @@ async def reset_request_limit(session: AsyncSession, user_id: int) -> RequestLim
     await session.commit()
     await session.refresh(limit_record)
 
+    # Keep Redis counters in sync, otherwise write-back would restore old value
+    await get_request_limit_store().set_fields(session, user_id, {"count": 0})
+
     logger.info(f"Request limit reset for user {user_id}")
     return limit_record
 
@@ -665,8 +702,13 @@ async def get_daily_limit_info(session: AsyncSession, user_id: int) -> dict:
     """
     from datetime import datetime, time, UTC, timedelta
 
-    # Get today's limit record
-    limit_record = await get_or_create_request_limit(session, user_id)
+    # Get today's limit record (Redis first, DB fallback)
+    store = get_request_limit_store()
+    counters = await store.get_counters(session, user_id)
+    if counters is not None:
+        limit_record = store.to_record(user_id, date.today(), counters)
+    else:
+        limit_record = await get_or_create_request_limit(session, user_id)
 
     # Calculate reset time (midnight UTC tomorrow)
     today = datetime.now(UTC).date()
@@ -744,27 +786,12 @@ async def get_total_costs(
     Returns:
         Dict with total_cost, total_tokens, request_count
     """
-    stmt = select(
-        func.sum(CostTracking.cost).label("total_cost"),
-        func.sum(CostTracking.tokens).label("total_tokens"),
-        func.count(CostTracking.id).label("request_count"),
-    )
-
-    if start_date:
-        stmt = stmt.where(CostTracking.timestamp >= start_date)
-    if end_date:
-        stmt = stmt.where(CostTracking.timestamp <= end_date)
-    if service:
-        stmt = stmt.where(CostTracking.service == service)
-
-    result = await session.execute(stmt)
-    row = result.one()
+    # Closed days come from daily_cost_rollups, edges from raw rows
+    totals = await aggregate_costs(session, start_date, end_date, service=service)
 
-    return {
-        "total_cost": float(row.total_cost or 0),
-        "total_tokens": int(row.total_tokens or 0),
-        "request_count": int(row.request_count or 0),
-    }
+    return totals.get(
+        (), {"total_cost": 0.0, "total_tokens": 0, "request_count": 0}
+    )
 
 
 async def get_user_costs(
@@ -928,10 +955,9 @@ async def get_detailed_user_stats(session: AsyncSession, days: int = 7) -> dict:
     active_period_result = await session.execute(active_period_stmt)
     active_period = active_period_result.scalar()
 
-    # New users in last N days
-    new_users_stmt = select(func.count(User.id)).where(User.created_at >= period_start)
-    new_users_result = await session.execute(new_users_stmt)
-    new_users = new_users_result.scalar()
+    # New users in last N days (daily signups rollup)
+    activity = await aggregate_user_activity(session, period_start, fields=("signups",))
+    new_users = activity["signups"]
 
     # Inactive users (>7 days)
     inactive_threshold = datetime.now(UTC) - timedelta(days=7)
@@ -1121,36 +1147,16 @@ async def get_costs_by_service(
     Returns:
         List of dicts with service costs
     """
-    stmt = (
-        select(
-            CostTracking.service,
-            CostTracking.model,
-            func.sum(CostTracking.cost).label("total_cost"),
-            func.sum(CostTracking.tokens).label("total_tokens"),
-            func.count(CostTracking.id).label("request_count"),
-        )
-        .group_by(CostTracking.service, CostTracking.model)
-        .order_by(func.sum(CostTracking.cost).desc())
+    totals = await aggregate_costs(
+        session, start_date, end_date, group_by=("service", "model")
     )
 
-    if start_date:
-        stmt = stmt.where(CostTracking.timestamp >= start_date)
-    if end_date:
-        stmt = stmt.where(CostTracking.timestamp <= end_date)
-
-    result = await session.execute(stmt)
-    rows = result.all()
-
-    return [
-        {
-            "service": row.service,
-            "model": row.model,
-            "total_cost": float(row.total_cost or 0),
-            "total_tokens": int(row.total_tokens or 0),
-            "request_count": int(row.request_count or 0),
-        }
-        for row in rows
+    rows = [
+        {"service": service, "model": model or None, **values}
+        for (service, model), values in totals.items()
     ]
+    rows.sort(key=lambda row: row["total_cost"], reverse=True)
+    return rows
 
 
 async def get_costs_by_day(session: AsyncSession, days: int = 7) -> List[dict]:
@@ -1166,29 +1172,11 @@ async def get_costs_by_day(session: AsyncSession, days: int = 7) -> List[dict]:
     """
     start_date = datetime.now(UTC) - timedelta(days=days)
 
-    stmt = (
-        select(
-            func.date(CostTracking.timestamp).label("date"),
-            func.sum(CostTracking.cost).label("total_cost"),
-            func.sum(CostTracking.tokens).label("total_tokens"),
-            func.count(CostTracking.id).label("request_count"),
-        )
-        .where(CostTracking.timestamp >= start_date)
-        .group_by(func.date(CostTracking.timestamp))
-        .order_by(func.date(CostTracking.timestamp).desc())
-    )
-
-    result = await session.execute(stmt)
-    rows = result.all()
+    totals = await aggregate_costs(session, start_date, group_by=("day",))
 
     return [
-        {
-            "date": row.date.isoformat() if row.date else None,
-            "total_cost": float(row.total_cost or 0),
-            "total_tokens": int(row.total_tokens or 0),
-            "request_count": int(row.request_count or 0),
-        }
-        for row in rows
+        {"date": day.isoformat() if day else None, **values}
+        for (day,), values in sorted(totals.items(), reverse=True)
     ]
 
 
@@ -1762,47 +1750,42 @@ async def get_revenue_stats(
     Returns:
         Dict with revenue stats
     """
-    stmt = select(
-        func.count(Payment.id).label("total_payments"),
-        func.sum(Payment.amount).label("total_revenue"),
-        func.avg(Payment.amount).label("avg_payment"),
-    ).where(Payment.status == PaymentStatus.COMPLETED.value)
+    # Revenue by tier (closed days from daily_revenue_rollups)
+    totals = await aggregate_revenue(session, start_date, end_date, group_by=("tier",))
+    by_tier = {tier: values for (tier,), values in totals.items()}
 
-    if start_date:
-        stmt = stmt.where(Payment.completed_at >= start_date)
-    if end_date:
-        stmt = stmt.where(Payment.completed_at <= end_date)
+    total_payments = sum(values["count"] for values in by_tier.values())
+    total_revenue = sum(values["revenue"] for values in by_tier.values())
 
-    result = await session.execute(stmt)
-    row = result.one()
+    return {
+        "total_payments": total_payments,
+        "total_revenue": total_revenue,
+        "avg_payment": (total_revenue / total_payments) if total_payments > 0 else 0.0,
+        "by_tier": by_tier,
+    }
 
-    # Revenue by tier
-    stmt_tiers = (
-        select(
-            Payment.tier,
-            func.sum(Payment.amount).label("revenue"),
-            func.count(Payment.id).label("count"),
-        )
-        .where(Payment.status == PaymentStatus.COMPLETED.value)
-        .group_by(Payment.tier)
-    )
 
-    if start_date:
-        stmt_tiers = stmt_tiers.where(Payment.completed_at >= start_date)
-    if end_date:
-        stmt_tiers = stmt_tiers.where(Payment.completed_at <= end_date)
+async def get_revenue_by_provider(
+    session: AsyncSession,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+) -> Dict[str, dict]:
+    """
+    Get completed payments grouped by provider
 
-    result_tiers = await session.execute(stmt_tiers)
-    by_tier = {
-        row.tier: {"revenue": float(row.revenue or 0), "count": row.count}
-        for row in result_tiers.all()
-    }
+    Args:
+        session: Database session
+        start_date: Start date (optional)
+        end_date: End date (optional)
+
+    Returns:
+        Dict provider -> {"amount", "count"}
+    """
+    totals = await aggregate_revenue(session, start_date, end_date, group_by=("provider",))
 
     return {
-        "total_payments": row.total_payments or 0,
-        "total_revenue": float(row.total_revenue or 0),
-        "avg_payment": float(row.avg_payment or 0),
-        "by_tier": by_tier,
+        provider: {"amount": values["revenue"], "count": values["count"]}
+        for (provider,), values in totals.items()
     }
 
 
@@ -1992,15 +1975,11 @@ async def get_churn_rate(session: AsyncSession, days: int = 30) -> dict:
     result_start = await session.execute(stmt_start)
     active_at_start = result_start.scalar() or 0
 
-    # Subscriptions that became inactive during period
-    stmt_churned = (
-        select(func.count(Subscription.id))
-        .where(Subscription.updated_at >= start_date)
-        .where(Subscription.updated_at <= end_date)
-        .where(Subscription.is_active == False)
+    # Subscriptions that became inactive during period (daily churn rollup)
+    activity = await aggregate_user_activity(
+        session, start_date, end_date, fields=("churned_subscriptions",)
     )
-    result_churned = await session.execute(stmt_churned)
-    churned = result_churned.scalar() or 0
+    churned = activity["churned_subscriptions"]
 
     # Calculate churn rate
     churn_rate = (churned / active_at_start * 100) if active_at_start > 0 else 0
@@ -3693,8 +3672,12 @@ async def delete_chat(
     if not chat:
         return False
 
+    chat_cache = get_chat_history_cache()
+    await chat_cache.flush_conversation(chat_id=chat_id)
+
     await session.delete(chat)
     await session.commit()
+    await chat_cache.invalidate(chat_id=chat_id)
 
     logger.info(f"Deleted chat {chat_id} for user {user_id}")
     return True
@@ -3728,6 +3711,7 @@ async def add_chat_message_to_chat(
         content=content,
         timestamp=datetime.now(UTC),
         tokens_used=tokens_used,
+        content_tokens=await count_tokens_async(content),
         model=model,
     )
     session.add(message)
@@ -3786,6 +3770,36 @@ async def get_chat_messages(
         return list(result.scalars().all())
 
 
+async def update_chat_summary(
+    session: AsyncSession,
+    chat_id: int,
+    summary: str,
+    until: datetime,
+) -> None:
+    """
+    Store rolling context summary for chat
+
+    Args:
+        session: Database session
+        chat_id: Chat ID
+        summary: Summary of older turns
+        until: Timestamp of the last message covered by summary
+    """
+    stmt = (
+        update(Chat)
+        .where(Chat.id == chat_id)
+        .values(
+            context_summary=summary,
+            context_summary_until=until,
+            updated_at=Chat.updated_at,  # Summary is not chat activity
+        )
+    )
+    await session.execute(stmt)
+    await session.commit()
+
+    logger.debug(f"Updated context summary for chat {chat_id} (until {until.isoformat()})")
+
+
 async def get_or_create_default_chat(
     session: AsyncSession,
     user_id: int,
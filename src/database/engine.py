@@ -4,7 +4,12 @@ Database engine configuration for Syntra Trade Consultant Bot
 Async SQLAlchemy 2.0 setup with connection pooling
 """
 
-from typing import AsyncGenerator
+import asyncio
+import re
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, AsyncIterator, Dict, Any
+from uuid import uuid4
 
 from fastapi import HTTPException
 from fastapi.exceptions import RequestValidationError
@@ -14,9 +19,26 @@ from sqlalchemy.ext.asyncio import (
     AsyncSession,
     async_sessionmaker,
 )
+from sqlalchemy import event, text
+from sqlalchemy.exc import DBAPIError, DisconnectionError, InterfaceError, OperationalError
 from sqlalchemy.pool import AsyncAdaptedQueuePool
 
-from config.config import DATABASE_URL, ENVIRONMENT
+from config.config import (
+    DATABASE_URL,
+    ENVIRONMENT,
+    DB_CONNECTION_MODE,
+    DB_STATEMENT_CACHE_SIZE,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_STATEMENT_METRICS,
+    DATABASE_REPLICA_URL,
+    DB_ANALYTICS_POOL_SIZE,
+    DB_ANALYTICS_MAX_OVERFLOW,
+    DB_ANALYTICS_STATEMENT_TIMEOUT_MS,
+    DB_REPLICA_MAX_LAG_SECONDS,
+    DB_REPLICA_CHECK_INTERVAL_SECONDS,
+)
 from src.database.models import Base
 
 from loguru import logger
@@ -26,6 +48,103 @@ from loguru import logger
 engine: AsyncEngine | None = None
 AsyncSessionLocal: async_sessionmaker[AsyncSession] | None = None
 
+# Analytics engines: separate pools so heavy reports can't starve chat/limit queries
+# "replica" exists only when DATABASE_REPLICA_URL is set; "primary" is the fallback
+analytics_engines: Dict[str, AsyncEngine] = {}
+_analytics_session_makers: Dict[str, async_sessionmaker[AsyncSession]] = {}
+_replica_health: Dict[str, float] = {"checked_at": 0.0, "lag": 0.0, "ok": 0.0}
+
+# Per-statement timings (only collected when DB_STATEMENT_METRICS=true),
+# keyed by statement fingerprint; statements past the cap share one entry
+_statement_stats: Dict[str, Dict[str, float]] = {}
+STATEMENT_STATS_MAX = 500
+_OTHER_STATEMENTS = "(other statements)"
+
+# Literals / bind parameters -> "?", IN lists of them -> "(...)"
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\$\d+|%\(\w+\)s|:\w+|\b\d+(?:\.\d+)?\b")
+_VALUE_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+
+CONNECTION_MODES = ("direct", "pgbouncer", "pgbouncer_prepared")
+
+
+def is_connection_error(error: Exception) -> bool:
+    """DB unreachable (retry everything later) vs. a problem with the data"""
+    if isinstance(error, DBAPIError) and error.connection_invalidated:
+        return True
+    return isinstance(
+        error,
+        (OperationalError, InterfaceError, DisconnectionError, OSError, asyncio.TimeoutError),
+    )
+
+
+def _unique_statement_name() -> str:
+    """Unique prepared statement name (PgBouncer may route to another backend)"""
+    return f"__asyncpg_{uuid4()}__"
+
+
+def get_connect_args(mode: str = DB_CONNECTION_MODE) -> Dict[str, Any]:
+    """
+    Build asyncpg connect args for connection mode
+
+    Args:
+        mode: direct / pgbouncer / pgbouncer_prepared (see config.DB_CONNECTION_MODE)
+
+    Returns:
+        connect_args for create_async_engine
+    """
+    if mode not in CONNECTION_MODES:
+        raise ValueError(f"Unknown DB_CONNECTION_MODE: {mode} (expected one of {CONNECTION_MODES})")
+
+    cache_enabled = mode in ("direct", "pgbouncer_prepared")
+    cache_size = DB_STATEMENT_CACHE_SIZE if cache_enabled else 0
+
+    connect_args: Dict[str, Any] = {
+        # asyncpg-level cache (used for its own introspection queries)
+        "statement_cache_size": cache_size,
+        # SQLAlchemy asyncpg adapter cache (prepared statements for our queries)
+        "prepared_statement_cache_size": cache_size,
+        "server_settings": {
+            "application_name": "syntra_bot",
+            "jit": "off",  # Disable JIT for better performance with small queries
+        },
+    }
+    if mode != "direct":
+        # Named statements must not collide across pooled server connections
+        connect_args["prepared_statement_name_func"] = _unique_statement_name
+
+    return connect_args
+
+
+def statement_fingerprint(statement: str) -> str:
+    """SQL with literals and IN lists collapsed (one stats entry per query shape)"""
+    fingerprint = _LITERAL_RE.sub("?", " ".join(statement.split()))
+    return _VALUE_LIST_RE.sub("(...)", fingerprint)
+
+
+def _install_statement_metrics(eng: AsyncEngine) -> None:
+    """Collect per-statement count/total time via cursor execute events"""
+
+    @event.listens_for(eng.sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(eng.sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["_query_start"].pop()
+        key = statement_fingerprint(statement)
+        if key not in _statement_stats and len(_statement_stats) >= STATEMENT_STATS_MAX:
+            key = _OTHER_STATEMENTS
+        stats = _statement_stats.setdefault(key, {"count": 0, "total_ms": 0.0})
+        stats["count"] += 1
+        stats["total_ms"] += elapsed * 1000
+
+    @event.listens_for(eng.sync_engine, "handle_error")
+    def _error(context):
+        # Failed statements never reach after_cursor_execute
+        conn = context.connection
+        if conn is not None and conn.info.get("_query_start"):
+            conn.info["_query_start"].pop()
+
 
 def get_engine() -> AsyncEngine:
     """
@@ -39,36 +158,152 @@ def get_engine() -> AsyncEngine:
     if engine is None:
         # Production vs Development settings
         is_production = ENVIRONMENT == "production"
+        pool_size = DB_POOL_SIZE if DB_POOL_SIZE is not None else (10 if is_production else 5)
+        max_overflow = (
+            DB_MAX_OVERFLOW if DB_MAX_OVERFLOW is not None else (20 if is_production else 10)
+        )
 
         engine = create_async_engine(
             DATABASE_URL,
             # Connection pooling
             poolclass=AsyncAdaptedQueuePool,
-            pool_size=10 if is_production else 5,
-            max_overflow=20 if is_production else 10,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=DB_POOL_TIMEOUT,
             pool_pre_ping=True,  # Verify connections before using
             pool_recycle=3600,  # Recycle connections every hour
             # Logging (disabled - using loguru)
             echo=False,  # Don't spam SQL queries
             echo_pool=False,  # Don't log pool operations
-            # Performance
-            connect_args={
-                "statement_cache_size": 0,  # Disable prepared statement cache
-                "server_settings": {
-                    "application_name": "syntra_bot",
-                    "jit": "off",  # Disable JIT for better performance with small queries
-                },
-            },
+            # Performance: prepared statement cache depends on DB_CONNECTION_MODE
+            connect_args=get_connect_args(DB_CONNECTION_MODE),
         )
 
+        if DB_STATEMENT_METRICS:
+            _install_statement_metrics(engine)
+
         logger.info(
-            f"Database engine created - Environment: {ENVIRONMENT}, "
-            f"Pool size: {engine.pool.size()}, Max overflow: {engine.pool.overflow()}"
+            f"Database engine created - Environment: {ENVIRONMENT}, mode: {DB_CONNECTION_MODE}, "
+            f"Pool size: {pool_size}, Max overflow: {max_overflow}"
         )
 
     return engine
 
 
+def _get_analytics_session_maker(target: str) -> async_sessionmaker[AsyncSession]:
+    """
+    Create (once) analytics engine + session maker for target
+
+    Args:
+        target: "replica" (DATABASE_REPLICA_URL) or "primary" (DATABASE_URL)
+    """
+    if target not in _analytics_session_makers:
+        connect_args = get_connect_args(DB_CONNECTION_MODE)
+        connect_args["server_settings"] = {
+            **connect_args["server_settings"],
+            "application_name": "syntra_analytics",
+            "statement_timeout": str(DB_ANALYTICS_STATEMENT_TIMEOUT_MS),
+        }
+
+        eng = create_async_engine(
+            DATABASE_REPLICA_URL if target == "replica" else DATABASE_URL,
+            poolclass=AsyncAdaptedQueuePool,
+            pool_size=DB_ANALYTICS_POOL_SIZE,
+            max_overflow=DB_ANALYTICS_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_pre_ping=True,
+            pool_recycle=3600,
+            echo=False,
+            connect_args=connect_args,
+        )
+        analytics_engines[target] = eng
+        _analytics_session_makers[target] = async_sessionmaker(
+            eng,
+            class_=AsyncSession,
+            expire_on_commit=False,
+            autoflush=False,
+        )
+
+        logger.info(
+            f"Analytics engine created - target: {target}, "
+            f"Pool size: {DB_ANALYTICS_POOL_SIZE}, Max overflow: {DB_ANALYTICS_MAX_OVERFLOW}"
+        )
+
+    return _analytics_session_makers[target]
+
+
+async def _replica_is_usable() -> bool:
+    """
+    Check replica reachability and replication lag (cached for a few seconds)
+
+    Returns:
+        True if replica lag is within DB_REPLICA_MAX_LAG_SECONDS
+    """
+    if not DATABASE_REPLICA_URL:
+        return False
+
+    now = time.monotonic()
+    if now - _replica_health["checked_at"] < DB_REPLICA_CHECK_INTERVAL_SECONDS:
+        return bool(_replica_health["ok"])
+
+    _replica_health["checked_at"] = now
+    try:
+        session_maker = _get_analytics_session_maker("replica")
+        async with session_maker() as session:
+            result = await session.execute(
+                text(
+                    "SELECT CASE WHEN pg_is_in_recovery() THEN "
+                    "COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) "
+                    "ELSE 0 END"
+                )
+            )
+            lag = float(result.scalar() or 0)
+        _replica_health["lag"] = lag
+        _replica_health["ok"] = float(lag <= DB_REPLICA_MAX_LAG_SECONDS)
+        if lag > DB_REPLICA_MAX_LAG_SECONDS:
+            logger.warning(
+                f"Replica lag {lag:.1f}s > {DB_REPLICA_MAX_LAG_SECONDS}s - analytics use primary"
+            )
+    except Exception as e:
+        _replica_health["ok"] = 0.0
+        logger.warning(f"Replica unavailable ({e}) - analytics use primary")
+
+    return bool(_replica_health["ok"])
+
+
+@asynccontextmanager
+async def analytics_session() -> AsyncIterator[AsyncSession]:
+    """
+    Read-only session for heavy analytics/admin queries
+
+    Routed to the read replica when it's reachable and fresh enough,
+    otherwise to a separate small pool on the primary. Never commits.
+
+    Usage:
+        async with analytics_session() as session:
+            metrics = await get_business_metrics(session)
+    """
+    target = "replica" if await _replica_is_usable() else "primary"
+    session_maker = _get_analytics_session_maker(target)
+    async with session_maker() as session:
+        try:
+            yield session
+        finally:
+            await session.rollback()
+
+
+async def get_analytics_session() -> AsyncGenerator[AsyncSession, None]:
+    """
+    FastAPI dependency for read-only analytics endpoints
+
+    Usage:
+        async def handler(session: AsyncSession = Depends(get_analytics_session)):
+            ...
+    """
+    async with analytics_session() as session:
+        yield session
+
+
 def get_session_maker() -> async_sessionmaker[AsyncSession]:
     """
     Create async session maker
@@ -170,6 +405,69 @@ async def dispose_engine() -> None:
         engine = None
         AsyncSessionLocal = None
 
+    for target, eng in list(analytics_engines.items()):
+        await eng.dispose()
+        logger.info(f"Analytics engine disposed ({target})")
+    analytics_engines.clear()
+    _analytics_session_makers.clear()
+
+
+def get_pool_stats(top_statements: int = 10) -> Dict[str, Any]:
+    """
+    Get connection pool and statement metrics
+
+    Args:
+        top_statements: Number of slowest statements (by total time) to include
+
+    Returns:
+        Dict with pool usage, statement cache settings and (if enabled) query timings
+    """
+    stats: Dict[str, Any] = {
+        "mode": DB_CONNECTION_MODE,
+        "statement_cache_size": get_connect_args(DB_CONNECTION_MODE)["statement_cache_size"],
+        "statement_metrics_enabled": DB_STATEMENT_METRICS,
+    }
+
+    if engine is not None:
+        pool = engine.pool
+        stats["pool"] = {
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+        }
+
+    for target, eng in analytics_engines.items():
+        pool = eng.pool
+        stats[f"analytics_pool_{target}"] = {
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+        }
+    if DATABASE_REPLICA_URL:
+        stats["replica"] = {
+            "usable": bool(_replica_health["ok"]),
+            "lag_seconds": round(_replica_health["lag"], 2),
+            "max_lag_seconds": DB_REPLICA_MAX_LAG_SECONDS,
+        }
+
+    if _statement_stats:
+        top = sorted(
+            _statement_stats.items(), key=lambda item: item[1]["total_ms"], reverse=True
+        )[:top_statements]
+        stats["top_statements"] = [
+            {
+                "statement": statement[:200],
+                "count": int(data["count"]),
+                "total_ms": round(data["total_ms"], 2),
+                "avg_ms": round(data["total_ms"] / data["count"], 3),
+            }
+            for statement, data in top
+        ]
+
+    return stats
+
 
 # For testing and manual operations
 async def check_connection() -> bool:
@@ -192,7 +490,6 @@ async def check_connection() -> bool:
 
 if __name__ == "__main__":
     # Test database connection
-    import asyncio
     from config.logging import setup_logging
 
     setup_logging()
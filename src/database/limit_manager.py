@@ -2,6 +2,10 @@
 Request Limit Manager - manages separate limits for text/chart/vision requests
 
 Provides unified interface for checking and incrementing different request types.
+
+Counters live in Redis (see src/cache/request_limit_store.py) and are checked
+and incremented atomically; the RequestLimit table is the write-back target
+and the fallback when Redis is unavailable.
 """
 
 from datetime import date, datetime, UTC
@@ -12,6 +16,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from loguru import logger
 
+from src.cache.request_limit_store import get_request_limit_store
 from src.database.models import RequestLimit, User, SubscriptionTier
 from config.limits import (
     get_text_limit,
@@ -30,6 +35,51 @@ class RequestType(str, Enum):
     FUTURES = "futures" # Futures signal generation
 
 
+# RequestLimit counter column per request type
+_COUNTER_FIELDS = {
+    RequestType.TEXT: "text_count",
+    RequestType.CHART: "chart_count",
+    RequestType.VISION: "vision_count",
+    RequestType.FUTURES: "futures_count",
+}
+
+
+def _get_counter_field(request_type: RequestType) -> str:
+    """Get RequestLimit column name for request type"""
+    try:
+        return _COUNTER_FIELDS[request_type]
+    except KeyError:
+        raise ValueError(f"Unknown request type: {request_type}")
+
+
+def _get_increment_fields(request_type: RequestType) -> Tuple[str, ...]:
+    """Get columns incremented for request type (TEXT also bumps legacy count)"""
+    field = _get_counter_field(request_type)
+    if request_type == RequestType.TEXT:
+        return (field, "count")
+    return (field,)
+
+
+def _get_user_tier(user: User) -> SubscriptionTier:
+    """Get user's subscription tier (FREE if no subscription)"""
+    if not user.subscription:
+        return SubscriptionTier.FREE
+    return SubscriptionTier(user.subscription.tier)
+
+
+def _get_tier_limit(tier: SubscriptionTier, request_type: RequestType) -> int:
+    """Get daily limit for tier and request type"""
+    if request_type == RequestType.TEXT:
+        return get_text_limit(tier)
+    elif request_type == RequestType.CHART:
+        return get_chart_limit(tier)
+    elif request_type == RequestType.VISION:
+        return get_vision_limit(tier)
+    elif request_type == RequestType.FUTURES:
+        return get_futures_limit(tier)
+    raise ValueError(f"Unknown request type: {request_type}")
+
+
 async def get_or_create_limit_record(
     session: AsyncSession, user_id: int
 ) -> RequestLimit:
@@ -92,37 +142,17 @@ async def check_limit(
     Returns:
         Tuple of (has_requests_remaining, current_count, limit)
     """
-    # Get limit for user's tier
-    if not user.subscription:
-        tier = SubscriptionTier.FREE
+    tier = _get_user_tier(user)
+    limit = _get_tier_limit(tier, request_type)
+    field = _get_counter_field(request_type)
+
+    # Get current count (Redis first, DB fallback)
+    counters = await get_request_limit_store().get_counters(session, user.id)
+    if counters is not None:
+        current_count = counters.get(field, 0)
     else:
-        tier = SubscriptionTier(user.subscription.tier)
-
-    # Get limit based on request type
-    if request_type == RequestType.TEXT:
-        limit = get_text_limit(tier)
-    elif request_type == RequestType.CHART:
-        limit = get_chart_limit(tier)
-    elif request_type == RequestType.VISION:
-        limit = get_vision_limit(tier)
-    elif request_type == RequestType.FUTURES:
-        limit = get_futures_limit(tier)
-    else:
-        raise ValueError(f"Unknown request type: {request_type}")
-
-    # Get current count
-    limit_record = await get_or_create_limit_record(session, user.id)
-
-    if request_type == RequestType.TEXT:
-        current_count = limit_record.text_count
-    elif request_type == RequestType.CHART:
-        current_count = limit_record.chart_count
-    elif request_type == RequestType.VISION:
-        current_count = limit_record.vision_count
-    elif request_type == RequestType.FUTURES:
-        current_count = limit_record.futures_count
-    else:
-        current_count = 0
+        limit_record = await get_or_create_limit_record(session, user.id)
+        current_count = getattr(limit_record, field)
 
     # Check if has remaining
     has_remaining = current_count < limit
@@ -135,6 +165,46 @@ async def check_limit(
     return has_remaining, current_count, limit
 
 
+async def consume_limit(
+    session: AsyncSession,
+    user: User,
+    request_type: RequestType,
+) -> Tuple[bool, int, int]:
+    """
+    Atomically check limit and increment counter if request is allowed
+
+    Unlike check_limit() + increment_limit(), concurrent requests from the
+    same user can't both pass the last remaining slot.
+
+    Args:
+        session: Database session
+        user: User model (with subscription loaded)
+        request_type: Type of request (text/chart/vision/futures)
+
+    Returns:
+        Tuple of (allowed, count_before_this_request, limit)
+    """
+    tier = _get_user_tier(user)
+    limit = _get_tier_limit(tier, request_type)
+
+    result = await get_request_limit_store().consume(
+        session,
+        user.id,
+        check_field=_get_counter_field(request_type),
+        limit=limit,
+        fields=_get_increment_fields(request_type),
+    )
+    if result is not None:
+        allowed, current_count, _ = result
+        return allowed, current_count, limit
+
+    # Redis unavailable - fall back to DB (not atomic)
+    has_remaining, current_count, limit = await check_limit(session, user, request_type)
+    if has_remaining:
+        await increment_limit(session, user.id, request_type)
+    return has_remaining, current_count, limit
+
+
 async def increment_limit(
     session: AsyncSession,
     user_id: int,
@@ -149,8 +219,23 @@ async def increment_limit(
         request_type: Type of request (text/chart/vision)
 
     Returns:
-        Updated RequestLimit model
+        Updated RequestLimit model (detached snapshot when counters are in Redis)
     """
+    store = get_request_limit_store()
+    result = await store.consume(
+        session,
+        user_id,
+        check_field=_get_counter_field(request_type),
+        limit=None,
+        fields=_get_increment_fields(request_type),
+    )
+    if result is not None:
+        _, _, counters = result
+        logger.debug(
+            f"User {user_id} {request_type.value} count incremented (redis): {counters}"
+        )
+        return store.to_record(user_id, date.today(), counters)
+
     limit_record = await get_or_create_limit_record(session, user_id)
 
     # Increment appropriate counter
@@ -178,6 +263,33 @@ async def increment_limit(
     return limit_record
 
 
+async def refund_limit(
+    session: AsyncSession,
+    user_id: int,
+    request_type: RequestType,
+) -> None:
+    """
+    Give back a request taken by consume_limit() when it couldn't be served
+
+    Args:
+        session: Database session
+        user_id: User ID (database ID)
+        request_type: Type of request (text/chart/vision/futures)
+    """
+    fields = _get_increment_fields(request_type)
+    refunded = await get_request_limit_store().refund(user_id, fields)
+    if refunded is not None:
+        logger.debug(f"User {user_id} {request_type.value} request refunded (redis)")
+        return
+
+    limit_record = await get_or_create_limit_record(session, user_id)
+    for field in fields:
+        setattr(limit_record, field, max(getattr(limit_record, field) - 1, 0))
+    await session.commit()
+
+    logger.info(f"User {user_id} {request_type.value} request refunded")
+
+
 async def get_usage_stats(
     session: AsyncSession,
     user: User,
@@ -192,11 +304,7 @@ async def get_usage_stats(
     Returns:
         Dict with usage stats for each request type
     """
-    # Get tier
-    if not user.subscription:
-        tier = SubscriptionTier.FREE
-    else:
-        tier = SubscriptionTier(user.subscription.tier)
+    tier = _get_user_tier(user)
 
     # Get limits
     text_limit = get_text_limit(tier)
@@ -204,8 +312,13 @@ async def get_usage_stats(
     vision_limit = get_vision_limit(tier)
     futures_limit = get_futures_limit(tier)
 
-    # Get current counts
-    limit_record = await get_or_create_limit_record(session, user.id)
+    # Get current counts (Redis first, DB fallback)
+    store = get_request_limit_store()
+    counters = await store.get_counters(session, user.id)
+    if counters is not None:
+        limit_record = store.to_record(user.id, date.today(), counters)
+    else:
+        limit_record = await get_or_create_limit_record(session, user.id)
 
     return {
         "text": {
@@ -281,6 +394,15 @@ async def reset_limit(
     await session.commit()
     await session.refresh(limit_record)
 
+    # Keep Redis counters in sync, otherwise write-back would restore old values
+    if request_type is None:
+        reset_fields = ("text_count", "chart_count", "vision_count", "futures_count", "count")
+    else:
+        reset_fields = _get_increment_fields(request_type)
+    await get_request_limit_store().set_fields(
+        session, user_id, {field: 0 for field in reset_fields}
+    )
+
     return limit_record
 
 
@@ -402,6 +402,14 @@ class Chat(Base):
         nullable=False,
         comment="Last message timestamp",
     )
+    context_summary: Mapped[Optional[str]] = mapped_column(
+        Text, nullable=True, comment="Rolling summary of turns that no longer fit the context"
+    )
+    context_summary_until: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+        comment="Timestamp of the last message covered by context_summary",
+    )
 
     # Relationships
     user = relationship("User", back_populates="chats")
@@ -449,6 +457,9 @@ class ChatMessage(Base):
     tokens_used: Mapped[Optional[int]] = mapped_column(
         Integer, nullable=True, comment="Tokens used (for AI responses)"
     )
+    content_tokens: Mapped[Optional[int]] = mapped_column(
+        Integer, nullable=True, comment="Token count of content (computed on write)"
+    )
     model: Mapped[Optional[str]] = mapped_column(
         String(100), nullable=True, comment="AI model used (gpt-4o, gpt-4o-mini, etc.)"
     )
@@ -494,6 +505,9 @@ class ChatHistory(Base):
     tokens_used: Mapped[Optional[int]] = mapped_column(
         Integer, nullable=True, comment="Tokens used (for AI responses)"
     )
+    content_tokens: Mapped[Optional[int]] = mapped_column(
+        Integer, nullable=True, comment="Token count of content (computed on write)"
+    )
     model: Mapped[Optional[str]] = mapped_column(
         String(100), nullable=True, comment="AI model used (gpt-4o, gpt-4o-mini, etc.)"
     )
@@ -895,6 +909,13 @@ class Subscription(Base):
         comment="Is subscription currently active",
     )
 
+    cancelled_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+        index=True,
+        comment="When the subscription was deactivated (churn event)",
+    )
+
     auto_renew: Mapped[bool] = mapped_column(
         Boolean,
         default=False,
@@ -4918,6 +4939,117 @@ class ScenarioGenerationLog(Base):
         )
 
 
+# ===========================
+# BUSINESS METRICS ROLLUPS
+# ===========================
+
+
+class DailyCostRollup(Base):
+    """
+    Daily API cost rollup - one row per (day, service, model)
+
+    Maintained by src.database.rollups from CostTracking.
+    Closed days only; the current day is always read from raw rows.
+    """
+
+    __tablename__ = "daily_cost_rollups"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    day: Mapped[date] = mapped_column(
+        Date, nullable=False, index=True, comment="UTC day"
+    )
+    service: Mapped[str] = mapped_column(
+        String(50), nullable=False, comment="Service name"
+    )
+    model: Mapped[str] = mapped_column(
+        String(100), nullable=False, default="", comment="Model ('' when not set)"
+    )
+    total_cost: Mapped[float] = mapped_column(
+        Float, nullable=False, default=0.0, comment="Sum of costs in USD"
+    )
+    total_tokens: Mapped[int] = mapped_column(
+        BigInteger, nullable=False, default=0, comment="Sum of tokens"
+    )
+    request_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, comment="Number of tracked requests"
+    )
+
+    __table_args__ = (
+        UniqueConstraint("day", "service", "model", name="uq_daily_cost_rollup"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<DailyCostRollup(day={self.day}, service={self.service}, cost=${self.total_cost:.4f})>"
+
+
+class DailyRevenueRollup(Base):
+    """
+    Daily revenue rollup - completed payments per (day, tier, provider)
+
+    Day is taken from Payment.completed_at (UTC).
+    """
+
+    __tablename__ = "daily_revenue_rollups"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    day: Mapped[date] = mapped_column(
+        Date, nullable=False, index=True, comment="UTC day"
+    )
+    tier: Mapped[str] = mapped_column(
+        String(20), nullable=False, comment="Subscription tier"
+    )
+    provider: Mapped[str] = mapped_column(
+        String(50), nullable=False, comment="Payment provider"
+    )
+    revenue: Mapped[float] = mapped_column(
+        Float, nullable=False, default=0.0, comment="Sum of payments in USD"
+    )
+    payments_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, comment="Number of completed payments"
+    )
+
+    __table_args__ = (
+        UniqueConstraint("day", "tier", "provider", name="uq_daily_revenue_rollup"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<DailyRevenueRollup(day={self.day}, tier={self.tier}, revenue=${self.revenue:.2f})>"
+
+
+class DailyUserRollup(Base):
+    """
+    Daily user activity rollup - one row per day (also for empty days)
+
+    The latest day present is the rollup watermark: every closed day
+    up to it is covered by all rollup tables.
+    """
+
+    __tablename__ = "daily_user_rollups"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True, comment="UTC day")
+    signups: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, comment="New users registered"
+    )
+    active_users: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, comment="Users with at least one request"
+    )
+    churned_subscriptions: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, comment="Subscriptions deactivated"
+    )
+    assistant_messages: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, comment="AI responses sent"
+    )
+    refreshed_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(UTC),
+        nullable=False,
+        comment="Last rollup refresh",
+    )
+
+    def __repr__(self) -> str:
+        return f"<DailyUserRollup(day={self.day}, signups={self.signups}, active={self.active_users})>"
+
+
 # ===========================
 # FORWARD TEST MODELS (re-export)
 # ===========================
@@ -0,0 +1,539 @@
+"""
+Daily business-metrics rollups
+
+Admin dashboards used to scan Payment / CostTracking / Subscription / User
+on every click. Closed days are now aggregated once into daily_*_rollups
+tables; metric readers combine:
+
+    rollup rows for full days  +  raw rows for the partial edges (today, etc.)
+
+so the cost of a dashboard no longer grows with history.
+
+Refresh is incremental: each run re-aggregates the last
+METRICS_ROLLUP_REFRESH_DAYS closed days (late writes, refunds). The first
+run backfills the whole history.
+"""
+
+from datetime import date, datetime, time, timedelta, UTC
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from loguru import logger
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config.config import METRICS_ROLLUPS_ENABLED, METRICS_ROLLUP_REFRESH_DAYS
+from src.database.models import (
+    ChatMessage,
+    CostTracking,
+    DailyCostRollup,
+    DailyRevenueRollup,
+    DailyUserRollup,
+    Payment,
+    PaymentStatus,
+    RequestLimit,
+    Subscription,
+    User,
+)
+
+# Backfill is done in chunks so one transaction never spans the whole history
+BACKFILL_CHUNK_DAYS = 31
+
+# (lower bound, upper bound, upper bound inclusive)
+RawRange = Tuple[Optional[datetime], Optional[datetime], bool]
+
+
+class PeriodSplit(NamedTuple):
+    """Period split into rollup-covered days and raw datetime ranges"""
+
+    rollup_days: Optional[Tuple[date, date]]
+    raw_ranges: List[RawRange]
+
+
+# ===========================
+# PERIOD SPLITTING
+# ===========================
+
+
+def day_start(day: date) -> datetime:
+    """UTC midnight of day"""
+    return datetime.combine(day, time.min, tzinfo=UTC)
+
+
+def _as_utc(value: datetime) -> datetime:
+    """Naive datetimes are treated as UTC"""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=UTC)
+    return value.astimezone(UTC)
+
+
+def utc_day(column):
+    """SQL expression: UTC calendar day of timestamptz column"""
+    return func.date(func.timezone("UTC", column))
+
+
+def split_period(
+    start_date: Optional[datetime],
+    end_date: Optional[datetime],
+    bounds: Optional[Tuple[date, date]],
+) -> PeriodSplit:
+    """
+    Split [start_date, end_date] into full rollup days and raw edges
+
+    Args:
+        start_date: Period start (inclusive), None = beginning of time
+        end_date: Period end (inclusive), None = now
+        bounds: (first_day, last_day) covered by rollups, None = no rollups
+
+    Returns:
+        PeriodSplit; raw ranges are never longer than the partial edge days
+        (plus anything before the first rollup day)
+    """
+    whole_period = PeriodSplit(None, [(start_date, end_date, True)])
+    if bounds is None:
+        return whole_period
+
+    first_day, last_day = bounds
+    start_utc = _as_utc(start_date) if start_date else None
+    end_utc = _as_utc(end_date) if end_date else None
+
+    if start_utc is None:
+        from_day = first_day
+    else:
+        from_day = start_utc.date()
+        if start_utc > day_start(from_day):
+            from_day += timedelta(days=1)
+        from_day = max(from_day, first_day)
+
+    # Day d is fully inside the period only if the next midnight is <= end
+    to_day = (
+        last_day
+        if end_utc is None
+        else min(last_day, end_utc.date() - timedelta(days=1))
+    )
+
+    if from_day > to_day:
+        return whole_period
+
+    raw_ranges: List[RawRange] = []
+    if start_utc is None or start_utc < day_start(from_day):
+        raw_ranges.append((start_date, day_start(from_day), False))
+    raw_ranges.append((day_start(to_day + timedelta(days=1)), end_date, True))
+
+    return PeriodSplit((from_day, to_day), raw_ranges)
+
+
+def filter_raw_range(stmt, column, raw_range: RawRange):
+    """Apply raw datetime range to select statement"""
+    lower, upper, upper_inclusive = raw_range
+    if lower is not None:
+        stmt = stmt.where(column >= lower)
+    if upper is not None:
+        stmt = stmt.where(column <= upper if upper_inclusive else column < upper)
+    return stmt
+
+
+async def get_rollup_bounds(session: AsyncSession) -> Optional[Tuple[date, date]]:
+    """
+    Get (first_day, last_day) covered by rollups
+
+    Returns:
+        Tuple of days or None if rollups are disabled / not built yet
+    """
+    if not METRICS_ROLLUPS_ENABLED:
+        return None
+
+    result = await session.execute(
+        select(func.min(DailyUserRollup.day), func.max(DailyUserRollup.day))
+    )
+    first_day, last_day = result.one()
+    if first_day is None:
+        return None
+    return first_day, last_day
+
+
+async def get_period_split(
+    session: AsyncSession,
+    start_date: Optional[datetime],
+    end_date: Optional[datetime],
+) -> PeriodSplit:
+    """Split period using current rollup bounds"""
+    return split_period(start_date, end_date, await get_rollup_bounds(session))
+
+
+# ===========================
+# READERS
+# ===========================
+
+
+_COST_DIMENSIONS = {
+    "day": (DailyCostRollup.day, utc_day(CostTracking.timestamp)),
+    "service": (DailyCostRollup.service, CostTracking.service),
+    "model": (DailyCostRollup.model, func.coalesce(CostTracking.model, "")),
+}
+
+_REVENUE_DIMENSIONS = {
+    "day": (DailyRevenueRollup.day, utc_day(Payment.completed_at)),
+    "tier": (DailyRevenueRollup.tier, Payment.tier),
+    "provider": (DailyRevenueRollup.provider, Payment.provider),
+}
+
+
+def _merge(target: Dict[tuple, dict], key: tuple, values: Dict[str, Any]) -> None:
+    """Add aggregate values into target[key]"""
+    bucket = target.setdefault(key, {name: 0 for name in values})
+    for name, value in values.items():
+        bucket[name] += value or 0
+
+
+async def aggregate_costs(
+    session: AsyncSession,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    group_by: Sequence[str] = (),
+    service: Optional[str] = None,
+) -> Dict[tuple, dict]:
+    """
+    Aggregate API costs over period (rollups + raw edges)
+
+    Args:
+        session: Database session
+        start_date: Start (inclusive)
+        end_date: End (inclusive)
+        group_by: Dimensions from ("day", "service", "model")
+        service: Filter by service
+
+    Returns:
+        {dimension values tuple: {total_cost, total_tokens, request_count}}
+    """
+    split = await get_period_split(session, start_date, end_date)
+    totals: Dict[tuple, dict] = {}
+
+    if split.rollup_days:
+        columns = [_COST_DIMENSIONS[name][0] for name in group_by]
+        stmt = select(
+            *columns,
+            func.sum(DailyCostRollup.total_cost).label("total_cost"),
+            func.sum(DailyCostRollup.total_tokens).label("total_tokens"),
+            func.sum(DailyCostRollup.request_count).label("request_count"),
+        ).where(DailyCostRollup.day.between(*split.rollup_days))
+        if service:
+            stmt = stmt.where(DailyCostRollup.service == service)
+        if columns:
+            stmt = stmt.group_by(*columns)
+
+        for row in (await session.execute(stmt)).all():
+            if row.request_count:
+                _merge(
+                    totals,
+                    tuple(row[: len(columns)]),
+                    {
+                        "total_cost": float(row.total_cost or 0),
+                        "total_tokens": int(row.total_tokens or 0),
+                        "request_count": int(row.request_count or 0),
+                    },
+                )
+
+    for raw_range in split.raw_ranges:
+        columns = [_COST_DIMENSIONS[name][1] for name in group_by]
+        stmt = select(
+            *columns,
+            func.sum(CostTracking.cost).label("total_cost"),
+            func.sum(CostTracking.tokens).label("total_tokens"),
+            func.count(CostTracking.id).label("request_count"),
+        )
+        stmt = filter_raw_range(stmt, CostTracking.timestamp, raw_range)
+        if service:
+            stmt = stmt.where(CostTracking.service == service)
+        if columns:
+            stmt = stmt.group_by(*columns)
+
+        for row in (await session.execute(stmt)).all():
+            if row.request_count:
+                _merge(
+                    totals,
+                    tuple(row[: len(columns)]),
+                    {
+                        "total_cost": float(row.total_cost or 0),
+                        "total_tokens": int(row.total_tokens or 0),
+                        "request_count": int(row.request_count or 0),
+                    },
+                )
+
+    return totals
+
+
+async def aggregate_revenue(
+    session: AsyncSession,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    group_by: Sequence[str] = (),
+) -> Dict[tuple, dict]:
+    """
+    Aggregate completed payments over period (rollups + raw edges)
+
+    Args:
+        session: Database session
+        start_date: Start by completed_at (inclusive)
+        end_date: End by completed_at (inclusive)
+        group_by: Dimensions from ("day", "tier", "provider")
+
+    Returns:
+        {dimension values tuple: {revenue, count}}
+    """
+    split = await get_period_split(session, start_date, end_date)
+    totals: Dict[tuple, dict] = {}
+
+    if split.rollup_days:
+        columns = [_REVENUE_DIMENSIONS[name][0] for name in group_by]
+        stmt = select(
+            *columns,
+            func.sum(DailyRevenueRollup.revenue).label("revenue"),
+            func.sum(DailyRevenueRollup.payments_count).label("count"),
+        ).where(DailyRevenueRollup.day.between(*split.rollup_days))
+        if columns:
+            stmt = stmt.group_by(*columns)
+
+        for row in (await session.execute(stmt)).all():
+            if row.count:
+                _merge(
+                    totals,
+                    tuple(row[: len(columns)]),
+                    {
+                        "revenue": float(row.revenue or 0),
+                        "count": int(row.count or 0),
+                    },
+                )
+
+    for raw_range in split.raw_ranges:
+        columns = [_REVENUE_DIMENSIONS[name][1] for name in group_by]
+        stmt = select(
+            *columns,
+            func.sum(Payment.amount).label("revenue"),
+            func.count(Payment.id).label("count"),
+        ).where(Payment.status == PaymentStatus.COMPLETED.value)
+        stmt = filter_raw_range(stmt, Payment.completed_at, raw_range)
+        if columns:
+            stmt = stmt.group_by(*columns)
+
+        for row in (await session.execute(stmt)).all():
+            if row.count:
+                _merge(
+                    totals,
+                    tuple(row[: len(columns)]),
+                    {
+                        "revenue": float(row.revenue or 0),
+                        "count": int(row.count or 0),
+                    },
+                )
+
+    return totals
+
+
+def _raw_activity_counts():
+    """Raw (table, timestamp column, extra filters) per user rollup field"""
+    return {
+        "signups": (User.id, User.created_at, ()),
+        # Keyed on the deactivation itself: updated_at moves on every later
+        # edit, so one subscription would be counted on several days
+        "churned_subscriptions": (Subscription.id, Subscription.cancelled_at, ()),
+        "assistant_messages": (
+            ChatMessage.id,
+            ChatMessage.timestamp,
+            (ChatMessage.role == "assistant",),
+        ),
+    }
+
+
+async def aggregate_user_activity(
+    session: AsyncSession,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    fields: Sequence[str] = ("signups", "churned_subscriptions", "assistant_messages"),
+) -> Dict[str, int]:
+    """
+    Sum daily user counters over period (rollups + raw edges)
+
+    Args:
+        session: Database session
+        start_date: Start (inclusive)
+        end_date: End (inclusive)
+        fields: Counters from ("signups", "churned_subscriptions", "assistant_messages")
+
+    Returns:
+        {field: count}
+    """
+    split = await get_period_split(session, start_date, end_date)
+    totals = {name: 0 for name in fields}
+
+    if split.rollup_days:
+        stmt = select(
+            *[func.sum(getattr(DailyUserRollup, name)).label(name) for name in fields]
+        ).where(DailyUserRollup.day.between(*split.rollup_days))
+        row = (await session.execute(stmt)).one()
+        for name in fields:
+            totals[name] += int(getattr(row, name) or 0)
+
+    raw_sources = _raw_activity_counts()
+    for raw_range in split.raw_ranges:
+        for name in fields:
+            id_column, ts_column, filters = raw_sources[name]
+            stmt = select(func.count(id_column)).where(*filters)
+            stmt = filter_raw_range(stmt, ts_column, raw_range)
+            totals[name] += int((await session.execute(stmt)).scalar() or 0)
+
+    return totals
+
+
+# ===========================
+# REFRESH
+# ===========================
+
+
+async def _rebuild_days(session: AsyncSession, first_day: date, last_day: date) -> None:
+    """Re-aggregate rollups for closed days [first_day, last_day] (no commit)"""
+    lower = day_start(first_day)
+    upper = day_start(last_day + timedelta(days=1))
+
+    for model in (DailyCostRollup, DailyRevenueRollup, DailyUserRollup):
+        await session.execute(
+            delete(model).where(model.day.between(first_day, last_day))
+        )
+
+    # Costs: INSERT ... SELECT, nothing goes through Python
+    cost_day = utc_day(CostTracking.timestamp)
+    cost_model = func.coalesce(CostTracking.model, "")
+    await session.execute(
+        insert(DailyCostRollup).from_select(
+            ["day", "service", "model", "total_cost", "total_tokens", "request_count"],
+            select(
+                cost_day,
+                CostTracking.service,
+                cost_model,
+                func.sum(CostTracking.cost),
+                func.sum(CostTracking.tokens),
+                func.count(CostTracking.id),
+            )
+            .where(CostTracking.timestamp >= lower, CostTracking.timestamp < upper)
+            .group_by(cost_day, CostTracking.service, cost_model),
+        )
+    )
+
+    # Revenue
+    revenue_day = utc_day(Payment.completed_at)
+    await session.execute(
+        insert(DailyRevenueRollup).from_select(
+            ["day", "tier", "provider", "revenue", "payments_count"],
+            select(
+                revenue_day,
+                Payment.tier,
+                Payment.provider,
+                func.sum(Payment.amount),
+                func.count(Payment.id),
+            )
+            .where(Payment.status == PaymentStatus.COMPLETED.value)
+            .where(Payment.completed_at >= lower, Payment.completed_at < upper)
+            .group_by(revenue_day, Payment.tier, Payment.provider),
+        )
+    )
+
+    # Users: one row per day, also for empty days (row presence = day is rolled up)
+    days: Dict[date, Dict[str, Any]] = {}
+    current = first_day
+    while current <= last_day:
+        days[current] = {
+            "day": current,
+            "signups": 0,
+            "active_users": 0,
+            "churned_subscriptions": 0,
+            "assistant_messages": 0,
+            "refreshed_at": datetime.now(UTC),
+        }
+        current += timedelta(days=1)
+
+    for name, (id_column, ts_column, filters) in _raw_activity_counts().items():
+        column_day = utc_day(ts_column)
+        stmt = (
+            select(column_day.label("day"), func.count(id_column).label("count"))
+            .where(*filters)
+            .where(ts_column >= lower, ts_column < upper)
+            .group_by(column_day)
+        )
+        for row in (await session.execute(stmt)).all():
+            if row.day in days:
+                days[row.day][name] = int(row.count)
+
+    # RequestLimit has one row per user per day - distinct users with requests
+    stmt = (
+        select(
+            RequestLimit.date,
+            func.count(func.distinct(RequestLimit.user_id)).label("count"),
+        )
+        .where(RequestLimit.date.between(first_day, last_day))
+        .group_by(RequestLimit.date)
+    )
+    for row in (await session.execute(stmt)).all():
+        if row.date in days:
+            days[row.date]["active_users"] = int(row.count)
+
+    await session.execute(insert(DailyUserRollup), list(days.values()))
+
+
+async def refresh_daily_rollups(
+    session: AsyncSession,
+    first_day: date,
+    last_day: date,
+) -> int:
+    """
+    Rebuild rollups for [first_day, last_day] (commits per chunk)
+
+    Args:
+        session: Database session (primary)
+        first_day: First day to rebuild
+        last_day: Last day to rebuild (must be a closed day)
+
+    Returns:
+        Number of days rebuilt
+    """
+    rebuilt = 0
+    chunk_start = first_day
+    while chunk_start <= last_day:
+        chunk_end = min(last_day, chunk_start + timedelta(days=BACKFILL_CHUNK_DAYS - 1))
+        await _rebuild_days(session, chunk_start, chunk_end)
+        await session.commit()
+        rebuilt += (chunk_end - chunk_start).days + 1
+        chunk_start = chunk_end + timedelta(days=1)
+    return rebuilt
+
+
+async def refresh_recent_rollups(
+    session: AsyncSession,
+    refresh_days: int = METRICS_ROLLUP_REFRESH_DAYS,
+) -> int:
+    """
+    Incremental refresh: catch up missed days and re-aggregate recent ones
+
+    On an empty rollup table the whole history is backfilled.
+
+    Returns:
+        Number of days rebuilt
+    """
+    yesterday = datetime.now(UTC).date() - timedelta(days=1)
+    bounds = await get_rollup_bounds(session)
+
+    if bounds is None:
+        result = await session.execute(select(func.min(User.created_at)))
+        earliest = result.scalar()
+        first_day = min(_as_utc(earliest).date(), yesterday) if earliest else yesterday
+        logger.info(f"Backfilling metrics rollups from {first_day}")
+    else:
+        watermark = bounds[1]
+        first_day = min(
+            watermark + timedelta(days=1),
+            yesterday - timedelta(days=max(refresh_days, 1) - 1),
+        )
+        first_day = max(first_day, bounds[0])
+
+    if first_day > yesterday:
+        return 0
+
+    return await refresh_daily_rollups(session, first_day, yesterday)
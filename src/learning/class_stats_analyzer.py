@@ -160,20 +160,27 @@ class ClassStatsAnalyzer:
         session: AsyncSession,
         class_key: ClassKey,
         allow_fallback: bool = True,
+        stats_by_hash: Optional[Dict[str, ScenarioClassStats]] = None,
     ) -> ClassStatsLookupResult:
         """
         Получить статистику для класса с fallback.
 
         Args:
-            session: AsyncSession
+            session: AsyncSession (не используется если передан stats_by_hash)
             class_key: ClassKey для поиска
             allow_fallback: Разрешить L2 -> L1 fallback
+            stats_by_hash: Заранее загруженные stats (load_stats_by_hash)
 
         Returns:
             ClassStatsLookupResult с stats и metadata
         """
+        async def lookup(key_hash: str) -> Optional[ScenarioClassStats]:
+            if stats_by_hash is not None:
+                return stats_by_hash.get(key_hash)
+            return await self._lookup_by_hash(session, key_hash)
+
         # Сначала ищем точное совпадение
-        stats = await self._lookup_by_hash(session, class_key.key_hash)
+        stats = await lookup(class_key.key_hash)
 
         if stats:
             # Проверяем sample size
@@ -188,7 +195,7 @@ class ClassStatsAnalyzer:
             # Insufficient sample - пробуем fallback
             if allow_fallback and class_key.level == 2:
                 l1_key = class_key.to_l1_key()
-                l1_stats = await self._lookup_by_hash(session, l1_key.key_hash)
+                l1_stats = await lookup(l1_key.key_hash)
                 if l1_stats and l1_stats.total_trades >= MIN_TRADES_INSUFFICIENT:
                     return ClassStatsLookupResult(
                         stats=l1_stats,
@@ -208,7 +215,7 @@ class ClassStatsAnalyzer:
         # Не найдено - пробуем L1 fallback
         if allow_fallback and class_key.level == 2:
             l1_key = class_key.to_l1_key()
-            l1_stats = await self._lookup_by_hash(session, l1_key.key_hash)
+            l1_stats = await lookup(l1_key.key_hash)
             if l1_stats:
                 return ClassStatsLookupResult(
                     stats=l1_stats,
@@ -226,6 +233,20 @@ class ClassStatsAnalyzer:
             requested_level=class_key.level,
         )
 
+    async def load_stats_by_hash(
+        self,
+        session: AsyncSession,
+        key_hashes: List[str],
+    ) -> Dict[str, ScenarioClassStats]:
+        """Stats нескольких классов одним запросом (для get_class_stats)."""
+        if not key_hashes:
+            return {}
+        stmt = select(ScenarioClassStats).where(
+            ScenarioClassStats.class_key_hash.in_(key_hashes)
+        )
+        result = await session.execute(stmt)
+        return {row.class_key_hash: row for row in result.scalars().all()}
+
     async def log_scenario_generation(
         self,
         session: AsyncSession,
@@ -11,7 +11,7 @@ Confidence Calibrator
 - calibrated_confidence = raw + offset (clamped to 0.05-0.95)
 """
 from datetime import datetime, UTC
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Sequence
 
 from loguru import logger
 from sqlalchemy import select, and_, func
@@ -49,21 +49,32 @@ class ConfidenceCalibrator:
         raw_confidence: float,
         symbol: Optional[str] = None,
         timeframe: Optional[str] = None,
+        buckets: Optional[Sequence[ConfidenceBucket]] = None,
     ) -> float:
         """
         Калибровать raw confidence.
 
         Args:
-            session: DB session
+            session: DB session (не используется если переданы buckets)
             raw_confidence: Original AI confidence (0-1)
             symbol: Optional symbol filter
             timeframe: Optional timeframe filter
+            buckets: Заранее загруженные buckets (load_buckets)
 
         Returns:
             Calibrated confidence (clamped to 0.05-0.95)
         """
         # Find the bucket
-        bucket = await self._get_bucket(session, raw_confidence)
+        if buckets is not None:
+            bucket = next(
+                (
+                    b for b in buckets
+                    if b.confidence_min <= raw_confidence < b.confidence_max
+                ),
+                None,
+            )
+        else:
+            bucket = await self._get_bucket(session, raw_confidence)
 
         if not bucket or bucket.sample_size < self.MIN_SAMPLE_SIZE:
             # Insufficient data - return raw
@@ -208,6 +219,11 @@ class ConfidenceCalibrator:
 
         return report
 
+    async def load_buckets(self, session: AsyncSession) -> List[ConfidenceBucket]:
+        """Все buckets одним запросом (для calibrate(buckets=...))."""
+        result = await session.execute(select(ConfidenceBucket))
+        return list(result.scalars().all())
+
     async def _get_bucket(
         self,
         session: AsyncSession,
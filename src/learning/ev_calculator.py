@@ -6,7 +6,7 @@ EV Calculator
 - Cumulative payouts с учётом partial TPs
 - Fees/slippage
 """
-from typing import Optional, List, Dict, Any, Tuple
+from typing import Optional, List, Dict, Any, Sequence, Tuple
 from dataclasses import dataclass
 
 from loguru import logger
@@ -122,6 +122,7 @@ class EVCalculator:
         confidence: float = 0.5,
         llm_probs: Optional[Dict[str, float]] = None,
         fees_r: float = DEFAULT_FEES_R,
+        stats_rows: Optional[Sequence[ArchetypeStats]] = None,
     ) -> Tuple[OutcomeProbs, EVMetrics]:
         """
         Рассчитать EV для сценария.
@@ -136,6 +137,8 @@ class EVCalculator:
             confidence: AI confidence (для scenario_score)
             llm_probs: LLM-generated outcome probs (опционально)
             fees_r: Комиссии в R
+            stats_rows: Заранее загруженные ArchetypeStats (sltp_optimizer.load_stats),
+                session тогда не используется
 
         Returns:
             (OutcomeProbs, EVMetrics)
@@ -159,6 +162,7 @@ class EVCalculator:
             volatility_regime=volatility_regime,
             llm_probs=llm_probs,
             n_targets=n_targets,
+            stats_rows=stats_rows,
         )
         flags.extend(probs.flags)
 
@@ -211,6 +215,7 @@ class EVCalculator:
         volatility_regime: Optional[str],
         llm_probs: Optional[Dict[str, float]],
         n_targets: int,
+        stats_rows: Optional[Sequence[ArchetypeStats]] = None,
     ) -> OutcomeProbs:
         """Получить outcome probs с fallback (V2 с path probs)."""
         side_lower = side.lower()
@@ -219,7 +224,7 @@ class EVCalculator:
         # 1. Пробуем Learning Module (V2 с новыми полями)
         if archetype:
             stats = await self._get_archetype_stats(
-                session, archetype, side_lower, timeframe, volatility_regime
+                session, archetype, side_lower, timeframe, volatility_regime, stats_rows
             )
             if stats and stats.total_trades >= MIN_TRADES_FOR_PROBS:
                 probs = self._dirichlet_smooth_v2(stats, side_lower)
@@ -274,9 +279,10 @@ class EVCalculator:
         side: str,
         timeframe: Optional[str],
         volatility_regime: Optional[str],
+        stats_rows: Optional[Sequence[ArchetypeStats]] = None,
     ) -> Optional[ArchetypeStats]:
         """
-        Получить stats с fallback по специфичности.
+        Получить stats с fallback по специфичности (из stats_rows, если переданы).
 
         Fallback:
         1. archetype + side + tf + vol (самый точный)
@@ -291,6 +297,22 @@ class EVCalculator:
         ]
 
         for config in search_configs:
+            if stats_rows is not None:
+                stats = next(
+                    (
+                        row for row in stats_rows
+                        if row.archetype == config["archetype"]
+                        and row.side == config["side"]
+                        and row.timeframe == config.get("timeframe")
+                        and row.volatility_regime == config.get("volatility_regime")
+                        and row.symbol is None
+                    ),
+                    None,
+                )
+                if stats and stats.total_trades >= MIN_TRADES_FOR_PROBS:
+                    return stats
+                continue
+
             stmt = select(ArchetypeStats).where(
                 and_(
                     ArchetypeStats.archetype == config["archetype"],
@@ -18,6 +18,8 @@ from src.learning.confidence_calibrator import confidence_calibrator
 from src.learning.archetype_analyzer import archetype_analyzer
 from src.learning.class_stats_analyzer import class_stats_analyzer
 
+_JOB_IDS = ("confidence_calibration", "archetype_stats", "class_stats")
+
 
 class LearningScheduler:
     """
@@ -53,7 +55,32 @@ class LearningScheduler:
             logger.warning("Learning scheduler already running")
             return
 
-        self.scheduler = AsyncIOScheduler()
+        self.register_jobs(
+            AsyncIOScheduler(),
+            confidence_interval_hours=confidence_interval_hours,
+            archetype_interval_hours=archetype_interval_hours,
+            class_stats_interval_hours=class_stats_interval_hours,
+            include_testnet=include_testnet,
+        )
+        self.scheduler.start()
+        self._running = True
+
+    def register_jobs(
+        self,
+        scheduler: AsyncIOScheduler,
+        confidence_interval_hours: int = 6,
+        archetype_interval_hours: int = 6,
+        class_stats_interval_hours: int = 6,
+        include_testnet: bool = False,
+    ):
+        """
+        Добавить jobs в scheduler (свой в start() или общий job runner'а).
+
+        Args:
+            scheduler: APScheduler instance
+            (остальные аргументы как в start())
+        """
+        self.scheduler = scheduler
 
         # Confidence calibration job
         self.scheduler.add_job(
@@ -85,19 +112,16 @@ class LearningScheduler:
             replace_existing=True,
         )
 
-        self.scheduler.start()
-        self._running = True
-
         logger.info(
-            f"Learning scheduler started: "
+            f"Learning jobs registered: "
             f"confidence every {confidence_interval_hours}h, "
             f"archetypes every {archetype_interval_hours}h, "
             f"class_stats every {class_stats_interval_hours}h"
         )
 
     def stop(self):
-        """Остановить scheduler."""
-        if self.scheduler:
+        """Остановить scheduler (только свой, запущенный в start())."""
+        if self.scheduler and self._running:
             self.scheduler.shutdown()
             self._running = False
             logger.info("Learning scheduler stopped")
@@ -167,7 +191,7 @@ class LearningScheduler:
 
     def get_status(self) -> dict:
         """Получить статус scheduler."""
-        if not self.scheduler or not self._running:
+        if not self.scheduler or not self.scheduler.running:
             return {
                 "running": False,
                 "jobs": [],
@@ -175,6 +199,9 @@ class LearningScheduler:
 
         jobs = []
         for job in self.scheduler.get_jobs():
+            # Shared scheduler of the job runner also holds other jobs
+            if job.id not in _JOB_IDS:
+                continue
             jobs.append({
                 "id": job.id,
                 "name": job.name,
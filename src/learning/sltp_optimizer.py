@@ -4,11 +4,11 @@ SL/TP Optimizer
 Оптимизация Stop Loss и Take Profit на основе MAE/MFE анализа.
 Группирует данные по архетипу, символу, таймфрейму и волатильности.
 """
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Sequence
 from dataclasses import dataclass
 
 from loguru import logger
-from sqlalchemy import select, and_
+from sqlalchemy import select, and_, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database.models import ArchetypeStats
@@ -54,6 +54,8 @@ class SLTPOptimizer:
         symbol: Optional[str] = None,
         timeframe: Optional[str] = None,
         volatility_regime: Optional[str] = None,
+        stats_rows: Optional[Sequence[ArchetypeStats]] = None,
+        side: Optional[str] = None,
     ) -> SLTPSuggestion:
         """
         Получить оптимальные SL/TP для заданных условий.
@@ -61,11 +63,13 @@ class SLTPOptimizer:
         Ищет наиболее специфичную группу с достаточным количеством данных.
 
         Args:
-            session: DB session
+            session: DB session (не используется если переданы stats_rows)
             archetype: Trade archetype
             symbol: Trading pair
             timeframe: Timeframe
             volatility_regime: low/normal/high
+            stats_rows: Заранее загруженные ArchetypeStats (load_stats)
+            side: long/short - строка этой стороны (для stats_rows)
 
         Returns:
             SLTPSuggestion with optimized values
@@ -81,7 +85,10 @@ class SLTPOptimizer:
         ]
 
         for config in search_configs:
-            stats = await self._find_stats(session, **config)
+            if stats_rows is not None:
+                stats = self._match_stats(stats_rows, side=side, **config)
+            else:
+                stats = await self._find_stats(session, **config)
 
             if stats and stats.total_trades >= self.MIN_TRADES:
                 # Calculate confidence based on sample size
@@ -231,6 +238,51 @@ class SLTPOptimizer:
 
         return analysis
 
+    async def load_stats(
+        self,
+        session: AsyncSession,
+        archetypes: Sequence[str],
+        symbol: Optional[str] = None,
+        timeframe: Optional[str] = None,
+    ) -> List[ArchetypeStats]:
+        """
+        Все группы архетипов, нужные для symbol/timeframe, одним запросом.
+
+        Покрывает fallback-цепочки get_suggestions и EVCalculator
+        (symbol и timeframe - заданные или None).
+        """
+        stmt = select(ArchetypeStats).where(
+            and_(
+                ArchetypeStats.archetype.in_(list(archetypes)),
+                or_(ArchetypeStats.symbol == symbol, ArchetypeStats.symbol.is_(None)),
+                or_(ArchetypeStats.timeframe == timeframe, ArchetypeStats.timeframe.is_(None)),
+            )
+        )
+        result = await session.execute(stmt)
+        return list(result.scalars().all())
+
+    def _match_stats(
+        self,
+        rows: Sequence[ArchetypeStats],
+        archetype: str,
+        symbol: Optional[str] = None,
+        timeframe: Optional[str] = None,
+        volatility_regime: Optional[str] = None,
+        side: Optional[str] = None,
+    ) -> Optional[ArchetypeStats]:
+        """Группа из загруженных строк (строка стороны side, иначе без стороны)."""
+        matches = [
+            row for row in rows
+            if row.archetype == archetype
+            and row.symbol == symbol
+            and row.timeframe == timeframe
+            and row.volatility_regime == volatility_regime
+        ]
+        for row in matches:
+            if side and row.side == side:
+                return row
+        return next((row for row in matches if row.side is None), None)
+
     async def _find_stats(
         self,
         session: AsyncSession,
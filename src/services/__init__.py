@@ -1,6 +1,23 @@
 """Services for external API integrations"""
 
-from .openai_service import OpenAIService
-from .coingecko_service import CoinGeckoService
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .openai_service import OpenAIService
+    from .coingecko_service import CoinGeckoService
 
 __all__ = ["OpenAIService", "CoinGeckoService"]
+
+
+def __getattr__(name):
+    # Imported on first use: importing any src.services submodule (the
+    # database models do) shouldn't load the OpenAI SDK and all data services
+    if name == "OpenAIService":
+        from .openai_service import OpenAIService
+
+        return OpenAIService
+    if name == "CoinGeckoService":
+        from .coingecko_service import CoinGeckoService
+
+        return CoinGeckoService
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
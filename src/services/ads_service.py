@@ -6,7 +6,8 @@ Manages native advertising for AI Trading platform (syntratrade.xyz)
 across all channels: Telegram bot, Mini App, Web API.
 
 Features:
-- Frequency limiting per user
+- Frequency limiting per user (counters shared across workers, see
+  src/cache/ad_counter_store.py)
 - Contextual relevance scoring
 - A/B testing support
 - Analytics tracking
@@ -24,37 +25,11 @@ from config.ads_config import (
     should_show_ad_in_chat,
     get_webapp_banner,
 )
+from src.cache.ad_counter_store import get_ad_counter_store
 
 
-# In-memory cache for ad tracking (per user)
-# Format: {user_id: {"last_in_chat_ad": datetime, "ads_today": int, "messages_since_ad": int}}
-_user_ad_cache: Dict[int, Dict[str, Any]] = {}
-
-
-def _get_user_ad_state(user_id: int) -> Dict[str, Any]:
-    """Get or create user ad tracking state"""
-    if user_id not in _user_ad_cache:
-        _user_ad_cache[user_id] = {
-            "last_in_chat_ad": None,
-            "last_bot_push": None,
-            "ads_today": 0,
-            "ads_today_date": datetime.now(UTC).date(),
-            "messages_since_ad": 0,
-            "total_messages": 0,  # Всего сообщений за всё время
-            "has_seen_ad": False,  # Видел ли хоть одну рекламу
-            "total_impressions": 0,
-            "total_clicks": 0,
-        }
-
-    state = _user_ad_cache[user_id]
-
-    # Reset daily counter if it's a new day
-    today = datetime.now(UTC).date()
-    if state.get("ads_today_date") != today:
-        state["ads_today"] = 0
-        state["ads_today_date"] = today
-
-    return state
+def _from_timestamp(value: Optional[int]) -> Optional[datetime]:
+    return datetime.fromtimestamp(value, UTC) if value else None
 
 
 class AdsService:
@@ -65,7 +40,7 @@ class AdsService:
         ads_service = AdsService()
 
         # Check if we should add ad to AI response
-        should_add, ad_text = ads_service.maybe_add_chat_ad(
+        should_add, ad_text = await ads_service.maybe_add_chat_ad(
             user_id=123,
             user_message="Устал от ручного трейдинга",
             user_language="ru",
@@ -73,17 +48,18 @@ class AdsService:
         )
 
         # Get ad for bot push
-        ad_message = ads_service.get_bot_ad(user_id=123, language="ru")
+        ad_message = await ads_service.get_bot_ad(user_id=123, language="ru")
 
         # Track ad click
-        ads_service.track_click(user_id=123, ad_type="in_chat")
+        await ads_service.track_click(user_id=123, ad_type="in_chat")
     """
 
     def __init__(self):
         """Initialize ads service"""
         self.config = ADS_CONFIG
+        self.counters = get_ad_counter_store()
 
-    def maybe_add_chat_ad(
+    async def maybe_add_chat_ad(
         self,
         user_id: int,
         user_message: str,
@@ -112,11 +88,8 @@ class AdsService:
         Returns:
             Tuple of (should_add: bool, ad_text: Optional[str])
         """
-        state = _get_user_ad_state(user_id)
-
-        # Increment message counters
-        state["messages_since_ad"] = state.get("messages_since_ad", 0) + 1
-        state["total_messages"] = state.get("total_messages", 0) + 1
+        # Increment message counters (and read the rest in the same round trip)
+        state = await self.counters.record_message(user_id)
 
         # Calculate hours since registration
         hours_since_registration = 999.0  # Default: treat as old user
@@ -127,13 +100,13 @@ class AdsService:
         # Smart contextual check (returns tuple: should_show, ad_type)
         should_show, ad_type = should_show_ad_in_chat(
             user_message=user_message,
-            messages_since_last_ad=state["messages_since_ad"],
-            ads_today=state["ads_today"],
+            messages_since_last_ad=state.messages_since_ad,
+            ads_today=state.ads_today,
             user_tier=user_tier,
             ai_response=ai_response,
-            total_user_messages=state["total_messages"],
+            total_user_messages=state.total_messages,
             user_hours_since_registration=hours_since_registration,
-            user_has_seen_ad=state.get("has_seen_ad", False),
+            user_has_seen_ad=bool(state.has_seen_ad),
         )
 
         if not should_show:
@@ -143,22 +116,18 @@ class AdsService:
         # Get contextually relevant ad text
         ad_text = get_native_ad_ending(user_language, ad_type=ad_type)
 
-        # Update state
-        state["last_in_chat_ad"] = datetime.now(UTC)
-        state["ads_today"] += 1
-        state["messages_since_ad"] = 0
-        state["has_seen_ad"] = True  # Теперь точно видел рекламу
-        state["total_impressions"] += 1
+        # Update state (has_seen_ad: теперь точно видел рекламу)
+        await self.counters.record_in_chat_ad(user_id)
 
         logger.info(
             f"Showing in-chat ad to user {user_id} "
-            f"(tier={user_tier}, ads_today={state['ads_today']}, "
-            f"total_msgs={state['total_messages']}, ad_type={ad_type})"
+            f"(tier={user_tier}, ads_today={state.ads_today + 1}, "
+            f"total_msgs={state.total_messages}, ad_type={ad_type})"
         )
 
         return True, ad_text
 
-    def can_send_bot_push(self, user_id: int, last_activity: Optional[datetime] = None) -> bool:
+    async def can_send_bot_push(self, user_id: int, last_activity: Optional[datetime] = None) -> bool:
         """
         Check if we can send promotional push to user
 
@@ -174,11 +143,12 @@ class AdsService:
         if not config["enabled"]:
             return False
 
-        state = _get_user_ad_state(user_id)
+        state = await self.counters.get(user_id)
 
         # Check minimum interval
-        if state.get("last_bot_push"):
-            hours_since_last = (datetime.now(UTC) - state["last_bot_push"]).total_seconds() / 3600
+        last_bot_push = _from_timestamp(state.last_bot_push)
+        if last_bot_push:
+            hours_since_last = (datetime.now(UTC) - last_bot_push).total_seconds() / 3600
             if hours_since_last < config["min_interval_hours"]:
                 return False
 
@@ -190,7 +160,7 @@ class AdsService:
 
         return True
 
-    def get_bot_ad(
+    async def get_bot_ad(
         self,
         user_id: int,
         language: str = "ru",
@@ -205,23 +175,20 @@ class AdsService:
         Returns:
             Dict with ad message or None if shouldn't send
         """
-        if not self.can_send_bot_push(user_id):
+        if not await self.can_send_bot_push(user_id):
             return None
 
-        state = _get_user_ad_state(user_id)
-
         # Get ad message
         ad = get_bot_ad_message(language)
 
         # Update state
-        state["last_bot_push"] = datetime.now(UTC)
-        state["total_impressions"] += 1
+        await self.counters.record_bot_push(user_id)
 
         logger.info(f"Generated bot push ad for user {user_id}")
 
         return ad
 
-    def get_webapp_banner(
+    async def get_webapp_banner(
         self,
         user_id: int,
         language: str = "ru",
@@ -243,8 +210,6 @@ class AdsService:
         if not config["enabled"]:
             return None
 
-        state = _get_user_ad_state(user_id)
-
         # Check dismiss cooldown
         if last_dismissed:
             hours_since_dismiss = (datetime.now(UTC) - last_dismissed).total_seconds() / 3600
@@ -258,13 +223,13 @@ class AdsService:
         # Get banner
         banner = get_webapp_banner(language)
 
-        state["total_impressions"] += 1
+        self.counters.add(user_id, total_impressions=1)
 
         logger.debug(f"Showing webapp banner to user {user_id}")
 
         return banner
 
-    def track_click(self, user_id: int, ad_type: str = "in_chat") -> None:
+    async def track_click(self, user_id: int, ad_type: str = "in_chat") -> None:
         """
         Track ad click
 
@@ -272,12 +237,11 @@ class AdsService:
             user_id: User's database ID
             ad_type: Type of ad ('in_chat', 'bot_push', 'webapp_banner')
         """
-        state = _get_user_ad_state(user_id)
-        state["total_clicks"] = state.get("total_clicks", 0) + 1
+        self.counters.add(user_id, total_clicks=1)
 
         logger.info(f"Ad click tracked: user={user_id}, type={ad_type}")
 
-    def get_user_ad_stats(self, user_id: int) -> Dict[str, Any]:
+    async def get_user_ad_stats(self, user_id: int) -> Dict[str, Any]:
         """
         Get ad statistics for user
 
@@ -287,39 +251,21 @@ class AdsService:
         Returns:
             Dict with ad stats
         """
-        state = _get_user_ad_state(user_id)
+        state = await self.counters.get(user_id)
 
         return {
-            "total_impressions": state.get("total_impressions", 0),
-            "total_clicks": state.get("total_clicks", 0),
-            "ads_today": state.get("ads_today", 0),
-            "last_in_chat_ad": state.get("last_in_chat_ad"),
-            "last_bot_push": state.get("last_bot_push"),
+            "total_impressions": state.total_impressions,
+            "total_clicks": state.total_clicks,
+            "ads_today": state.ads_today,
+            "last_in_chat_ad": _from_timestamp(state.last_in_chat_ad),
+            "last_bot_push": _from_timestamp(state.last_bot_push),
             "ctr": (
-                state.get("total_clicks", 0) / state.get("total_impressions", 1)
-                if state.get("total_impressions", 0) > 0
+                state.total_clicks / state.total_impressions
+                if state.total_impressions > 0
                 else 0
             ),
         }
 
-    def reset_daily_stats(self) -> int:
-        """
-        Reset daily ad counters for all users
-
-        Should be called at midnight UTC
-
-        Returns:
-            Number of users reset
-        """
-        count = 0
-        for user_id in _user_ad_cache:
-            _user_ad_cache[user_id]["ads_today"] = 0
-            _user_ad_cache[user_id]["ads_today_date"] = datetime.now(UTC).date()
-            count += 1
-
-        logger.info(f"Reset daily ad stats for {count} users")
-        return count
-
 
 # Global service instance
 _ads_service: Optional[AdsService] = None
@@ -344,7 +290,7 @@ def get_ads_service() -> AdsService:
 # HELPER FUNCTIONS FOR EASY INTEGRATION
 # ============================================================================
 
-def enhance_response_with_ad(
+async def enhance_response_with_ad(
     response: str,
     user_id: int,
     user_message: str,
@@ -377,7 +323,7 @@ def enhance_response_with_ad(
     """
     ads_service = get_ads_service()
 
-    should_add, ad_text = ads_service.maybe_add_chat_ad(
+    should_add, ad_text = await ads_service.maybe_add_chat_ad(
         user_id=user_id,
         user_message=user_message,
         user_language=user_language,
@@ -401,5 +347,5 @@ def increment_message_counter(user_id: int) -> None:
     Args:
         user_id: User's database ID
     """
-    state = _get_user_ad_state(user_id)
-    state["messages_since_ad"] = state.get("messages_since_ad", 0) + 1
+    # Buffered: written to Redis with the next flush, not per message
+    get_ad_counter_store().add(user_id, messages_since_ad=1)
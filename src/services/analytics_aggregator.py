@@ -15,11 +15,7 @@ Analytics Aggregator Service
 from typing import Optional, Dict, Any
 from datetime import datetime, UTC
 
-from src.services.coingecko_service import CoinGeckoService
-from src.services.binance_service import BinanceService
-from src.services.cycle_analysis_service import CycleAnalysisService
-from src.services.coinmetrics_service import CoinMetricsService
-from src.services.fear_greed_service import FearGreedService
+from src.services.service_registry import lazy_service
 
 from loguru import logger
 
@@ -37,11 +33,11 @@ class AnalyticsAggregator:
     """
 
     def __init__(self):
-        self.coingecko = CoinGeckoService()
-        self.binance = BinanceService()
-        self.cycle_service = CycleAnalysisService()
-        self.coinmetrics = CoinMetricsService()
-        self.fear_greed = FearGreedService()
+        self.coingecko = lazy_service("coingecko")
+        self.binance = lazy_service("binance")
+        self.cycle_service = lazy_service("cycle_analysis")
+        self.coinmetrics = lazy_service("coinmetrics")
+        self.fear_greed = lazy_service("fear_greed")
 
     async def get_full_analytics(self, coin_id: str) -> Dict[str, Any]:
         """
@@ -93,7 +89,7 @@ class AnalyticsAggregator:
 
         # 2. Funding Rates (Binance Futures) - индикатор sentiment трейдеров
         try:
-            symbol = self.binance.get_symbol(coin_id)
+            symbol = self.binance.get_symbol(coin_id, market="perp")
             if symbol:
                 funding = await self.binance.get_latest_funding_rate(symbol)
                 if funding:
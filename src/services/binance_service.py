@@ -28,6 +28,8 @@ from loguru import logger
 from config.config import BINANCE_API_KEY, BINANCE_API_SECRET
 from config.cache_config import CacheTTL
 from src.cache import get_redis_manager, CacheKeyBuilder
+from src.services.coin_registry import get_coin_registry
+from src.services.service_registry import lazy_service
 
 
 class BinanceService:
@@ -109,21 +111,27 @@ class BinanceService:
                 f"Redis cache: {'enabled' if self.redis.is_available() else 'disabled'}"
             )
 
-    def get_symbol(self, coin_id: str) -> Optional[str]:
+    def get_symbol(self, coin_id: str, market: str = "spot") -> Optional[str]:
         """
         Convert CoinGecko coin ID to Binance symbol
 
         Args:
             coin_id: CoinGecko ID (e.g., 'bitcoin', 'ethereum')
+            market: 'spot' or 'perp' (USDT-M perpetual, for funding/OI/liquidations)
 
         Returns:
-            Binance symbol (e.g., 'BTCUSDT') or None
+            Binance symbol (e.g., 'BTCUSDT') or None if not listed
         """
         # Try direct mapping
         if coin_id.lower() in self.COMMON_SYMBOLS:
             return self.COMMON_SYMBOLS[coin_id.lower()]
 
-        # Try uppercase + USDT
+        # Listed pairs from the coin registry (no guessing -> no 400s)
+        registry = get_coin_registry()
+        if registry.is_loaded():
+            return registry.exchange_symbol(coin_id, "binance", market)
+
+        # Registry not synced yet: try uppercase + USDT
         symbol = f"{coin_id.upper()}USDT"
         return symbol
 
@@ -319,6 +327,36 @@ class BinanceService:
 
         return await self.get_klines(symbol, interval, limit)
 
+    @retry(
+        retry=retry_if_exception_type((aiohttp.ClientError, TimeoutError)),
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=2, max=10),
+        before_sleep=before_sleep_log(logger, logging.WARNING),
+        reraise=True,
+    )
+    async def get_exchange_info(self, futures: bool = False) -> Optional[Dict]:
+        """
+        Get all trading pairs (spot or USDT-M futures) in one request
+
+        Args:
+            futures: USDT-M futures exchangeInfo instead of spot
+
+        Returns:
+            exchangeInfo JSON ({"symbols": [...]}) or None
+        """
+        url = f"{self.FUTURES_URL if futures else self.BASE_URL}/exchangeInfo"
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(url, timeout=aiohttp.ClientTimeout(total=30)) as response:
+                    if response.status == 200:
+                        return await response.json()
+                    logger.warning(f"Binance exchangeInfo ({url}) returned {response.status}")
+                    return None
+
+        except Exception as e:
+            logger.error(f"Error fetching Binance exchangeInfo ({url}): {e}")
+            return None
+
     @retry(
         retry=retry_if_exception_type((aiohttp.ClientError, TimeoutError)),
         stop=stop_after_attempt(3),
@@ -1027,5 +1065,5 @@ class BinanceService:
             return None
 
 
-# Singleton instance
-binance_service = BinanceService()
+# Singleton instance (shared with the service registry)
+binance_service = lazy_service("binance")
@@ -248,6 +248,47 @@ class BybitService:
             logger.error(f"Error fetching Bybit instrument info for {symbol}: {e}")
             return None
 
+    async def get_instruments(self, category: str = "linear") -> Optional[List[Dict]]:
+        """
+        Получить все инструменты категории (linear / spot), с пагинацией.
+
+        Returns None if any page failed (a partial list is never returned).
+        """
+        instruments: List[Dict] = []
+        cursor = ""
+        try:
+            async with aiohttp.ClientSession() as session:
+                url = f"{self.BASE_URL}/v5/market/instruments-info"
+                while True:
+                    params = {"category": category, "limit": 1000}
+                    if cursor:
+                        params["cursor"] = cursor
+
+                    async with session.get(url, params=params) as response:
+                        if response.status != 200:
+                            logger.warning(
+                                f"Bybit instruments ({category}) HTTP {response.status}"
+                            )
+                            return None
+                        data = await response.json()
+                        if data.get("retCode") != 0:
+                            logger.warning(
+                                f"Bybit instruments ({category}) error: {data.get('retMsg')}"
+                            )
+                            return None
+
+                        result = data.get("result", {})
+                        instruments.extend(result.get("list", []))
+                        cursor = result.get("nextPageCursor") or ""
+                        if not cursor:
+                            break
+
+        except Exception as e:
+            logger.error(f"Error fetching Bybit instruments ({category}): {e}")
+            return None
+
+        return instruments
+
     async def symbol_exists(self, symbol: str) -> bool:
         """Проверить существует ли символ на Bybit."""
         info = await self.get_instrument_info(symbol)
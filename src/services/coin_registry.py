@@ -0,0 +1,444 @@
+# coding: utf-8
+"""
+Local coin registry: ticker / CoinGecko ID / exchange listing resolution
+
+Built periodically from CoinGecko /coins/list (+ market cap ranks for the
+top coins), Binance spot/futures exchangeInfo and Bybit spot/linear
+instruments, and stored in Redis as two hashes:
+
+- coins:   coingecko_id -> "SYMBOL<TAB>Name<TAB>rank"
+- markets: BASE asset   -> {"binance_spot": "BTCUSDT", "bybit_perp": ...}
+
+Every process keeps an in-memory snapshot (reloaded from Redis every
+COIN_REGISTRY_RELOAD_SECONDS), so lookups are plain dict reads: no more
+guessed f"{coin}USDT" symbols that 400 on Binance and no upstream search
+calls for tickers that the registry already knows.
+
+DexScreener has no bulk listing endpoint, so DEX-only tokens are still
+resolved on demand by crypto_tools.
+"""
+
+import asyncio
+import json
+import re
+import time
+from bisect import bisect_left
+from datetime import datetime, UTC
+from difflib import get_close_matches
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from loguru import logger
+from redis.exceptions import RedisError
+
+from config.config import (
+    COIN_REGISTRY_ENABLED,
+    COIN_REGISTRY_RANKED_COINS,
+    COIN_REGISTRY_RELOAD_SECONDS,
+)
+from src.cache import CacheKeyBuilder, get_redis_manager
+from src.utils.coin_parser import COIN_ID_MAPPING
+
+MARKETS = ("binance_spot", "binance_perp", "bybit_spot", "bybit_perp")
+PERP_MARKETS = {"binance": "binance_perp", "bybit": "bybit_perp"}
+
+# Sort key for coins without a market cap rank
+UNRANKED = 1_000_000
+
+# Quote assets we trade against (first match wins)
+_QUOTES = ("USDT",)
+
+# 1000PEPE / 10000SATS / SHIB1000 -> PEPE / SATS / SHIB
+_MULTIPLIER_RE = re.compile(r"^10{3,}(?=[A-Z])|(?<=[A-Z])10{3,}$")
+
+
+def normalize_base(base: str) -> str:
+    """Strip contract-size multipliers from exchange base asset"""
+    return _MULTIPLIER_RE.sub("", base.upper())
+
+
+def parse_binance_symbols(
+    exchange_info: Optional[Dict], futures: bool
+) -> Dict[str, str]:
+    """exchangeInfo -> {BASE: pair symbol} for trading USDT pairs (perpetuals for futures)"""
+    pairs: Dict[str, str] = {}
+    for item in (exchange_info or {}).get("symbols", []):
+        if item.get("status") != "TRADING" or item.get("quoteAsset") not in _QUOTES:
+            continue
+        if futures and item.get("contractType") != "PERPETUAL":
+            continue
+        pairs.setdefault(normalize_base(item["baseAsset"]), item["symbol"])
+    return pairs
+
+
+def parse_bybit_symbols(
+    instruments: Optional[List[Dict]], perp: bool
+) -> Dict[str, str]:
+    """instruments-info list -> {BASE: pair symbol} for trading USDT pairs"""
+    pairs: Dict[str, str] = {}
+    for item in instruments or []:
+        if item.get("status") != "Trading" or item.get("quoteCoin") not in _QUOTES:
+            continue
+        if perp and item.get("contractType") != "LinearPerpetual":
+            continue
+        pairs.setdefault(normalize_base(item["baseCoin"]), item["symbol"])
+    return pairs
+
+
+class RegistrySnapshot(NamedTuple):
+    """In-memory registry (all lookups are dict reads)"""
+
+    coins: Dict[str, Tuple[str, str, int]]  # id -> (SYMBOL, name, rank)
+    symbols: Dict[str, List[str]]  # lowercase symbol -> ids, best rank first
+    names: Dict[str, str]  # lowercase name -> id (best rank)
+    markets: Dict[str, Dict[str, str]]  # BASE -> {market: pair symbol}
+    search_keys: List[str]  # sorted lowercase symbols + names (prefix search)
+
+    @classmethod
+    def build(
+        cls,
+        coins: Dict[str, Tuple[str, str, int]],
+        markets: Dict[str, Dict[str, str]],
+    ) -> "RegistrySnapshot":
+        """Derive lookup indexes from stored coins + markets"""
+        symbols: Dict[str, List[str]] = {}
+        names: Dict[str, str] = {}
+        for coin_id, (symbol, name, rank) in sorted(
+            coins.items(), key=lambda kv: kv[1][2]
+        ):
+            symbols.setdefault(symbol.lower(), []).append(coin_id)
+            names.setdefault(name.lower(), coin_id)
+
+        return cls(coins, symbols, names, markets, sorted(set(symbols) | set(names)))
+
+
+_EMPTY = RegistrySnapshot({}, {}, {}, {}, [])
+
+
+class CoinRegistry:
+    """
+    Coin registry synced to Redis, read from an in-memory snapshot
+    """
+
+    def __init__(self, redis_manager=None):
+        self._redis_manager = redis_manager
+        self._snapshot = _EMPTY
+        self._loaded_at = 0.0
+        self._load_lock = asyncio.Lock()
+
+        self.coins_key = CacheKeyBuilder.build("coin_registry", "coins")
+        self.markets_key = CacheKeyBuilder.build("coin_registry", "markets")
+        self.meta_key = CacheKeyBuilder.build("coin_registry", "meta")
+
+    @property
+    def redis(self):
+        """Redis manager (resolved lazily so tests can swap the global one)"""
+        if self._redis_manager is None:
+            self._redis_manager = get_redis_manager()
+        return self._redis_manager
+
+    def is_loaded(self) -> bool:
+        """Registry has data (otherwise callers fall back to old heuristics)"""
+        return bool(self._snapshot.coins or self._snapshot.markets)
+
+    # ===========================
+    # LOOKUPS (sync, in-memory)
+    # ===========================
+
+    def resolve_coin_id(self, query: str) -> Optional[str]:
+        """
+        Resolve ticker / name / CoinGecko ID to CoinGecko ID
+
+        Ambiguous tickers resolve to the coin with the best market cap rank.
+
+        Args:
+            query: "WIF", "dogwifhat", "dogwifcoin", ...
+
+        Returns:
+            CoinGecko ID or None if unknown
+        """
+        if not query:
+            return None
+        snapshot = self._snapshot
+        q = query.lower().strip()
+
+        if q in snapshot.coins:
+            return q
+        ids = snapshot.symbols.get(q)
+        if ids:
+            return ids[0]
+        return snapshot.names.get(q)
+
+    def get_coin(self, coin_id: str) -> Optional[Tuple[str, str, int]]:
+        """(SYMBOL, name, rank) for CoinGecko ID"""
+        return self._snapshot.coins.get(coin_id)
+
+    def _base_for(self, coin: str) -> str:
+        """BASE asset for CoinGecko ID or ticker"""
+        info = self._snapshot.coins.get(coin.lower())
+        return info[0].upper() if info else normalize_base(coin)
+
+    def exchange_symbol(
+        self, coin: str, exchange: str, market: str = "spot"
+    ) -> Optional[str]:
+        """
+        Trading pair on exchange, e.g. ("pepe", "binance", "perp") -> "1000PEPEUSDT"
+
+        Args:
+            coin: CoinGecko ID or ticker
+            exchange: "binance" or "bybit"
+            market: "spot" or "perp"
+
+        Returns:
+            Pair symbol or None if not listed
+        """
+        listings = self._snapshot.markets.get(self._base_for(coin), {})
+        return listings.get(f"{exchange}_{market}")
+
+    def perp_exchanges(self, coin: str) -> List[str]:
+        """Exchanges with a USDT perpetual for coin (CoinGecko ID or ticker)"""
+        listings = self._snapshot.markets.get(self._base_for(coin), {})
+        return [
+            exchange for exchange, market in PERP_MARKETS.items() if market in listings
+        ]
+
+    def search(self, query: str, limit: int = 10) -> List[str]:
+        """
+        Prefix search over tickers and names, fuzzy match as fallback
+
+        Returns:
+            CoinGecko IDs, best market cap rank first
+        """
+        snapshot = self._snapshot
+        q = query.lower().strip()
+        if not q:
+            return []
+
+        keys = []
+        start = bisect_left(snapshot.search_keys, q)
+        for key in snapshot.search_keys[start:]:
+            if not key.startswith(q) or len(keys) >= limit * 5:
+                break
+            keys.append(key)
+        if not keys:
+            keys = get_close_matches(q, snapshot.search_keys, n=limit, cutoff=0.8)
+
+        ids = []
+        for key in keys:
+            for coin_id in snapshot.symbols.get(key, []) + [snapshot.names.get(key)]:
+                if coin_id and coin_id not in ids:
+                    ids.append(coin_id)
+        ids.sort(key=lambda coin_id: snapshot.coins[coin_id][2])
+        return ids[:limit]
+
+    # ===========================
+    # LOAD (Redis -> memory)
+    # ===========================
+
+    async def ensure_loaded(self) -> None:
+        """Reload snapshot from Redis if it's older than COIN_REGISTRY_RELOAD_SECONDS"""
+        if not COIN_REGISTRY_ENABLED:
+            return
+        if time.monotonic() - self._loaded_at < COIN_REGISTRY_RELOAD_SECONDS:
+            return
+        async with self._load_lock:
+            if time.monotonic() - self._loaded_at >= COIN_REGISTRY_RELOAD_SECONDS:
+                await self.load()
+
+    async def load(self) -> bool:
+        """
+        Load registry from Redis into memory
+
+        Returns:
+            True if registry data was found
+        """
+        self._loaded_at = time.monotonic()
+        client = self.redis.client
+        if client is None:
+            return False
+
+        try:
+            pipe = client.pipeline(transaction=False)
+            pipe.hgetall(self.coins_key)
+            pipe.hgetall(self.markets_key)
+            raw_coins, raw_markets = await pipe.execute()
+        except RedisError as e:
+            logger.warning(f"Coin registry load failed: {e}")
+            return False
+
+        if not raw_coins and not raw_markets:
+            return False
+
+        coins = {}
+        for coin_id, packed in raw_coins.items():
+            symbol, name, rank = packed.split("\t")
+            coins[coin_id] = (symbol, name, int(rank))
+        markets = {base: json.loads(listings) for base, listings in raw_markets.items()}
+
+        self._snapshot = RegistrySnapshot.build(coins, markets)
+        logger.info(
+            f"Coin registry loaded: {len(coins)} coins, {len(markets)} listed assets"
+        )
+        return True
+
+    # ===========================
+    # SYNC (upstream -> Redis)
+    # ===========================
+
+    async def is_fresh(self, max_age_seconds: float) -> bool:
+        """Registry in Redis was synced less than max_age_seconds ago"""
+        client = self.redis.client
+        if client is None:
+            return False
+        synced_at = await client.hget(self.meta_key, "synced_at")
+        return bool(synced_at) and time.time() - float(synced_at) < max_age_seconds
+
+    async def sync(self) -> bool:
+        """
+        Rebuild registry from upstream APIs and store it in Redis
+
+        Returns:
+            True if registry was stored
+        """
+        from src.services.bybit_service import bybit_service
+        from src.services.service_registry import get_service
+
+        binance_service = get_service("binance")
+        coingecko = get_service("coingecko")
+        pages = range(1, COIN_REGISTRY_RANKED_COINS // 250 + 1)
+        (
+            coin_list,
+            binance_spot,
+            binance_perp,
+            bybit_spot,
+            bybit_perp,
+            *ranked_pages,
+        ) = await asyncio.gather(
+            coingecko.get_coins_list(),
+            binance_service.get_exchange_info(futures=False),
+            binance_service.get_exchange_info(futures=True),
+            bybit_service.get_instruments("spot"),
+            bybit_service.get_instruments("linear"),
+            *[
+                coingecko.get_top_coins(
+                    limit=250, include_1h_7d_change=False, page=page
+                )
+                for page in pages
+            ],
+        )
+
+        if not coin_list:
+            logger.warning(
+                "Coin registry sync skipped: CoinGecko /coins/list unavailable"
+            )
+            return False
+
+        ranks = {}
+        for page in ranked_pages:
+            for coin in page or []:
+                if coin.get("market_cap_rank"):
+                    ranks[coin["id"]] = coin["market_cap_rank"]
+        # Curated aliases win ties (e.g. "ton" -> the-open-network)
+        for coin_id in set(COIN_ID_MAPPING.values()):
+            ranks.setdefault(coin_id, UNRANKED - 1)
+
+        coins = {
+            c["id"]: (c["symbol"].upper(), c["name"], ranks.get(c["id"], UNRANKED))
+            for c in coin_list
+            if c.get("id") and c.get("symbol") and "\t" not in c.get("name", "")
+        }
+
+        fetched = {
+            "binance_spot": parse_binance_symbols(binance_spot, futures=False),
+            "binance_perp": parse_binance_symbols(binance_perp, futures=True),
+            "bybit_spot": parse_bybit_symbols(bybit_spot, perp=False),
+            "bybit_perp": parse_bybit_symbols(bybit_perp, perp=True),
+        }
+        failed = [market for market, pairs in fetched.items() if not pairs]
+        if failed:
+            # Exchange fetch failed (listings are never partial: a failed page
+            # returns nothing) - keep that market's last stored listings
+            # instead of wiping it from the registry
+            await self.load()
+            previous = self._snapshot.markets
+            for market in failed:
+                fetched[market] = {
+                    base: listings[market]
+                    for base, listings in previous.items()
+                    if market in listings
+                }
+            logger.warning(
+                f"Coin registry sync: {', '.join(failed)} unavailable, "
+                f"keeping previous listings"
+            )
+
+        markets: Dict[str, Dict[str, str]] = {}
+        for market, pairs in fetched.items():
+            for base, symbol in pairs.items():
+                markets.setdefault(base, {})[market] = symbol
+
+        await self.store(coins, markets)
+        self._snapshot = RegistrySnapshot.build(coins, markets)
+        self._loaded_at = time.monotonic()
+        logger.info(
+            f"Coin registry synced: {len(coins)} coins, {len(markets)} listed assets"
+        )
+        return True
+
+    async def store(
+        self,
+        coins: Dict[str, Tuple[str, str, int]],
+        markets: Dict[str, Dict[str, str]],
+    ) -> None:
+        """Write registry to Redis (new hashes are swapped in atomically)"""
+        client = self.redis.client
+        if client is None:
+            return
+
+        tmp_coins, tmp_markets = f"{self.coins_key}:tmp", f"{self.markets_key}:tmp"
+        pipe = client.pipeline(transaction=False)
+        pipe.delete(tmp_coins, tmp_markets)
+        packed = {
+            cid: f"{sym}\t{name}\t{rank}" for cid, (sym, name, rank) in coins.items()
+        }
+        items = list(packed.items())
+        for start in range(0, len(items), 1000):
+            pipe.hset(tmp_coins, mapping=dict(items[start : start + 1000]))
+        if markets:
+            pipe.hset(
+                tmp_markets,
+                mapping={
+                    base: json.dumps(listings) for base, listings in markets.items()
+                },
+            )
+        await pipe.execute()
+
+        swap = client.pipeline(transaction=True)
+        if coins:
+            swap.rename(tmp_coins, self.coins_key)
+        if markets:
+            swap.rename(tmp_markets, self.markets_key)
+        swap.hset(
+            self.meta_key,
+            mapping={
+                "synced_at": time.time(),
+                "synced_at_iso": datetime.now(UTC).isoformat(),
+            },
+        )
+        await swap.execute()
+
+
+# Global registry instance
+_coin_registry: Optional[CoinRegistry] = None
+
+
+def get_coin_registry() -> CoinRegistry:
+    """
+    Get global coin registry (singleton)
+
+    Returns:
+        CoinRegistry instance
+    """
+    global _coin_registry
+    if _coin_registry is None:
+        _coin_registry = CoinRegistry()
+    return _coin_registry
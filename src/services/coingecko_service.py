@@ -203,6 +203,7 @@ class CoinGeckoService:
         "search": 600,         # Search results: 10min (rarely changes)
         "categories": 3600,    # Categories with market data: 1 hour (changes slowly)
         "categories_list": 86400,  # Category list: 24 hours (almost static)
+        "coins_list": 21600,   # Full coin list (id/symbol/name): 6 hours
         "markets": 180,        # Coins markets endpoint: 3min
         "default": 180,        # Default: 3min
     }
@@ -259,6 +260,8 @@ class CoinGeckoService:
             return "categories"
         elif "/coins/markets" in endpoint:
             return "markets"
+        elif "/coins/list" in endpoint:
+            return "coins_list"
         elif "/coins/" in endpoint:
             return "coin_data"
         elif "/search/trending" in endpoint:
@@ -852,15 +855,20 @@ class CoinGeckoService:
         return await self._make_request("/search/trending")
 
     async def get_top_coins(
-        self, vs_currency: str = "usd", limit: int = 10, include_1h_7d_change: bool = True
+        self,
+        vs_currency: str = "usd",
+        limit: int = 10,
+        include_1h_7d_change: bool = True,
+        page: int = 1,
     ) -> Optional[List[Dict[str, Any]]]:
         """
         Get top cryptocurrencies by market cap
 
         Args:
             vs_currency: Currency to compare against
-            limit: Number of coins to return
+            limit: Number of coins to return (per page, max 250)
             include_1h_7d_change: Include 1h and 7d price change percentages
+            page: Page number (for ranks beyond the first `limit`)
 
         Returns:
             List of top coins with market data
@@ -869,7 +877,7 @@ class CoinGeckoService:
             "vs_currency": vs_currency,
             "order": "market_cap_desc",
             "per_page": limit,
-            "page": 1,
+            "page": page,
             "sparkline": "false",
         }
 
@@ -879,6 +887,15 @@ class CoinGeckoService:
 
         return await self._make_request("/coins/markets", params)
 
+    async def get_coins_list(self) -> Optional[List[Dict[str, Any]]]:
+        """
+        Get all coins supported by CoinGecko (id, symbol, name)
+
+        Returns:
+            List of {"id", "symbol", "name"} dicts (~15k entries)
+        """
+        return await self._make_request("/coins/list")
+
     async def search_coin(self, query: str) -> Optional[Dict[str, Any]]:
         """
         Search for a cryptocurrency by name or symbol
@@ -28,6 +28,7 @@ from tenacity import (
 )
 
 from config.config import CACHE_TTL_COINGECKO  # Reuse same TTL
+from src.services.exceptions import PriceSourceUnavailable
 
 
 # Create standard logger for tenacity
@@ -114,6 +115,9 @@ class CoinMarketCapService:
 
         Returns:
             JSON response or None on error
+
+        Raises:
+            PriceSourceUnavailable: Rate limited, server error or timeout
         """
         if not self.api_key:
             logger.error("CoinMarketCap API key not configured")
@@ -148,7 +152,10 @@ class CoinMarketCapService:
                         return None
                     elif response.status == 429:
                         logger.warning("CoinMarketCap rate limit exceeded.")
-                        return None
+                        raise PriceSourceUnavailable("CoinMarketCap rate limit exceeded")
+                    elif response.status >= 500:
+                        logger.error(f"CoinMarketCap API error: {response.status}")
+                        raise PriceSourceUnavailable(f"CoinMarketCap HTTP {response.status}")
                     else:
                         logger.error(
                             f"CoinMarketCap API error: {response.status} - "
@@ -156,6 +163,11 @@ class CoinMarketCapService:
                         )
                         return None
 
+        except PriceSourceUnavailable:
+            raise
+        except (aiohttp.ClientError, TimeoutError) as e:
+            logger.warning(f"CoinMarketCap request failed: {e}")
+            raise PriceSourceUnavailable(f"CoinMarketCap request failed: {e}") from e
         except Exception as e:
             logger.exception(f"Error making CoinMarketCap request: {e}")
             return None
@@ -173,6 +185,9 @@ class CoinMarketCapService:
         Returns:
             Quote data dict or None
 
+        Raises:
+            PriceSourceUnavailable: CoinMarketCap couldn't be reached
+
         Example response:
             {
                 "symbol": "BTC",
@@ -219,6 +234,8 @@ class CoinMarketCapService:
                 "last_updated": quote.get("last_updated"),
             }
 
+        except PriceSourceUnavailable:
+            raise
         except Exception as e:
             logger.error(f"Error getting quote for {symbol}: {e}")
             return None
@@ -9,74 +9,35 @@ Following OpenAI best practices 2025:
 - Proper error handling
 - Validation
 """
-import json
+import asyncio
 import time
-from typing import Dict, Any, List
-from datetime import datetime
-
-import pandas as pd
-import numpy as np
-
-from src.services.coingecko_service import CoinGeckoService
-from src.services.cryptopanic_service import CryptoPanicService
-from src.services.binance_service import BinanceService
-from src.services.fear_greed_service import FearGreedService
-from src.services.technical_indicators import TechnicalIndicators
-from src.services.candlestick_patterns import CandlestickPatterns
-from src.services.cycle_analysis_service import CycleAnalysisService
-from src.services.coinmetrics_service import CoinMetricsService
-from src.services.price_levels_service import PriceLevelsService
+from typing import Dict, Any, List, Optional, Tuple
+
+from src.services.coin_registry import get_coin_registry
+from src.services.exceptions import PriceSourceUnavailable
 from src.utils.coin_parser import normalize_coin_name
+from src.utils.serialization import dumps, loads
 
 
 from loguru import logger
 
 
-def convert_to_serializable(obj: Any) -> Any:
-    """
-    Convert non-JSON-serializable objects to serializable format
+from config.cache_config import CacheConfig, CacheTTL
+from src.cache import CacheKeyBuilder, get_redis_manager
+from src.services.service_registry import lazy_service
 
-    Args:
-        obj: Object to convert (can be dict, list, or any type)
-
-    Returns:
-        JSON-serializable version of the object
-    """
-    if isinstance(obj, (pd.Timestamp, datetime)):
-        return obj.isoformat()
-    elif isinstance(obj, (np.bool_, bool)):
-        return bool(obj)
-    elif isinstance(obj, (np.integer, np.int64, np.int32)):
-        return int(obj)
-    elif isinstance(obj, (np.floating, np.float64, np.float32)):
-        return float(obj)
-    elif isinstance(obj, dict):
-        return {key: convert_to_serializable(value) for key, value in obj.items()}
-    elif isinstance(obj, list):
-        return [convert_to_serializable(item) for item in obj]
-    elif isinstance(obj, tuple):
-        return tuple(convert_to_serializable(item) for item in obj)
-    elif pd.isna(obj):
-        return None
-    else:
-        return obj
-
-# Initialize services
-from src.services.dexscreener_service import DexScreenerService
-from src.services.coinmarketcap_service import CoinMarketCapService
-from config.config import COINMARKETCAP_API_KEY, RateLimits
-
-coingecko_service = CoinGeckoService(rate_limit=RateLimits.COINGECKO_CALLS_PER_MINUTE)
-dexscreener_service = DexScreenerService()
-coinmarketcap_service = CoinMarketCapService(api_key=COINMARKETCAP_API_KEY)
-cryptopanic_service = CryptoPanicService()
-binance_service = BinanceService()
-fear_greed_service = FearGreedService()
-technical_indicators = TechnicalIndicators()
-candlestick_patterns = CandlestickPatterns()
-cycle_service = CycleAnalysisService()
-coinmetrics_service = CoinMetricsService()
-price_levels_service = PriceLevelsService()
+# Shared instances, created on first tool call
+coingecko_service = lazy_service("coingecko")
+dexscreener_service = lazy_service("dexscreener")
+coinmarketcap_service = lazy_service("coinmarketcap")
+cryptopanic_service = lazy_service("cryptopanic")
+binance_service = lazy_service("binance")
+fear_greed_service = lazy_service("fear_greed")
+technical_indicators = lazy_service("technical_indicators")
+candlestick_patterns = lazy_service("candlestick_patterns")
+cycle_service = lazy_service("cycle_analysis")
+coinmetrics_service = lazy_service("coinmetrics")
+price_levels_service = lazy_service("price_levels")
 
 
 # ============================================================================
@@ -329,174 +290,365 @@ CRYPTO_TOOLS = [
 # ============================================================================
 
 
-async def get_crypto_price(coin_id: str) -> Dict[str, Any]:
+async def resolve_coin_id(coin_id: str) -> str:
     """
-    Get current price and market data for ANY cryptocurrency with fallback logic
+    Resolve user/LLM coin reference to CoinGecko ID
 
-    Tries multiple data sources in order:
-    1. CoinGecko (major coins, CEX)
-    2. DexScreener (DEX tokens: Solana, BSC, ETH, etc.)
-    3. CoinMarketCap (smaller CEX: KuCoin, BingX, Gate.io)
+    Curated aliases first, then the local coin registry (tickers like
+    'WIF' -> 'dogwifcoin'); unknown input is returned lowercased.
+    """
+    normalized = normalize_coin_name(coin_id)
+    if normalized:
+        return normalized
+
+    registry = get_coin_registry()
+    await registry.ensure_loaded()
+    return registry.resolve_coin_id(coin_id) or coin_id.lower()
+
+
+# Price sources in preference order (CoinGecko has the best data for listed coins)
+PRICE_SOURCES = ("coingecko", "coinmarketcap", "dexscreener")
+
+
+async def _price_from_coingecko(coin_id: str, normalized_id: str) -> Optional[Dict[str, Any]]:
+    """CoinGecko price (major coins, established projects); None if unknown id"""
+    price_data = await coingecko_service.get_price(
+        normalized_id,
+        include_24h_change=True,
+        include_market_cap=True,
+        include_24h_volume=True,
+    )
+    if price_data is None:
+        # Service returns {} for unknown ids and None when the request failed
+        raise PriceSourceUnavailable("CoinGecko request failed")
+    if normalized_id not in price_data:
+        return None
 
-    Args:
-        coin_id: Cryptocurrency identifier (name, symbol, or address)
+    data = price_data[normalized_id]
+
+    # Get coin details for proper name
+    coin_details = await coingecko_service.get_coin_data(normalized_id)
+    coin_name = (
+        coin_details.get("name", normalized_id.title())
+        if coin_details
+        else normalized_id.title()
+    )
+    symbol = coin_details.get("symbol", "").upper() if coin_details else ""
+
+    logger.info(f"✅ Found on CoinGecko: {coin_name} ({symbol})")
+
+    return {
+        "success": True,
+        "data_source": "CoinGecko",
+        "coin_id": normalized_id,
+        "name": coin_name,
+        "symbol": symbol,
+        "price_usd": data.get("usd", 0),
+        "change_24h_percent": data.get("usd_24h_change", 0),
+        "market_cap_usd": data.get("usd_market_cap", 0),
+        "volume_24h_usd": data.get("usd_24h_vol", 0),
+    }
 
-    Returns:
-        Dict with price data and data source, or error
+
+async def _price_from_coinmarketcap(coin_id: str, normalized_id: str) -> Optional[Dict[str, Any]]:
+    """CoinMarketCap quote (smaller CEX tokens: KuCoin, BingX, Gate.io); None if unknown"""
+    cmc_data = await coinmarketcap_service.get_quote_by_symbol(coin_id)
+    if not cmc_data:
+        return None
+
+    logger.info(f"✅ Found on CoinMarketCap: {cmc_data['name']} ({cmc_data['symbol']})")
+
+    return {
+        "success": True,
+        "data_source": "CoinMarketCap",
+        "name": cmc_data["name"],
+        "symbol": cmc_data["symbol"],
+        "price_usd": cmc_data["price"],
+        "change_24h_percent": cmc_data["percent_change_24h"],
+        "market_cap_usd": cmc_data["market_cap"],
+        "volume_24h_usd": cmc_data["volume_24h"],
+        "cmc_rank": cmc_data.get("cmc_rank"),
+        "circulating_supply": cmc_data.get("circulating_supply"),
+        "max_supply": cmc_data.get("max_supply"),
+    }
+
+
+async def _price_from_dexscreener(coin_id: str, normalized_id: str) -> Optional[Dict[str, Any]]:
+    """DexScreener price (DEX tokens: Solana, BSC, ETH, etc.); None if unknown"""
+    # Get ALL variants first - there can be MULTIPLE tokens with the same name
+    dex_variants = await dexscreener_service.get_all_token_variants(coin_id, top_n=3)
+    if not dex_variants:
+        return None
+
+    # If multiple variants with significant differences, return all
+    if len(dex_variants) > 1:
+        # Check if variants have significantly different market caps
+        market_caps = [v.get("market_cap_usd", 0) for v in dex_variants if v.get("market_cap_usd")]
+
+        # If market caps differ by more than 10x, show multiple options
+        if market_caps and max(market_caps) > min(market_caps) * 10:
+            logger.info(
+                f"✅ Found {len(dex_variants)} variants on DexScreener - returning multiple options"
+            )
+
+            return {
+                "success": True,
+                "data_source": "DexScreener (multiple variants)",
+                "multiple_variants": True,
+                "variants": dex_variants,
+                "message": (
+                    f"Found {len(dex_variants)} different tokens named '{coin_id}'. "
+                    "Please specify which one you're interested in by chain/dex or market cap."
+                )
+            }
+
+    # Single variant or similar market caps - return best one
+    best_variant = dex_variants[0]
+    logger.info(
+        f"✅ Found on DexScreener: {best_variant['name']} ({best_variant['symbol']}) "
+        f"on {best_variant['chain']}/{best_variant['dex']}"
+    )
+
+    return {
+        "success": True,
+        "data_source": f"DexScreener ({best_variant['chain']}/{best_variant['dex']})",
+        "name": best_variant["name"],
+        "symbol": best_variant["symbol"],
+        "price_usd": best_variant["price_usd"],
+        "change_24h_percent": best_variant["price_change_24h"],
+        "market_cap_usd": best_variant["market_cap_usd"],
+        "volume_24h_usd": best_variant["volume_24h_usd"],
+        "liquidity_usd": best_variant["liquidity_usd"],
+        "chain": best_variant["chain"],
+        "dex": best_variant["dex"],
+        "pair_address": best_variant["pair_address"],
+        "token_address": best_variant["token_address"],
+    }
+
+
+_PRICE_FETCHERS = {
+    "coingecko": _price_from_coingecko,
+    "coinmarketcap": _price_from_coinmarketcap,
+    "dexscreener": _price_from_dexscreener,
+}
+
+_PRICE_SOURCE_NAMES = {
+    "coingecko": "CoinGecko",
+    "coinmarketcap": "CoinMarketCap",
+    "dexscreener": "DexScreener",
+}
+
+
+def _price_route_key(normalized_id: str) -> str:
+    return CacheKeyBuilder.build("price_source", "route", normalized_id)
+
+
+def _price_quote_key(normalized_id: str) -> str:
+    return CacheKeyBuilder.build("price_source", "quote", normalized_id)
+
+
+def _parse_price_route(route: Any) -> Dict[str, Any]:
+    """
+    Routing state for a coin: {"hit": source, "miss": {source: expires_at}}
+
+    Expired misses are dropped on read.
     """
+    if not isinstance(route, dict):
+        return {"hit": None, "miss": {}}
+
+    now = time.time()
+    misses = {
+        source: expires_at
+        for source, expires_at in (route.get("miss") or {}).items()
+        if expires_at > now
+    }
+    return {"hit": route.get("hit"), "miss": misses}
+
+
+async def _load_price_route(normalized_id: str) -> Dict[str, Any]:
+    return _parse_price_route(await get_redis_manager().get(_price_route_key(normalized_id)))
+
+
+async def _save_price_route(normalized_id: str, route: Dict[str, Any]) -> None:
+    await get_redis_manager().set(
+        _price_route_key(normalized_id), route, ttl=CacheTTL.PRICE_SOURCE_AFFINITY
+    )
+
+
+async def _fetch_price(
+    source: str, coin_id: str, normalized_id: str
+) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """Run one source; returns (outcome, result) with outcome hit/miss/error"""
     try:
-        # Normalize coin name
-        normalized_id = normalize_coin_name(coin_id) or coin_id.lower()
+        logger.debug(f"Trying {_PRICE_SOURCE_NAMES[source]} for '{coin_id}'...")
+        result = await _PRICE_FETCHERS[source](coin_id, normalized_id)
+        return ("hit", result) if result else ("miss", None)
+    except Exception as e:
+        logger.debug(f"{_PRICE_SOURCE_NAMES[source]} failed for '{coin_id}': {e}")
+        return "error", None
 
-        logger.info(f"🔍 Searching price for '{coin_id}' (normalized: '{normalized_id}')")
 
-        # ============================================================================
-        # 1. TRY COINGECKO (PRIMARY SOURCE - major coins, established projects)
-        # ============================================================================
-        try:
-            logger.debug(f"Trying CoinGecko for '{normalized_id}'...")
-            price_data = await coingecko_service.get_price(
-                normalized_id,
-                include_24h_change=True,
-                include_market_cap=True,
-                include_24h_volume=True,
+async def _hedged_price_lookup(
+    sources: List[str], coin_id: str, normalized_id: str, outcomes: Dict[str, str]
+) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+    """
+    Query sources with the first one given a head start
+
+    The other sources are started after CacheConfig.PRICE_HEDGE_DELAY, or
+    as soon as the first one misses. The first hit wins and the remaining
+    requests are cancelled. Outcomes of finished sources go to `outcomes`.
+    """
+    if not sources:
+        return None, None
+
+    tasks = {
+        asyncio.create_task(_fetch_price(sources[0], coin_id, normalized_id)): sources[0]
+    }
+    pending_sources = list(sources[1:])
+
+    try:
+        while tasks:
+            done, _ = await asyncio.wait(
+                tasks,
+                timeout=CacheConfig.PRICE_HEDGE_DELAY if pending_sources else None,
+                return_when=asyncio.FIRST_COMPLETED,
             )
 
-            if price_data and normalized_id in price_data:
-                data = price_data[normalized_id]
+            for task in done:
+                source = tasks.pop(task)
+                outcome, result = task.result()
+                outcomes[source] = outcome
+                if outcome == "hit":
+                    return source, result
 
-                # Get coin details for proper name
-                coin_details = await coingecko_service.get_coin_data(normalized_id)
-                coin_name = (
-                    coin_details.get("name", normalized_id.title())
-                    if coin_details
-                    else normalized_id.title()
-                )
-                symbol = coin_details.get("symbol", "").upper() if coin_details else ""
-
-                logger.info(f"✅ Found on CoinGecko: {coin_name} ({symbol})")
-
-                return {
-                    "success": True,
-                    "data_source": "CoinGecko",
-                    "coin_id": normalized_id,
-                    "name": coin_name,
-                    "symbol": symbol,
-                    "price_usd": data.get("usd", 0),
-                    "change_24h_percent": data.get("usd_24h_change", 0),
-                    "market_cap_usd": data.get("usd_market_cap", 0),
-                    "volume_24h_usd": data.get("usd_24h_vol", 0),
-                }
-        except Exception as e:
-            logger.debug(f"CoinGecko failed for '{normalized_id}': {e}")
+            # Head start over (timeout) or preferred source missed - hedge
+            if pending_sources:
+                for source in pending_sources:
+                    task = asyncio.create_task(_fetch_price(source, coin_id, normalized_id))
+                    tasks[task] = source
+                pending_sources = []
+    finally:
+        for task in tasks:
+            task.cancel()
 
-        # ============================================================================
-        # 2. TRY COINMARKETCAP (SECONDARY - CEX tokens: KuCoin, BingX, Gate.io)
-        # ============================================================================
-        try:
-            # Only try if API key is configured
-            if coinmarketcap_service.api_key:
-                logger.debug(f"Trying CoinMarketCap for '{coin_id}'...")
-                cmc_data = await coinmarketcap_service.get_quote_by_symbol(coin_id)
-
-                if cmc_data:
-                    logger.info(f"✅ Found on CoinMarketCap: {cmc_data['name']} ({cmc_data['symbol']})")
-
-                    return {
-                        "success": True,
-                        "data_source": "CoinMarketCap",
-                        "name": cmc_data["name"],
-                        "symbol": cmc_data["symbol"],
-                        "price_usd": cmc_data["price"],
-                        "change_24h_percent": cmc_data["percent_change_24h"],
-                        "market_cap_usd": cmc_data["market_cap"],
-                        "volume_24h_usd": cmc_data["volume_24h"],
-                        "cmc_rank": cmc_data.get("cmc_rank"),
-                        "circulating_supply": cmc_data.get("circulating_supply"),
-                        "max_supply": cmc_data.get("max_supply"),
-                    }
-            else:
-                logger.debug("CoinMarketCap API key not configured, skipping")
-        except Exception as e:
-            logger.debug(f"CoinMarketCap failed for '{coin_id}': {e}")
+    return None, None
 
-        # ============================================================================
-        # 3. TRY DEXSCREENER (TERTIARY - DEX tokens: Solana, BSC, ETH, etc.)
-        # Check for MULTIPLE variants with same name!
-        # ============================================================================
-        try:
-            logger.debug(f"Trying DexScreener for '{coin_id}'...")
 
-            # Get ALL variants first
-            dex_variants = await dexscreener_service.get_all_token_variants(coin_id, top_n=3)
+def _is_known_coin_id(coin_id: str, normalized_id: str) -> bool:
+    """Whether the ID comes from curated aliases or the coin registry"""
+    if normalize_coin_name(coin_id):
+        return True
+    registry = get_coin_registry()
+    return registry.is_loaded() and registry.get_coin(normalized_id) is not None
 
-            if dex_variants and len(dex_variants) > 0:
-                # If multiple variants with significant differences, return all
-                if len(dex_variants) > 1:
-                    # Check if variants have significantly different market caps
-                    market_caps = [v.get("market_cap_usd", 0) for v in dex_variants if v.get("market_cap_usd")]
 
-                    # If market caps differ by more than 10x, show multiple options
-                    if market_caps and max(market_caps) > min(market_caps) * 10:
-                        logger.info(
-                            f"✅ Found {len(dex_variants)} variants on DexScreener - returning multiple options"
-                        )
+async def get_crypto_price(coin_id: str) -> Dict[str, Any]:
+    """
+    Get current price and market data for ANY cryptocurrency with fallback logic
 
-                        return {
-                            "success": True,
-                            "data_source": "DexScreener (multiple variants)",
-                            "multiple_variants": True,
-                            "variants": dex_variants,
-                            "message": (
-                                f"Found {len(dex_variants)} different tokens named '{coin_id}'. "
-                                "Please specify which one you're interested in by chain/dex or market cap."
-                            )
-                        }
+    Data sources:
+    1. CoinGecko (major coins, CEX)
+    2. CoinMarketCap (smaller CEX: KuCoin, BingX, Gate.io)
+    3. DexScreener (DEX tokens: Solana, BSC, ETH, etc.)
 
-                # Single variant or similar market caps - return best one
-                best_variant = dex_variants[0]
-                logger.info(
-                    f"✅ Found on DexScreener: {best_variant['name']} ({best_variant['symbol']}) "
-                    f"on {best_variant['chain']}/{best_variant['dex']}"
-                )
+    Routing is remembered per coin in Redis: the source that answered last
+    time is asked first (affinity) and sources that did not know the coin are
+    skipped for a while (negative cache). Without affinity, coins known to
+    CoinGecko go there first; unknown ones give CoinGecko a short head start
+    and then query the other sources in parallel - first answer wins.
 
-                return {
-                    "success": True,
-                    "data_source": f"DexScreener ({best_variant['chain']}/{best_variant['dex']})",
-                    "name": best_variant["name"],
-                    "symbol": best_variant["symbol"],
-                    "price_usd": best_variant["price_usd"],
-                    "change_24h_percent": best_variant["price_change_24h"],
-                    "market_cap_usd": best_variant["market_cap_usd"],
-                    "volume_24h_usd": best_variant["volume_24h_usd"],
-                    "liquidity_usd": best_variant["liquidity_usd"],
-                    "chain": best_variant["chain"],
-                    "dex": best_variant["dex"],
-                    "pair_address": best_variant["pair_address"],
-                    "token_address": best_variant["token_address"],
-                }
-        except Exception as e:
-            logger.debug(f"DexScreener failed for '{coin_id}': {e}")
+    Args:
+        coin_id: Cryptocurrency identifier (name, symbol, or address)
+
+    Returns:
+        Dict with price data and data source, or error
+    """
+    try:
+        # Normalize coin name
+        normalized_id = await resolve_coin_id(coin_id)
+
+        logger.info(f"🔍 Searching price for '{coin_id}' (normalized: '{normalized_id}')")
+
+        cached = await get_redis_manager().get(_price_quote_key(normalized_id))
+        if isinstance(cached, dict):
+            return cached
+
+        configured = [
+            source for source in PRICE_SOURCES
+            if source != "coinmarketcap" or coinmarketcap_service.api_key
+        ]
+        route = await _load_price_route(normalized_id)
+        candidates = [source for source in configured if source not in route["miss"]]
+        outcomes: Dict[str, str] = {}
+        winner, result = None, None
+
+        # 1. Source that answered for this coin before
+        affinity = route["hit"]
+        if affinity in candidates:
+            candidates.remove(affinity)
+            outcome, result = await _fetch_price(affinity, coin_id, normalized_id)
+            outcomes[affinity] = outcome
+            if outcome == "hit":
+                winner = affinity
+
+        # 2. Coins CoinGecko knows - ask it alone before anything else
+        if (
+            winner is None
+            and "coingecko" in candidates
+            and _is_known_coin_id(coin_id, normalized_id)
+        ):
+            candidates.remove("coingecko")
+            outcome, result = await _fetch_price("coingecko", coin_id, normalized_id)
+            outcomes["coingecko"] = outcome
+            if outcome == "hit":
+                winner = "coingecko"
+
+        # 3. Hedged lookup over the remaining sources
+        if winner is None:
+            winner, result = await _hedged_price_lookup(
+                candidates, coin_id, normalized_id, outcomes
+            )
+
+        # Remember routing (only definite answers - errors are not cached)
+        now = time.time()
+        misses = dict(route["miss"])
+        for source, outcome in outcomes.items():
+            if outcome == "miss":
+                misses[source] = now + CacheTTL.PRICE_SOURCE_NOT_FOUND
+        misses.pop(winner, None)
+        new_route = {"hit": winner or (affinity if affinity not in misses else None), "miss": misses}
+        if new_route != route:
+            await _save_price_route(normalized_id, new_route)
+
+        if winner is not None:
+            await get_redis_manager().set(
+                _price_quote_key(normalized_id), result, ttl=CacheTTL.PRICE_QUOTE
+            )
+            return result
 
         # ============================================================================
         # ALL SOURCES FAILED
         # ============================================================================
         logger.warning(f"❌ Token '{coin_id}' not found in any data source")
 
+        # Only sources actually queried count as tried; the negative cache
+        # skipped the rest (they didn't know the coin recently)
+        tried = [_PRICE_SOURCE_NAMES[source] for source in configured if source in outcomes]
+        skipped = [
+            _PRICE_SOURCE_NAMES[source]
+            for source in configured
+            if source not in outcomes and source in route["miss"]
+        ]
         return {
             "success": False,
             "error": (
                 f"Cryptocurrency '{coin_id}' not found in any data source. "
-                f"Tried: CoinGecko"
-                f"{', CoinMarketCap' if coinmarketcap_service.api_key else ''}"
-                f", DexScreener. "
-                f"Please check the name/symbol and try again."
+                f"Tried: {', '.join(tried) or 'none'}. "
+                + (f"Recently not found in: {', '.join(skipped)}. " if skipped else "")
+                + "Please check the name/symbol and try again."
             ),
-            "tried_sources": [
-                "CoinGecko",
-                "CoinMarketCap" if coinmarketcap_service.api_key else None,
-                "DexScreener",
-            ],
+            "tried_sources": tried,
+            "skipped_sources": skipped,
         }
 
     except Exception as e:
@@ -507,6 +659,98 @@ async def get_crypto_price(coin_id: str) -> Dict[str, Any]:
         }
 
 
+def _coingecko_market_quote(coin: Dict[str, Any]) -> Dict[str, Any]:
+    """get_crypto_price result from a /coins/markets row"""
+    return {
+        "success": True,
+        "data_source": "CoinGecko",
+        "coin_id": coin["id"],
+        "name": coin.get("name") or coin["id"].title(),
+        "symbol": (coin.get("symbol") or "").upper(),
+        "price_usd": coin.get("current_price") or 0,
+        "change_24h_percent": coin.get("price_change_percentage_24h") or 0,
+        "market_cap_usd": coin.get("market_cap") or 0,
+        "volume_24h_usd": coin.get("total_volume") or 0,
+    }
+
+
+async def get_crypto_prices(coin_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Get prices for several coins with as few upstream requests as possible
+
+    Cached quotes are read in one MGET. Coins CoinGecko is known to serve
+    (routing affinity, curated aliases, coin registry) are fetched with a
+    single /coins/markets request; only the rest go through
+    get_crypto_price (CoinMarketCap/DexScreener), concurrently.
+
+    Args:
+        coin_ids: Coin identifiers as given by the user/LLM
+
+    Returns:
+        {coin_id: get_crypto_price-style result} in input order
+    """
+    coin_ids = list(dict.fromkeys(coin_ids))
+    if not coin_ids:
+        return {}
+
+    normalized = dict(zip(coin_ids, await asyncio.gather(*map(resolve_coin_id, coin_ids))))
+    unique_ids = list(dict.fromkeys(normalized.values()))
+
+    redis = get_redis_manager()
+    cached = await redis.get_many(
+        [_price_quote_key(nid) for nid in unique_ids]
+        + [_price_route_key(nid) for nid in unique_ids]
+    )
+    quotes = {
+        nid: quote
+        for nid, quote in zip(unique_ids, cached[:len(unique_ids)])
+        if isinstance(quote, dict)
+    }
+    routes = {
+        nid: _parse_price_route(route)
+        for nid, route in zip(unique_ids, cached[len(unique_ids):])
+    }
+
+    # One batched CoinGecko request for coins it is known to have
+    coin_by_id = {nid: coin_id for coin_id, nid in reversed(normalized.items())}
+    batch_ids = [
+        nid for nid in unique_ids
+        if nid not in quotes
+        and "coingecko" not in routes[nid]["miss"]
+        and routes[nid]["hit"] in (None, "coingecko")
+        and (routes[nid]["hit"] == "coingecko" or _is_known_coin_id(coin_by_id[nid], nid))
+    ]
+    if batch_ids:
+        try:
+            markets = await coingecko_service.get_batch_coins_data(batch_ids)
+        except Exception as e:
+            logger.debug(f"CoinGecko batch failed for {batch_ids}: {e}")
+            markets = None
+
+        fetched = {
+            coin["id"]: _coingecko_market_quote(coin)
+            for coin in markets or []
+            if coin.get("id") in batch_ids
+        }
+        if fetched:
+            logger.info(f"✅ Batch price from CoinGecko: {len(fetched)}/{len(batch_ids)} coins")
+            await asyncio.gather(*(
+                redis.set(_price_quote_key(nid), quote, ttl=CacheTTL.PRICE_QUOTE)
+                for nid, quote in fetched.items()
+            ))
+            quotes.update(fetched)
+
+    # Leftovers (unknown to CoinGecko or not in the batch) - full source routing
+    leftovers = [nid for nid in unique_ids if nid not in quotes]
+    if leftovers:
+        results = await asyncio.gather(
+            *(get_crypto_price(coin_by_id[nid]) for nid in leftovers)
+        )
+        quotes.update(zip(leftovers, results))
+
+    return {coin_id: quotes[normalized[coin_id]] for coin_id in coin_ids}
+
+
 async def get_crypto_news(coin_symbol: str, limit: int = 5) -> Dict[str, Any]:
     """
     Get latest cryptocurrency news
@@ -577,13 +821,9 @@ async def compare_cryptos(coin_ids: List[str]) -> Dict[str, Any]:
         if len(coin_ids) < 2 or len(coin_ids) > 3:
             return {"success": False, "error": "Please provide 2-3 coins to compare"}
 
-        # Get data for each coin
-        comparison_data = []
-
-        for coin_id in coin_ids:
-            price_result = await get_crypto_price(coin_id)
-            if price_result.get("success"):
-                comparison_data.append(price_result)
+        # Get data for all coins (one batched request where possible)
+        prices = await get_crypto_prices(coin_ids)
+        comparison_data = [result for result in prices.values() if result.get("success")]
 
         if not comparison_data:
             return {
@@ -711,18 +951,33 @@ async def get_coins_by_category(category: str, limit: int = 10) -> Dict[str, Any
         return {"success": False, "error": f"Failed to fetch coins for category: {str(e)}"}
 
 
-# Cache for market overview results (to avoid rate limits)
-_market_overview_cache = None
-_market_overview_cache_time = 0
-MARKET_OVERVIEW_CACHE_TTL = 120  # 2 minutes cache
-
-
 async def get_market_overview() -> Dict[str, Any]:
     """
     Get comprehensive crypto market overview with BTC/ETH prices, technical analysis, and relevant news
 
-    Uses aggressive caching (2 minutes) to prevent rate limit issues when multiple users
-    request market data simultaneously.
+    Served from the market snapshot kept fresh by MarketSnapshotService, so
+    users asking "what's the market doing" cost no upstream calls. Builds
+    the overview directly when the snapshot is disabled/unavailable or holds
+    a failed overview.
+
+    Returns:
+        Dict with structured market data (see build_market_overview)
+    """
+    from src.services.market_snapshot import get_market_snapshot_service
+
+    snapshot = await get_market_snapshot_service().get_snapshot()
+    overview = (snapshot or {}).get("overview") or {}
+    if overview.get("success"):
+        return overview
+    return await build_market_overview()
+
+
+async def build_market_overview() -> Dict[str, Any]:
+    """
+    Collect market overview from upstream APIs (no caching)
+
+    Called by MarketSnapshotService on its refresh cadence; consumers use
+    get_market_overview() instead.
 
     Returns:
         Dict with structured market data:
@@ -733,15 +988,6 @@ async def get_market_overview() -> Dict[str, Any]:
             "news": [{"title", "summary", "sentiment", "source", "url"}]
         }
     """
-    global _market_overview_cache, _market_overview_cache_time
-
-    # Check cache first
-    current_time = time.time()
-    if _market_overview_cache and (current_time - _market_overview_cache_time) < MARKET_OVERVIEW_CACHE_TTL:
-        cache_age = int(current_time - _market_overview_cache_time)
-        logger.info(f"📦 Returning cached market overview (age: {cache_age}s, TTL: {MARKET_OVERVIEW_CACHE_TTL}s)")
-        return _market_overview_cache
-
     try:
         logger.info("Starting comprehensive market overview collection...")
 
@@ -1052,8 +1298,8 @@ async def get_market_overview() -> Dict[str, Any]:
             except:
                 pass
 
-        # ========== 5. CACHE AND RETURN STRUCTURED DATA ==========
-        result = {
+        # ========== 5. RETURN STRUCTURED DATA ==========
+        return {
             "success": True,
             "btc": btc_data,
             "eth": eth_data,
@@ -1062,22 +1308,8 @@ async def get_market_overview() -> Dict[str, Any]:
             "news": news_data
         }
 
-        # Cache the result
-        _market_overview_cache = result
-        _market_overview_cache_time = time.time()
-        logger.info(f"✅ Market overview cached for {MARKET_OVERVIEW_CACHE_TTL}s")
-
-        return result
-
     except Exception as e:
-        logger.error(f"Error in get_market_overview: {e}")
-
-        # If we have cached data, return it even if expired (graceful degradation)
-        if _market_overview_cache:
-            cache_age = int(time.time() - _market_overview_cache_time)
-            logger.warning(f"⚠️ Error occurred, returning stale cache (age: {cache_age}s)")
-            return _market_overview_cache
-
+        logger.error(f"Error in build_market_overview: {e}")
         return {"success": False, "error": f"Failed to fetch market overview: {str(e)}"}
 
 
@@ -1106,7 +1338,7 @@ async def get_technical_analysis(coin_id: str, timeframe: str = "4h") -> Dict[st
     """
     try:
         # Normalize coin name
-        normalized_id = normalize_coin_name(coin_id) or coin_id.lower()
+        normalized_id = await resolve_coin_id(coin_id)
 
         logger.info(f"Starting technical analysis for {normalized_id} ({timeframe})")
 
@@ -1135,7 +1367,7 @@ async def get_technical_analysis(coin_id: str, timeframe: str = "4h") -> Dict[st
         funding_data = None
         try:
             # Get Binance symbol for this coin
-            symbol = binance_service.get_symbol(normalized_id)
+            symbol = binance_service.get_symbol(normalized_id, market="perp")
             if symbol:
                 funding = await binance_service.get_latest_funding_rate(symbol)
                 if funding:
@@ -1167,7 +1399,7 @@ async def get_technical_analysis(coin_id: str, timeframe: str = "4h") -> Dict[st
         long_short_data = None
         try:
             # Get Binance symbol for this coin
-            symbol = binance_service.get_symbol(normalized_id)
+            symbol = binance_service.get_symbol(normalized_id, market="perp")
             if symbol:
                 ls_ratio = await binance_service.get_long_short_ratio(
                     symbol, period="5m", limit=30
@@ -1195,7 +1427,7 @@ async def get_technical_analysis(coin_id: str, timeframe: str = "4h") -> Dict[st
         try:
             # Only fetch if API keys are configured
             if binance_service.has_credentials:
-                symbol = binance_service.get_symbol(normalized_id)
+                symbol = binance_service.get_symbol(normalized_id, market="perp")
                 if symbol:
                     # Get last 24h liquidations
                     liq_history = await binance_service.get_liquidation_history(
@@ -1713,14 +1945,11 @@ async def execute_tool(tool_name: str, arguments: Dict[str, Any], user_tier: str
         has_access, reason = check_tool_access(tool_name, user_tier)
         if not has_access:
             logger.warning(f"Tool {tool_name} blocked for tier {user_tier}: {reason}")
-            return json.dumps(
-                {"success": False, "error": reason, "upgrade_required": True},
-                ensure_ascii=False
-            )
+            return dumps({"success": False, "error": reason, "upgrade_required": True})
 
         # Parse JSON if arguments is a string (e.g., from OpenAI API)
         if isinstance(arguments, str):
-            arguments = json.loads(arguments)
+            arguments = loads(arguments)
 
         # Route to appropriate function
         if tool_name == "get_crypto_price":
@@ -1850,13 +2079,9 @@ async def execute_tool(tool_name: str, arguments: Dict[str, Any], user_tier: str
         else:
             result = {"success": False, "error": f"Unknown tool: {tool_name}"}
 
-        # Convert pandas Timestamp and other non-serializable objects
-        result = convert_to_serializable(result)
-        return json.dumps(result, ensure_ascii=False)
+        # pandas Timestamps / numpy values are handled by the serializer
+        return dumps(result)
 
     except Exception as e:
         logger.exception(f"Error executing tool {tool_name}: {e}")
-        return json.dumps(
-            {"success": False, "error": f"Tool execution failed: {str(e)}"},
-            ensure_ascii=False,
-        )
+        return dumps({"success": False, "error": f"Tool execution failed: {str(e)}"})
@@ -27,6 +27,7 @@ from tenacity import (
 )
 
 from config.config import CACHE_TTL_COINGECKO  # Reuse same TTL for consistency
+from src.services.exceptions import PriceSourceUnavailable
 
 
 # Create standard logger for tenacity
@@ -116,6 +117,9 @@ class DexScreenerService:
 
         Returns:
             JSON response or None on error
+
+        Raises:
+            PriceSourceUnavailable: Rate limited, server error or timeout
         """
         params = params or {}
 
@@ -137,7 +141,10 @@ class DexScreenerService:
                         return data
                     elif response.status == 429:
                         logger.warning("DexScreener rate limit exceeded. Retry after delay.")
-                        return None
+                        raise PriceSourceUnavailable("DexScreener rate limit exceeded")
+                    elif response.status >= 500:
+                        logger.error(f"DexScreener API error: {response.status}")
+                        raise PriceSourceUnavailable(f"DexScreener HTTP {response.status}")
                     else:
                         logger.error(
                             f"DexScreener API error: {response.status} - "
@@ -145,6 +152,11 @@ class DexScreenerService:
                         )
                         return None
 
+        except PriceSourceUnavailable:
+            raise
+        except (aiohttp.ClientError, TimeoutError) as e:
+            logger.warning(f"DexScreener request failed: {e}")
+            raise PriceSourceUnavailable(f"DexScreener request failed: {e}") from e
         except Exception as e:
             logger.exception(f"Error making DexScreener request: {e}")
             return None
@@ -159,6 +171,9 @@ class DexScreenerService:
         Returns:
             List of matching pairs or None
 
+        Raises:
+            PriceSourceUnavailable: DexScreener couldn't be reached
+
         Example:
             [
                 {
@@ -189,6 +204,8 @@ class DexScreenerService:
             logger.info(f"Found {len(pairs)} pairs for '{query}'")
             return pairs
 
+        except PriceSourceUnavailable:
+            raise
         except Exception as e:
             logger.error(f"Error searching token '{query}': {e}")
             return None
@@ -294,6 +311,9 @@ class DexScreenerService:
 
         Returns:
             List of top token variants sorted by liquidity, or None
+
+        Raises:
+            PriceSourceUnavailable: DexScreener couldn't be reached
         """
         try:
             pairs = await self.search_token(query)
@@ -348,6 +368,8 @@ class DexScreenerService:
             logger.info(f"Found {len(variants)} variants for '{query}'")
             return variants
 
+        except PriceSourceUnavailable:
+            raise
         except Exception as e:
             logger.error(f"Error getting token variants for '{query}': {e}")
             return None
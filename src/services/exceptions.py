@@ -0,0 +1,8 @@
+# coding: utf-8
+"""
+Exceptions shared by market data services
+"""
+
+
+class PriceSourceUnavailable(Exception):
+    """Source could not answer (transport/rate limit) - not cached as a miss"""
@@ -54,7 +54,18 @@ class ForwardTestScheduler:
             logger.warning("Forward test scheduler already running")
             return
 
-        self.scheduler = AsyncIOScheduler()
+        self.register_jobs(AsyncIOScheduler())
+        self.scheduler.start()
+        self._running = True
+
+    def register_jobs(self, scheduler: AsyncIOScheduler):
+        """
+        Добавить jobs в scheduler (свой в start() или общий job runner'а).
+
+        Args:
+            scheduler: APScheduler instance
+        """
+        self.scheduler = scheduler
 
         schedule = self.config.schedule
 
@@ -123,19 +134,16 @@ class ForwardTestScheduler:
                 replace_existing=True
             )
 
-        self.scheduler.start()
-        self._running = True
-
         logger.info(
-            f"Forward test scheduler started: "
+            f"Forward test jobs registered: "
             f"generation at {hours}:00 UTC, "
             f"monitor every {self.config.monitor.interval_sec}s, "
             f"report at {schedule.telegram_report_hour}:{schedule.telegram_report_minute:02d} UTC"
         )
 
     def stop(self):
-        """Остановить scheduler."""
-        if self.scheduler:
+        """Остановить scheduler (только свой, запущенный в start())."""
+        if self.scheduler and self._running:
             self.scheduler.shutdown()
             self._running = False
             logger.info("Forward test scheduler stopped")
@@ -350,7 +358,7 @@ class ForwardTestScheduler:
 
     def get_status(self) -> dict:
         """Получить статус scheduler."""
-        if not self.scheduler or not self._running:
+        if not self.scheduler or not self.scheduler.running:
             return {
                 "running": False,
                 "enabled": self.config.enabled,
@@ -359,6 +367,9 @@ class ForwardTestScheduler:
 
         jobs = []
         for job in self.scheduler.get_jobs():
+            # Shared scheduler of the job runner also holds other jobs
+            if not job.id.startswith("forward_test_"):
+                continue
             jobs.append({
                 "id": job.id,
                 "name": job.name,
@@ -10,7 +10,7 @@ from typing import Any, Dict, Optional
 import pandas as pd
 from loguru import logger
 
-from src.services.binance_service import BinanceService
+from src.services.service_registry import lazy_service
 from src.services.bybit_service import bybit_service
 
 
@@ -21,7 +21,7 @@ class FuturesDataFetcher:
 
     def __init__(self):
         self.bybit = bybit_service
-        self.binance = BinanceService()
+        self.binance = lazy_service("binance")
         logger.debug("FuturesDataFetcher initialized (Bybit primary, Binance fallback)")
 
     # =========================================================================
@@ -6,10 +6,11 @@ Swing points, range, trend state, volatility regime.
 """
 from typing import Any, Dict
 
-import numpy as np
 import pandas as pd
 from loguru import logger
 
+from src.utils.serialization import to_builtin
+
 
 class PriceStructureAnalyzer:
     """
@@ -86,7 +87,7 @@ class PriceStructureAnalyzer:
         self._add_nearest_levels(structure, current_price)
 
         # Convert numpy types to native Python types for JSON serialization
-        structure = self._convert_numpy_types(structure)
+        structure = to_builtin(structure)
 
         logger.debug(f"Price structure calculated: {structure}")
         return structure
@@ -241,18 +242,3 @@ class PriceStructureAnalyzer:
             if nearest_support:
                 structure["distance_to_support_pct"] = nearest_support["distance_pct"]
 
-    def _convert_numpy_types(self, obj: Any) -> Any:
-        """Recursively convert numpy types to native Python types."""
-        if isinstance(obj, dict):
-            return {k: self._convert_numpy_types(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [self._convert_numpy_types(item) for item in obj]
-        elif isinstance(obj, np.bool_):
-            return bool(obj)
-        elif isinstance(obj, (np.integer, np.int64, np.int32)):
-            return int(obj)
-        elif isinstance(obj, (np.floating, np.float64, np.float32)):
-            return float(obj)
-        elif isinstance(obj, np.ndarray):
-            return obj.tolist()
-        return obj
@@ -0,0 +1,219 @@
+# coding: utf-8
+"""
+Scenario Cache - общий кэш анализа на свечу.
+
+Один и тот же запрос (BTCUSDT 4h standard) внутри одной свечи даёт те же
+данные на входе LLM, поэтому полный pipeline с ScenarioGenerator.ai_generate
+выполняется один раз на ключ:
+
+    (symbol, timeframe, mode, max_scenarios, открытие текущей свечи, версия pipeline)
+
+- Результат лежит в Redis до закрытия свечи, но не дольше
+  CacheTTL.FUTURES_SCENARIOS (15 минут): сценарии старой 4h/1d свечи
+  строились от цены, которая могла уже уйти. current_price и дистанции
+  до уровней пересчитываются по живой цене на каждый запрос
+  (FuturesAnalysisService.analyze_symbol).
+- Single-flight: одновременные запросы в процессе ждут одну задачу, между
+  процессами - Redis NX claim; остальные ждут появления результата.
+- Версия = hash модели и исходников pipeline (промпты, валидация, режимы),
+  так что деплой с новыми промптами не отдаёт старые сценарии.
+- Кэшируются только успешные анализы. Без Redis работает только single-flight.
+"""
+
+import asyncio
+import hashlib
+import re
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from loguru import logger
+
+from config.cache_config import CacheTTL
+from config.config import (
+    FUTURES_SCENARIO_CACHE_ENABLED,
+    FUTURES_SCENARIO_CACHE_WAIT_SECONDS,
+)
+from src.cache import CacheKeyBuilder, get_redis_manager
+
+# Длительность свечи (секунды)
+TIMEFRAME_SECONDS = {
+    "15m": 900,
+    "30m": 1800,
+    "1h": 3600,
+    "2h": 7200,
+    "4h": 14400,
+    "6h": 21600,
+    "12h": 43200,
+    "1d": 86400,
+    "1w": 604800,
+}
+
+# Недельные свечи открываются в понедельник 00:00 UTC (epoch - четверг)
+_WEEK_OFFSET = 4 * 86400
+
+# Как часто ждущий запрос проверяет появление результата в Redis
+_POLL_INTERVAL = 0.5
+
+# Исходники, от которых зависит результат анализа
+_SERVICES_DIR = Path(__file__).resolve().parent.parent
+_PIPELINE_SOURCES = sorted(Path(__file__).resolve().parent.glob("*.py")) + [
+    _SERVICES_DIR / "futures_analysis_service.py",
+    _SERVICES_DIR / "trading_modes.py",
+]
+
+# payload: {"result": {...}, "scenarios": [...]} (см. FuturesAnalysisService)
+Payload = Dict[str, Any]
+
+
+def normalize_symbol(symbol: str) -> str:
+    """'btc/usdt', 'BTC-USDT', 'btcusdt' -> 'BTCUSDT' (один ключ кэша на пару)"""
+    return re.sub(r"[^A-Z0-9]", "", symbol.upper())
+
+
+def pipeline_version(model: str) -> str:
+    """Hash модели и исходников pipeline (промпты, валидация, режимы)"""
+    digest = hashlib.sha1(model.encode())
+    for path in _PIPELINE_SOURCES:
+        try:
+            digest.update(path.read_bytes())
+        except OSError:
+            continue
+    return digest.hexdigest()[:12]
+
+
+def bar_window(
+    timeframe: str, now: Optional[float] = None
+) -> Optional[Tuple[int, int]]:
+    """
+    Открытие и закрытие текущей свечи (unix seconds)
+
+    Returns:
+        (bar_open, bar_close) или None для неизвестного таймфрейма
+    """
+    seconds = TIMEFRAME_SECONDS.get(timeframe)
+    if seconds is None:
+        return None
+    now = time.time() if now is None else now
+    offset = _WEEK_OFFSET if timeframe == "1w" else 0
+    bar_open = int((now - offset) // seconds * seconds + offset)
+    return bar_open, bar_open + seconds
+
+
+class ScenarioCache:
+    """
+    Кэш результатов анализа на свечу с single-flight
+    """
+
+    def __init__(self, version: str, redis_manager=None):
+        self.version = version
+        self._redis_manager = redis_manager
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    @property
+    def redis(self):
+        """Redis manager (лениво, чтобы тесты могли подменить глобальный)"""
+        if self._redis_manager is None:
+            self._redis_manager = get_redis_manager()
+        return self._redis_manager
+
+    def key(
+        self, symbol: str, timeframe: str, mode: str, max_scenarios: int, bar_open: int
+    ) -> str:
+        return CacheKeyBuilder.build(
+            "futures_scenarios",
+            "analysis",
+            f"{normalize_symbol(symbol)}:{timeframe}:{mode}:{max_scenarios}:{bar_open}:{self.version}",
+        )
+
+    async def get_or_build(
+        self,
+        symbol: str,
+        timeframe: str,
+        mode: str,
+        max_scenarios: int,
+        build: Callable[[], Awaitable[Payload]],
+    ) -> Tuple[Payload, bool]:
+        """
+        Анализ текущей свечи: из кэша, из уже идущего запроса или новый
+
+        Args:
+            symbol, timeframe, mode, max_scenarios: Параметры анализа
+            build: Запускает полный анализ (payload с result.success)
+
+        Returns:
+            (payload, shared) - shared=True если анализ построен другим запросом
+        """
+        window = bar_window(timeframe)
+        if not FUTURES_SCENARIO_CACHE_ENABLED or window is None:
+            return await build(), False
+
+        bar_open, bar_close = window
+        key = self.key(symbol, timeframe, mode, max_scenarios, bar_open)
+
+        cached = await self.redis.get(key)
+        if isinstance(cached, dict):
+            logger.debug(f"Scenario cache HIT: {key}")
+            return cached, True
+
+        task = self._inflight.get(key)
+        if task is not None:
+            payload, _ = await asyncio.shield(task)
+            return payload, True
+
+        ttl = max(1, min(bar_close - int(time.time()), CacheTTL.FUTURES_SCENARIOS))
+        task = asyncio.create_task(self._build_once(key, ttl, build))
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # shield: отмена одного запроса не отменяет анализ для остальных
+        return await asyncio.shield(task)
+
+    async def _build_once(
+        self, key: str, ttl: int, build: Callable[[], Awaitable[Payload]]
+    ) -> Tuple[Payload, bool]:
+        """Построить анализ, если другой процесс не строит его прямо сейчас"""
+        client = self.redis.client
+        lock_key = f"{key}:lock"
+        claimed = False
+
+        if client is not None:
+            try:
+                claimed = bool(
+                    await client.set(
+                        lock_key, "1", nx=True, ex=FUTURES_SCENARIO_CACHE_WAIT_SECONDS
+                    )
+                )
+                if not claimed:
+                    payload = await self._wait_for(key, lock_key)
+                    if payload is not None:
+                        return payload, True
+            except Exception as e:
+                logger.warning(f"Scenario cache claim failed for {key}: {e}")
+
+        try:
+            payload = await build()
+            if payload["result"].get("success"):
+                await self.redis.set(key, payload, ttl=ttl)
+            return payload, False
+        finally:
+            if claimed:
+                try:
+                    await client.delete(lock_key)
+                except Exception as e:
+                    logger.warning(f"Scenario cache unlock failed for {key}: {e}")
+
+    async def _wait_for(self, key: str, lock_key: str) -> Optional[Payload]:
+        """Ждать результат другого процесса (None - он не справился, строим сами)"""
+        client = self.redis.client
+        deadline = time.monotonic() + FUTURES_SCENARIO_CACHE_WAIT_SECONDS
+        while time.monotonic() < deadline:
+            await asyncio.sleep(_POLL_INTERVAL)
+            cached = await self.redis.get(key)
+            if isinstance(cached, dict):
+                return cached
+            if not await client.exists(lock_key):
+                # Строивший процесс не справился (ошибки не кэшируются) или lock истёк
+                cached = await self.redis.get(key)
+                return cached if isinstance(cached, dict) else None
+        logger.warning(f"Scenario cache wait timed out for {key}, building locally")
+        return None
@@ -175,24 +175,9 @@ class ScenarioGenerator:
             ]
             logger.info(f"Final scores: {scores_info}")
 
-            # Learning calibration (если доступен calibrator)
+            # Learning calibration + EV + class stats gates (если доступен calibrator)
             if calibrator:
-                final_scenarios = await calibrator.apply_calibration(
-                    scenarios=final_scenarios,
-                    symbol=symbol,
-                    timeframe=timeframe,
-                )
-
-                # EV calculation
-                volatility = market_context.get("volatility", "normal")
-                final_scenarios = await calibrator.apply_ev_calculation(
-                    scenarios=final_scenarios,
-                    timeframe=timeframe,
-                    volatility_regime=volatility,
-                )
-
-                # Class stats context gates
-                final_scenarios = await calibrator.apply_class_stats(
+                final_scenarios = await calibrator.apply_learning(
                     scenarios=final_scenarios,
                     symbol=symbol,
                     timeframe=timeframe,
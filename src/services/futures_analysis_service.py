@@ -14,6 +14,7 @@ Futures Analysis Service
 - Structured reasoning (почему этот сценарий валидный)
 - Market context (trend, phase, sentiment, volatility)
 """
+import copy
 import json
 import time
 import uuid
@@ -24,14 +25,9 @@ from typing import Any, Dict, List, Optional
 import pandas as pd
 from loguru import logger
 
-from src.services.binance_service import BinanceService
 from src.services.bybit_service import bybit_service
-from src.services.candlestick_patterns import CandlestickPatterns
-from src.services.fear_greed_service import FearGreedService
-from src.services.openai_service import OpenAIService
-from src.services.price_levels_service import PriceLevelsService
 from src.services.session_detector import session_detector
-from src.services.technical_indicators import TechnicalIndicators
+from src.services.service_registry import lazy_service
 from src.services.volume_analyzer import volume_analyzer
 from src.services.trading_modes import (
     ModeConfig,
@@ -62,6 +58,12 @@ from src.services.futures_analysis.liquidation_analyzer import LiquidationAnalyz
 from src.services.futures_analysis.scenario_validator import ScenarioValidator
 from src.services.futures_analysis.learning_calibrator import LearningCalibrator
 from src.services.futures_analysis.scenario_generator import ScenarioGenerator
+from src.services.futures_analysis.scenario_cache import (
+    ScenarioCache,
+    normalize_symbol,
+    pipeline_version,
+)
+from src.utils.serialization import to_builtin
 
 
 # ==============================================================================
@@ -149,6 +151,22 @@ def _filter_levels_by_distance(
     return near, macro
 
 
+def _apply_current_price(result: Dict[str, Any], current_price: float) -> None:
+    """
+    Update current_price and the distances derived from it in a shared result
+
+    The cached analysis was built at an earlier price in the same candle;
+    everything else in it (levels, scenarios, context) is per candle.
+    """
+    result["current_price"] = round(current_price, 2)
+    key_levels = result.get("key_levels") or {}
+    for level in [*(key_levels.get("ema_levels") or {}).values(), key_levels.get("vwap")]:
+        if level and level.get("price"):
+            level["distance_pct"] = round(
+                ((current_price - level["price"]) / current_price) * 100, 2
+            )
+
+
 class FuturesAnalysisService:
     """
     Главный движок для анализа фьючерсов и генерации торговых сценариев
@@ -163,12 +181,12 @@ class FuturesAnalysisService:
     def __init__(self):
         """Initialize services"""
         self.bybit = bybit_service  # Primary source
-        self.binance = BinanceService()  # Fallback
-        self.technical = TechnicalIndicators()
-        self.patterns = CandlestickPatterns()
-        self.price_levels = PriceLevelsService()
-        self.fear_greed = FearGreedService()
-        self.openai = OpenAIService()
+        self.binance = lazy_service("binance")  # Fallback
+        self.technical = lazy_service("technical_indicators")
+        self.patterns = lazy_service("candlestick_patterns")
+        self.price_levels = lazy_service("price_levels")
+        self.fear_greed = lazy_service("fear_greed")
+        self.openai = lazy_service("openai")
 
         # Modular components (refactored)
         self._price_structure_analyzer = PriceStructureAnalyzer()
@@ -176,6 +194,7 @@ class FuturesAnalysisService:
         self._scenario_validator = ScenarioValidator()
         self._learning_calibrator = LearningCalibrator()
         self._scenario_generator = ScenarioGenerator(openai_service=self.openai)
+        self._scenario_cache = ScenarioCache(version=pipeline_version(FUTURES_MODEL))
 
         logger.info("FuturesAnalysisService initialized (Bybit primary, Binance fallback)")
 
@@ -361,6 +380,66 @@ class FuturesAnalysisService:
                 "key_levels": {...},
                 "data_quality": {...}
             }
+
+        Анализ общий для всех запросов с теми же параметрами внутри одной
+        свечи (ScenarioCache); analysis_id, timestamp и лог генерации у
+        каждого запроса свои.
+        """
+        symbol = normalize_symbol(symbol)
+        payload, shared = await self._scenario_cache.get_or_build(
+            symbol,
+            timeframe,
+            mode,
+            max_scenarios,
+            build=lambda: self._run_analysis(symbol, timeframe, max_scenarios, mode),
+        )
+
+        result = payload["result"]
+        if not result.get("success"):
+            return result
+
+        # Shared result: per-request copy with its own analysis_id
+        result = copy.deepcopy(result)
+        generated_at = result["analysis_timestamp"]
+        result["analysis_id"] = str(uuid.uuid4())  # 🆕 For feedback loop tracking
+        result["analysis_timestamp"] = datetime.utcnow().isoformat() + "Z"
+        result["metadata"]["cache"] = {"shared": shared, "generated_at": generated_at}
+
+        if shared:
+            logger.info(
+                f"Analysis for {symbol} {timeframe} [mode={mode}] served from "
+                f"candle cache (generated {generated_at})"
+            )
+            # Levels/scenarios are per candle, the price isn't
+            current_price = await self._get_current_price(symbol)
+            if current_price:
+                _apply_current_price(result, current_price)
+
+        # 🆕 LOG: Логируем генерацию сценариев для class stats
+        await self._log_scenario_generation(
+            analysis_id=result["analysis_id"],
+            scenarios=payload["scenarios"],
+            symbol=symbol,
+            timeframe=timeframe,
+            market_context=result["market_context"],
+        )
+
+        return result
+
+    async def _run_analysis(
+        self,
+        symbol: str,
+        timeframe: str,
+        max_scenarios: int,
+        mode: str,
+    ) -> Dict[str, Any]:
+        """
+        Полный pipeline анализа (данные, индикаторы, LLM сценарии)
+
+        Returns:
+            {"result": {...}, "scenarios": [...]} - result для ответа,
+            scenarios - все сгенерированные сценарии в исходном порядке
+            (для лога генерации)
         """
         try:
             logger.info(f"Starting futures analysis for {symbol} on {timeframe} [mode={mode}]")
@@ -372,19 +451,19 @@ class FuturesAnalysisService:
             # 1.1 Получить current price
             current_price = await self._get_current_price(symbol)
             if not current_price:
-                return {
+                return {"result": {
                     "success": False,
                     "error": f"Failed to fetch current price for {symbol} (both Bybit and Binance failed)"
-                }
+                }}
 
             # 1.2 Получить OHLCV данные (200 свечей для индикаторов)
             klines_df = await self._get_klines(symbol, timeframe, limit=200)
 
             if klines_df is None or len(klines_df) < 50:
-                return {
+                return {"result": {
                     "success": False,
                     "error": f"Insufficient candlestick data for {symbol}"
-                }
+                }}
 
             # 1.3 Получить multi-timeframe данные для контекста
             mtf_data = await self._get_multi_timeframe_data(symbol)
@@ -566,9 +645,6 @@ class FuturesAnalysisService:
             # 7. FINAL RESULT
             # ====================================================================
 
-            # Generate unique analysis_id for feedback tracking
-            analysis_id = str(uuid.uuid4())
-
             # 🆕 Separate scenarios by quality tier
             # "high" and "acceptable" → main scenarios (for auto-trading)
             # "low" → low_quality scenarios (for manual review / learning)
@@ -586,7 +662,6 @@ class FuturesAnalysisService:
                 "symbol": symbol,
                 "timeframe": timeframe,
                 "analysis_timestamp": datetime.utcnow().isoformat() + "Z",
-                "analysis_id": analysis_id,  # 🆕 For feedback loop tracking
                 "current_price": round(current_price, 2),
                 "market_context": market_context,
                 "scenarios": scenarios_valid,  # Only high/acceptable quality
@@ -611,27 +686,17 @@ class FuturesAnalysisService:
                 f"quality={data_quality['completeness']}%"
             )
 
-            # 🆕 LOG: Логируем генерацию сценариев для class stats
-            await self._log_scenario_generation(
-                analysis_id=analysis_id,
-                scenarios=scenarios,
-                symbol=symbol,
-                timeframe=timeframe,
-                market_context=market_context,
-            )
-
             # 🔧 Convert numpy types to native Python for JSON serialization
-            result = self._convert_numpy_types(result)
-
-            return result
+            # (the payload is also stored in Redis by ScenarioCache)
+            return to_builtin({"result": result, "scenarios": scenarios})
 
         except Exception as e:
             logger.exception(f"Error in futures analysis for {symbol}: {e}")
-            return {
+            return {"result": {
                 "success": False,
                 "error": str(e),
                 "symbol": symbol
-            }
+            }}
 
     async def _get_multi_timeframe_data(
         self,
@@ -987,24 +1052,6 @@ class FuturesAnalysisService:
             timeframe=timeframe
         )
 
-    def _convert_numpy_types(self, obj: Any) -> Any:
-        """Recursively convert numpy types to native Python types"""
-        import numpy as np
-
-        if isinstance(obj, dict):
-            return {k: self._convert_numpy_types(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [self._convert_numpy_types(item) for item in obj]
-        elif isinstance(obj, np.bool_):
-            return bool(obj)
-        elif isinstance(obj, (np.integer, np.int64, np.int32)):
-            return int(obj)
-        elif isinstance(obj, (np.floating, np.float64, np.float32)):
-            return float(obj)
-        elif isinstance(obj, np.ndarray):
-            return obj.tolist()
-        return obj
-
     def _aggregate_liquidation_clusters(
         self,
         liquidation_data: Optional[Dict],
@@ -1146,23 +1193,9 @@ class FuturesAnalysisService:
             #     current_price=current_price,
             # )
 
-            # 🆕 LEARNING: Калибровка confidence и SL/TP suggestions
-            final_scenarios = await self._apply_learning_calibration(
-                scenarios=final_scenarios,
-                symbol=symbol,
-                timeframe=timeframe,
-            )
-
-            # 📊 EV: Expected Value calculation и финальная сортировка
-            volatility = market_context.get("volatility", "normal")
-            final_scenarios = await self._apply_ev_calculation(
-                scenarios=final_scenarios,
-                timeframe=timeframe,
-                volatility_regime=volatility,
-            )
-
-            # 🆕 CLASS STATS: Context gates (kill switch / boost)
-            final_scenarios = await self._apply_class_stats(
+            # 🆕 LEARNING: Калибровка confidence, SL/TP suggestions, EV
+            # и class stats gates (kill switch / boost) за один проход
+            final_scenarios = await self._apply_learning(
                 scenarios=final_scenarios,
                 symbol=symbol,
                 timeframe=timeframe,
@@ -1237,41 +1270,15 @@ class FuturesAnalysisService:
     # 🆕 LEARNING SYSTEM INTEGRATION (делегирует к LearningCalibrator)
     # =========================================================================
 
-    async def _apply_learning_calibration(
-        self,
-        scenarios: List[Dict],
-        symbol: str,
-        timeframe: str,
-    ) -> List[Dict]:
-        """Делегирует к LearningCalibrator.apply_calibration()"""
-        return await self._learning_calibrator.apply_calibration(
-            scenarios=scenarios,
-            symbol=symbol,
-            timeframe=timeframe
-        )
-
-    async def _apply_ev_calculation(
-        self,
-        scenarios: List[Dict],
-        timeframe: str,
-        volatility_regime: str = "normal",
-    ) -> List[Dict]:
-        """Делегирует к LearningCalibrator.apply_ev_calculation()"""
-        return await self._learning_calibrator.apply_ev_calculation(
-            scenarios=scenarios,
-            timeframe=timeframe,
-            volatility_regime=volatility_regime
-        )
-
-    async def _apply_class_stats(
+    async def _apply_learning(
         self,
         scenarios: List[Dict],
         symbol: str,
         timeframe: str,
         market_context: Dict,
     ) -> List[Dict]:
-        """Делегирует к LearningCalibrator.apply_class_stats()"""
-        return await self._learning_calibrator.apply_class_stats(
+        """Делегирует к LearningCalibrator.apply_learning()"""
+        return await self._learning_calibrator.apply_learning(
             scenarios=scenarios,
             symbol=symbol,
             timeframe=timeframe,
@@ -1425,5 +1432,5 @@ class FuturesAnalysisService:
         }
 
 
-# Singleton instance
-futures_analysis_service = FuturesAnalysisService()
+# Singleton instance (shared with the service registry)
+futures_analysis_service = lazy_service("futures_analysis")
@@ -27,6 +27,7 @@ from openai import AsyncOpenAI
 from loguru import logger
 
 from config.config import OPENAI_API_KEY
+from src.services.service_registry import lazy_service
 
 
 # ==============================================================================
@@ -261,6 +262,10 @@ class FuturesRequestRouter:
         self.client = AsyncOpenAI(api_key=OPENAI_API_KEY)
         logger.info(f"🚦 FuturesRequestRouter initialized (model: {self.config.model})")
 
+    async def close(self) -> None:
+        """Close OpenAI HTTP client"""
+        await self.client.close()
+
     async def validate_request(
         self,
         user_message: str,
@@ -551,4 +556,4 @@ class FuturesRequestRouter:
 # SINGLETON
 # ==============================================================================
 
-futures_request_router = FuturesRequestRouter()
+futures_request_router = lazy_service("futures_request_router")
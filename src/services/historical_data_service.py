@@ -16,8 +16,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_
 
 from src.database.models import HistoricalPrice
-from src.services.coingecko_service import CoinGeckoService
-from src.services.binance_service import BinanceService
+from src.services.service_registry import lazy_service
 
 
 from loguru import logger
@@ -35,8 +34,8 @@ class HistoricalDataService:
     """
 
     def __init__(self):
-        self.coingecko = CoinGeckoService()
-        self.binance = BinanceService()
+        self.coingecko = lazy_service("coingecko")
+        self.binance = lazy_service("binance")
 
     async def fetch_and_store_historical(
         self,
@@ -0,0 +1,249 @@
+# coding: utf-8
+"""
+Pre-warmed market overview snapshot
+
+"What's the market doing" used to trigger BTC technical analysis, ETH and
+altcoin data, global data, Fear & Greed and news on every request (with a
+per-process 2 minute cache), and the Mini App overview / weekly overview
+endpoints fetched overlapping data on their own.
+
+MarketSnapshotService rebuilds one snapshot every
+MARKET_SNAPSHOT_REFRESH_SECONDS and publishes it to Redis with an
+increasing version number. Every process reads the published snapshot
+(a Redis lock lets only one of them rebuild per cadence), so consumers
+cost no upstream calls. Without Redis each process refreshes its own copy.
+
+Snapshot layout:
+    {
+        "version": 42,
+        "generated_at": "2025-01-18T12:00:00Z",
+        "generated_ts": 1737201600.0,
+        "overview": {...},            # crypto_tools.build_market_overview()
+        "global": {...},              # CoinGeckoService.get_global_market_data()
+        "fear_greed": {...},          # FearGreedService.get_current()
+        "fear_greed_history": [...],  # FearGreedService.get_historical(limit=7)
+        "extended": {"bitcoin": {...}, "ethereum": {...}},  # get_extended_market_data()
+    }
+"""
+
+import asyncio
+import time
+from datetime import datetime, UTC
+from typing import Any, Dict, Optional
+
+from loguru import logger
+
+from config.config import (
+    MARKET_SNAPSHOT_ENABLED,
+    MARKET_SNAPSHOT_MAX_AGE_SECONDS,
+    MARKET_SNAPSHOT_REFRESH_SECONDS,
+)
+from src.cache import CacheKeyBuilder, get_redis_manager
+
+
+class MarketSnapshotService:
+    """
+    Background refresher and reader of the shared market snapshot
+    """
+
+    def __init__(self, redis_manager=None):
+        self._redis_manager = redis_manager
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._local_version = 0
+        self._refresh_lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+        self.snapshot_key = CacheKeyBuilder.build("market_snapshot", "current")
+        self.version_key = CacheKeyBuilder.build("market_snapshot", "version")
+        self.lock_key = CacheKeyBuilder.build("market_snapshot", "lock")
+
+    @property
+    def redis(self):
+        """Redis manager (resolved lazily so tests can swap the global one)"""
+        if self._redis_manager is None:
+            self._redis_manager = get_redis_manager()
+        return self._redis_manager
+
+    @staticmethod
+    def _age(snapshot: Optional[Dict[str, Any]]) -> float:
+        if not snapshot:
+            return float("inf")
+        return time.time() - snapshot.get("generated_ts", 0)
+
+    async def _load_published(self) -> Optional[Dict[str, Any]]:
+        """Adopt the snapshot in Redis if it's newer than the local one"""
+        published = await self.redis.get(self.snapshot_key)
+        if isinstance(published, dict) and self._age(published) < self._age(
+            self._snapshot
+        ):
+            self._snapshot = published
+        return self._snapshot
+
+    async def get_snapshot(self) -> Optional[Dict[str, Any]]:
+        """
+        Current snapshot
+
+        Local copy while it's younger than the refresh cadence, then the one
+        published in Redis; rebuilt on the spot only when nothing younger
+        than MARKET_SNAPSHOT_MAX_AGE_SECONDS exists (cold start).
+
+        Returns:
+            Snapshot dict, or None if disabled or it couldn't be built
+        """
+        if not MARKET_SNAPSHOT_ENABLED:
+            return None
+
+        if self._age(self._snapshot) < MARKET_SNAPSHOT_REFRESH_SECONDS:
+            return self._snapshot
+
+        snapshot = await self._load_published()
+        if self._age(snapshot) < MARKET_SNAPSHOT_MAX_AGE_SECONDS:
+            return snapshot
+
+        return await self.refresh()
+
+    async def refresh(self, only_if_leader: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Rebuild and publish the snapshot
+
+        Args:
+            only_if_leader: Skip the rebuild (and just read Redis) when another
+                process already refreshed within the current cadence
+
+        Returns:
+            Newest snapshot (previous one if the rebuild failed)
+        """
+        async with self._refresh_lock:
+            # Someone refreshed while we were waiting for the lock
+            if self._age(self._snapshot) < MARKET_SNAPSHOT_REFRESH_SECONDS:
+                return self._snapshot
+
+            client = self.redis.client
+            if only_if_leader and client is not None:
+                acquired = await client.set(
+                    self.lock_key, "1", nx=True, ex=MARKET_SNAPSHOT_REFRESH_SECONDS
+                )
+                if not acquired:
+                    return await self._load_published()
+
+            started = time.monotonic()
+            try:
+                snapshot = await self._build()
+            except Exception as e:
+                logger.error(f"Market snapshot build failed: {e}")
+                return self._snapshot
+
+            if snapshot is None:
+                logger.warning(
+                    "Market snapshot build returned no data, keeping previous"
+                )
+                return self._snapshot
+
+            if client is not None:
+                snapshot["version"] = await client.incr(self.version_key)
+                await self.redis.set(
+                    self.snapshot_key, snapshot, ttl=MARKET_SNAPSHOT_MAX_AGE_SECONDS
+                )
+            else:
+                self._local_version += 1
+                snapshot["version"] = self._local_version
+
+            self._snapshot = snapshot
+            logger.info(
+                f"Market snapshot v{snapshot['version']} built in "
+                f"{time.monotonic() - started:.1f}s"
+            )
+            return snapshot
+
+    async def _build(self) -> Optional[Dict[str, Any]]:
+        """Collect all snapshot parts (shares crypto_tools service instances/caches)"""
+        from src.services import crypto_tools
+
+        coingecko = crypto_tools.coingecko_service
+        fear_greed = crypto_tools.fear_greed_service
+
+        parts = await asyncio.gather(
+            coingecko.get_global_market_data(),
+            fear_greed.get_current(),
+            fear_greed.get_historical(limit=7),
+            coingecko.get_extended_market_data("bitcoin"),
+            coingecko.get_extended_market_data("ethereum"),
+            return_exceptions=True,
+        )
+        (
+            global_data,
+            fear_greed_current,
+            fear_greed_history,
+            btc_extended,
+            eth_extended,
+        ) = [None if isinstance(part, Exception) else part for part in parts]
+
+        overview = await crypto_tools.build_market_overview()
+        if not overview.get("success"):
+            if not global_data:
+                return None
+            # Don't replace a good overview with an error for a whole cadence
+            previous = (self._snapshot or {}).get("overview") or {}
+            if previous.get("success"):
+                logger.warning(
+                    "Market overview build failed, keeping previous overview"
+                )
+                overview = previous
+
+        now = datetime.now(UTC)
+        return {
+            "version": 0,
+            "generated_at": now.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "generated_ts": now.timestamp(),
+            "overview": overview,
+            "global": global_data,
+            "fear_greed": fear_greed_current,
+            "fear_greed_history": fear_greed_history,
+            "extended": {"bitcoin": btc_extended, "ethereum": eth_extended},
+        }
+
+    async def _refresh_loop(self) -> None:
+        """Background loop: rebuild (or adopt another process's build) every cadence"""
+        while True:
+            try:
+                await self.refresh(only_if_leader=True)
+            except Exception as e:
+                logger.error(f"Market snapshot refresh error: {e}")
+            await asyncio.sleep(MARKET_SNAPSHOT_REFRESH_SECONDS)
+
+    def start(self) -> None:
+        """Start background refresher (call from startup hooks)"""
+        if not MARKET_SNAPSHOT_ENABLED:
+            return
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+            logger.info(
+                f"Market snapshot refresher started (every {MARKET_SNAPSHOT_REFRESH_SECONDS}s)"
+            )
+
+    async def stop(self) -> None:
+        """Stop background refresher"""
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+
+# Global snapshot service instance
+_market_snapshot_service: Optional[MarketSnapshotService] = None
+
+
+def get_market_snapshot_service() -> MarketSnapshotService:
+    """
+    Get global market snapshot service (singleton)
+
+    Returns:
+        MarketSnapshotService instance
+    """
+    global _market_snapshot_service
+    if _market_snapshot_service is None:
+        _market_snapshot_service = MarketSnapshotService()
+    return _market_snapshot_service
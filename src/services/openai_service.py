@@ -2,12 +2,13 @@
 """
 OpenAI API Service with streaming support and Vision capabilities
 """
+import asyncio
 import base64
 import json
+from datetime import datetime
 import logging  # Needed for tenacity before_sleep_log level constants
-from typing import AsyncGenerator, Optional, List, Tuple, Dict, Any
+from typing import AsyncGenerator, Optional, List, Tuple, Dict, Any, NamedTuple
 
-import tiktoken
 from openai import (
     AsyncOpenAI,
     BadRequestError,
@@ -31,8 +32,11 @@ from config.config import (
     DEEPSEEK_BASE_URL,
     ModelConfig,
     Pricing,
+    CHAT_CONTEXT_SUMMARY_ENABLED,
+    CHAT_SUMMARY_MODEL,
+    CHAT_SUMMARY_MAX_TOKENS,
 )
-from config.limits import get_token_limits
+from config.limits import get_token_limits, get_context_token_budget
 from config.prompt_selector import (
     get_system_prompt,
     get_few_shot_examples,
@@ -40,14 +44,18 @@ from config.prompt_selector import (
     get_enhanced_vision_prompt,
     get_coin_detection_prompt,
 )
-from src.database.crud import (
-    add_chat_message,
-    get_chat_history,
-    track_cost,
-    add_chat_message_to_chat,
-    get_chat_messages,
+from src.database.crud import update_chat_summary
+from src.cache.chat_history_cache import get_chat_history_cache
+from src.services.usage_recorder import get_usage_recorder
+from src.database.models import SubscriptionTier, Chat
+from src.utils.text_tokens import (
+    count_tokens as _count_tokens,
+    count_tokens_async,
+    count_prompt_tokens,
+    ensure_token_counts,
+    fit_history_to_budget,
+    message_tokens,
 )
-from src.database.models import SubscriptionTier
 from src.utils.vision_tokens import calculate_image_tokens
 from src.services.crypto_tools import CRYPTO_TOOLS, execute_tool
 
@@ -55,6 +63,26 @@ from src.services.crypto_tools import CRYPTO_TOOLS, execute_tool
 from loguru import logger
 
 
+SUMMARY_SYSTEM_PROMPT = (
+    "You maintain a compact running summary of a crypto trading chat. "
+    "Merge the previous summary with the new turns. Keep coins, prices, levels, "
+    "user positions, preferences and open questions. Drop small talk. "
+    "Answer with the summary only, in the language of the conversation."
+)
+
+# Seconds close() waits for running summary refreshes
+SUMMARY_SHUTDOWN_TIMEOUT = 10
+
+
+class ChatContext(NamedTuple):
+    """Prompt messages with their token accounting"""
+
+    messages: List[ChatCompletionMessageParam]
+    prompt_tokens: int  # All messages incl. current user message
+    message_tokens: int  # Current user message only
+    dropped_messages: int  # History turns left out by the token budget
+
+
 class OpenAIService:
     """
     Service for interacting with OpenAI API
@@ -91,8 +119,20 @@ class OpenAIService:
         # Vision always uses OpenAI
         self.vision_client = self.openai_client
 
-        # Tokenizer (same for all models)
-        self.encoding = tiktoken.encoding_for_model("gpt-4o")
+        # Background rolling-summary refreshes, one per chat
+        self._summary_tasks: Dict[int, asyncio.Task] = {}
+
+    async def close(self) -> None:
+        """Let running summary refreshes finish, then close HTTP clients"""
+        if self._summary_tasks:
+            _, pending = await asyncio.wait(
+                list(self._summary_tasks.values()), timeout=SUMMARY_SHUTDOWN_TIMEOUT
+            )
+            for task in pending:
+                task.cancel()
+
+        await self.openai_client.close()
+        await self.deepseek_client.close()
 
     def _get_client_for_model(self, model: str) -> AsyncOpenAI:
         """
@@ -119,9 +159,27 @@ class OpenAIService:
         Returns:
             Number of tokens
         """
-        return len(self.encoding.encode(text))
+        return _count_tokens(text)
 
-    def select_model(self, user_message: str, history_tokens: int = 0, user_tier: str = "free") -> str:
+    async def count_tokens_async(self, text: str) -> int:
+        """
+        Count tokens without blocking the event loop on large texts
+
+        Args:
+            text: Text to count tokens for
+
+        Returns:
+            Number of tokens
+        """
+        return await count_tokens_async(text)
+
+    def select_model(
+        self,
+        user_message: str,
+        history_tokens: int = 0,
+        user_tier: str = "free",
+        message_tokens: Optional[int] = None,
+    ) -> str:
         """
         Smart model selection based on TIER, message complexity and keywords
 
@@ -132,6 +190,7 @@ class OpenAIService:
             user_message: User's message
             history_tokens: Tokens in chat history
             user_tier: User's subscription tier (free, basic, premium, vip)
+            message_tokens: Pre-computed tokens of user_message (counted if None)
 
         Returns:
             Model name based on AI_PROVIDER and tier:
@@ -167,7 +226,8 @@ class OpenAIService:
             return model
 
         # Advanced routing enabled: check complexity
-        message_tokens = self.count_tokens(user_message)
+        if message_tokens is None:
+            message_tokens = self.count_tokens(user_message)
         total_tokens = message_tokens + history_tokens
 
         # Keywords indicating complex analysis requiring main model
@@ -213,7 +273,7 @@ class OpenAIService:
             )
             return model
 
-    async def get_context_messages(
+    async def build_context(
         self,
         session: AsyncSession,
         user_id: int,
@@ -221,9 +281,10 @@ class OpenAIService:
         user_language: str = "ru",
         user_tier: str = "free",
         chat_id: Optional[int] = None,
-    ) -> List[ChatCompletionMessageParam]:
+        model: Optional[str] = None,
+    ) -> ChatContext:
         """
-        Build context messages from chat history (tier-aware)
+        Build context messages from chat history within a token budget (tier-aware)
 
         OpenAI Cached Prompts Optimization:
         - System prompt is placed FIRST (required for caching)
@@ -233,7 +294,7 @@ class OpenAIService:
         - Cache TTL: 5-10 minutes (OpenAI manages automatically)
 
         Message Structure:
-        [system_prompt] + [few_shot_examples] + [history] + [user_message]
+        [system_prompt] + [few_shot_examples] + [summary] + [history] + [user_message]
 
         Tier-based History:
         - FREE: 0 messages (no memory)
@@ -241,6 +302,11 @@ class OpenAIService:
         - PREMIUM: 10 messages
         - VIP: 50 messages
 
+        History is additionally capped by min(tier max_input_tokens, model budget):
+        turns are added newest-first using token counts stored on write.
+        With CHAT_CONTEXT_SUMMARY_ENABLED, dropped turns are replaced by
+        the chat's rolling summary.
+
         Args:
             session: Database session
             user_id: User's database ID (NOT Telegram ID)
@@ -248,11 +314,12 @@ class OpenAIService:
             user_language: User's language ('ru' or 'en')
             user_tier: User's subscription tier (free, basic, premium, vip)
             chat_id: Optional chat ID for multiple chats support
+            model: Target model (tier primary model if None)
 
         Returns:
-            List of messages for OpenAI API
+            ChatContext with messages and token counts
         """
-        from config.limits import get_chat_history_limit
+        from config.limits import get_chat_history_limit, get_model_config
 
         # Get tier enum
         try:
@@ -263,9 +330,13 @@ class OpenAIService:
 
         # Get history limit for tier (0 for FREE = no memory)
         max_history = get_chat_history_limit(tier_enum)
+        budget = get_context_token_budget(
+            tier_enum, model or get_model_config(tier_enum)["primary_model"]
+        )
 
         logger.info(
-            f"User {user_id} tier={user_tier}: chat_history_limit={max_history} messages, chat_id={chat_id}"
+            f"User {user_id} tier={user_tier}: chat_history_limit={max_history} messages, "
+            f"token_budget={budget}, chat_id={chat_id}"
         )
 
         # System prompt MUST be first for automatic caching
@@ -285,27 +356,191 @@ class OpenAIService:
         )
         messages.extend(few_shot)
 
+        # Static prompts are tokenized once and memoized
+        current_tokens = await count_tokens_async(current_message)
+        prompt_tokens = sum(
+            message_tokens(count_prompt_tokens(m["content"])) for m in messages
+        ) + message_tokens(current_tokens)
+        dropped = 0
+
         # Get recent chat history (only if tier allows it)
         if max_history > 0:
-            # If chat_id provided, use new chat system
-            if chat_id:
-                history = await get_chat_messages(session, chat_id, limit=max_history)
-                logger.debug(f"Loaded {len(history)} messages from chat {chat_id}")
-            else:
-                # Fallback to old system for backward compatibility
-                history = await get_chat_history(session, user_id, limit=max_history)
-                logger.debug(f"Loaded {len(history)} messages from old chat_history")
+            # Recent messages come from the Redis ring buffer (DB on cold chats);
+            # chat_id = new chat system, otherwise old per-user chat_history
+            history = await get_chat_history_cache().get_recent(
+                session, max_history, chat_id=chat_id, user_id=user_id
+            )
+            logger.debug(
+                f"Loaded {len(history)} messages for "
+                f"{f'chat {chat_id}' if chat_id else f'user {user_id} (old chat_history)'}"
+            )
+
+            # Both loaders return oldest first; old rows may lack stored counts
+            counts = await ensure_token_counts(
+                [msg.content for msg in history],
+                [msg.content_tokens for msg in history],
+            )
+            history_budget = max(budget - prompt_tokens, 0)
+            first_kept, history_tokens = fit_history_to_budget(counts, history_budget)
+
+            if first_kept > 0 and chat_id and CHAT_CONTEXT_SUMMARY_ENABLED:
+                summary = await self._get_chat_summary(
+                    session, user_id, chat_id, history[:first_kept]
+                )
+                if summary:
+                    summary_message = {
+                        "role": "system",
+                        "content": f"Summary of the earlier conversation:\n{summary}",
+                    }
+                    summary_tokens = message_tokens(
+                        await count_tokens_async(summary_message["content"])
+                    )
+                    if summary_tokens < history_budget:
+                        first_kept, history_tokens = fit_history_to_budget(
+                            counts, history_budget - summary_tokens
+                        )
+                        messages.append(summary_message)
+                        prompt_tokens += summary_tokens
+
+            dropped = first_kept
+            if dropped:
+                logger.info(
+                    f"User {user_id}: {dropped} history messages left out by token budget"
+                )
 
             # Add history messages (oldest first)
-            for msg in reversed(history):
+            for msg in history[first_kept:]:
                 messages.append({"role": msg.role, "content": msg.content})
+            prompt_tokens += history_tokens
         else:
             logger.info(f"User {user_id} on FREE tier - no chat history loaded")
 
         # Add current message
         messages.append({"role": "user", "content": current_message})
 
-        return messages
+        return ChatContext(messages, prompt_tokens, current_tokens, dropped)
+
+    async def get_context_messages(
+        self,
+        session: AsyncSession,
+        user_id: int,
+        current_message: str,
+        user_language: str = "ru",
+        user_tier: str = "free",
+        chat_id: Optional[int] = None,
+    ) -> List[ChatCompletionMessageParam]:
+        """
+        Build context messages from chat history (see build_context)
+
+        Returns:
+            List of messages for OpenAI API
+        """
+        context = await self.build_context(
+            session, user_id, current_message, user_language, user_tier, chat_id
+        )
+        return context.messages
+
+    async def _get_chat_summary(
+        self,
+        session: AsyncSession,
+        user_id: int,
+        chat_id: int,
+        dropped: List[Any],
+    ) -> Optional[str]:
+        """
+        Get rolling summary for turns dropped from context
+
+        Returns the stored summary right away; if newer turns were dropped
+        since it was written, a refresh is scheduled in the background.
+
+        Args:
+            session: Database session
+            user_id: User's database ID (for cost tracking)
+            chat_id: Chat ID
+            dropped: Dropped messages (oldest first)
+
+        Returns:
+            Summary text or None
+        """
+        from sqlalchemy import select
+
+        result = await session.execute(
+            select(Chat.context_summary, Chat.context_summary_until).where(
+                Chat.id == chat_id
+            )
+        )
+        row = result.one_or_none()
+        summary = row.context_summary if row else None
+        covered_until = row.context_summary_until if row else None
+
+        new_turns = [
+            {"role": msg.role, "content": msg.content}
+            for msg in dropped
+            if covered_until is None or msg.timestamp > covered_until
+        ]
+        if new_turns and chat_id not in self._summary_tasks:
+            task = asyncio.create_task(
+                self._refresh_chat_summary(
+                    user_id, chat_id, summary, new_turns, dropped[-1].timestamp
+                )
+            )
+            self._summary_tasks[chat_id] = task
+            task.add_done_callback(lambda _: self._summary_tasks.pop(chat_id, None))
+
+        return summary
+
+    async def _refresh_chat_summary(
+        self,
+        user_id: int,
+        chat_id: int,
+        previous_summary: Optional[str],
+        new_turns: List[Dict[str, str]],
+        until: datetime,
+    ) -> None:
+        """Merge newly dropped turns into chat summary (runs in background)"""
+        from src.database.engine import get_session_maker
+
+        transcript = "\n".join(f"{t['role']}: {t['content']}" for t in new_turns)
+        prompt = (
+            f"Previous summary:\n{previous_summary or '(none)'}\n\n"
+            f"New turns:\n{transcript}"
+        )
+
+        try:
+            response = await self._get_client_for_model(
+                CHAT_SUMMARY_MODEL
+            ).chat.completions.create(
+                model=CHAT_SUMMARY_MODEL,
+                messages=[
+                    {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt},
+                ],
+                max_tokens=CHAT_SUMMARY_MAX_TOKENS,
+                temperature=0.2,
+            )
+            summary = (response.choices[0].message.content or "").strip()
+            if not summary:
+                return
+
+            async with get_session_maker()() as session:
+                await update_chat_summary(session, chat_id, summary, until)
+
+                if response.usage:
+                    await get_usage_recorder().record_cost(
+                        session,
+                        user_id=user_id,
+                        service="openai",
+                        tokens=response.usage.total_tokens,
+                        cost=self.calculate_cost(
+                            CHAT_SUMMARY_MODEL,
+                            response.usage.prompt_tokens,
+                            response.usage.completion_tokens,
+                        ),
+                        model=CHAT_SUMMARY_MODEL,
+                        request_type="chat_summary",
+                    )
+        except Exception as e:
+            logger.warning(f"Failed to refresh context summary for chat {chat_id}: {e}")
 
     async def stream_completion(
         self,
@@ -335,18 +570,21 @@ class OpenAIService:
             Text chunks from OpenAI
         """
         try:
-            # Build context messages (tier-aware)
-            messages = await self.get_context_messages(
-                session, user_id, user_message, user_language, user_tier, chat_id
+            # Build context messages (tier-aware, token-budgeted)
+            context = await self.build_context(
+                session, user_id, user_message, user_language, user_tier, chat_id, model
             )
+            messages = context.messages
 
-            # Calculate history tokens
-            history_text = "\n".join([m["content"] for m in messages[:-1]])
-            history_tokens = self.count_tokens(history_text)
+            # History tokens come from stored per-message counts, no re-tokenization
+            history_tokens = context.prompt_tokens - message_tokens(context.message_tokens)
 
             # Select model if not provided (tier-aware routing)
             if model is None:
-                model = self.select_model(user_message, history_tokens, user_tier)
+                model = self.select_model(
+                    user_message, history_tokens, user_tier,
+                    message_tokens=context.message_tokens,
+                )
 
             # Get token limits for user's tier
             try:
@@ -366,18 +604,11 @@ class OpenAIService:
             from config.limits import should_save_chat_history
 
             if should_save_chat_history(tier_enum):
-                if chat_id:
-                    # Use new chat system
-                    await add_chat_message_to_chat(
-                        session, chat_id=chat_id, role="user", content=user_message
-                    )
-                    logger.debug(f"User message saved to chat {chat_id} for tier {user_tier}")
-                else:
-                    # Fallback to old system for backward compatibility
-                    await add_chat_message(
-                        session, user_id=user_id, role="user", content=user_message
-                    )
-                    logger.debug(f"User message saved to old history for tier {user_tier}")
+                # Redis write-through, DB write-behind (chat_id=None -> old chat_history)
+                await get_chat_history_cache().append(
+                    session, "user", user_message, chat_id=chat_id, user_id=user_id
+                )
+                logger.debug(f"User message saved for tier {user_tier} (chat {chat_id})")
             else:
                 logger.debug(
                     f"User message NOT saved to history for tier {user_tier} (save_chat_history=False)"
@@ -549,34 +780,27 @@ class OpenAIService:
 
             # If no usage data, estimate tokens
             if input_tokens == 0:
-                input_tokens = self.count_tokens(history_text + user_message)
-                output_tokens = self.count_tokens(full_response)
+                input_tokens = context.prompt_tokens
+                output_tokens = await count_tokens_async(full_response)
 
             # Calculate cost
             cost = self.calculate_cost(model, input_tokens, output_tokens)
 
             # Save assistant response to history (only for tiers with save_chat_history=True)
             if should_save_chat_history(tier_enum):
-                if chat_id:
-                    # Use new chat system
-                    await add_chat_message_to_chat(
-                        session, chat_id=chat_id, role="assistant", content=full_response,
-                        tokens_used=output_tokens, model=model
-                    )
-                    logger.debug(f"Assistant response saved to chat {chat_id} for tier {user_tier}")
-                else:
-                    # Fallback to old system for backward compatibility
-                    await add_chat_message(
-                        session, user_id=user_id, role="assistant", content=full_response
-                    )
-                    logger.debug(f"Assistant response saved to old history for tier {user_tier}")
+                await get_chat_history_cache().append(
+                    session, "assistant", full_response, chat_id=chat_id, user_id=user_id,
+                    tokens_used=output_tokens if chat_id else None,
+                    model=model if chat_id else None,
+                )
+                logger.debug(f"Assistant response saved for tier {user_tier} (chat {chat_id})")
             else:
                 logger.debug(
                     f"Assistant response NOT saved to history for tier {user_tier} (save_chat_history=False)"
                 )
 
             # Track cost
-            await track_cost(
+            await get_usage_recorder().record_cost(
                 session,
                 user_id=user_id,
                 service="openai",
@@ -893,7 +1117,7 @@ class OpenAIService:
 
             # Calculate image tokens BEFORE API call
             image_tokens = calculate_image_tokens(image_bytes, detail)
-            prompt_tokens_estimate = self.count_tokens(user_prompt)
+            prompt_tokens_estimate = await self.count_tokens_async(user_prompt)
             total_input_tokens_estimate = image_tokens + prompt_tokens_estimate
 
             logger.info(
@@ -950,13 +1174,13 @@ class OpenAIService:
             # If no usage data, use estimates
             if input_tokens == 0:
                 input_tokens = total_input_tokens_estimate
-                output_tokens = self.count_tokens(full_response)
+                output_tokens = await self.count_tokens_async(full_response)
 
             # Calculate cost
             cost = self.calculate_vision_cost(input_tokens, output_tokens)
 
             # Track in database
-            await track_cost(
+            await get_usage_recorder().record_cost(
                 session,
                 user_id=user_id,
                 service="openai_vision",
@@ -1042,7 +1266,7 @@ class OpenAIService:
 
             # Calculate image tokens BEFORE API call
             image_tokens = calculate_image_tokens(image_bytes, detail)
-            prompt_tokens_estimate = self.count_tokens(user_prompt)
+            prompt_tokens_estimate = await self.count_tokens_async(user_prompt)
             total_input_tokens_estimate = image_tokens + prompt_tokens_estimate
 
             logger.info(
@@ -1091,14 +1315,14 @@ class OpenAIService:
             else:
                 # Fallback to estimates if usage not provided
                 input_tokens = total_input_tokens_estimate
-                output_tokens = self.count_tokens(analysis)
+                output_tokens = await self.count_tokens_async(analysis)
                 total_tokens = input_tokens + output_tokens
 
             # Calculate cost
             cost = self.calculate_vision_cost(input_tokens, output_tokens)
 
             # Track in database
-            await track_cost(
+            await get_usage_recorder().record_cost(
                 session,
                 user_id=user_id,
                 service="openai_vision",
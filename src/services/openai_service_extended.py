@@ -14,7 +14,8 @@ from openai.types.chat import ChatCompletionMessageParam
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from config.config import OPENAI_API_KEY, ModelConfig
-from src.database.crud import add_chat_message, get_chat_history, track_cost
+from src.services.usage_recorder import get_usage_recorder
+from src.cache.chat_history_cache import get_chat_history_cache
 from src.services.openai_service import OpenAIService
 from src.services.crypto_tools import CRYPTO_TOOLS, execute_tool
 
@@ -64,21 +65,23 @@ class OpenAIServiceWithTools(OpenAIService):
         """
         try:
             # Build context messages with dynamic sarcasm detection
-            messages = await self.get_context_messages(
+            context = await self.build_context(
                 session, user_id, user_message, user_language
             )
+            messages = context.messages
 
-            # Calculate history tokens
-            history_text = "\n".join([m["content"] for m in messages[:-1]])
-            history_tokens = self.count_tokens(history_text)
+            # History tokens from stored per-message counts
+            history_tokens = context.prompt_tokens - context.message_tokens
 
             # Select model if not provided
             if model is None:
-                model = self.select_model(user_message, history_tokens)
+                model = self.select_model(
+                    user_message, history_tokens, message_tokens=context.message_tokens
+                )
 
             # Save user message to history
-            await add_chat_message(
-                session, user_id=user_id, role="user", content=user_message
+            await get_chat_history_cache().append(
+                session, "user", user_message, user_id=user_id
             )
 
             logger.info(
@@ -231,20 +234,20 @@ class OpenAIServiceWithTools(OpenAIService):
 
             # Estimate tokens if not provided
             if total_input_tokens == 0:
-                total_input_tokens = self.count_tokens(history_text + user_message)
+                total_input_tokens = context.prompt_tokens
             if total_output_tokens == 0:
-                total_output_tokens = self.count_tokens(full_response)
+                total_output_tokens = await self.count_tokens_async(full_response)
 
             # Calculate cost
             cost = self.calculate_cost(model, total_input_tokens, total_output_tokens)
 
             # Save assistant response to history
-            await add_chat_message(
-                session, user_id=user_id, role="assistant", content=full_response
+            await get_chat_history_cache().append(
+                session, "assistant", full_response, user_id=user_id
             )
 
             # Track cost
-            await track_cost(
+            await get_usage_recorder().record_cost(
                 session,
                 user_id=user_id,
                 service="openai_tools",
@@ -30,9 +30,18 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from config.config import ModelConfig
 from config.prompt_selector import get_system_prompt
-from src.database.crud import add_chat_message, get_chat_history, track_cost
+from src.services.usage_recorder import get_usage_recorder
+from src.cache.chat_history_cache import get_chat_history_cache
 from src.services.openai_service import OpenAIService
 from src.services.crypto_tools import CRYPTO_TOOLS, execute_tool
+from src.services.service_registry import lazy_service
+from src.utils.text_tokens import (
+    count_prompt_tokens,
+    count_tokens_async,
+    ensure_token_counts,
+    fit_history_to_budget,
+    message_tokens,
+)
 
 
 from loguru import logger
@@ -201,7 +210,11 @@ NO comments. NO explanations. NO text like "I need data" or "Please provide". ON
         Yields:
             Text chunks from final styled response
         """
-        from config.limits import get_chat_history_limit, should_save_chat_history
+        from config.limits import (
+            get_chat_history_limit,
+            get_context_token_budget,
+            should_save_chat_history,
+        )
         from src.database.models import SubscriptionTier
 
         try:
@@ -221,8 +234,8 @@ NO comments. NO explanations. NO text like "I need data" or "Please provide". ON
 
             # Save user message to history (only for tiers with save_chat_history=True)
             if should_save_chat_history(tier_enum):
-                await add_chat_message(
-                    session, user_id=user_id, role="user", content=user_message
+                await get_chat_history_cache().append(
+                    session, "user", user_message, user_id=user_id
                 )
                 logger.debug(f"User message saved to history for tier {user_tier}")
             else:
@@ -239,7 +252,9 @@ NO comments. NO explanations. NO text like "I need data" or "Please provide". ON
             # Get recent chat history for context (tier-aware)
             history = []
             if max_history > 0:
-                history = await get_chat_history(session, user_id, limit=max_history)
+                history = await get_chat_history_cache().get_recent(
+                    session, max_history, user_id=user_id
+                )
                 logger.info(f"Loaded {len(history)} messages from history")
             else:
                 logger.info(f"No history loaded for FREE tier")
@@ -253,6 +268,20 @@ NO comments. NO explanations. NO text like "I need data" or "Please provide". ON
             # If we saved current message (paid tiers), exclude it from history
             # If we didn't save (FREE tier), use all history
             history_to_use = history[:-1] if should_save_chat_history(tier_enum) and len(history) > 0 else history
+
+            # Keep only the newest turns that fit the step 1 model token budget
+            if history_to_use:
+                counts = await ensure_token_counts(
+                    [msg.content for msg in history_to_use],
+                    [msg.content_tokens for msg in history_to_use],
+                )
+                fixed_tokens = message_tokens(
+                    count_prompt_tokens(self.ANALYSIS_SYSTEM_PROMPT)
+                ) + message_tokens(await count_tokens_async(user_message))
+                budget = get_context_token_budget(tier_enum, ModelConfig.GPT_4O_MINI)
+                first_kept, _ = fit_history_to_budget(counts, max(budget - fixed_tokens, 0))
+                history_to_use = history_to_use[first_kept:]
+
             for msg in history_to_use:
                 analysis_messages.append({
                     "role": msg.role,
@@ -625,13 +654,13 @@ NO comments. NO explanations. NO text like "I need data" or "Please provide". ON
 
             # Estimate tokens if not provided
             if step1_input_tokens == 0:
-                step1_input_tokens = self.count_tokens(self.ANALYSIS_SYSTEM_PROMPT + user_message)
+                step1_input_tokens = await self.count_tokens_async(self.ANALYSIS_SYSTEM_PROMPT + user_message)
             if step1_output_tokens == 0:
-                step1_output_tokens = self.count_tokens(structured_analysis)
+                step1_output_tokens = await self.count_tokens_async(structured_analysis)
             if step2_input_tokens == 0:
-                step2_input_tokens = self.count_tokens(syntra_system_prompt + styling_prompt)
+                step2_input_tokens = await self.count_tokens_async(syntra_system_prompt + styling_prompt)
             if step2_output_tokens == 0:
-                step2_output_tokens = self.count_tokens(full_response)
+                step2_output_tokens = await self.count_tokens_async(full_response)
 
             # Calculate total cost
             step1_cost = self.calculate_cost(
@@ -644,8 +673,8 @@ NO comments. NO explanations. NO text like "I need data" or "Please provide". ON
 
             # Save assistant response to history (only for tiers with save_chat_history=True)
             if should_save_chat_history(tier_enum):
-                await add_chat_message(
-                    session, user_id=user_id, role="assistant", content=full_response
+                await get_chat_history_cache().append(
+                    session, "assistant", full_response, user_id=user_id
                 )
                 logger.debug(f"Assistant response saved to history for tier {user_tier}")
             else:
@@ -654,7 +683,7 @@ NO comments. NO explanations. NO text like "I need data" or "Please provide". ON
                 )
 
             # Track cost
-            await track_cost(
+            await get_usage_recorder().record_cost(
                 session,
                 user_id=user_id,
                 service="openai_two_step",
@@ -682,5 +711,5 @@ NO comments. NO explanations. NO text like "I need data" or "Please provide". ON
             yield ""
 
 
-# Global instance
-two_step_service = TwoStepOpenAIService()
+# Global instance (shared with the service registry)
+two_step_service = lazy_service("openai_two_step")
@@ -20,6 +20,7 @@ from sqlalchemy import select, and_, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from loguru import logger
 
+from src.database.engine import is_connection_error
 from src.database.models import (
     User,
     PointsBalance,
@@ -110,6 +111,7 @@ class PointsService:
         metadata: Optional[Dict] = None,
         transaction_id: Optional[str] = None,
         expires_in_days: Optional[int] = None,
+        raise_on_connection_error: bool = False,
     ) -> Optional[PointsTransaction]:
         """
         Award points to user
@@ -123,6 +125,8 @@ class PointsService:
             metadata: Additional metadata dict
             transaction_id: Unique transaction ID for idempotency
             expires_in_days: Days until points expire (optional)
+            raise_on_connection_error: Re-raise when the DB is unreachable
+                instead of returning None (callers that retry the award later)
 
         Returns:
             PointsTransaction if successful, None if failed/duplicate
@@ -253,6 +257,8 @@ class PointsService:
 
         except Exception as e:
             logger.error(f"Error awarding points to user {user_id}: {e}")
+            if raise_on_connection_error and is_connection_error(e):
+                raise
             await session.rollback()
             return None
 
@@ -14,6 +14,8 @@ from datetime import datetime, timedelta
 
 from loguru import logger
 
+from src.services.service_registry import lazy_service
+
 
 class PriceLevelsService:
     """
@@ -626,5 +628,5 @@ class PriceLevelsService:
             return {"success": False, "error": str(e)}
 
 
-# Singleton instance
-price_levels_service = PriceLevelsService()
+# Singleton instance (shared with the service registry)
+price_levels_service = lazy_service("price_levels")
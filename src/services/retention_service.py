@@ -32,7 +32,7 @@ from src.database.crud import (
     update_user_subscription,
     check_request_limit,
 )
-from src.services.coingecko_service import CoinGeckoService
+from src.services.service_registry import lazy_service
 
 
 from loguru import logger
@@ -59,7 +59,7 @@ class RetentionService:
         self.bot = bot
         self.scheduler = AsyncIOScheduler(timezone="UTC")
         self.is_running = False
-        self.coingecko = CoinGeckoService()
+        self.coingecko = lazy_service("coingecko")
 
     async def start(self):
         """Start the retention service scheduler"""
@@ -70,7 +70,7 @@ class RetentionService:
         logger.info("Starting retention service...")
 
         # Schedule jobs
-        self._schedule_jobs()
+        self.register_jobs(self.scheduler)
 
         # Start scheduler
         self.scheduler.start()
@@ -88,11 +88,16 @@ class RetentionService:
         self.is_running = False
         logger.info("Retention service stopped")
 
-    def _schedule_jobs(self):
-        """Schedule all retention jobs"""
+    def register_jobs(self, scheduler: AsyncIOScheduler):
+        """
+        Schedule all retention jobs
+
+        Args:
+            scheduler: Own scheduler (start()) or the shared job runner one
+        """
 
         # Check non-subscribers every hour (for 1h and 24h follow-ups)
-        self.scheduler.add_job(
+        scheduler.add_job(
             self.check_non_subscribers,
             trigger=IntervalTrigger(hours=1),
             id="check_non_subscribers",
@@ -101,7 +106,7 @@ class RetentionService:
         )
 
         # Check inactive users daily at 10:00 UTC
-        self.scheduler.add_job(
+        scheduler.add_job(
             self.check_inactive_users,
             trigger=CronTrigger(hour=10, minute=0),
             id="check_inactive_users",
@@ -110,7 +115,7 @@ class RetentionService:
         )
 
         # Check subscription status every 6 hours
-        self.scheduler.add_job(
+        scheduler.add_job(
             self.check_subscription_status,
             trigger=IntervalTrigger(hours=6),
             id="check_subscription_status",
@@ -119,7 +124,7 @@ class RetentionService:
         )
 
         # Send motivation to active users weekly on Sunday at 12:00 UTC
-        self.scheduler.add_job(
+        scheduler.add_job(
             self.motivate_active_users,
             trigger=CronTrigger(day_of_week="sun", hour=12, minute=0),
             id="motivate_active_users",
@@ -129,7 +134,7 @@ class RetentionService:
 
         # Send AI Trading promo to active users (Wednesday and Saturday at 14:00 UTC)
         if ADS_CONFIG["bot_push"]["enabled"]:
-            self.scheduler.add_job(
+            scheduler.add_job(
                 self.send_ai_trading_promo,
                 trigger=CronTrigger(day_of_week="wed,sat", hour=14, minute=0),
                 id="send_ai_trading_promo",
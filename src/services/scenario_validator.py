@@ -27,7 +27,7 @@ from typing import Dict, List, Optional, Any
 from loguru import logger
 
 from config.config import MODEL_FAST
-from src.services.openai_service import OpenAIService
+from src.services.service_registry import lazy_service
 
 
 # ==============================================================================
@@ -156,7 +156,7 @@ class ScenarioValidator:
     """
 
     def __init__(self):
-        self.openai = OpenAIService()
+        self.openai = lazy_service("openai")
         self.model = MODEL_FAST
         logger.info(f"ScenarioValidator initialized with model={self.model}")
 
@@ -0,0 +1,154 @@
+# coding: utf-8
+"""
+Process-wide registry of API/data services
+
+API routers, bot handlers and crypto_tools used to build their own
+CoinGeckoService, BinanceService, OpenAIService... at import time. A cold
+start paid for every constructor (and the OpenAI SDK/pandas/ta imports
+behind them) before serving anything, and every CoinGeckoService had its
+own RateLimiter, so together they could go over the CoinGecko limit.
+
+Now each service has one factory here and at most one instance per
+process, created on first use. Modules keep their module-level names
+through lazy_service():
+
+    coingecko_service = lazy_service("coingecko")  # nothing created yet
+    await coingecko_service.get_price("bitcoin")   # created here
+
+close_services() closes what was created (FastAPI lifespan, bot shutdown).
+"""
+
+import importlib
+import inspect
+from typing import Any, Callable, Dict
+
+from loguru import logger
+
+from config.config import COINMARKETCAP_API_KEY, RateLimits
+
+
+def _factory(module: str, class_name: str, **kwargs: Any) -> Callable[[], Any]:
+    """Factory importing the service module only when first called"""
+
+    def create() -> Any:
+        return getattr(importlib.import_module(module), class_name)(**kwargs)
+
+    return create
+
+
+_FACTORIES: Dict[str, Callable[[], Any]] = {
+    "openai": _factory("src.services.openai_service", "OpenAIService"),
+    "openai_two_step": _factory(
+        "src.services.openai_service_two_step", "TwoStepOpenAIService"
+    ),
+    "coingecko": _factory(
+        "src.services.coingecko_service",
+        "CoinGeckoService",
+        rate_limit=RateLimits.COINGECKO_CALLS_PER_MINUTE,
+    ),
+    "coinmarketcap": _factory(
+        "src.services.coinmarketcap_service",
+        "CoinMarketCapService",
+        api_key=COINMARKETCAP_API_KEY,
+    ),
+    "binance": _factory("src.services.binance_service", "BinanceService"),
+    "dexscreener": _factory("src.services.dexscreener_service", "DexScreenerService"),
+    "cryptopanic": _factory("src.services.cryptopanic_service", "CryptoPanicService"),
+    "fear_greed": _factory("src.services.fear_greed_service", "FearGreedService"),
+    "technical_indicators": _factory(
+        "src.services.technical_indicators", "TechnicalIndicators"
+    ),
+    "candlestick_patterns": _factory(
+        "src.services.candlestick_patterns", "CandlestickPatterns"
+    ),
+    "cycle_analysis": _factory(
+        "src.services.cycle_analysis_service", "CycleAnalysisService"
+    ),
+    "coinmetrics": _factory("src.services.coinmetrics_service", "CoinMetricsService"),
+    "price_levels": _factory("src.services.price_levels_service", "PriceLevelsService"),
+    "telegram_stars": _factory(
+        "src.services.telegram_stars_service", "TelegramStarsService"
+    ),
+    "futures_analysis": _factory(
+        "src.services.futures_analysis_service", "FuturesAnalysisService"
+    ),
+    "futures_request_router": _factory(
+        "src.services.futures_request_router", "FuturesRequestRouter"
+    ),
+}
+
+_instances: Dict[str, Any] = {}
+
+
+def get_service(name: str) -> Any:
+    """
+    Get the process-wide instance of a service (created on first call)
+
+    Args:
+        name: Registry name ("coingecko", "binance", "openai", ...)
+
+    Returns:
+        Service instance
+    """
+    service = _instances.get(name)
+    if service is None:
+        if name not in _FACTORIES:
+            raise KeyError(f"Unknown service: {name}")
+        service = _FACTORIES[name]()
+        _instances[name] = service
+        logger.debug(f"Service created: {name}")
+    return service
+
+
+class LazyService:
+    """
+    Module-level stand-in for a registry service
+
+    Attribute access (and monkeypatching in tests) goes to the shared
+    instance, which is created on first access.
+    """
+
+    __slots__ = ("_name",)
+
+    def __init__(self, name: str):
+        if name not in _FACTORIES:
+            raise KeyError(f"Unknown service: {name}")
+        object.__setattr__(self, "_name", name)
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(get_service(self._name), attr)
+
+    def __setattr__(self, attr: str, value: Any) -> None:
+        setattr(get_service(self._name), attr, value)
+
+    def __delattr__(self, attr: str) -> None:
+        delattr(get_service(self._name), attr)
+
+    def __repr__(self) -> str:
+        state = "created" if self._name in _instances else "not created"
+        return f"<LazyService {self._name} ({state})>"
+
+
+def lazy_service(name: str) -> Any:
+    """Proxy for a module-level service name (see module docstring)"""
+    return LazyService(name)
+
+
+async def close_services() -> None:
+    """Close created services (those with close()) and drop all instances"""
+    instances = list(_instances.items())
+    _instances.clear()
+
+    for name, service in instances:
+        close = getattr(service, "close", None)
+        if close is None:
+            continue
+        try:
+            result = close()
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            logger.warning(f"Error closing service {name}: {e}")
+
+    if instances:
+        logger.info(f"Services closed ({len(instances)} created this run)")
@@ -9,9 +9,11 @@ This module:
 3. Parses and validates LLM response
 4. Falls back to rule-based recommendations on error
 """
+import asyncio
 import json
+import time
 from datetime import datetime, timedelta, UTC
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass, asdict, field
 
 from loguru import logger
@@ -21,16 +23,23 @@ from src.database.models import (
     SupervisorUrgency,
     RecommendationType,
 )
-from src.services.binance_service import binance_service
-from src.services.openai_service import OpenAIService
+from src.services.service_registry import lazy_service
 from config.config import MODEL_FAST
 
-# Create instance for LLM calls
-_openai_service = OpenAIService()
+binance_service = lazy_service("binance")
+# Shared instance for LLM calls
+_openai_service = lazy_service("openai")
 
 # Supervisor uses fast model for quick decisions
 SUPERVISOR_MODEL = MODEL_FAST  # gpt-5-mini
 
+# Candles fetched once per symbol: (interval, limit)
+MARKET_DATA_TIMEFRAMES = (("1h", 24), ("4h", 12), ("1d", 7))
+ATR_PERIOD = 14  # 1h candles used for ATR
+VOLUME_RATIO_PERIOD = 24  # 1h candles used for volume ratio
+# How long a symbol's market data is shared between positions/users
+MARKET_DATA_TTL_SECONDS = 60
+
 
 # ============================================================================
 # DATA STRUCTURES
@@ -50,6 +59,18 @@ class OHLCVSummary:
     candles_count: int
 
 
+@dataclass
+class SymbolMarketData:
+    """Market part of the context, shared by all positions on a symbol"""
+    ohlcv_1h: Optional[OHLCVSummary] = None
+    ohlcv_4h: Optional[OHLCVSummary] = None
+    ohlcv_1d: Optional[OHLCVSummary] = None
+    atr_pct: Optional[float] = None
+    volume_ratio: Optional[float] = None
+    trend_1h: Optional[str] = None
+    trend_4h: Optional[str] = None
+
+
 @dataclass
 class MarketContextPack:
     """
@@ -166,12 +187,62 @@ class SupervisorLLMAdvisor:
         self.binance = binance_service
         self.openai = _openai_service
         self.model = SUPERVISOR_MODEL  # gpt-5-mini for fast decisions
+        # symbol -> (fetched_at monotonic, SymbolMarketData)
+        self._market_data: Dict[str, Tuple[float, SymbolMarketData]] = {}
+        self._market_data_inflight: Dict[str, asyncio.Task] = {}
         logger.info(f"SupervisorLLMAdvisor initialized with model={self.model}")
 
     # ========================================================================
     # MARKET CONTEXT BUILDING
     # ========================================================================
 
+    async def get_symbol_market_data(self, symbol: str) -> SymbolMarketData:
+        """
+        Market data for symbol, shared by all positions on it.
+
+        Each timeframe is fetched once (concurrently) and every summary is
+        derived from those candles. Results are kept for
+        MARKET_DATA_TTL_SECONDS and concurrent callers wait for the same
+        fetch, so a sync batch (and other users syncing at the same time)
+        costs one round trip per symbol.
+        """
+        cached = self._market_data.get(symbol)
+        if cached and time.monotonic() - cached[0] < MARKET_DATA_TTL_SECONDS:
+            return cached[1]
+
+        task = self._market_data_inflight.get(symbol)
+        if task is None:
+            task = asyncio.create_task(self._fetch_symbol_market_data(symbol))
+            self._market_data_inflight[symbol] = task
+            task.add_done_callback(lambda _: self._market_data_inflight.pop(symbol, None))
+        # shield: one cancelled sync shouldn't cancel the fetch for the others
+        return await asyncio.shield(task)
+
+    async def _fetch_symbol_market_data(self, symbol: str) -> SymbolMarketData:
+        klines_1h, klines_4h, klines_1d = await asyncio.gather(
+            *(
+                self._get_klines(symbol, interval, limit)
+                for interval, limit in MARKET_DATA_TIMEFRAMES
+            )
+        )
+
+        ohlcv_1h = self._summarize_ohlcv(klines_1h, "1h")
+        ohlcv_4h = self._summarize_ohlcv(klines_4h, "4h")
+
+        data = SymbolMarketData(
+            ohlcv_1h=ohlcv_1h,
+            ohlcv_4h=ohlcv_4h,
+            ohlcv_1d=self._summarize_ohlcv(klines_1d, "1d"),
+            atr_pct=self._calculate_atr_pct(klines_1h),
+            volume_ratio=self._calculate_volume_ratio(klines_1h),
+            trend_1h=self._determine_trend(ohlcv_1h) if ohlcv_1h else None,
+            trend_4h=self._determine_trend(ohlcv_4h) if ohlcv_4h else None,
+        )
+        # Don't keep a failed fetch around, the next position retries it
+        if klines_1h is not None:
+            self._market_data[symbol] = (time.monotonic(), data)
+        return data
+
     async def build_market_context(
         self,
         trade_id: str,
@@ -192,18 +263,7 @@ class SupervisorLLMAdvisor:
         Returns:
             MarketContextPack ready for LLM
         """
-        # Get OHLCV data
-        ohlcv_1h = await self._get_ohlcv_summary(symbol, "1h", limit=24)
-        ohlcv_4h = await self._get_ohlcv_summary(symbol, "4h", limit=12)
-        ohlcv_1d = await self._get_ohlcv_summary(symbol, "1d", limit=7)
-
-        # Calculate technical context
-        atr_pct = await self._calculate_atr_pct(symbol)
-        volume_ratio = await self._calculate_volume_ratio(symbol)
-
-        # Determine trends
-        trend_1h = self._determine_trend(ohlcv_1h) if ohlcv_1h else None
-        trend_4h = self._determine_trend(ohlcv_4h) if ohlcv_4h else None
+        market = await self.get_symbol_market_data(symbol)
 
         # Determine max urgency from events
         event_urgency = self._get_max_urgency(events)
@@ -233,30 +293,37 @@ class SupervisorLLMAdvisor:
             timeframe=scenario_data.get('timeframe', '4h'),
 
             # Market data
-            ohlcv_1h=ohlcv_1h,
-            ohlcv_4h=ohlcv_4h,
-            ohlcv_1d=ohlcv_1d,
+            ohlcv_1h=market.ohlcv_1h,
+            ohlcv_4h=market.ohlcv_4h,
+            ohlcv_1d=market.ohlcv_1d,
 
             # Technical
-            atr_pct=atr_pct,
-            volume_ratio=volume_ratio,
-            trend_1h=trend_1h,
-            trend_4h=trend_4h,
+            atr_pct=market.atr_pct,
+            volume_ratio=market.volume_ratio,
+            trend_1h=market.trend_1h,
+            trend_4h=market.trend_4h,
 
             # Events
             events=[e.value for e in events],
             event_urgency=event_urgency,
         )
 
-    async def _get_ohlcv_summary(
-        self, symbol: str, interval: str, limit: int = 24
-    ) -> Optional[OHLCVSummary]:
-        """Get OHLCV summary for timeframe"""
+    async def _get_klines(self, symbol: str, interval: str, limit: int):
+        """Klines DataFrame or None (errors are logged, not raised)"""
         try:
             klines = await self.binance.get_klines(symbol, interval, limit)
             if klines is None or klines.empty:
                 return None
+            return klines
+        except Exception as e:
+            logger.warning(f"Failed to get OHLCV for {symbol} {interval}: {e}")
+            return None
 
+    def _summarize_ohlcv(self, klines, interval: str) -> Optional[OHLCVSummary]:
+        """Aggregate OHLCV summary for timeframe"""
+        if klines is None:
+            return None
+        try:
             # Calculate aggregates (klines is a DataFrame)
             opens = klines['open'].astype(float).tolist()
             highs = klines['high'].astype(float).tolist()
@@ -279,39 +346,43 @@ class SupervisorLLMAdvisor:
                 candles_count=len(klines)
             )
         except Exception as e:
-            logger.warning(f"Failed to get OHLCV for {symbol} {interval}: {e}")
+            logger.warning(f"Failed to summarize OHLCV {interval}: {e}")
             return None
 
-    async def _calculate_atr_pct(self, symbol: str) -> Optional[float]:
-        """Calculate ATR as percentage of price"""
+    def _calculate_atr_pct(self, klines_1h) -> Optional[float]:
+        """Calculate ATR (last ATR_PERIOD 1h candles) as percentage of price"""
         try:
-            klines = await self.binance.get_klines(symbol, "1h", 14)
-            if klines is None or klines.empty or len(klines) < 14:
+            if klines_1h is None or len(klines_1h) < ATR_PERIOD:
                 return None
 
+            klines = klines_1h.tail(ATR_PERIOD)
+            highs = klines['high'].astype(float).tolist()
+            lows = klines['low'].astype(float).tolist()
+            closes = klines['close'].astype(float).tolist()
+
             trs = []
-            for i in range(1, len(klines)):
-                high = float(klines.iloc[i]['high'])
-                low = float(klines.iloc[i]['low'])
-                prev_close = float(klines.iloc[i-1]['close'])
-                tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
+            for i in range(1, len(closes)):
+                prev_close = closes[i - 1]
+                tr = max(
+                    highs[i] - lows[i],
+                    abs(highs[i] - prev_close),
+                    abs(lows[i] - prev_close),
+                )
                 trs.append(tr)
 
             atr = sum(trs) / len(trs)
-            current_price = float(klines.iloc[-1]['close'])
-            return round((atr / current_price) * 100, 3)
+            return round((atr / closes[-1]) * 100, 3)
         except Exception as e:
             logger.warning(f"Failed to calculate ATR: {e}")
             return None
 
-    async def _calculate_volume_ratio(self, symbol: str) -> Optional[float]:
-        """Calculate current volume vs average"""
+    def _calculate_volume_ratio(self, klines_1h) -> Optional[float]:
+        """Calculate current volume vs average (last 24 1h candles)"""
         try:
-            klines = await self.binance.get_klines(symbol, "1h", 24)
-            if klines is None or klines.empty or len(klines) < 24:
+            if klines_1h is None or len(klines_1h) < VOLUME_RATIO_PERIOD:
                 return None
 
-            volumes = klines['volume'].astype(float).tolist()
+            volumes = klines_1h['volume'].astype(float).tolist()[-VOLUME_RATIO_PERIOD:]
             avg_volume = sum(volumes[:-1]) / (len(volumes) - 1)
             current_volume = volumes[-1]
 
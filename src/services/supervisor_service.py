@@ -10,14 +10,16 @@ Advisory service for managing open positions:
 - Fallback to rule-based on LLM error
 - Anti-spam cooldowns
 """
+import asyncio
+import contextlib
 import json
 import uuid
 from datetime import datetime, timedelta, UTC
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Set, Tuple
 from dataclasses import dataclass, asdict
 
 from loguru import logger
-from sqlalchemy import select, and_
+from sqlalchemy import select, and_, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database.models import (
@@ -30,13 +32,15 @@ from src.database.models import (
     RecommendationStatus,
     SupervisorEvent,
 )
-from src.services.binance_service import binance_service
+from src.services.service_registry import lazy_service
 from src.services.supervisor_llm_advisor import (
     supervisor_llm_advisor,
     supervisor_guardrails,
 )
 from src.services.trading_modes import get_mode_config
 
+binance_service = lazy_service("binance")
+
 
 # Mode family mapping
 MODE_FAMILIES = {
@@ -124,6 +128,7 @@ ADVICE_EXPIRATION_MINUTES = 30
 LLM_ENABLED = True  # Set to False to use pure rules
 LLM_MIN_URGENCY = "med"  # Minimum urgency to trigger LLM (low/med/high/critical)
 LLM_TIMEOUT_SECONDS = 30
+LLM_MAX_CONCURRENT = 4  # Parallel LLM calls per sync batch
 
 
 # ============================================================================
@@ -313,6 +318,11 @@ class SupervisorService:
         """
         Sync positions from trading bot and generate advice.
 
+        Batched: one query for active scenarios and one for cooldowns,
+        rules for the whole batch in a single pass, market data fetched
+        concurrently per symbol, LLM calls in parallel and all advice
+        saved in one commit.
+
         Args:
             user_id: Telegram user ID
             positions: List of PositionSnapshot dicts from trading bot
@@ -320,73 +330,118 @@ class SupervisorService:
         Returns:
             List of AdvicePack for positions that need attention
         """
-        advice_packs = []
-
-        for pos_data in positions:
-            position = PositionSnapshot(**pos_data)
-
-            # Get scenario for this trade
-            stmt = select(ScenarioSnapshot).where(
-                and_(
-                    ScenarioSnapshot.trade_id == position.trade_id,
-                    ScenarioSnapshot.is_active == True
-                )
-            )
-            result = await session.execute(stmt)
-            scenario = result.scalar_one_or_none()
-
+        snapshots = [PositionSnapshot(**pos_data) for pos_data in positions]
+        if not snapshots:
+            return []
+
+        trade_ids = [position.trade_id for position in snapshots]
+        scenarios = await self._load_active_scenarios(session, trade_ids)
+        in_cooldown = await self._load_cooldowns(session, trade_ids)
+
+        # STEP 1 for the whole batch: rules are cheap, run them before any I/O
+        flagged = []
+        for position in snapshots:
+            scenario = scenarios.get(position.trade_id)
             if not scenario:
                 logger.debug(f"No active scenario for trade {position.trade_id}")
                 continue
 
-            # Check cooldown
-            if await self._is_in_cooldown(session, position.trade_id):
+            if position.trade_id in in_cooldown:
                 logger.debug(f"Trade {position.trade_id} in cooldown")
                 continue
 
-            # Evaluate and generate advice
-            advice = await self._evaluate_position(
-                session, scenario, position, user_id
+            take_profits = json.loads(scenario.take_profits_json)
+            time_left_min = self._get_time_left_minutes(scenario.valid_until)
+            events = self._detect_events(scenario, position, take_profits, time_left_min)
+
+            if not events:
+                # No events = HOLD, no action needed
+                continue
+
+            flagged.append((scenario, position, take_profits, time_left_min, events))
+
+        if not flagged:
+            return []
+
+        # Market data once per symbol, all symbols at the same time
+        llm_symbols = {
+            position.symbol
+            for _, position, _, _, events in flagged
+            if self._use_llm(events)
+        }
+        if llm_symbols:
+            await asyncio.gather(
+                *(supervisor_llm_advisor.get_symbol_market_data(s) for s in llm_symbols),
+                return_exceptions=True,
             )
 
+        llm_slots = asyncio.Semaphore(LLM_MAX_CONCURRENT)
+        advices = await asyncio.gather(
+            *(
+                self._evaluate_position(
+                    scenario, position, user_id, take_profits, time_left_min, events,
+                    llm_slots=llm_slots,
+                )
+                for scenario, position, take_profits, time_left_min, events in flagged
+            )
+        )
+
+        advice_packs = []
+        to_save = []
+        for (scenario, *_), advice in zip(flagged, advices):
             if advice and advice.recommendations:
                 advice_packs.append(advice)
+                to_save.append((scenario, advice))
+
+        await self._save_advices(session, to_save)
 
         return advice_packs
 
+    async def _load_active_scenarios(
+        self, session: AsyncSession, trade_ids: List[str]
+    ) -> Dict[str, ScenarioSnapshot]:
+        """Active scenarios for the trades (one query)"""
+        stmt = select(ScenarioSnapshot).where(
+            and_(
+                ScenarioSnapshot.trade_id.in_(trade_ids),
+                ScenarioSnapshot.is_active == True
+            )
+        ).order_by(ScenarioSnapshot.id)
+        result = await session.execute(stmt)
+        # Latest registration wins if a trade somehow has several
+        return {scenario.trade_id: scenario for scenario in result.scalars()}
+
+    def _use_llm(self, events: List[SupervisorEvent]) -> bool:
+        """Events urgent enough for the LLM path"""
+        return LLM_ENABLED and self._urgency_meets_threshold(
+            self._get_max_event_urgency(events), LLM_MIN_URGENCY
+        )
+
     async def _evaluate_position(
         self,
-        session: AsyncSession,
         scenario: ScenarioSnapshot,
         position: PositionSnapshot,
-        user_id: int
+        user_id: int,
+        take_profits: List[Dict],
+        time_left_min: int,
+        events: List[SupervisorEvent],
+        llm_slots: Optional[asyncio.Semaphore] = None,
     ) -> Optional[AdvicePack]:
         """
         HYBRID evaluation: Rules detect events -> LLM analyzes -> Guardrails validate.
 
         Flow:
-        1. Rules detect events (invalidation, TP hit, etc.)
+        1. Rules detect events (invalidation, TP hit, etc.) - done by caller
         2. If urgency >= threshold, call LLM for smart recommendations
         3. Guardrails validate LLM output
         4. Fallback to rule-based if LLM fails
-        """
-        # Parse scenario data
-        take_profits = json.loads(scenario.take_profits_json)
-        time_left_min = self._get_time_left_minutes(scenario.valid_until)
 
+        The advice is not saved here, see _save_advices.
+        """
         price = position.mark_price
         entry = position.entry_price
         side = position.side
 
-        # ====================================================================
-        # STEP 1: DETECT EVENTS (rule-based triggers)
-        # ====================================================================
-        events = self._detect_events(scenario, position, take_profits, time_left_min)
-
-        if not events:
-            # No events = HOLD, no action needed
-            return None
-
         # Determine max urgency
         max_urgency = self._get_max_event_urgency(events)
 
@@ -398,10 +453,7 @@ class SupervisorService:
         # ====================================================================
         # STEP 2: DECIDE LLM vs RULES
         # ====================================================================
-        use_llm = (
-            LLM_ENABLED and
-            self._urgency_meets_threshold(max_urgency, LLM_MIN_URGENCY)
-        )
+        use_llm = self._use_llm(events)
 
         recommendations = []
         market_summary = ""
@@ -448,9 +500,10 @@ class SupervisorService:
                 )
 
                 # Call LLM
-                llm_response = await supervisor_llm_advisor.get_advice(
-                    context, timeout=LLM_TIMEOUT_SECONDS
-                )
+                async with llm_slots or contextlib.nullcontext():
+                    llm_response = await supervisor_llm_advisor.get_advice(
+                        context, timeout=LLM_TIMEOUT_SECONDS
+                    )
 
                 if llm_response and llm_response.recommendations:
                     # Validate through guardrails
@@ -533,9 +586,6 @@ class SupervisorService:
             expires_at=expires_at.isoformat(),
         )
 
-        # Save to DB
-        await self._save_advice(session, scenario, advice)
-
         return advice
 
     # ========================================================================
@@ -1068,51 +1118,69 @@ class SupervisorService:
 
         return SupervisorRiskState.SAFE
 
-    async def _is_in_cooldown(
-        self, session: AsyncSession, trade_id: str
-    ) -> bool:
-        """Check if trade is in cooldown period."""
-        stmt = select(SupervisorAdvice).where(
-            SupervisorAdvice.trade_id == trade_id
-        ).order_by(SupervisorAdvice.created_at.desc()).limit(1)
-
+    async def _load_cooldowns(
+        self, session: AsyncSession, trade_ids: List[str]
+    ) -> Set[str]:
+        """Trades whose latest advice is still in cooldown (one query)"""
+        latest = (
+            select(
+                SupervisorAdvice.trade_id,
+                func.max(SupervisorAdvice.created_at).label("created_at"),
+            )
+            .where(SupervisorAdvice.trade_id.in_(trade_ids))
+            .group_by(SupervisorAdvice.trade_id)
+            .subquery()
+        )
+        stmt = select(SupervisorAdvice.trade_id, SupervisorAdvice.cooldown_until).join(
+            latest,
+            and_(
+                SupervisorAdvice.trade_id == latest.c.trade_id,
+                SupervisorAdvice.created_at == latest.c.created_at,
+            ),
+        )
         result = await session.execute(stmt)
-        last_advice = result.scalar_one_or_none()
-
-        if not last_advice or not last_advice.cooldown_until:
-            return False
 
-        cooldown = last_advice.cooldown_until
-        if cooldown.tzinfo is None:
-            cooldown = cooldown.replace(tzinfo=UTC)
+        now = datetime.now(UTC)
+        in_cooldown = set()
+        for trade_id, cooldown in result.all():
+            if not cooldown:
+                continue
+            if cooldown.tzinfo is None:
+                cooldown = cooldown.replace(tzinfo=UTC)
+            if now < cooldown:
+                in_cooldown.add(trade_id)
 
-        return datetime.now(UTC) < cooldown
+        return in_cooldown
 
-    async def _save_advice(
+    async def _save_advices(
         self,
         session: AsyncSession,
-        scenario: ScenarioSnapshot,
-        advice: AdvicePack
-    ) -> SupervisorAdvice:
-        """Save advice pack to database."""
-        db_advice = SupervisorAdvice(
-            scenario_id=scenario.id,
-            trade_id=advice.trade_id,
-            user_id=advice.user_id,
-            market_summary=advice.market_summary,
-            scenario_valid=advice.scenario_valid,
-            time_valid_left_min=advice.time_valid_left_min,
-            risk_state=advice.risk_state,
-            price_at_creation=advice.price_at_creation,
-            recommendations_json=json.dumps(advice.recommendations),
-            cooldown_until=datetime.fromisoformat(advice.cooldown_until) if advice.cooldown_until else None,
-            expires_at=datetime.fromisoformat(advice.expires_at),
-        )
+        advices: List[Tuple[ScenarioSnapshot, AdvicePack]]
+    ) -> List[SupervisorAdvice]:
+        """Save advice packs to database (one commit)."""
+        db_advices = [
+            SupervisorAdvice(
+                scenario_id=scenario.id,
+                trade_id=advice.trade_id,
+                user_id=advice.user_id,
+                market_summary=advice.market_summary,
+                scenario_valid=advice.scenario_valid,
+                time_valid_left_min=advice.time_valid_left_min,
+                risk_state=advice.risk_state,
+                price_at_creation=advice.price_at_creation,
+                recommendations_json=json.dumps(advice.recommendations),
+                cooldown_until=datetime.fromisoformat(advice.cooldown_until) if advice.cooldown_until else None,
+                expires_at=datetime.fromisoformat(advice.expires_at),
+            )
+            for scenario, advice in advices
+        ]
+        if not db_advices:
+            return []
 
-        session.add(db_advice)
+        session.add_all(db_advices)
         await session.commit()
 
-        return db_advice
+        return db_advices
 
     # ========================================================================
     # ACTION TRACKING
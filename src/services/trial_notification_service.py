@@ -206,7 +206,7 @@ async def send_discount_expiring_notification(
 
 async def process_trial_notifications(bot: Bot, session: AsyncSession) -> dict:
     """
-    Process all trial notifications (called by cron job)
+    Process all trial notifications (called by the hourly trial checker job)
 
     Args:
         bot: Telegram bot instance
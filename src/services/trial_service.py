@@ -195,9 +195,9 @@ async def get_active_trial_stats(session: AsyncSession) -> dict:
 
 async def process_trial_expirations(session: AsyncSession) -> dict:
     """
-    Main cron job function - process all trial-related tasks
+    Process all trial-related tasks
 
-    This should be called by a cron job every hour or so.
+    Called hourly by the trial checker job (src/tasks/trial_checker.py).
 
     Returns:
         Dict with processing results
@@ -37,6 +37,8 @@ from config.unit_economics import (
     BONUS_REQUEST_COST,
 )
 from config.limits import TIER_LIMITS, COST_PER_REQUEST
+from src.database.crud import get_revenue_by_provider, get_revenue_stats
+from src.database.rollups import aggregate_user_activity
 
 
 @dataclass
@@ -653,25 +655,8 @@ async def get_unit_economics_dashboard(
     """
     start_date = datetime.now(UTC) - timedelta(days=days)
 
-    # 1. Общий доход с разбивкой по провайдерам
-    stmt = (
-        select(
-            Payment.provider,
-            func.sum(Payment.amount).label('total_amount'),
-            func.count(Payment.id).label('payment_count'),
-        )
-        .where(Payment.status == PaymentStatus.COMPLETED.value)
-        .where(Payment.completed_at >= start_date)
-        .group_by(Payment.provider)
-    )
-    result = await session.execute(stmt)
-    payments_by_provider = {
-        row.provider: {
-            "amount": float(row.total_amount or 0),
-            "count": int(row.payment_count or 0),
-        }
-        for row in result.fetchall()
-    }
+    # 1. Общий доход с разбивкой по провайдерам (дневные rollup'ы + сегодня)
+    payments_by_provider = await get_revenue_by_provider(session, start_date=start_date)
 
     gross_revenue = sum(p["amount"] for p in payments_by_provider.values())
 
@@ -684,13 +669,10 @@ async def get_unit_economics_dashboard(
 
     # 2. Общие API расходы (считаем по количеству запросов)
     # Используем средневзвешенную стоимость
-    stmt = (
-        select(func.count(ChatMessage.id))
-        .where(ChatMessage.timestamp >= start_date)
-        .where(ChatMessage.role == 'assistant')  # Только ответы AI
+    activity = await aggregate_user_activity(
+        session, start_date, fields=("assistant_messages",)  # Только ответы AI
     )
-    result = await session.execute(stmt)
-    total_requests = result.scalar() or 0
+    total_requests = activity["assistant_messages"]
     # Средняя стоимость запроса (между free и premium)
     avg_request_cost = 0.01  # ~$0.01 усредненная стоимость
     api_costs = total_requests * avg_request_cost
@@ -715,12 +697,8 @@ async def get_unit_economics_dashboard(
     result = await session.execute(stmt)
     paying_users = result.scalar() or 1
 
-    stmt = (
-        select(func.sum(Payment.amount))
-        .where(Payment.status == PaymentStatus.COMPLETED.value)
-    )
-    result = await session.execute(stmt)
-    total_revenue_all_time = float(result.scalar() or 0)
+    revenue_all_time = await get_revenue_stats(session)
+    total_revenue_all_time = revenue_all_time["total_revenue"]
     ltv = total_revenue_all_time / paying_users if paying_users > 0 else 0
 
     # CAC (через FREE tier)
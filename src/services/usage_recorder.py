@@ -0,0 +1,427 @@
+# coding: utf-8
+"""
+Usage accounting pipeline (cost tracking + points for chat requests)
+
+Request handlers used to INSERT + commit a CostTracking row after every LLM
+call and run a full points transaction after every chat reply. Now they
+only put an event into an in-memory queue; a background task writes:
+
+- cost events as one bulk INSERT per batch;
+- points events through PointsService.earn_points (idempotency, rate
+  limits and daily caps still apply), each in its own short transaction.
+
+The queue is bounded: when it's full, producers wait up to
+USAGE_ENQUEUE_TIMEOUT_SECONDS and then spill the event to a JSONL file.
+Batches that can't be written (DB down) are spilled too. The spill file
+is replayed on the next successful flush. It's shared by the bot and API
+processes, so appends and taking it for replay hold a file lock. Before
+start() (scripts, tests)
+events are written directly with the caller's session.
+"""
+
+import asyncio
+import fcntl
+import json
+import os
+from contextlib import contextmanager
+from datetime import datetime, UTC
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from loguru import logger
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config.config import (
+    USAGE_ENQUEUE_TIMEOUT_SECONDS,
+    USAGE_FLUSH_BATCH_SIZE,
+    USAGE_FLUSH_INTERVAL_SECONDS,
+    USAGE_QUEUE_MAX,
+    USAGE_SPILL_PATH,
+)
+from src.database.models import CostTracking
+
+
+class CostEvent(NamedTuple):
+    """One API cost record (-> cost_tracking row)"""
+
+    user_id: int
+    service: str
+    tokens: int
+    cost: float
+    model: Optional[str]
+    request_type: Optional[str]
+    timestamp: datetime
+
+
+class PointsEvent(NamedTuple):
+    """One points award (-> PointsService.earn_points)"""
+
+    user_id: int
+    transaction_type: str
+    amount: Optional[int]
+    description: Optional[str]
+    metadata: Optional[Dict]
+    transaction_id: Optional[str]
+
+
+UsageEvent = Union[CostEvent, PointsEvent]
+
+
+def encode_event(event: UsageEvent) -> str:
+    """Serialize event for the spill file"""
+    data = event._asdict()
+    if isinstance(event, CostEvent):
+        data["kind"] = "cost"
+        data["timestamp"] = event.timestamp.isoformat()
+    else:
+        data["kind"] = "points"
+    return json.dumps(data, ensure_ascii=False)
+
+
+def decode_event(line: str) -> UsageEvent:
+    """Deserialize event from the spill file"""
+    data = json.loads(line)
+    if data.pop("kind") == "cost":
+        data["timestamp"] = datetime.fromisoformat(data["timestamp"])
+        return CostEvent(**data)
+    return PointsEvent(**data)
+
+
+class UsageRecorder:
+    """
+    Queue of usage events with batched background persistence
+    """
+
+    def __init__(self, spill_path: str = USAGE_SPILL_PATH):
+        self.spill_path = spill_path
+
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=USAGE_QUEUE_MAX)
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._writer_task: Optional[asyncio.Task] = None
+
+    def is_running(self) -> bool:
+        """Background writer is active (events are queued, not written inline)"""
+        return self._writer_task is not None and not self._writer_task.done()
+
+    # ===========================
+    # PRODUCERS (request path)
+    # ===========================
+
+    async def record_cost(
+        self,
+        session: AsyncSession,
+        user_id: int,
+        service: str,
+        tokens: int,
+        cost: float,
+        model: Optional[str] = None,
+        request_type: Optional[str] = None,
+    ) -> None:
+        """
+        Record API cost (same arguments as crud.track_cost)
+
+        Args:
+            session: Database session (used only when the writer isn't running)
+            user_id: User ID (database ID)
+            service: Service name (openai, together)
+            tokens: Tokens used
+            cost: Cost in USD
+            model: Model used
+            request_type: Type of request
+        """
+        if not self.is_running():
+            from src.database.crud import track_cost
+
+            await track_cost(
+                session,
+                user_id=user_id,
+                service=service,
+                tokens=tokens,
+                cost=cost,
+                model=model,
+                request_type=request_type,
+            )
+            return
+
+        await self._enqueue(
+            CostEvent(
+                user_id, service, tokens, cost, model, request_type, datetime.now(UTC)
+            )
+        )
+
+    async def record_points(
+        self,
+        session: AsyncSession,
+        user_id: int,
+        transaction_type: str,
+        amount: Optional[int] = None,
+        description: Optional[str] = None,
+        metadata: Optional[Dict] = None,
+        transaction_id: Optional[str] = None,
+    ) -> None:
+        """
+        Award points asynchronously (same arguments as PointsService.earn_points)
+
+        Args:
+            session: Database session (used only when the writer isn't running)
+            user_id: User ID
+            transaction_type: Type of transaction (PointsTransactionType)
+            amount: Points amount (if None, calculated from config)
+            description: Human-readable description
+            metadata: Additional metadata dict (must be JSON-serializable)
+            transaction_id: Unique transaction ID for idempotency
+        """
+        if not self.is_running():
+            from src.services.points_service import PointsService
+
+            await PointsService.earn_points(
+                session=session,
+                user_id=user_id,
+                transaction_type=transaction_type,
+                amount=amount,
+                description=description,
+                metadata=metadata,
+                transaction_id=transaction_id,
+            )
+            return
+
+        await self._enqueue(
+            PointsEvent(
+                user_id, transaction_type, amount, description, metadata, transaction_id
+            )
+        )
+
+    async def _enqueue(self, event: UsageEvent) -> None:
+        """Queue event; wait briefly when full (backpressure), then spill to disk"""
+        try:
+            await asyncio.wait_for(
+                self._queue.put(event), timeout=USAGE_ENQUEUE_TIMEOUT_SECONDS
+            )
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"Usage queue full ({self._queue.qsize()}), spilling event to disk"
+            )
+            await asyncio.to_thread(self._spill, [event])
+            return
+
+        if self._queue.qsize() >= USAGE_FLUSH_BATCH_SIZE:
+            self._wakeup.set()
+
+    # ===========================
+    # CONSUMER (background)
+    # ===========================
+
+    async def flush(self) -> int:
+        """
+        Write all queued events (and replay spilled ones)
+
+        Returns:
+            Number of events written
+        """
+        async with self._flush_lock:
+            written = 0
+            while not self._queue.empty():
+                batch = []
+                while not self._queue.empty() and len(batch) < USAGE_FLUSH_BATCH_SIZE:
+                    batch.append(self._queue.get_nowait())
+                try:
+                    unwritten = await self._persist(batch)
+                except Exception as e:
+                    logger.error(f"Usage flush failed: {e}")
+                    unwritten = batch
+                written += len(batch) - len(unwritten)
+                if unwritten:
+                    logger.error(
+                        f"Spilling {len(unwritten)} unwritten usage events to disk"
+                    )
+                    await asyncio.to_thread(self._spill, unwritten)
+                    return written
+
+            return written + await self._replay_spill()
+
+    async def _persist(self, batch: List[UsageEvent]) -> List[UsageEvent]:
+        """
+        Bulk INSERT cost events, apply points events one by one
+
+        Cost rows go in one transaction (raises if it fails, nothing is
+        written). Each points event commits on its own, so if the DB fails
+        part-way only the events after it are returned - a retry never
+        writes a cost row or points award twice.
+
+        Returns:
+            Events that weren't written
+        """
+        from src.database.engine import get_session_maker
+        from src.services.points_service import PointsService
+
+        costs = [e for e in batch if isinstance(e, CostEvent)]
+        points = [e for e in batch if isinstance(e, PointsEvent)]
+        session_maker = get_session_maker()
+
+        if costs:
+            async with session_maker() as session:
+                await session.execute(
+                    insert(CostTracking),
+                    [
+                        {
+                            "user_id": e.user_id,
+                            "service": e.service,
+                            "model": e.model,
+                            "tokens": e.tokens,
+                            "cost": e.cost,
+                            "request_type": e.request_type,
+                            "timestamp": e.timestamp,
+                        }
+                        for e in costs
+                    ],
+                )
+                await session.commit()
+            logger.debug(
+                f"Usage flush: {len(costs)} cost records (${sum(e.cost for e in costs):.4f})"
+            )
+
+        # earn_points returns None for a bad event, so it doesn't block the
+        # rest; it raises only when the DB itself is unreachable
+        for index, e in enumerate(points):
+            try:
+                async with session_maker() as session:
+                    await PointsService.earn_points(
+                        session=session,
+                        user_id=e.user_id,
+                        transaction_type=e.transaction_type,
+                        amount=e.amount,
+                        description=e.description,
+                        metadata=e.metadata,
+                        transaction_id=e.transaction_id,
+                        raise_on_connection_error=True,
+                    )
+            except Exception as error:
+                logger.error(f"Usage flush: points write failed: {error}")
+                return points[index:]
+
+        return []
+
+    @contextmanager
+    def _spill_lock(self) -> Iterator[None]:
+        """
+        Exclusive lock on the spill file (blocking)
+
+        The bot and every API worker share USAGE_SPILL_PATH; without it one
+        process could append to a file another one is taking for replay.
+        """
+        os.makedirs(os.path.dirname(self.spill_path) or ".", exist_ok=True)
+        with open(f"{self.spill_path}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _spill(self, events: List[UsageEvent]) -> None:
+        """Append events to the spill file (blocking, run in a thread)"""
+        with self._spill_lock():
+            with open(self.spill_path, "a", encoding="utf-8") as f:
+                for event in events:
+                    f.write(encode_event(event) + "\n")
+
+    def _take_spill(self) -> Optional[Tuple[str, List[UsageEvent]]]:
+        """
+        Move the spill file to this process's replay file and read it
+        (blocking, run in a thread)
+
+        Returns:
+            (replay path, events), or None if nothing was spilled
+        """
+        with self._spill_lock():
+            if not os.path.exists(self.spill_path):
+                return None
+            replay_path = f"{self.spill_path}.replay.{os.getpid()}"
+            os.replace(self.spill_path, replay_path)
+        with open(replay_path, encoding="utf-8") as f:
+            return replay_path, [decode_event(line) for line in f if line.strip()]
+
+    async def _replay_spill(self) -> int:
+        """Write events spilled earlier (called once the DB is reachable again)"""
+        if not os.path.exists(self.spill_path):
+            return 0
+
+        taken = await asyncio.to_thread(self._take_spill)
+        if taken is None:
+            return 0
+        replay_path, events = taken
+
+        replayed = 0
+        for start in range(0, len(events), USAGE_FLUSH_BATCH_SIZE):
+            batch = events[start : start + USAGE_FLUSH_BATCH_SIZE]
+            try:
+                unwritten = await self._persist(batch)
+            except Exception as e:
+                logger.error(f"Usage spill replay failed: {e}")
+                unwritten = batch
+            replayed += len(batch) - len(unwritten)
+            if unwritten:
+                remaining = unwritten + events[start + len(batch) :]
+                logger.error(
+                    f"Usage spill replay stopped, keeping {len(remaining)} events"
+                )
+                await asyncio.to_thread(self._spill, remaining)
+                break
+
+        os.remove(replay_path)
+        if replayed:
+            logger.info(f"Replayed {replayed} spilled usage events")
+        return replayed
+
+    async def _writer_loop(self) -> None:
+        """Background loop: flush every interval or when a batch is full"""
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(), timeout=USAGE_FLUSH_INTERVAL_SECONDS
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Usage writer error: {e}")
+
+    def start(self) -> None:
+        """Start background writer (call from startup hooks)"""
+        if not self.is_running():
+            self._writer_task = asyncio.create_task(self._writer_loop())
+            logger.info(
+                f"Usage recorder started (flush every {USAGE_FLUSH_INTERVAL_SECONDS}s, "
+                f"batch {USAGE_FLUSH_BATCH_SIZE})"
+            )
+
+    async def stop(self) -> None:
+        """Stop background writer and write everything still queued"""
+        if self._writer_task is not None:
+            self._writer_task.cancel()
+            try:
+                await self._writer_task
+            except asyncio.CancelledError:
+                pass
+            self._writer_task = None
+
+        await self.flush()
+
+
+# Global recorder instance
+_usage_recorder: Optional[UsageRecorder] = None
+
+
+def get_usage_recorder() -> UsageRecorder:
+    """
+    Get global usage recorder (singleton)
+
+    Returns:
+        UsageRecorder instance
+    """
+    global _usage_recorder
+    if _usage_recorder is None:
+        _usage_recorder = UsageRecorder()
+    return _usage_recorder
@@ -0,0 +1,61 @@
+"""
+Coin Registry Scheduler
+
+Background task that rebuilds the local coin registry (CoinGecko coin list,
+Binance/Bybit listings) in Redis
+"""
+
+from datetime import datetime
+from loguru import logger
+
+from config.config import COIN_REGISTRY_ENABLED, COIN_REGISTRY_SYNC_HOURS
+from src.services.coin_registry import get_coin_registry
+
+
+async def sync_coin_registry():
+    """
+    Rebuild coin registry from upstream APIs
+
+    Skipped right after startup if another process synced it recently.
+    """
+    try:
+        registry = get_coin_registry()
+        if await registry.is_fresh(COIN_REGISTRY_SYNC_HOURS * 3600 / 2):
+            await registry.load()
+            logger.info("Coin registry is fresh, loaded from Redis")
+            return
+
+        start_time = datetime.now()
+        if await registry.sync():
+            duration = (datetime.now() - start_time).total_seconds()
+            logger.info(f"Coin registry synced in {duration:.2f}s")
+
+    except Exception as e:
+        logger.error(f"Error syncing coin registry: {e}", exc_info=True)
+
+
+def schedule_coin_registry_tasks(scheduler):
+    """
+    Schedule coin registry sync
+
+    Args:
+        scheduler: APScheduler instance
+    """
+    if not COIN_REGISTRY_ENABLED:
+        logger.info("Coin registry disabled (COIN_REGISTRY_ENABLED=false)")
+        return
+
+    scheduler.add_job(
+        sync_coin_registry,
+        trigger="interval",
+        hours=COIN_REGISTRY_SYNC_HOURS,
+        id="sync_coin_registry",
+        name="Sync local coin registry",
+        replace_existing=True,
+        max_instances=1,
+        next_run_time=datetime.now(),  # Run once right after startup
+    )
+
+    logger.info(
+        f"Coin registry scheduler configured: syncing every {COIN_REGISTRY_SYNC_HOURS} hours"
+    )
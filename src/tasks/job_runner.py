@@ -0,0 +1,350 @@
+# coding: utf-8
+"""
+Background job runner with Redis-lease leader election
+
+Scheduled jobs used to be spread over the processes that serve users:
+the bot process ran APScheduler jobs, the retention service and the TON
+scanner, and every uvicorn worker started its own ForwardTestScheduler, so
+CPU-heavy jobs (monitor ticks, class stats, daily aggregation) competed
+with request handling and ran once per worker.
+
+JobRunner collects all jobs into one AsyncIOScheduler, registered from the
+existing schedulers (referral, broadcast, metrics rollup, coin registry,
+trial checker, retention, forward test, learning), plus long-running
+services (TON scanner). Any number of runners may be started (the bot's
+main process when JOBS_MODE=embedded, `python job_runner.py` otherwise);
+the one holding the Redis lease is the leader and the only one that runs
+jobs. Standby runners take over within JOB_LEADER_LEASE_SECONDS if the
+leader dies. Without Redis the runner assumes it's alone and leads.
+
+Every run goes through a wrapper that enforces JOB_MAX_CONCURRENT (all
+jobs together) and the per-job JOB_CONCURRENCY_LIMITS (APScheduler
+max_instances), and records run-duration metrics in
+syntra:jobs:stats:{job_id} (runs, failures, total/last seconds, last run).
+"""
+
+import asyncio
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, UTC
+from functools import wraps
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from aiogram import Bot
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from loguru import logger
+
+from config.config import (
+    JOB_CONCURRENCY_LIMITS,
+    JOB_LEADER_LEASE_SECONDS,
+    JOB_MAX_CONCURRENT,
+)
+from src.cache import CacheKeyBuilder, get_redis_manager
+
+# Extend the lease only if we still hold it:
+#   KEYS[1] = lease key, ARGV[1] = runner id, ARGV[2] = lease ms
+_RENEW_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+# Give up the lease only if we hold it
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class JobRunner:
+    """
+    Leader-elected runner of scheduled jobs and long-running services
+    """
+
+    def __init__(
+        self, redis_manager=None, lease_seconds: int = JOB_LEADER_LEASE_SECONDS
+    ):
+        self._redis_manager = redis_manager
+        self.lease_seconds = lease_seconds
+        self.scheduler = AsyncIOScheduler(timezone="UTC")
+        self.runner_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.is_leader = False
+
+        self.lease_key = CacheKeyBuilder.build("jobs", "leader")
+        self._lease_valid_until = 0.0
+        self._lease_task: Optional[asyncio.Task] = None
+        self._scripts_client = None
+        self._renew = None
+        self._release = None
+
+        self._slots = asyncio.Semaphore(max(1, JOB_MAX_CONCURRENT))
+        self._services: Dict[str, Callable[[], Awaitable[Any]]] = {}
+        self._service_tasks: Dict[str, asyncio.Task] = {}
+        self.stats: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def redis(self):
+        """Redis manager (resolved lazily so tests can swap the global one)"""
+        if self._redis_manager is None:
+            self._redis_manager = get_redis_manager()
+        return self._redis_manager
+
+    def _client(self):
+        """Redis client with the lease scripts registered for it"""
+        client = self.redis.client
+        if client is not None and client is not self._scripts_client:
+            self._renew = client.register_script(_RENEW_SCRIPT)
+            self._release = client.register_script(_RELEASE_SCRIPT)
+            self._scripts_client = client
+        return client
+
+    def _stats_key(self, job_id: str) -> str:
+        return CacheKeyBuilder.build("jobs", "stats", job_id)
+
+    # ------------------------------------------------------------------
+    # Registration
+    # ------------------------------------------------------------------
+
+    def add_service(self, name: str, factory: Callable[[], Awaitable[Any]]) -> None:
+        """
+        Register a long-running coroutine run only while this runner leads
+
+        Args:
+            name: Service name (logs)
+            factory: Returns the coroutine to run (cancelled on losing the lease)
+        """
+        self._services[name] = factory
+
+    def _wrap(self, job_id: str, func: Callable[..., Awaitable[Any]]):
+        """Leader check, global concurrency slot and metrics around a job"""
+
+        @wraps(func)
+        async def run(*args, **kwargs):
+            if not self.is_leader:
+                return None
+            async with self._slots:
+                started = time.monotonic()
+                error = None
+                try:
+                    return await func(*args, **kwargs)
+                except Exception as e:
+                    error = e
+                    logger.exception(f"Job {job_id} failed: {e}")
+                finally:
+                    await self._record_run(job_id, time.monotonic() - started, error)
+
+        return run
+
+    def _apply_limits(self) -> None:
+        """Wrap all registered jobs and apply per-job concurrency limits"""
+        for job in self.scheduler.get_jobs():
+            changes = {"func": self._wrap(job.id, job.func)}
+            # Jobs not listed keep their own max_instances (scheduler default: 1)
+            if job.id in JOB_CONCURRENCY_LIMITS:
+                changes["max_instances"] = JOB_CONCURRENCY_LIMITS[job.id]
+            job.modify(**changes)
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    async def _record_run(
+        self, job_id: str, duration: float, error: Optional[Exception]
+    ) -> None:
+        stats = self.stats.setdefault(
+            job_id, {"runs": 0, "failures": 0, "total_seconds": 0.0, "max_seconds": 0.0}
+        )
+        stats["runs"] += 1
+        stats["failures"] += error is not None
+        stats["total_seconds"] += duration
+        stats["max_seconds"] = max(stats["max_seconds"], duration)
+        stats["last_seconds"] = duration
+        stats["last_run_at"] = datetime.now(UTC).isoformat()
+        stats["last_error"] = str(error)[:500] if error else ""
+
+        logger.debug(f"Job {job_id} finished in {duration:.2f}s")
+
+        client = self._client()
+        if client is None:
+            return
+        try:
+            key = self._stats_key(job_id)
+            async with client.pipeline(transaction=False) as pipe:
+                pipe.hincrby(key, "runs", 1)
+                pipe.hincrby(key, "failures", int(error is not None))
+                pipe.hincrbyfloat(key, "total_seconds", round(duration, 3))
+                pipe.hset(
+                    key,
+                    mapping={
+                        "last_seconds": round(duration, 3),
+                        "last_run_at": stats["last_run_at"],
+                        "last_error": stats["last_error"],
+                        "runner": self.runner_id,
+                    },
+                )
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to record job metrics for {job_id}: {e}")
+
+    async def get_stats(self) -> Dict[str, Dict[str, str]]:
+        """Run metrics of all registered jobs (shared across runners via Redis)"""
+        client = self._client()
+        job_ids = [job.id for job in self.scheduler.get_jobs()]
+        if client is None:
+            return {job_id: self.stats.get(job_id, {}) for job_id in job_ids}
+
+        async with client.pipeline(transaction=False) as pipe:
+            for job_id in job_ids:
+                pipe.hgetall(self._stats_key(job_id))
+            results = await pipe.execute()
+        return dict(zip(job_ids, results))
+
+    # ------------------------------------------------------------------
+    # Leader election
+    # ------------------------------------------------------------------
+
+    async def _hold_lease(self) -> bool:
+        """Acquire or renew the leader lease; True while we hold it"""
+        client = self._client()
+        if client is None:
+            # No Redis to coordinate through: single runner deployment
+            return True
+
+        lease_ms = self.lease_seconds * 1000
+        try:
+            if self.is_leader:
+                held = bool(
+                    await self._renew(
+                        keys=[self.lease_key], args=[self.runner_id, lease_ms]
+                    )
+                )
+            else:
+                held = bool(
+                    await client.set(
+                        self.lease_key, self.runner_id, nx=True, px=lease_ms
+                    )
+                )
+        except Exception as e:
+            logger.warning(f"Job leader lease check failed: {e}")
+            # Keep leading until the lease we last confirmed runs out
+            return self.is_leader and time.monotonic() < self._lease_valid_until
+
+        if held:
+            self._lease_valid_until = time.monotonic() + self.lease_seconds
+        return held
+
+    async def _set_leader(self, leader: bool) -> None:
+        if leader == self.is_leader:
+            return
+        self.is_leader = leader
+
+        if leader:
+            logger.info(f"Job runner {self.runner_id} is now the leader")
+            for name, factory in self._services.items():
+                self._service_tasks[name] = asyncio.create_task(factory())
+                logger.info(f"Job service started: {name}")
+        else:
+            logger.warning(f"Job runner {self.runner_id} lost leadership, pausing jobs")
+            await self._stop_services()
+
+    async def _stop_services(self) -> None:
+        for name, task in self._service_tasks.items():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                logger.error(f"Job service {name} failed on stop: {e}")
+        self._service_tasks.clear()
+
+    async def _lease_loop(self) -> None:
+        """Renew (or try to take over) the lease every third of its length"""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await self._set_leader(await self._hold_lease())
+            except Exception as e:
+                logger.error(f"Job leader election error: {e}")
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    async def start(self) -> None:
+        """Apply limits, elect a leader and start the scheduler"""
+        self._apply_limits()
+        # Decide leadership before startup jobs (next_run_time=now) fire
+        await self._set_leader(await self._hold_lease())
+        self.scheduler.start()
+        self._lease_task = asyncio.create_task(self._lease_loop())
+
+        jobs: List[str] = [job.id for job in self.scheduler.get_jobs()]
+        logger.info(
+            f"Job runner {self.runner_id} started with {len(jobs)} jobs, "
+            f"{len(self._services)} services ({'leader' if self.is_leader else 'standby'})"
+        )
+
+    async def stop(self) -> None:
+        """Stop scheduling, stop services and hand the lease over"""
+        if self._lease_task is not None:
+            self._lease_task.cancel()
+            try:
+                await self._lease_task
+            except asyncio.CancelledError:
+                pass
+            self._lease_task = None
+
+        if self.scheduler.running:
+            self.scheduler.shutdown(wait=False)
+        await self._stop_services()
+
+        client = self._client()
+        if self.is_leader and client is not None:
+            try:
+                await self._release(keys=[self.lease_key], args=[self.runner_id])
+            except Exception as e:
+                logger.warning(f"Failed to release job leader lease: {e}")
+        self.is_leader = False
+        logger.info("Job runner stopped")
+
+
+def create_job_runner(bot: Bot) -> JobRunner:
+    """
+    Job runner with every scheduler's jobs registered
+
+    Args:
+        bot: Bot instance (broadcasts, retention, trial notifications)
+
+    Returns:
+        JobRunner (not started)
+    """
+    from src.learning.scheduler import learning_scheduler
+    from src.services.forward_test.scheduler import forward_test_scheduler
+    from src.services.retention_service import get_retention_service
+    from src.tasks.broadcast_scheduler import schedule_broadcast_tasks
+    from src.tasks.coin_registry_scheduler import schedule_coin_registry_tasks
+    from src.tasks.metrics_rollup_scheduler import schedule_metrics_rollup_tasks
+    from src.tasks.referral_scheduler import schedule_referral_tasks
+    from src.tasks.ton_scanner import start_ton_scanner
+    from src.tasks.trial_checker import schedule_trial_tasks
+
+    runner = JobRunner()
+    scheduler = runner.scheduler
+
+    schedule_referral_tasks(scheduler)
+    schedule_broadcast_tasks(scheduler, bot)
+    schedule_metrics_rollup_tasks(scheduler)
+    schedule_coin_registry_tasks(scheduler)
+    schedule_trial_tasks(scheduler, bot)
+    get_retention_service(bot).register_jobs(scheduler)
+    forward_test_scheduler.register_jobs(scheduler)
+    learning_scheduler.register_jobs(scheduler)
+
+    runner.add_service("ton_scanner", start_ton_scanner)
+    return runner
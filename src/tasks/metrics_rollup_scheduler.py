@@ -0,0 +1,70 @@
+"""
+Business Metrics Rollup Scheduler
+
+Background task that keeps daily_*_rollups tables up to date for admin dashboards
+"""
+
+from datetime import datetime
+from loguru import logger
+
+from config.config import METRICS_ROLLUPS_ENABLED, METRICS_ROLLUP_INTERVAL_MINUTES
+from src.database.engine import get_session
+from src.database.rollups import refresh_recent_rollups
+
+
+async def refresh_metrics_rollups():
+    """
+    Re-aggregate recent closed days into rollup tables
+
+    First run backfills the whole history, later runs only touch
+    the last METRICS_ROLLUP_REFRESH_DAYS days.
+    """
+    try:
+        start_time = datetime.now()
+
+        async for session in get_session():
+            try:
+                days = await refresh_recent_rollups(session)
+
+                duration = (datetime.now() - start_time).total_seconds()
+                logger.info(
+                    f"Metrics rollups refreshed in {duration:.2f}s: {days} days rebuilt"
+                )
+
+                # Only need one session
+                break
+            except Exception as e:
+                await session.rollback()
+                logger.error(f"Error refreshing metrics rollups: {e}", exc_info=True)
+            finally:
+                await session.close()
+
+    except Exception as e:
+        logger.error(f"Fatal error in metrics rollup scheduler: {e}", exc_info=True)
+
+
+def schedule_metrics_rollup_tasks(scheduler):
+    """
+    Schedule metrics rollup refresh
+
+    Args:
+        scheduler: APScheduler instance
+    """
+    if not METRICS_ROLLUPS_ENABLED:
+        logger.info("Metrics rollups disabled (METRICS_ROLLUPS_ENABLED=false)")
+        return
+
+    scheduler.add_job(
+        refresh_metrics_rollups,
+        trigger="interval",
+        minutes=METRICS_ROLLUP_INTERVAL_MINUTES,
+        id="refresh_metrics_rollups",
+        name="Refresh business metrics rollups",
+        replace_existing=True,
+        max_instances=1,  # Backfill may take longer than the interval
+        next_run_time=datetime.now(),  # Run once right after startup
+    )
+
+    logger.info(
+        f"Metrics rollup scheduler configured: refreshing every {METRICS_ROLLUP_INTERVAL_MINUTES} minutes"
+    )
@@ -1,11 +1,10 @@
 """
 Trial Checker Cron Job - runs hourly to process trial expirations and send notifications
 
-Run this with:
+Scheduled hourly by the job runner (schedule_trial_tasks). Don't add a
+crontab entry for it (remove the old one on existing servers), otherwise
+trial notifications go out twice. Manual one-off run:
     python -m src.tasks.trial_checker
-
-Or add to crontab:
-    0 * * * * cd /path/to/project && /path/to/.venv/bin/python -m src.tasks.trial_checker
 """
 
 import asyncio
@@ -17,8 +16,10 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from loguru import logger
 from aiogram import Bot
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.cron import CronTrigger
 
-from config.config import TELEGRAM_BOT_TOKEN
+from config.config import BOT_TOKEN
 from src.database.engine import get_session_maker
 from src.services.trial_service import (
     process_trial_expirations,
@@ -31,21 +32,14 @@ from src.services.trial_notification_service import (
 )
 
 
-async def main():
-    """
-    Main cron job entry point
+async def check_trials(bot: Bot) -> None:
     """
-    logger.info("=" * 80)
-    logger.info("Trial Checker Cron Job - Starting")
-    logger.info("=" * 80)
+    Send 24h trial notifications, downgrade expired trials, notify their users
 
-    # Initialize bot
-    bot = Bot(token=TELEGRAM_BOT_TOKEN)
-
-    # Initialize database session
-    SessionLocal = await get_session_maker()
-
-    async with SessionLocal() as session:
+    Args:
+        bot: Bot instance used for notifications
+    """
+    async with get_session_maker()() as session:
         try:
             # Get current stats
             stats = await get_active_trial_stats(session)
@@ -78,8 +72,44 @@ async def main():
         except Exception as e:
             logger.error(f"Error in trial checker cron job: {e}", exc_info=True)
             raise
-        finally:
-            await bot.session.close()
+
+
+def schedule_trial_tasks(scheduler: AsyncIOScheduler, bot: Bot) -> None:
+    """
+    Schedule hourly trial check (same cadence as the former cron entry)
+
+    Args:
+        scheduler: APScheduler instance
+        bot: Bot instance
+    """
+    scheduler.add_job(
+        check_trials,
+        trigger=CronTrigger(minute=0),
+        args=[bot],
+        id="trial_check",
+        name="Trial expirations and notifications",
+        replace_existing=True,
+        max_instances=1,
+    )
+
+    logger.info("Trial checker scheduled: hourly")
+
+
+async def main():
+    """
+    Main cron job entry point
+    """
+    logger.info("=" * 80)
+    logger.info("Trial Checker Cron Job - Starting")
+    logger.info("=" * 80)
+
+    # Initialize bot
+    bot = Bot(token=BOT_TOKEN)
+
+    try:
+        await check_trials(bot)
+    finally:
+        await bot.session.close()
 
 
 if __name__ == "__main__":
@@ -1,10 +1,16 @@
 # coding: utf-8
 """
 Utility for parsing and normalizing cryptocurrency names
+
+Coin mentions are found with one precompiled alternation over all known
+names/symbols (rebuilt by reload_coin_index when coins are added) instead
+of a separate regex per name.
 """
-from typing import Optional, List
+from typing import Dict, List, NamedTuple, Optional
 import re
 
+from loguru import logger
+
 
 # Mapping of common coin names/symbols to CoinGecko IDs
 COIN_ID_MAPPING = {
@@ -74,6 +80,59 @@ COIN_ID_MAPPING = {
 }
 
 
+# Pair/contract suffixes and non-name characters (Cyrillic kept)
+_PAIR_SUFFIX_RE = re.compile(r"[/\-_\s]+(usd|usdt|btc|eth|eur|perp|perpetual).*$")
+_NON_NAME_CHARS_RE = re.compile(r"[^a-z0-9а-я]")
+
+
+class _CoinIndex(NamedTuple):
+    """Compiled lookup structures built from COIN_ID_MAPPING"""
+
+    pattern: Optional[re.Pattern]
+    rank: Dict[str, int]  # coin_id -> position of its first alias (result order)
+    symbols: Dict[str, str]  # coin_id -> ticker symbol
+
+
+def _build_index(mapping: Dict[str, str]) -> _CoinIndex:
+    """Compile alias alternation and inverted id -> symbol index"""
+    rank: Dict[str, int] = {}
+    symbols: Dict[str, str] = {}
+    for key, coin_id in mapping.items():
+        rank.setdefault(coin_id, len(rank))
+        # First short Latin alias is the ticker (btc, eth, usdt, ton, ...)
+        if coin_id not in symbols and len(key) <= 5 and key.isascii():
+            symbols[coin_id] = key.upper()
+
+    pattern = None
+    if mapping:
+        # Longest first so the alternation prefers full names over prefixes;
+        # lookarounds are \b for Unicode words (Latin and Cyrillic alike)
+        aliases = sorted(mapping, key=len, reverse=True)
+        pattern = re.compile(
+            r"(?<!\w)(?:" + "|".join(map(re.escape, aliases)) + r")(?!\w)"
+        )
+
+    return _CoinIndex(pattern, rank, symbols)
+
+
+_index = _build_index(COIN_ID_MAPPING)
+
+
+def reload_coin_index(aliases: Optional[Dict[str, str]] = None) -> None:
+    """
+    Add coin aliases and rebuild the mention index
+
+    Args:
+        aliases: New alias -> CoinGecko ID entries (lowercase); None just
+            recompiles from COIN_ID_MAPPING
+    """
+    global _index
+    if aliases:
+        COIN_ID_MAPPING.update({key.lower(): coin_id for key, coin_id in aliases.items()})
+    _index = _build_index(COIN_ID_MAPPING)
+    logger.debug(f"Coin index rebuilt: {len(COIN_ID_MAPPING)} aliases, {len(_index.rank)} coins")
+
+
 def normalize_coin_name(coin_name: str) -> Optional[str]:
     """
     Normalize coin name to CoinGecko ID
@@ -91,12 +150,10 @@ def normalize_coin_name(coin_name: str) -> Optional[str]:
     coin_name = coin_name.lower().strip()
 
     # Remove common suffixes (USD, USDT, BTC pairs)
-    coin_name = re.sub(
-        r"[/\-_\s]+(usd|usdt|btc|eth|eur|perp|perpetual).*$", "", coin_name
-    )
+    coin_name = _PAIR_SUFFIX_RE.sub("", coin_name)
 
     # Remove special characters but keep Cyrillic (а-яА-Я)
-    coin_name = re.sub(r"[^a-z0-9а-я]", "", coin_name)
+    coin_name = _NON_NAME_CHARS_RE.sub("", coin_name)
 
     # Direct lookup
     if coin_name in COIN_ID_MAPPING:
@@ -125,18 +182,15 @@ def extract_coin_from_text(text: str) -> List[str]:
     if not text:
         return []
 
-    text_lower = text.lower()
-    found_coins = []
+    index = _index
+    if index.pattern is None:
+        return []
 
-    # Look for exact matches of known coins
-    for key, coin_id in COIN_ID_MAPPING.items():
-        # Match whole words only
-        pattern = r"\b" + re.escape(key) + r"\b"
-        if re.search(pattern, text_lower):
-            if coin_id not in found_coins:
-                found_coins.append(coin_id)
+    # Whole-word matches of known coins, one pass over the text
+    found = {COIN_ID_MAPPING[m] for m in index.pattern.findall(text.lower())}
 
-    return found_coins
+    # Same order as COIN_ID_MAPPING (major coins first), not text order
+    return sorted(found, key=index.rank.__getitem__)
 
 
 def format_coin_name(coin_id: str) -> str:
@@ -149,12 +203,7 @@ def format_coin_name(coin_id: str) -> str:
     Returns:
         Formatted name (e.g., "Bitcoin (BTC)")
     """
-    # Reverse lookup for symbol
-    symbol = None
-    for key, value in COIN_ID_MAPPING.items():
-        if value == coin_id and len(key) <= 5 and key.upper() == key or len(key) <= 4:
-            symbol = key.upper()
-            break
+    symbol = _index.symbols.get(coin_id)
 
     # Format name
     name = coin_id.replace("-", " ").title()
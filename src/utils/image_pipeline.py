@@ -0,0 +1,171 @@
+# coding: utf-8
+"""
+Image preprocessing for Vision requests
+
+Photos used to be sent as downloaded (often 1280px+ PNG/JPEG screenshots).
+OpenAI rescales them anyway, so we do it before upload:
+
+- resize to the size OpenAI would use (shortest side 768px for high
+  detail, 512px box for low detail) and re-encode as JPEG;
+- if the long side only just spills into an extra 512px tile row/column
+  (see vision_tokens._calculate_high_detail_tokens), trim the overhang:
+  from the left for wide images (oldest candles, the price axis and the
+  latest candles are on the right), evenly top/bottom for tall ones.
+
+Everything here is CPU-bound PIL work: call it through asyncio.to_thread.
+"""
+
+import math
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Optional, Tuple
+
+from PIL import Image, ImageOps
+
+from src.utils.vision_tokens import calculate_image_tokens
+
+TILE_SIZE = 512
+HIGH_DETAIL_SHORT_SIDE = 768
+HIGH_DETAIL_MAX_SIDE = 2048
+LOW_DETAIL_MAX_SIDE = 512
+
+# Trim at most this share of the long side to save a tile row/column
+MAX_CROP_RATIO = 0.1
+
+JPEG_QUALITY = 85
+
+
+@dataclass
+class PreparedImage:
+    """Image ready for the Vision API"""
+
+    image_bytes: bytes
+    detail: str
+    width: int
+    height: int
+    tokens: int
+    cropped: bool = False
+
+
+def _open(image_bytes: bytes) -> Image.Image:
+    image = Image.open(BytesIO(image_bytes))
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ("RGBA", "LA", "P"):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, "white")
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    return image.convert("RGB")
+
+
+def _encode(image: Image.Image) -> bytes:
+    output = BytesIO()
+    image.save(output, format="JPEG", quality=JPEG_QUALITY)
+    return output.getvalue()
+
+
+def tile_crop_box(width: int, height: int) -> Optional[Tuple[int, int, int, int]]:
+    """
+    Crop box that drops a nearly empty tile row/column in high detail
+
+    Args:
+        width, height: Original image size
+
+    Returns:
+        (left, top, right, bottom) box or None if cropping isn't worth it
+    """
+    short_side = min(width, height)
+    long_side = max(width, height)
+    # Long side after OpenAI's scaling (fit in 2048, shortest side to 768)
+    scale = min(1.0, HIGH_DETAIL_MAX_SIDE / long_side)
+    scale *= HIGH_DETAIL_SHORT_SIDE / (short_side * scale)
+    scaled_long = long_side * scale
+
+    tiles = math.ceil(scaled_long / TILE_SIZE)
+    target = (tiles - 1) * TILE_SIZE
+    if tiles <= 1 or target < HIGH_DETAIL_SHORT_SIDE:
+        return None
+    if (scaled_long - target) / scaled_long > MAX_CROP_RATIO:
+        return None
+
+    keep = int(long_side * target / scaled_long)
+    if width >= height:
+        return (width - keep, 0, width, height)
+    top = (height - keep) // 2
+    return (0, top, width, top + keep)
+
+
+def prepare_image(image_bytes: bytes, detail: str = "high") -> PreparedImage:
+    """
+    Resize/crop an image to what the Vision API actually uses
+
+    Args:
+        image_bytes: Downloaded image
+        detail: "low", "high" or "auto" (resolved like calculate_image_tokens)
+
+    Returns:
+        PreparedImage (original bytes if the image can't be decoded)
+    """
+    try:
+        image = _open(image_bytes)
+    except Exception:
+        return PreparedImage(
+            image_bytes=image_bytes,
+            detail=detail,
+            width=0,
+            height=0,
+            tokens=calculate_image_tokens(image_bytes, detail),
+        )
+
+    width, height = image.size
+    if detail == "auto":
+        detail = (
+            "low"
+            if width <= LOW_DETAIL_MAX_SIDE and height <= LOW_DETAIL_MAX_SIDE
+            else "high"
+        )
+
+    cropped = False
+    if detail == "low":
+        image.thumbnail(
+            (LOW_DETAIL_MAX_SIDE, LOW_DETAIL_MAX_SIDE), Image.Resampling.LANCZOS
+        )
+    else:
+        box = tile_crop_box(width, height)
+        if box:
+            image = image.crop(box)
+            cropped = True
+        # Never upscale: OpenAI does that itself at no extra cost
+        scale = min(
+            1.0,
+            HIGH_DETAIL_SHORT_SIDE / min(image.size),
+            HIGH_DETAIL_MAX_SIDE / max(image.size),
+        )
+        if scale < 1.0:
+            size = (round(image.width * scale), round(image.height * scale))
+            image = image.resize(size, Image.Resampling.LANCZOS)
+
+    prepared_bytes = _encode(image)
+    if image.size == (width, height) and len(prepared_bytes) >= len(image_bytes):
+        # Nothing resized and re-encoding didn't help (small flat PNG)
+        prepared_bytes = image_bytes
+    return PreparedImage(
+        image_bytes=prepared_bytes,
+        detail=detail,
+        width=image.width,
+        height=image.height,
+        tokens=calculate_image_tokens(prepared_bytes, detail),
+        cropped=cropped,
+    )
+
+
+def make_detection_image(image_bytes: bytes) -> bytes:
+    """Small JPEG for coin detection (low detail, ticker/title only)"""
+    try:
+        image = _open(image_bytes)
+    except Exception:
+        return image_bytes
+    image.thumbnail(
+        (LOW_DETAIL_MAX_SIDE, LOW_DETAIL_MAX_SIDE), Image.Resampling.LANCZOS
+    )
+    return _encode(image)
@@ -148,3 +148,53 @@ def convert_to_telegram_markdown(text: str) -> str:
     Оставлен для обратной совместимости
     """
     return convert_to_telegram_html(text)
+
+
+class IncrementalHTMLConverter:
+    """
+    Markdown → Telegram HTML for text that grows while it is streamed
+
+    Re-converting the whole reply on every preview is O(n²) over a reply.
+    Text up to the last blank line outside a ``` block can't change any
+    more, so it is converted once and cached; each render() only converts
+    the unfinished tail. Markup spanning a blank line is rendered when the
+    full text is converted with convert_to_telegram_html() at the end.
+    """
+
+    def __init__(self):
+        self._stable_len = 0  # source chars already converted
+        self._stable_html: list[str] = []
+
+    def _find_boundary(self, text: str) -> int:
+        """End of the last blank line after which no ``` block is open"""
+        boundary = self._stable_len
+        pos = self._stable_len
+        fences = 0
+        while True:
+            idx = text.find("\n\n", pos)
+            if idx == -1:
+                return boundary
+            fences += text.count("```", pos, idx)
+            pos = idx + 2
+            if fences % 2 == 0:
+                boundary = pos
+
+    def render(self, text: str) -> str:
+        """
+        Convert the current text (must extend the previously rendered one)
+
+        Args:
+            text: Full text received so far
+
+        Returns:
+            str: Text with HTML markup for Telegram
+        """
+        boundary = self._find_boundary(text)
+        if boundary > self._stable_len:
+            block = convert_to_telegram_html(text[self._stable_len:boundary])
+            if block:
+                self._stable_html.append(block)
+            self._stable_len = boundary
+
+        tail = convert_to_telegram_html(text[self._stable_len:])
+        return "\n\n".join(self._stable_html + ([tail] if tail else []))
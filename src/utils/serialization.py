@@ -0,0 +1,124 @@
+# coding: utf-8
+"""
+JSON serialization used by the Redis cache, SSE streams, tool results and
+API responses
+
+Uses orjson when installed (several times faster, native numpy arrays and
+scalars, datetime, NaN -> null), stdlib json otherwise. NumPy/pandas/
+datetime values are handled by the serializer itself, so callers no longer
+walk results with a recursive conversion pass before dumping.
+
+Output is always compact UTF-8 (like json.dumps(..., ensure_ascii=False)).
+
+pandas is not imported here: every Redis cache user imports this module,
+and a pandas object can only reach the serializer once pandas is loaded.
+"""
+
+import json
+import math
+import sys
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Union
+
+import numpy as np
+from starlette.responses import JSONResponse
+
+# orjson is optional (falls back to stdlib json)
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+if ORJSON_AVAILABLE:
+    _ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj: Any) -> Any:
+    """Types neither serializer handles natively"""
+    pd = sys.modules.get("pandas")
+    if pd is not None and isinstance(obj, pd.Timestamp):
+        return None if pd.isna(obj) else obj.isoformat()
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, (np.generic, np.ndarray)):
+        return _json_ready(obj)
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if pd is not None:
+        if isinstance(obj, (pd.Series, pd.Index)):
+            return _json_ready(obj.tolist())
+        if obj is pd.NaT or obj is pd.NA:
+            return None
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def to_builtin(obj: Any) -> Any:
+    """
+    Recursively convert NumPy scalars/arrays to native Python values
+
+    For results that stay Python objects (DB JSON columns, pydantic models);
+    data that is only dumped should go straight to dumps().
+    """
+    if isinstance(obj, dict):
+        return {key: to_builtin(value) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [to_builtin(item) for item in obj]
+    if isinstance(obj, tuple):
+        return tuple(to_builtin(item) for item in obj)
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    return obj
+
+
+def _json_ready(obj: Any) -> Any:
+    """stdlib fallback: NaN -> None and numpy floats (which skip default())"""
+    if isinstance(obj, dict):
+        return {key: _json_ready(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_json_ready(item) for item in obj]
+    if isinstance(obj, float):
+        return None if math.isnan(obj) else obj
+    if isinstance(obj, (np.generic, np.ndarray)):
+        return _json_ready(to_builtin(obj))
+    return obj
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    """Serialize to UTF-8 JSON bytes"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS)
+    return dumps(obj).encode("utf-8")
+
+
+def dumps(obj: Any) -> str:
+    """Serialize to a JSON string"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS).decode(
+            "utf-8"
+        )
+    # stdlib writes NaN literally and doesn't call default() for numpy
+    # floats (float subclasses), so normalize first
+    return json.dumps(
+        _json_ready(obj), default=_default, ensure_ascii=False, separators=(",", ":")
+    )
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """Parse JSON (raises ValueError on invalid input)"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONResponse(JSONResponse):
+    """FastAPI/Starlette JSON response rendered with dumps_bytes"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps_bytes(content)
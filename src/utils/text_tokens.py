@@ -0,0 +1,122 @@
+# coding: utf-8
+"""
+Utility for counting text tokens and fitting chat history into a token budget
+
+Tokenization is CPU-bound: short strings are counted inline, large inputs
+are moved to a worker thread so they don't block the event loop.
+"""
+
+import asyncio
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
+
+from config.config import TOKENIZE_OFFLOAD_CHARS
+
+# OpenAI chat format adds a few tokens per message (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    """Load tokenizer once (same encoding for all supported models)"""
+    import tiktoken
+
+    return tiktoken.encoding_for_model("gpt-4o")
+
+
+def count_tokens(text: Optional[str]) -> int:
+    """
+    Count tokens in text (blocking)
+
+    Args:
+        text: Text to count tokens for
+
+    Returns:
+        Number of tokens
+    """
+    if not text:
+        return 0
+    return len(_get_encoding().encode(text))
+
+
+@lru_cache(maxsize=256)
+def count_prompt_tokens(text: str) -> int:
+    """
+    Count tokens of a (mostly static) prompt, memoized
+
+    System prompts and few-shot examples repeat across requests,
+    so they are tokenized once per distinct text.
+    """
+    return count_tokens(text)
+
+
+async def count_tokens_async(text: Optional[str]) -> int:
+    """
+    Count tokens without blocking the event loop on large inputs
+
+    Args:
+        text: Text to count tokens for
+
+    Returns:
+        Number of tokens
+    """
+    if not text:
+        return 0
+    if len(text) < TOKENIZE_OFFLOAD_CHARS:
+        return count_tokens(text)
+    return await asyncio.to_thread(count_tokens, text)
+
+
+def message_tokens(content_tokens: int) -> int:
+    """Tokens of one chat message including format overhead"""
+    return content_tokens + MESSAGE_OVERHEAD_TOKENS
+
+
+def fit_history_to_budget(
+    token_counts: Sequence[int],
+    budget: int,
+) -> Tuple[int, int]:
+    """
+    Pick the newest messages that fit into token budget
+
+    Args:
+        token_counts: Content tokens per message, oldest first
+        budget: Tokens available for history
+
+    Returns:
+        (index of first kept message, tokens used by kept messages);
+        messages before the index are dropped
+    """
+    used = 0
+    first_kept = len(token_counts)
+
+    for index in range(len(token_counts) - 1, -1, -1):
+        cost = message_tokens(token_counts[index])
+        if used + cost > budget:
+            break
+        used += cost
+        first_kept = index
+
+    return first_kept, used
+
+
+async def ensure_token_counts(
+    contents: Sequence[str],
+    known: Sequence[Optional[int]],
+) -> List[int]:
+    """
+    Fill in token counts missing on older rows (written before counts were stored)
+
+    Args:
+        contents: Message contents
+        known: Stored counts (None if unknown)
+
+    Returns:
+        Token count per message
+    """
+    counts = []
+    for content, tokens in zip(contents, known):
+        counts.append(
+            tokens if tokens is not None else await count_tokens_async(content)
+        )
+    return counts
@@ -0,0 +1,88 @@
+"""
+Unit tests for the Redis-backed ad counter store
+"""
+
+import pytest
+
+from src.cache.ad_counter_store import AdCounterStore, _today
+from src.cache.redis_manager import RedisManager
+from src.services.ads_service import AdsService
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def manager():
+    manager = RedisManager()
+    manager._client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    manager._is_available = True
+    return manager
+
+
+async def test_counters_are_shared_between_workers(manager):
+    """Two processes see the same counts; daily counter lives in an expiring hash"""
+    first = AdCounterStore(redis_manager=manager)
+    second = AdCounterStore(redis_manager=manager)
+
+    await first.record_message(7)
+    await first.record_in_chat_ad(7)
+    counters = await second.record_message(7)
+
+    assert counters.total_messages == 2
+    assert counters.messages_since_ad == 1
+    assert counters.ads_today == 1
+    assert counters.has_seen_ad == 1
+    assert counters.last_in_chat_ad is not None
+
+    client = manager.client
+    assert await client.ttl(first.user_key(7)) > 0
+    assert 0 < await client.ttl(first.daily_key(_today())) <= 2 * 86400
+    assert set(await client.hkeys(first.user_key(7))) <= {
+        "m",
+        "s",
+        "i",
+        "c",
+        "a",
+        "p",
+        "h",
+    }
+
+
+async def test_buffered_increments_flush_in_one_pipeline(manager):
+    """add() doesn't touch Redis until flush or the user's next read"""
+    store = AdCounterStore(redis_manager=manager)
+    store.add(1, total_clicks=1)
+    store.add(1, total_clicks=1)
+    store.add(2, messages_since_ad=1)
+
+    assert await manager.client.exists(store.user_key(1)) == 0
+    assert (await store.get(1)).total_clicks == 2
+
+    assert await store.flush() == 1
+    assert (await AdCounterStore(redis_manager=manager).get(2)).messages_since_ad == 1
+
+
+async def test_local_fallback_is_bounded():
+    """Without Redis the LRU shadow keeps counting but holds max_local users"""
+    store = AdCounterStore(redis_manager=RedisManager(), max_local=2)
+    for user_id in (1, 2, 3):
+        await store.record_message(user_id)
+    await store.record_message(3)
+
+    assert list(store._local) == [2, 3]
+    assert (await store.get(3)).total_messages == 2
+
+
+async def test_ads_service_stats_use_shared_counters(manager):
+    service = AdsService()
+    service.counters = AdCounterStore(redis_manager=manager)
+
+    await service.track_click(5)
+    await service.counters.record_bot_push(5)
+    stats = await service.get_user_ad_stats(5)
+
+    assert stats["total_clicks"] == 1
+    assert stats["total_impressions"] == 1
+    assert stats["ctr"] == 1
+    assert stats["last_bot_push"] is not None
+    assert not await service.can_send_bot_push(5)
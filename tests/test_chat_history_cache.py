@@ -0,0 +1,203 @@
+"""
+Unit tests for Redis chat history ring buffer with write-behind persistence
+"""
+
+from datetime import datetime, timedelta, UTC
+
+import pytest
+
+from config.cache_config import CacheConfig
+from src.cache.chat_history_cache import CachedChatMessage, ChatHistoryCache
+from src.cache.redis_manager import RedisManager
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+def _row(role, content, minutes_ago):
+    return CachedChatMessage(
+        role, content, 3, datetime.now(UTC) - timedelta(minutes=minutes_ago)
+    )
+
+
+@pytest.fixture
+async def cache(monkeypatch):
+    """Cache backed by fake Redis; DB reads/writes recorded in memory"""
+    manager = RedisManager()
+    manager._client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    manager._is_available = True
+    cache = ChatHistoryCache(redis_manager=manager)
+
+    cache.db_rows = {}
+    cache.db_loads = 0
+    cache.persisted = []
+
+    async def load_from_db(session, chat_id, user_id, limit):
+        cache.db_loads += 1
+        return cache.db_rows.get(chat_id or user_id, [])[-limit:]
+
+    async def persist(batch):
+        cache.persisted.extend(batch)
+        for item in batch:
+            cache.db_rows.setdefault(item.chat_id or item.user_id, []).append(
+                item.record
+            )
+
+    monkeypatch.setattr(cache, "_load_from_db", load_from_db)
+    monkeypatch.setattr(cache, "_persist", persist)
+
+    cache.start()
+    yield cache
+    await cache.stop()
+
+
+async def test_cold_chat_loaded_once_then_served_from_redis(cache):
+    """First read populates the ring buffer, later reads skip the DB"""
+    cache.db_rows[5] = [_row("user", "hi", 2), _row("assistant", "hello", 1)]
+
+    first = await cache.get_recent(None, 10, chat_id=5)
+    second = await cache.get_recent(None, 10, chat_id=5)
+
+    assert cache.db_loads == 1
+    assert [m.content for m in second] == ["hi", "hello"]
+    assert second == first
+
+
+async def test_empty_chat_is_a_cache_hit(cache):
+    """A cached chat without messages doesn't go back to the DB"""
+    assert await cache.get_recent(None, 10, chat_id=6) == []
+    assert await cache.get_recent(None, 10, chat_id=6) == []
+    assert cache.db_loads == 1
+
+
+async def test_append_extends_warm_list_and_persists_in_batch(cache):
+    """Appends are visible immediately and written to DB on flush"""
+    await cache.get_recent(None, 10, chat_id=7)
+    await cache.append(None, "user", "what about btc?", chat_id=7)
+    await cache.append(
+        None, "assistant", "up 3%", chat_id=7, tokens_used=5, model="gpt-4o"
+    )
+
+    history = await cache.get_recent(None, 10, chat_id=7)
+    assert [(m.role, m.content) for m in history] == [
+        ("user", "what about btc?"),
+        ("assistant", "up 3%"),
+    ]
+    assert history[0].content_tokens > 0
+    assert cache.db_loads == 1
+
+    assert await cache.flush() == 2
+    assert [p.record.content for p in cache.persisted] == ["what about btc?", "up 3%"]
+    assert cache.persisted[1].model == "gpt-4o"
+
+
+async def test_cold_read_includes_queued_messages(cache):
+    """Messages queued before the list existed are merged into the first read"""
+    await cache.append(None, "user", "queued", user_id=9)
+
+    history = await cache.get_recent(None, 10, user_id=9)
+
+    assert [m.content for m in history] == ["queued"]
+    assert [p.record.content for p in cache.persisted] == ["queued"]
+
+
+async def test_cold_read_not_cached_while_another_process_has_queued(
+    cache, monkeypatch
+):
+    """A list built without another worker's unsaved messages isn't cached"""
+    other = ChatHistoryCache(redis_manager=cache.redis)
+    monkeypatch.setattr(other, "_load_from_db", cache._load_from_db)
+    monkeypatch.setattr(other, "_persist", cache._persist)
+    other.start()
+    try:
+        await other.append(None, "user", "from worker 2", chat_id=17)
+
+        assert await cache.get_recent(None, 10, chat_id=17) == []
+        assert not await cache.redis.client.exists(cache.conversation_key(chat_id=17))
+
+        await other.flush()
+        history = await cache.get_recent(None, 10, chat_id=17)
+        assert [m.content for m in history] == ["from worker 2"]
+        assert await cache.redis.client.exists(cache.conversation_key(chat_id=17))
+    finally:
+        await other.stop()
+
+
+async def test_ring_buffer_is_capped(cache):
+    """Only the newest CHAT_HISTORY_CACHE_SIZE messages are kept"""
+    cache.size = 3
+    await cache.get_recent(None, 3, chat_id=11)
+    for i in range(5):
+        await cache.append(None, "user", f"m{i}", chat_id=11)
+
+    history = await cache.get_recent(None, 3, chat_id=11)
+
+    assert [m.content for m in history] == ["m2", "m3", "m4"]
+    assert (
+        await cache.redis.client.llen(cache.conversation_key(chat_id=11)) <= 4
+    )  # size + marker slot
+
+
+async def test_invalidate_forces_reload(cache):
+    """After invalidate the next read goes to the DB again"""
+    await cache.get_recent(None, 10, chat_id=12)
+    await cache.invalidate(chat_id=12)
+    await cache.get_recent(None, 10, chat_id=12)
+
+    assert cache.db_loads == 2
+
+
+async def test_disabled_cache_reads_db(cache, monkeypatch):
+    """With the cache switched off every read goes to the DB"""
+    monkeypatch.setattr(CacheConfig, "CHAT_HISTORY_CACHE_ENABLED", False)
+    await cache.get_recent(None, 10, chat_id=13)
+    await cache.get_recent(None, 10, chat_id=13)
+
+    assert cache.db_loads == 2
+
+
+async def test_bad_message_is_dropped_after_retries(cache, monkeypatch):
+    """A message the DB keeps rejecting doesn't block other conversations for good"""
+    monkeypatch.setattr(CacheConfig, "CHAT_WRITE_BEHIND_MAX_ATTEMPTS", 2)
+    persist = cache._persist
+
+    async def reject_bad(batch):
+        if any(item.record.content == "bad" for item in batch):
+            raise ValueError("value too long for type character varying")
+        await persist(batch)
+
+    monkeypatch.setattr(cache, "_persist", reject_bad)
+    await cache.append(None, "user", "bad", chat_id=14)
+    await cache.append(None, "user", "fine", chat_id=15)
+
+    assert await cache.flush() == 1
+    assert [p.record.content for p in cache.persisted] == ["fine"]
+
+    await cache.flush()  # second failure: dropped
+    await cache.append(None, "user", "after", chat_id=14)
+    await cache.flush()
+
+    assert [p.record.content for p in cache.persisted] == ["fine", "after"]
+    assert cache._retry == [] and cache._attempts == {}
+
+
+async def test_unreachable_db_keeps_batch_for_next_flush(cache, monkeypatch):
+    """Connection errors don't count as attempts: nothing is dropped"""
+    from sqlalchemy.exc import OperationalError
+
+    persist = cache._persist
+    outage = {"on": True}
+
+    async def flaky(batch):
+        if outage["on"]:
+            raise OperationalError("INSERT", {}, ConnectionRefusedError())
+        await persist(batch)
+
+    monkeypatch.setattr(cache, "_persist", flaky)
+    await cache.append(None, "user", "m1", chat_id=16)
+    for _ in range(3):
+        with pytest.raises(OperationalError):
+            await cache.flush()
+
+    outage["on"] = False
+    assert await cache.flush() == 1
+    assert [p.record.content for p in cache.persisted] == ["m1"]
@@ -157,3 +157,33 @@ def test_normalize_coin_name_case_insensitive():
     assert normalize_coin_name("BTC") == normalize_coin_name("btc")
     assert normalize_coin_name("Bitcoin") == normalize_coin_name("BITCOIN")
     assert normalize_coin_name("ETH") == normalize_coin_name("eth")
+
+
+def test_extract_coin_from_text_word_boundaries():
+    """Aliases inside other words (Latin or Cyrillic) are not matches"""
+    assert extract_coin_from_text("solution and sold out") == []
+    assert extract_coin_from_text("эфирный канал") == []
+    assert extract_coin_from_text("эфир, sol!") == ["ethereum", "solana"]
+
+
+def test_format_coin_name_uses_own_symbol():
+    """Each coin gets its own ticker, not the first short alias in the mapping"""
+    assert format_coin_name("ethereum") == "Ethereum (ETH)"
+    assert format_coin_name("the-open-network") == "The Open Network (TON)"
+
+
+def test_reload_coin_index_adds_aliases(monkeypatch):
+    """New coins are matched after the index is reloaded"""
+    monkeypatch.setattr(
+        "src.utils.coin_parser.COIN_ID_MAPPING", dict(COIN_ID_MAPPING)
+    )
+    from src.utils import coin_parser
+
+    assert extract_coin_from_text("pepe to the moon") == []
+    try:
+        coin_parser.reload_coin_index({"PEPE": "pepe"})
+        assert extract_coin_from_text("pepe to the moon") == ["pepe"]
+        assert format_coin_name("pepe") == "Pepe (PEPE)"
+    finally:
+        monkeypatch.undo()
+        coin_parser.reload_coin_index()
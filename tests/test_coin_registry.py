@@ -0,0 +1,203 @@
+"""
+Unit tests for local coin registry (resolution, listings, search)
+"""
+
+import pytest
+
+from src.cache.redis_manager import RedisManager
+from src.services.coin_registry import (
+    UNRANKED,
+    CoinRegistry,
+    normalize_base,
+    parse_binance_symbols,
+    parse_bybit_symbols,
+)
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+COINS = {
+    "bitcoin": ("BTC", "Bitcoin", 1),
+    "dogwifcoin": ("WIF", "dogwifhat", 40),
+    "wif-scam": ("WIF", "WIF Token", UNRANKED),
+    "pepe": ("PEPE", "Pepe", 30),
+    "tiny-coin": ("TINY", "Tiny Coin", UNRANKED),
+}
+
+BINANCE_SPOT = {
+    "symbols": [
+        {
+            "symbol": "BTCUSDT",
+            "baseAsset": "BTC",
+            "quoteAsset": "USDT",
+            "status": "TRADING",
+        },
+        {
+            "symbol": "PEPEUSDT",
+            "baseAsset": "PEPE",
+            "quoteAsset": "USDT",
+            "status": "TRADING",
+        },
+        {
+            "symbol": "WIFBTC",
+            "baseAsset": "WIF",
+            "quoteAsset": "BTC",
+            "status": "TRADING",
+        },
+        {
+            "symbol": "OLDUSDT",
+            "baseAsset": "OLD",
+            "quoteAsset": "USDT",
+            "status": "BREAK",
+        },
+    ]
+}
+
+BINANCE_FUTURES = {
+    "symbols": [
+        {
+            "symbol": "BTCUSDT",
+            "baseAsset": "BTC",
+            "quoteAsset": "USDT",
+            "status": "TRADING",
+            "contractType": "PERPETUAL",
+        },
+        {
+            "symbol": "BTCUSDT_250627",
+            "baseAsset": "BTC",
+            "quoteAsset": "USDT",
+            "status": "TRADING",
+            "contractType": "CURRENT_QUARTER",
+        },
+        {
+            "symbol": "1000PEPEUSDT",
+            "baseAsset": "1000PEPE",
+            "quoteAsset": "USDT",
+            "status": "TRADING",
+            "contractType": "PERPETUAL",
+        },
+    ]
+}
+
+BYBIT_LINEAR = [
+    {
+        "symbol": "WIFUSDT",
+        "baseCoin": "WIF",
+        "quoteCoin": "USDT",
+        "status": "Trading",
+        "contractType": "LinearPerpetual",
+    },
+    {
+        "symbol": "1000PEPEUSDT",
+        "baseCoin": "1000PEPE",
+        "quoteCoin": "USDT",
+        "status": "Trading",
+        "contractType": "LinearPerpetual",
+    },
+]
+
+
+@pytest.fixture
+async def registry():
+    """Registry stored in fake Redis and loaded back"""
+    manager = RedisManager()
+    manager._client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    manager._is_available = True
+
+    markets = {}
+    for market, pairs in (
+        ("binance_spot", parse_binance_symbols(BINANCE_SPOT, futures=False)),
+        ("binance_perp", parse_binance_symbols(BINANCE_FUTURES, futures=True)),
+        ("bybit_perp", parse_bybit_symbols(BYBIT_LINEAR, perp=True)),
+    ):
+        for base, symbol in pairs.items():
+            markets.setdefault(base, {})[market] = symbol
+
+    writer = CoinRegistry(redis_manager=manager)
+    await writer.store(COINS, markets)
+
+    registry = CoinRegistry(redis_manager=manager)
+    assert await registry.load() is True
+    return registry
+
+
+def test_normalize_base_strips_multipliers():
+    assert normalize_base("1000PEPE") == "PEPE"
+    assert normalize_base("SHIB1000") == "SHIB"
+    assert normalize_base("1INCH") == "1INCH"
+
+
+async def test_resolve_ticker_prefers_best_rank(registry):
+    """Ambiguous tickers resolve to the highest market cap coin"""
+    assert registry.resolve_coin_id("WIF") == "dogwifcoin"
+    assert registry.resolve_coin_id("dogwifhat") == "dogwifcoin"
+    assert registry.resolve_coin_id("bitcoin") == "bitcoin"
+    assert registry.resolve_coin_id("nonexistent") is None
+
+
+async def test_exchange_listings(registry):
+    """Only listed USDT pairs are returned, contract multipliers included"""
+    assert registry.exchange_symbol("pepe", "binance", "perp") == "1000PEPEUSDT"
+    assert registry.exchange_symbol("pepe", "binance", "spot") == "PEPEUSDT"
+    assert registry.exchange_symbol("dogwifcoin", "binance", "spot") is None
+    assert registry.perp_exchanges("WIF") == ["bybit"]
+    assert registry.perp_exchanges("bitcoin") == ["binance"]
+    assert registry.perp_exchanges("tiny-coin") == []
+
+
+async def test_prefix_and_fuzzy_search(registry):
+    """Prefix matches first, fuzzy fallback for typos"""
+    assert registry.search("dogwif") == ["dogwifcoin"]
+    assert registry.search("wi")[:2] == ["dogwifcoin", "wif-scam"]
+    assert registry.search("bitcon") == ["bitcoin"]
+
+
+async def test_binance_symbol_uses_registry(registry, monkeypatch):
+    """Unlisted coins get no guessed symbol once the registry is loaded"""
+    from src.services import binance_service as binance_module
+
+    monkeypatch.setattr(binance_module, "get_coin_registry", lambda: registry)
+    service = binance_module.BinanceService()
+
+    assert service.get_symbol("tiny-coin") is None
+    assert service.get_symbol("pepe", market="perp") == "1000PEPEUSDT"
+
+
+async def test_sync_keeps_listings_of_failed_exchange(registry, monkeypatch):
+    """A Bybit outage doesn't wipe Bybit listings from the stored registry"""
+    from types import SimpleNamespace
+
+    from src.services import bybit_service as bybit_module
+    from src.services import service_registry
+
+    async def coins_list():
+        return [
+            {"id": cid, "symbol": sym, "name": name}
+            for cid, (sym, name, _) in COINS.items()
+        ]
+
+    async def top_coins(**kwargs):
+        return []
+
+    async def exchange_info(futures):
+        return BINANCE_FUTURES if futures else BINANCE_SPOT
+
+    async def instruments(category):
+        return None
+
+    services = {
+        "coingecko": SimpleNamespace(
+            get_coins_list=coins_list, get_top_coins=top_coins
+        ),
+        "binance": SimpleNamespace(get_exchange_info=exchange_info),
+    }
+    monkeypatch.setattr(service_registry, "get_service", services.__getitem__)
+    monkeypatch.setattr(bybit_module.bybit_service, "get_instruments", instruments)
+
+    assert await registry.sync() is True
+    assert registry.perp_exchanges("WIF") == ["bybit"]
+    assert registry.perp_exchanges("pepe") == ["binance", "bybit"]
+
+    reloaded = CoinRegistry(redis_manager=registry.redis)
+    assert await reloaded.load() is True
+    assert reloaded.exchange_symbol("WIF", "bybit", "perp") == "WIFUSDT"
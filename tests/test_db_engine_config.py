@@ -0,0 +1,98 @@
+"""
+Unit tests for database engine connection modes
+"""
+
+import pytest
+
+from src.database.engine import get_connect_args
+
+
+def test_direct_mode_enables_statement_cache():
+    """Direct PostgreSQL connections reuse prepared statements"""
+    args = get_connect_args("direct")
+
+    assert args["statement_cache_size"] > 0
+    assert args["prepared_statement_cache_size"] > 0
+    assert "prepared_statement_name_func" not in args
+
+
+def test_pgbouncer_mode_is_transaction_pooling_safe():
+    """PgBouncer mode disables cache and uses unique statement names"""
+    args = get_connect_args("pgbouncer")
+
+    assert args["statement_cache_size"] == 0
+    assert args["prepared_statement_cache_size"] == 0
+    name_func = args["prepared_statement_name_func"]
+    assert name_func() != name_func()
+
+
+def test_pgbouncer_prepared_mode_keeps_cache_with_unique_names():
+    """PgBouncer >= 1.21 mode caches statements under unique names"""
+    args = get_connect_args("pgbouncer_prepared")
+
+    assert args["prepared_statement_cache_size"] > 0
+    assert "prepared_statement_name_func" in args
+
+
+def test_unknown_mode_rejected():
+    """Typos in DB_CONNECTION_MODE fail loudly"""
+    with pytest.raises(ValueError):
+        get_connect_args("pgpool")
+
+
+async def test_replica_unused_without_url(monkeypatch):
+    """Analytics queries stay on the primary pool when no replica is configured"""
+    from src.database import engine
+
+    monkeypatch.setattr(engine, "DATABASE_REPLICA_URL", "")
+
+    assert await engine._replica_is_usable() is False
+
+
+def test_statement_fingerprint_collapses_literals_and_in_lists():
+    """Queries differing only in values/IN list length share one stats entry"""
+    from src.database.engine import statement_fingerprint
+
+    first = statement_fingerprint(
+        "SELECT * FROM users WHERE id IN ($1, $2) AND tier = 'vip'"
+    )
+    second = statement_fingerprint(
+        "SELECT *\n  FROM users WHERE id IN ($1, $2, $3) AND tier = 'free'"
+    )
+
+    assert first == second == "SELECT * FROM users WHERE id IN (...) AND tier = ?"
+
+
+async def test_statement_metrics_survive_failed_queries(monkeypatch):
+    """Stats are bounded and a failed query leaves no start time behind"""
+    pytest.importorskip("aiosqlite")
+    from sqlalchemy import text
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    from src.database import engine
+
+    monkeypatch.setattr(engine, "_statement_stats", {})
+    monkeypatch.setattr(engine, "STATEMENT_STATS_MAX", 2)
+    eng = create_async_engine("sqlite+aiosqlite://")
+    engine._install_statement_metrics(eng)
+    try:
+        async with eng.connect() as conn:
+            for statement in (
+                "SELECT 1",
+                "SELECT 2",
+                "SELECT 'a', 1",
+                "SELECT 1 + 1 AS x",
+            ):
+                await conn.execute(text(statement))
+            with pytest.raises(Exception):
+                await conn.execute(text("SELECT * FROM missing_table"))
+            assert not conn.sync_connection.info.get("_query_start")
+    finally:
+        await eng.dispose()
+
+    assert engine._statement_stats["SELECT ?"]["count"] == 2
+    assert set(engine._statement_stats) == {
+        "SELECT ?",
+        "SELECT ?, ?",
+        "(other statements)",
+    }
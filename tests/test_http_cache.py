@@ -0,0 +1,120 @@
+"""
+Unit tests for HTTP response cache middleware (ETag/304, compression, SWR)
+"""
+
+import httpx
+import pytest
+from fastapi import FastAPI, Header, HTTPException
+
+from src.api import http_cache
+from src.cache.redis_manager import RedisManager
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def app_client(monkeypatch):
+    """App with one market and one stats route behind the cache middleware"""
+    manager = RedisManager()
+    manager._client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    manager._is_available = True
+    monkeypatch.setattr(http_cache, "get_redis_manager", lambda: manager)
+
+    calls = {"overview": 0, "stats": 0}
+    app = FastAPI()
+    app.add_middleware(http_cache.HttpCacheMiddleware)
+
+    @app.get("/api/market/overview")
+    async def overview():
+        calls["overview"] += 1
+        return {"call": calls["overview"], "padding": "x" * 2000}
+
+    @app.get("/api/stats/trading/overview")
+    async def stats(x_api_key: str = Header(None)):
+        if x_api_key != "secret":
+            raise HTTPException(status_code=401, detail="Invalid API key")
+        calls["stats"] += 1
+        return {"call": calls["stats"]}
+
+    client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    )
+    return client, calls
+
+
+async def test_fresh_entry_served_from_cache_with_etag(app_client):
+    """Second request skips the route; matching If-None-Match gets 304"""
+    client, calls = app_client
+
+    first = await client.get("/api/market/overview")
+    second = await client.get("/api/market/overview")
+    assert first.headers["x-cache"] == "MISS" and second.headers["x-cache"] == "HIT"
+    assert second.json() == first.json()
+    assert calls["overview"] == 1
+    assert "max-age=" in second.headers["cache-control"]
+
+    not_modified = await client.get(
+        "/api/market/overview", headers={"If-None-Match": first.headers["etag"]}
+    )
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+
+
+async def test_precompressed_gzip_body(app_client):
+    """Large bodies are stored gzip-compressed and sent as-is"""
+    client, _ = app_client
+    await client.get("/api/market/overview")
+
+    response = await client.get(
+        "/api/market/overview", headers={"Accept-Encoding": "gzip"}
+    )
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.json()["call"] == 1
+
+
+async def test_stale_entry_revalidated_by_one_request(app_client, monkeypatch):
+    """Expired entry: one request rebuilds, others get the stale copy"""
+    client, calls = app_client
+    await client.get("/api/market/overview")
+
+    rule = http_cache.match_rule("/api/market/overview")
+    monkeypatch.setattr(
+        http_cache,
+        "HTTP_CACHE_RULES",
+        (rule._replace(ttl=0),) + http_cache.HTTP_CACHE_RULES,
+    )
+    # Another request is already rebuilding
+    redis = http_cache.get_redis_manager().client
+    (key,) = [k async for k in redis.scan_iter(match="syntra:http_cache:response:*")]
+    await redis.set(f"{key}:revalidate", "1")
+
+    stale = await client.get("/api/market/overview")
+    assert stale.headers["x-cache"] == "STALE"
+    assert calls["overview"] == 1
+
+    await redis.delete(f"{key}:revalidate")
+    rebuilt = await client.get("/api/market/overview")
+    assert rebuilt.headers["x-cache"] == "MISS"
+    assert rebuilt.json()["call"] == 2
+
+
+async def test_auth_dependent_routes_keyed_per_api_key(app_client):
+    """Cached stats are not served to requests without the right API key"""
+    client, calls = app_client
+
+    ok = await client.get(
+        "/api/stats/trading/overview", headers={"X-API-Key": "secret"}
+    )
+    assert ok.status_code == 200
+    assert "private" in ok.headers["cache-control"]
+
+    denied = await client.get(
+        "/api/stats/trading/overview", headers={"X-API-Key": "wrong"}
+    )
+    assert denied.status_code == 401
+
+    cached = await client.get(
+        "/api/stats/trading/overview", headers={"X-API-Key": "secret"}
+    )
+    assert cached.headers["x-cache"] == "HIT"
+    assert calls["stats"] == 1
@@ -0,0 +1,76 @@
+"""
+Unit tests for Vision image preprocessing and the analysis cache
+"""
+
+from io import BytesIO
+
+import pytest
+from PIL import Image, ImageDraw
+
+from src.cache.redis_manager import RedisManager
+from src.cache.vision_analysis_cache import VisionAnalysisCache
+from src.utils.image_pipeline import make_detection_image, prepare_image
+from src.utils.vision_tokens import calculate_image_tokens
+
+
+def _chart(width, height, fmt="PNG"):
+    image = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(image)
+    for i in range(0, width, 40):
+        top = height // 2 + ((i * 7919) % (height // 2)) - height // 4
+        draw.rectangle(
+            [i, top, i + 20, top + height // 8], fill="green" if i % 80 else "red"
+        )
+    output = BytesIO()
+    image.save(output, format=fmt)
+    return output.getvalue()
+
+
+def test_prepare_image_trims_spare_tile_and_downscales():
+    """A long side just over a tile boundary is trimmed, output sized like OpenAI's"""
+    raw = _chart(1400, 1000)
+    prepared = prepare_image(raw, "high")
+
+    assert prepared.cropped
+    assert (prepared.width, prepared.height) == (1024, 768)
+    assert prepared.tokens == 765 < calculate_image_tokens(raw, "high")
+
+    # 16:9 spills a whole tile - not cropped, only resized
+    wide = prepare_image(_chart(1920, 1080), "high")
+    assert not wide.cropped and wide.height == 768
+
+
+def test_detection_image_is_low_detail_thumbnail():
+    thumbnail = Image.open(BytesIO(make_detection_image(_chart(1400, 1000))))
+    assert thumbnail.format == "JPEG" and max(thumbnail.size) == 512
+    assert make_detection_image(b"not an image") == b"not an image"
+
+
+def test_prepare_image_auto_and_invalid_bytes():
+    small = prepare_image(_chart(400, 300), "auto")
+    assert small.detail == "low" and small.tokens == 85
+
+    broken = prepare_image(b"not an image", "high")
+    assert broken.image_bytes == b"not an image"
+    assert broken.width == broken.height == 0
+
+
+async def test_vision_analysis_cache_roundtrip():
+    fakeredis = pytest.importorskip("fakeredis")
+    manager = RedisManager()
+    manager._client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    manager._is_available = True
+
+    cache = VisionAnalysisCache(redis_manager=manager)
+    params = {"language": "en", "detail": "high", "user_prompt": None}
+    market_data = {"name": "Bitcoin", "current_price": 1.0}
+
+    assert await cache.get("abc", **params) is None
+    await cache.set("abc", "42", "bitcoin", market_data, **params)
+    assert await cache.get("abc", **params) == {
+        "analysis": "42",
+        "coin_id": "bitcoin",
+        "market_data": market_data,
+    }
+    assert await cache.get("abc", **{**params, "language": "ru"}) is None
+    assert await cache.get(None, **params) is None
@@ -0,0 +1,81 @@
+"""
+Unit tests for the leader-elected background job runner
+"""
+
+import asyncio
+
+import pytest
+
+from src.cache.redis_manager import RedisManager
+from src.tasks.job_runner import JobRunner
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def manager():
+    manager = RedisManager()
+    manager._client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    manager._is_available = True
+    return manager
+
+
+async def test_single_leader_and_failover(manager):
+    """Only one runner leads; a standby takes over once the leader stops"""
+    first = JobRunner(redis_manager=manager, lease_seconds=30)
+    second = JobRunner(redis_manager=manager, lease_seconds=30)
+    started = asyncio.Event()
+
+    async def service():
+        started.set()
+        await asyncio.Event().wait()
+
+    first.add_service("scanner", service)
+    second.add_service("scanner", service)
+
+    await first.start()
+    await second.start()
+    try:
+        assert first.is_leader and not second.is_leader
+        await asyncio.wait_for(started.wait(), 1)
+        assert "scanner" not in second._service_tasks
+
+        await first.stop()
+        await second._set_leader(await second._hold_lease())
+        assert second.is_leader
+        assert "scanner" in second._service_tasks
+    finally:
+        await first.stop()
+        await second.stop()
+
+    assert await manager.client.get(second.lease_key) is None
+
+
+async def test_wrapped_job_records_stats_and_skips_on_standby(manager):
+    """Jobs run only on the leader and their runs are recorded in Redis"""
+    runner = JobRunner(redis_manager=manager)
+    calls = []
+
+    async def job():
+        calls.append(1)
+
+    async def broken():
+        raise RuntimeError("boom")
+
+    runner.scheduler.add_job(job, "interval", hours=1, id="job")
+    runner.scheduler.add_job(broken, "interval", hours=1, id="broken")
+    runner._apply_limits()
+
+    await runner.scheduler.get_job("job").func()
+    assert calls == []
+
+    runner.is_leader = True
+    await runner.scheduler.get_job("job").func()
+    await runner.scheduler.get_job("broken").func()
+    assert calls == [1]
+
+    stats = await runner.get_stats()
+    assert stats["job"]["runs"] == "1"
+    assert stats["job"]["failures"] == "0"
+    assert stats["broken"]["failures"] == "1"
+    assert stats["broken"]["last_error"] == "boom"
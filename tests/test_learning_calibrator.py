@@ -0,0 +1,106 @@
+# coding: utf-8
+"""
+Unit tests for the single-pass learning pipeline (bulk prefetch + calibration/EV/class stats)
+"""
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.database.models import ArchetypeStats, ConfidenceBucket
+from src.learning import ev_calculator
+from src.services.futures_analysis import learning_calibrator
+from src.services.futures_analysis.learning_calibrator import (
+    LearningCalibrator,
+    get_stage_timings,
+)
+
+
+def _scenario(side, confidence=0.6):
+    return {
+        "bias": side,
+        "confidence": confidence,
+        "primary_archetype": "breakout",
+        "targets": [
+            {"price": 1, "rr": 1.5, "partial_close_pct": 50},
+            {"price": 2, "rr": 2.5, "partial_close_pct": 30},
+            {"price": 3, "rr": 4.0, "partial_close_pct": 20},
+        ],
+    }
+
+
+async def test_apply_learning_prefetches_once_and_matches_db_lookups(
+    test_db_engine, db_session, monkeypatch
+):
+    """Three SELECTs for the whole scenario set, same numbers as per-scenario lookups"""
+    db_session.add(
+        ConfidenceBucket(
+            bucket_name="medium",
+            confidence_min=0.55,
+            confidence_max=0.70,
+            sample_size=30,
+            calibration_offset=-0.05,
+        )
+    )
+    for side in ("long", "short"):
+        db_session.add(
+            ArchetypeStats(
+                archetype="breakout",
+                side=side,
+                total_trades=40,
+                wins=22,
+                losses=18,
+                suggested_sl_atr_mult=1.2,
+                suggested_tp1_r=1.4,
+                suggested_tp2_r=2.2,
+            )
+        )
+    await db_session.commit()
+
+    sessions = async_sessionmaker(
+        test_db_engine, class_=AsyncSession, expire_on_commit=False
+    )
+    monkeypatch.setattr(learning_calibrator, "get_session_maker", lambda: sessions)
+
+    selects = []
+
+    def count_selects(conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith("SELECT"):
+            selects.append(statement)
+
+    event.listen(test_db_engine.sync_engine, "before_cursor_execute", count_selects)
+    try:
+        scenarios = await LearningCalibrator().apply_learning(
+            scenarios=[_scenario("long"), _scenario("short"), _scenario("long", 0.3)],
+            symbol="BTCUSDT",
+            timeframe="4h",
+            market_context={"volatility": "normal", "trend": "bullish"},
+        )
+    finally:
+        event.remove(test_db_engine.sync_engine, "before_cursor_execute", count_selects)
+
+    assert len(selects) == 3
+
+    short = next(sc for sc in scenarios if sc["bias"] == "short")
+    assert short["confidence_raw"] == 0.6
+    assert short["confidence"] == pytest.approx(0.55)
+    assert short["learning_suggestions"]["based_on_trades"] == 40
+    assert short["outcome_probs"]["source"] == "learning"
+
+    probs, metrics = await ev_calculator.calculate_ev(
+        session=db_session,
+        targets=short["targets"],
+        side="short",
+        archetype="breakout",
+        timeframe="4h",
+        volatility_regime="normal",
+        confidence=short["confidence"],
+    )
+    assert short["outcome_probs"]["sl_early"] == probs.sl_early
+    assert short["ev_metrics"]["ev_grade"] == metrics.ev_grade
+
+    scores = [sc["ev_metrics"]["scenario_score"] for sc in scenarios]
+    assert scores == sorted(scores, reverse=True)
+    assert {"prefetch", "calibration", "ev", "class_stats", "total"} <= set(
+        get_stage_timings()
+    )
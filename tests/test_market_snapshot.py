@@ -0,0 +1,131 @@
+"""
+Unit tests for the shared market overview snapshot
+"""
+
+import time
+
+import pytest
+
+from src.cache.redis_manager import RedisManager
+from src.services.market_snapshot import MarketSnapshotService
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def manager():
+    manager = RedisManager()
+    manager._client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    manager._is_available = True
+    return manager
+
+
+def _service(manager, builds):
+    """Snapshot service whose build returns scripted results and counts calls"""
+    service = MarketSnapshotService(redis_manager=manager)
+
+    async def build():
+        builds.append(1)
+        result = service.next_result
+        if isinstance(result, Exception):
+            raise result
+        if result is None:
+            return None
+        return {
+            "version": 0,
+            "generated_ts": time.time(),
+            "generated_at": "now",
+            **result,
+        }
+
+    service.next_result = {"overview": {"success": True, "btc": {"price": 1}}}
+    service._build = build
+    return service
+
+
+async def test_snapshot_shared_between_processes(manager):
+    """Second process reads the published snapshot instead of rebuilding"""
+    builds_a, builds_b = [], []
+    process_a = _service(manager, builds_a)
+    process_b = _service(manager, builds_b)
+
+    snapshot = await process_a.refresh(only_if_leader=True)
+    assert snapshot["version"] == 1
+
+    # Lock held by process A for this cadence
+    assert (await process_b.refresh(only_if_leader=True))["version"] == 1
+    assert (await process_b.get_snapshot())["overview"]["btc"]["price"] == 1
+    assert builds_a == [1] and builds_b == []
+
+
+async def test_failed_refresh_keeps_previous_snapshot(manager):
+    """Upstream failure leaves the last good snapshot in place"""
+    builds = []
+    service = _service(manager, builds)
+    await service.refresh()
+    service._snapshot["generated_ts"] -= 10_000
+
+    service.next_result = RuntimeError("CoinGecko down")
+    assert (await service.refresh())["version"] == 1
+
+    service.next_result = None
+    assert (await service.refresh())["version"] == 1
+    assert len(builds) == 3
+
+
+async def test_market_overview_tool_reads_snapshot(manager, monkeypatch):
+    """crypto_tools.get_market_overview makes no upstream calls when a snapshot exists"""
+    from src.services import crypto_tools, market_snapshot
+
+    service = _service(manager, [])
+    await service.refresh()
+    monkeypatch.setattr(market_snapshot, "_market_snapshot_service", service)
+
+    async def fail():
+        raise AssertionError("overview rebuilt per request")
+
+    monkeypatch.setattr(crypto_tools, "build_market_overview", fail)
+
+    overview = await crypto_tools.get_market_overview()
+    assert overview == {"success": True, "btc": {"price": 1}}
+
+
+async def test_failed_overview_keeps_previous_overview(manager, monkeypatch):
+    """An error overview isn't published over a good one, nor served by the tool"""
+    from src.services import crypto_tools, market_snapshot
+
+    class FakeUpstream:
+        async def get_global_market_data(self):
+            return {"total_market_cap": 1}
+
+        async def get_extended_market_data(self, coin_id):
+            return {}
+
+        async def get_current(self):
+            return {}
+
+        async def get_historical(self, limit):
+            return []
+
+    overviews = [{"success": False, "error": "CoinGecko down"}]
+
+    async def build_overview():
+        return overviews[-1]
+
+    monkeypatch.setattr(crypto_tools, "coingecko_service", FakeUpstream())
+    monkeypatch.setattr(crypto_tools, "fear_greed_service", FakeUpstream())
+    monkeypatch.setattr(crypto_tools, "build_market_overview", build_overview)
+
+    service = MarketSnapshotService(redis_manager=manager)
+    service._snapshot = {
+        "generated_ts": 0,
+        "overview": {"success": True, "btc": {"price": 1}},
+    }
+    snapshot = await service._build()
+    assert snapshot["overview"] == {"success": True, "btc": {"price": 1}}
+
+    # No good overview to keep: the tool rebuilds instead of serving the error
+    service._snapshot = {"generated_ts": time.time(), "overview": overviews[0]}
+    monkeypatch.setattr(market_snapshot, "_market_snapshot_service", service)
+    overviews.append({"success": True, "btc": {"price": 2}})
+    assert await crypto_tools.get_market_overview() == overviews[-1]
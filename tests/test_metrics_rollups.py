@@ -0,0 +1,62 @@
+"""
+Unit tests for business metrics rollup period splitting
+"""
+
+from datetime import date, datetime, UTC
+
+from src.database.rollups import day_start, split_period
+
+BOUNDS = (date(2025, 1, 1), date(2025, 1, 9))
+
+
+def test_no_rollups_reads_raw_period():
+    """Without rollups the whole period is read from raw rows"""
+    start = datetime(2025, 1, 5, 10, tzinfo=UTC)
+
+    split = split_period(start, None, None)
+
+    assert split.rollup_days is None
+    assert split.raw_ranges == [(start, None, True)]
+
+
+def test_partial_edges_read_raw():
+    """Full closed days come from rollups, partial start day and today from raw"""
+    start = datetime(2025, 1, 5, 10, tzinfo=UTC)
+
+    split = split_period(start, None, BOUNDS)
+
+    assert split.rollup_days == (date(2025, 1, 6), date(2025, 1, 9))
+    assert split.raw_ranges == [
+        (start, day_start(date(2025, 1, 6)), False),
+        (day_start(date(2025, 1, 10)), None, True),
+    ]
+
+
+def test_midnight_start_and_inclusive_end():
+    """Midnight start needs no raw head; end day is only partially covered"""
+    start = datetime(2025, 1, 3, tzinfo=UTC)
+    end = datetime(2025, 1, 6, 12, tzinfo=UTC)
+
+    split = split_period(start, end, BOUNDS)
+
+    assert split.rollup_days == (date(2025, 1, 3), date(2025, 1, 5))
+    assert split.raw_ranges == [(day_start(date(2025, 1, 6)), end, True)]
+
+
+def test_all_time_includes_rows_before_first_rollup_day():
+    """Open start keeps a raw range before the first rolled up day"""
+    split = split_period(None, None, BOUNDS)
+
+    assert split.rollup_days == BOUNDS
+    assert split.raw_ranges[0] == (None, day_start(date(2025, 1, 1)), False)
+
+
+def test_period_inside_single_day_is_raw():
+    """Period shorter than a day never touches rollups"""
+    start = datetime(2025, 1, 4, 1, tzinfo=UTC)
+    end = datetime(2025, 1, 4, 23, tzinfo=UTC)
+
+    split = split_period(start, end, BOUNDS)
+
+    assert split.rollup_days is None
+    assert split.raw_ranges == [(start, end, True)]
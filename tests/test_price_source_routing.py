@@ -0,0 +1,190 @@
+"""
+Unit tests for price source routing (affinity, negative cache, hedging, batching)
+"""
+
+import asyncio
+
+import pytest
+
+from src.cache.redis_manager import RedisManager
+from src.services import crypto_tools
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+class FakeSources:
+    """Scripted price sources recording their calls"""
+
+    def __init__(self, redis, answers, delays=None):
+        self.redis = redis
+        self.answers = answers
+        self.delays = delays or {}
+        self.calls = []
+
+    def fetcher(self, source):
+        async def fetch(coin_id, normalized_id):
+            self.calls.append(source)
+            await asyncio.sleep(self.delays.get(source, 0))
+            answer = self.answers.get(source)
+            if isinstance(answer, Exception):
+                raise answer
+            return answer
+
+        return fetch
+
+
+@pytest.fixture
+def route_price(monkeypatch):
+    """Patch sources and Redis; returns factory for FakeSources"""
+    manager = RedisManager()
+    manager._client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    manager._is_available = True
+
+    async def resolve(coin_id):
+        return coin_id.lower()
+
+    monkeypatch.setattr(crypto_tools, "get_redis_manager", lambda: manager)
+    monkeypatch.setattr(crypto_tools, "resolve_coin_id", resolve)
+    monkeypatch.setattr(
+        crypto_tools, "_is_known_coin_id", lambda coin_id, normalized_id: False
+    )
+    monkeypatch.setattr(crypto_tools.coinmarketcap_service, "api_key", "test")
+    monkeypatch.setattr(crypto_tools.CacheConfig, "PRICE_HEDGE_DELAY", 0.05)
+
+    def install(answers, delays=None):
+        sources = FakeSources(manager, answers, delays)
+        monkeypatch.setattr(
+            crypto_tools,
+            "_PRICE_FETCHERS",
+            {name: sources.fetcher(name) for name in crypto_tools.PRICE_SOURCES},
+        )
+        return sources
+
+    return install
+
+
+def _hit(source):
+    return {"success": True, "data_source": source}
+
+
+async def test_hedged_lookup_first_answer_wins(route_price):
+    """Slow CoinGecko miss does not block a faster DEX answer"""
+    sources = route_price(
+        {"coingecko": None, "coinmarketcap": None, "dexscreener": _hit("dex")},
+        delays={"coingecko": 0.5},
+    )
+
+    result = await crypto_tools.get_crypto_price("memecoin")
+
+    assert result["data_source"] == "dex"
+    assert sources.calls == ["coingecko", "coinmarketcap", "dexscreener"]
+
+
+async def test_affinity_skips_other_sources(route_price):
+    """Second lookup goes straight to the source that answered before"""
+    sources = route_price(
+        {"coingecko": None, "coinmarketcap": _hit("cmc"), "dexscreener": None}
+    )
+    await crypto_tools.get_crypto_price("kcs")
+    # Quote expired, routing remembered
+    await sources.redis.delete(crypto_tools._price_quote_key("kcs"))
+
+    sources = route_price({"coinmarketcap": _hit("cmc")})
+    result = await crypto_tools.get_crypto_price("kcs")
+
+    assert result["data_source"] == "cmc"
+    assert sources.calls == ["coinmarketcap"]
+
+
+async def test_not_found_is_cached_but_errors_are_not(route_price):
+    """Definite misses are skipped next time, failed sources are retried"""
+    route_price(
+        {
+            "coingecko": None,
+            "coinmarketcap": RuntimeError("rate limited"),
+            "dexscreener": None,
+        }
+    )
+    result = await crypto_tools.get_crypto_price("nosuchcoin")
+    assert result["success"] is False
+
+    sources = route_price({"coinmarketcap": None})
+    result = await crypto_tools.get_crypto_price("nosuchcoin")
+
+    assert result["success"] is False
+    assert sources.calls == ["coinmarketcap"]
+    assert result["tried_sources"] == ["CoinMarketCap"]
+    assert result["skipped_sources"] == ["CoinGecko", "DexScreener"]
+
+
+async def test_batch_prices_single_coingecko_request(route_price, monkeypatch):
+    """Known coins share one markets request, unknown ones use the waterfall"""
+    sources = route_price({"dexscreener": _hit("dex")})
+    batches = []
+
+    async def get_batch_coins_data(coin_ids):
+        batches.append(list(coin_ids))
+        return [
+            {
+                "id": coin_id,
+                "symbol": coin_id[:3],
+                "name": coin_id.title(),
+                "current_price": 1.0,
+            }
+            for coin_id in coin_ids
+        ]
+
+    monkeypatch.setattr(
+        crypto_tools,
+        "_is_known_coin_id",
+        lambda coin_id, normalized_id: normalized_id != "memecoin",
+    )
+    monkeypatch.setattr(
+        crypto_tools.coingecko_service, "get_batch_coins_data", get_batch_coins_data
+    )
+
+    prices = await crypto_tools.get_crypto_prices(["bitcoin", "ethereum", "memecoin"])
+
+    assert list(prices) == ["bitcoin", "ethereum", "memecoin"]
+    assert prices["ethereum"]["data_source"] == "CoinGecko"
+    assert prices["memecoin"]["data_source"] == "dex"
+    assert batches == [["bitcoin", "ethereum"]]
+
+    # Second request is served from per-coin cache
+    sources.calls.clear()
+    await crypto_tools.get_crypto_prices(["ethereum", "memecoin"])
+    assert batches == [["bitcoin", "ethereum"]]
+    assert sources.calls == []
+
+
+async def test_outage_is_an_error_not_a_miss(monkeypatch):
+    """CoinMarketCap/DexScreener transport failures aren't cached as misses"""
+    import aiohttp
+
+    class DownSession:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+        def get(self, *args, **kwargs):
+            raise aiohttp.ClientConnectionError("connection refused")
+
+    monkeypatch.setattr(aiohttp, "ClientSession", DownSession)
+    monkeypatch.setattr(crypto_tools.coinmarketcap_service, "api_key", "test")
+    for source in ("coinmarketcap", "dexscreener"):
+        outcome, _ = await crypto_tools._fetch_price(source, "outagecoin", "outagecoin")
+        assert outcome == "error"
+
+    async def empty_answer(endpoint, params=None):
+        return {"data": {}, "pairs": []}
+
+    for service in (
+        crypto_tools.coinmarketcap_service,
+        crypto_tools.dexscreener_service,
+    ):
+        monkeypatch.setattr(service, "_make_request", empty_answer)
+    for source in ("coinmarketcap", "dexscreener"):
+        outcome, _ = await crypto_tools._fetch_price(source, "outagecoin", "outagecoin")
+        assert outcome == "miss"
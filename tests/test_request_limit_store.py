@@ -0,0 +1,115 @@
+"""
+Unit tests for Redis-backed request limit counters
+"""
+
+import asyncio
+from datetime import date
+
+import pytest
+
+from src.cache.redis_manager import RedisManager
+from src.cache.request_limit_store import RequestLimitStore
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def store():
+    """Store backed by in-process fake Redis (with Lua support)"""
+    manager = RedisManager()
+    manager._client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    manager._is_available = True
+    return RequestLimitStore(redis_manager=manager)
+
+
+async def test_consume_seeds_and_increments(store):
+    """First consume seeds zero counters, then increments atomically"""
+    allowed, before, counters = await store.consume(
+        None, 1, "text_count", limit=3, fields=("text_count", "count")
+    )
+
+    assert allowed is True
+    assert before == 0
+    assert counters["text_count"] == 1
+    assert counters["count"] == 1
+    assert counters["vision_count"] == 0
+
+
+async def test_consume_respects_limit(store):
+    """Requests over the limit are rejected and don't increment"""
+    for _ in range(2):
+        await store.consume(None, 1, "vision_count", limit=2, fields=("vision_count",))
+
+    allowed, before, counters = await store.consume(
+        None, 1, "vision_count", limit=2, fields=("vision_count",)
+    )
+
+    assert allowed is False
+    assert before == 2
+    assert counters["vision_count"] == 2
+
+
+async def test_concurrent_consume_never_exceeds_limit(store):
+    """Parallel requests from one user can't race past the limit"""
+    results = await asyncio.gather(
+        *[
+            store.consume(None, 7, "futures_count", limit=5, fields=("futures_count",))
+            for _ in range(20)
+        ]
+    )
+
+    assert sum(1 for allowed, _, _ in results if allowed) == 5
+    counters = await store.get_counters(None, 7)
+    assert counters["futures_count"] == 5
+
+
+async def test_set_fields_resets_counter(store):
+    """Admin reset overwrites the counter and marks user dirty"""
+    await store.consume(None, 3, "text_count", limit=None, fields=("text_count",))
+
+    counters = await store.set_fields(None, 3, {"text_count": 0})
+
+    assert counters["text_count"] == 0
+    dirty = await store.redis.client.smembers(store.dirty_key(date.today()))
+    assert "3" in dirty
+
+
+async def test_refund_undoes_consume(store):
+    """A failed request gives its slot back, counters never go below zero"""
+    await store.consume(None, 4, "text_count", limit=1, fields=("text_count", "count"))
+
+    assert await store.refund(4, ("text_count", "count")) is True
+    counters = await store.get_counters(None, 4)
+    assert counters["text_count"] == 0
+    assert counters["count"] == 0
+
+    await store.refund(4, ("text_count",))
+    allowed, before, _ = await store.consume(
+        None, 4, "text_count", limit=1, fields=("text_count",)
+    )
+    assert allowed is True
+    assert before == 0
+
+    assert await store.refund(5, ("text_count",)) is False
+
+
+async def test_unavailable_redis_returns_none():
+    """Callers fall back to Postgres when Redis is down"""
+    store = RequestLimitStore(redis_manager=RedisManager())
+
+    assert store.is_available() is False
+    assert await store.get_counters(None, 1) is None
+    assert await store.consume(None, 1, "text_count", 5, ("text_count",)) is None
+    assert await store.refund(1, ("text_count",)) is None
+
+
+def test_to_record_snapshot():
+    """Detached RequestLimit snapshot mirrors Redis counters"""
+    record = RequestLimitStore.to_record(
+        5, date(2025, 1, 1), {"text_count": 2, "count": 2, "limit": 10}
+    )
+
+    assert record.user_id == 5
+    assert record.text_count == 2
+    assert record.chart_count == 0
+    assert record.limit == 10
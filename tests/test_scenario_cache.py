@@ -0,0 +1,130 @@
+# coding: utf-8
+"""
+Unit tests for the per-candle futures scenario cache (single-flight, sharing)
+"""
+
+import asyncio
+from datetime import datetime, UTC
+
+import pytest
+
+from src.cache.redis_manager import RedisManager
+from src.services.futures_analysis.scenario_cache import ScenarioCache, bar_window
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def manager():
+    manager = RedisManager()
+    manager._client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    manager._is_available = True
+    return manager
+
+
+def _payload(success=True):
+    result = {
+        "success": success,
+        "analysis_timestamp": "2025-01-15T12:00:00Z",
+        "current_price": 100.0,
+        "market_context": {"trend": "bullish"},
+        "key_levels": {"ema_levels": {"ema_20": {"price": 90.0, "distance_pct": 10.0}}},
+        "scenarios": [{"id": 1}],
+        "metadata": {},
+    }
+    return {"result": result, "scenarios": [{"id": 1}, {"id": 2}]}
+
+
+def test_bar_window_aligns_to_candle_open():
+    """4h bars open on 4h UTC boundaries, weekly bars on Monday"""
+    noon = datetime(2025, 1, 15, 13, 30, tzinfo=UTC).timestamp()
+    bar_open, bar_close = bar_window("4h", noon)
+    assert datetime.fromtimestamp(bar_open, UTC).hour == 12
+    assert bar_close - bar_open == 4 * 3600
+
+    week_open, _ = bar_window("1w", noon)
+    assert datetime.fromtimestamp(week_open, UTC) == datetime(2025, 1, 13, tzinfo=UTC)
+    assert bar_window("3m", noon) is None
+
+
+async def test_concurrent_requests_share_one_build(manager):
+    """Identical concurrent requests run one analysis; other processes reuse it"""
+    cache = ScenarioCache(version="v1", redis_manager=manager)
+    calls = []
+
+    async def build():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return _payload()
+
+    results = await asyncio.gather(
+        *(cache.get_or_build("BTCUSDT", "4h", "standard", 3, build) for _ in range(5))
+    )
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+
+    other_process = ScenarioCache(version="v1", redis_manager=manager)
+    payload, shared = await other_process.get_or_build(
+        "BTCUSDT", "4h", "standard", 3, build
+    )
+    assert shared and payload == _payload()
+    assert len(calls) == 1
+
+    # Different mode / pipeline version -> separate analysis
+    await cache.get_or_build("BTCUSDT", "4h", "high_risk", 3, build)
+    await ScenarioCache(version="v2", redis_manager=manager).get_or_build(
+        "BTCUSDT", "4h", "standard", 3, build
+    )
+    assert len(calls) == 3
+
+
+async def test_failed_analysis_is_not_cached(manager):
+    """Errors are returned to the caller but the next request retries"""
+    cache = ScenarioCache(version="v1", redis_manager=manager)
+    outcomes = [_payload(success=False), _payload()]
+
+    async def build():
+        return outcomes.pop(0)
+
+    payload, _ = await cache.get_or_build("ETHUSDT", "1h", "standard", 3, build)
+    assert payload["result"]["success"] is False
+    payload, shared = await cache.get_or_build("ETHUSDT", "1h", "standard", 3, build)
+    assert payload["result"]["success"] is True and not shared
+
+
+async def test_analyze_symbol_copies_shared_result_per_request(manager, monkeypatch):
+    """Each request gets its own analysis_id and generation log entry"""
+    from src.services.futures_analysis_service import FuturesAnalysisService
+
+    service = FuturesAnalysisService()
+    service._scenario_cache = ScenarioCache(version="v1", redis_manager=manager)
+    logged = []
+
+    async def run_analysis(*args):
+        return _payload()
+
+    async def log_generation(**kwargs):
+        logged.append((kwargs["analysis_id"], len(kwargs["scenarios"])))
+
+    async def live_price(symbol):
+        return 120.0
+
+    monkeypatch.setattr(service, "_run_analysis", run_analysis)
+    monkeypatch.setattr(service, "_log_scenario_generation", log_generation)
+    monkeypatch.setattr(service, "_get_current_price", live_price)
+
+    first = await service.analyze_symbol("BTCUSDT", "4h")
+    second = await service.analyze_symbol("btc/usdt", "4h")
+
+    assert first["analysis_id"] != second["analysis_id"]
+    assert not first["metadata"]["cache"]["shared"]
+    assert second["metadata"]["cache"]["shared"]
+    # Shared result is re-priced, the cached one isn't touched
+    assert first["current_price"] == 100.0
+    assert second["current_price"] == 120.0
+    assert second["key_levels"]["ema_levels"]["ema_20"]["distance_pct"] == 25.0
+    assert [analysis_id for analysis_id, _ in logged] == [
+        first["analysis_id"],
+        second["analysis_id"],
+    ]
+    assert all(count == 2 for _, count in logged)
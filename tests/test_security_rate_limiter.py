@@ -0,0 +1,134 @@
+"""
+Unit tests for SecurityMiddleware rate limiting storages (GCRA)
+"""
+
+import pytest
+
+from src.api.security import (
+    SecurityStorage,
+    RedisSecurityStorage,
+    gcra_update,
+    get_route_group,
+)
+from src.cache.redis_manager import RedisManager
+
+
+def _redis_storage(client) -> RedisSecurityStorage:
+    """Redis storage bound to given (fake) client"""
+    manager = RedisManager()
+    manager._client = client
+    manager._is_available = True
+    return RedisSecurityStorage(redis_manager=manager)
+
+
+def test_gcra_allows_burst_then_rejects():
+    """GCRA lets `limit` requests through instantly, then rejects"""
+    tat = None
+    for _ in range(5):
+        allowed, tat, _ = gcra_update(tat, 1000.0, limit=5, period=60)
+        assert allowed
+
+    allowed, _, retry_after = gcra_update(tat, 1000.0, limit=5, period=60)
+    assert not allowed
+    assert retry_after == pytest.approx(12.0)
+
+    # One emission interval later a slot is free again
+    allowed, _, _ = gcra_update(tat, 1012.0, limit=5, period=60)
+    assert allowed
+
+
+def test_route_group_resolution():
+    """Longest matching prefix selects the route group"""
+    assert get_route_group("/api/chat/stream")[0] == "chat"
+    assert get_route_group("/api/auth/magic/verify")[0] == "auth"
+    assert get_route_group("/api/market/overview")[0] == "default"
+
+
+async def test_memory_storage_enforces_limit():
+    """In-memory stand-in rejects requests over per-minute limit"""
+    storage = SecurityStorage()
+
+    results = [
+        await storage.check_rate_limit("1.2.3.4", "default", 3, 100) for _ in range(4)
+    ]
+
+    assert [allowed for allowed, _, _ in results] == [True, True, True, False]
+    assert results[-1][1] == "minute"
+
+
+async def test_memory_storage_bounded_under_flood():
+    """Memory stays bounded when flooded from many IPs"""
+    storage = SecurityStorage(max_keys=100)
+
+    for i in range(5000):
+        await storage.check_rate_limit(
+            f"10.0.{i // 256}.{i % 256}", "default", 60, 1000
+        )
+        await storage.add_suspicious_action(f"10.0.{i // 256}.{i % 256}")
+
+    assert len(storage.rate_state) <= 100
+    assert len(storage.suspicious_counts) <= 100
+
+
+async def test_memory_storage_ban_and_unban():
+    """Ban/unban cycle in memory storage"""
+    storage = SecurityStorage()
+
+    await storage.ban_ip("5.6.7.8", 60)
+    assert await storage.is_banned("5.6.7.8")
+
+    await storage.unban_ip("5.6.7.8")
+    assert not await storage.is_banned("5.6.7.8")
+
+
+async def test_redis_storage_shared_between_workers():
+    """Limits and bans are shared by all workers using the same Redis"""
+    fakeredis = pytest.importorskip("fakeredis")
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    worker_a = _redis_storage(client)
+    worker_b = _redis_storage(client)
+
+    assert (await worker_a.check_rate_limit("9.9.9.9", "chat", 2, 100))[0]
+    assert (await worker_b.check_rate_limit("9.9.9.9", "chat", 2, 100))[0]
+    allowed, window, retry_after = await worker_a.check_rate_limit(
+        "9.9.9.9", "chat", 2, 100
+    )
+    assert not allowed
+    assert window == "minute"
+    assert retry_after > 0
+
+    await worker_a.ban_ip("9.9.9.9", 60)
+    assert await worker_b.is_banned("9.9.9.9")
+
+
+async def test_redis_storage_hour_window():
+    """Hourly window is checked independently of the minute window"""
+    fakeredis = pytest.importorskip("fakeredis")
+    storage = _redis_storage(fakeredis.FakeAsyncRedis(decode_responses=True))
+
+    for _ in range(3):
+        assert (await storage.check_rate_limit("8.8.8.8", "default", 100, 3))[0]
+
+    allowed, window, _ = await storage.check_rate_limit("8.8.8.8", "default", 100, 3)
+    assert not allowed
+    assert window == "hour"
+
+
+async def test_zero_limit_disables_window():
+    """A limit of 0 (e.g. from RATE_LIMIT_GROUPS) turns the window off instead of crashing"""
+    assert gcra_update(None, 1000.0, limit=0, period=60)[0]
+
+    fakeredis = pytest.importorskip("fakeredis")
+    storages = (
+        SecurityStorage(),
+        _redis_storage(fakeredis.FakeAsyncRedis(decode_responses=True)),
+    )
+    for storage in storages:
+        for _ in range(5):
+            assert (await storage.check_rate_limit("7.7.7.7", "webhooks", 0, 0))[0]
+
+        for _ in range(2):
+            assert (await storage.check_rate_limit("7.7.7.7", "auth", 0, 2))[0]
+        allowed, window, _ = await storage.check_rate_limit("7.7.7.7", "auth", 0, 2)
+        assert not allowed
+        assert window == "hour"
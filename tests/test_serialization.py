@@ -0,0 +1,59 @@
+"""
+Unit tests for JSON serialization helpers
+"""
+
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from src.utils.serialization import (
+    FastJSONResponse,
+    dumps,
+    dumps_bytes,
+    loads,
+    to_builtin,
+)
+
+
+def test_dumps_handles_numpy_pandas_and_datetime():
+    """Analysis results serialize without a conversion pass"""
+    data = {
+        "rsi": np.float64(55.5),
+        "count": np.int64(3),
+        "bullish": np.bool_(True),
+        "levels": np.array([1.5, 2.5]),
+        "ts": pd.Timestamp("2025-01-18 12:00:00"),
+        "created": datetime(2025, 1, 18, 12, 0),
+        "missing": float("nan"),
+        "name": "Биткоин",
+    }
+
+    assert loads(dumps(data)) == {
+        "rsi": 55.5,
+        "count": 3,
+        "bullish": True,
+        "levels": [1.5, 2.5],
+        "ts": "2025-01-18T12:00:00",
+        "created": "2025-01-18T12:00:00",
+        "missing": None,
+        "name": "Биткоин",
+    }
+    assert "Биткоин".encode() in dumps_bytes(data)
+
+
+def test_to_builtin_keeps_python_values():
+    """Only numpy values are converted for results kept as Python objects"""
+    converted = to_builtin(
+        {"a": [np.float32(0.5), (np.int32(1), "x")], "b": np.array([1, 2])}
+    )
+
+    assert converted == {"a": [0.5, (1, "x")], "b": [1, 2]}
+    assert type(converted["a"][0]) is float
+
+
+def test_fast_json_response_renders_numpy():
+    response = FastJSONResponse({"price": np.float64(1.25)})
+
+    assert response.body == b'{"price":1.25}'
+    assert response.media_type == "application/json"
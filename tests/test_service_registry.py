@@ -0,0 +1,54 @@
+# coding: utf-8
+"""
+Unit tests for the lazy service registry (one instance per process, closed on shutdown)
+"""
+
+import pytest
+
+from src.services import service_registry
+from src.services.service_registry import close_services, get_service, lazy_service
+
+
+@pytest.fixture(autouse=True)
+def instances(monkeypatch):
+    """Fresh registry per test"""
+    instances = {}
+    monkeypatch.setattr(service_registry, "_instances", instances)
+    return instances
+
+
+def test_modules_share_one_instance_created_on_first_use(instances):
+    """Routers, handlers and crypto_tools use the same CoinGecko rate limiter"""
+    from src.api import market
+    from src.services import crypto_tools
+
+    assert "coingecko" not in instances
+
+    limiter = market.coingecko_service.rate_limiter
+    assert instances["coingecko"].rate_limiter is limiter
+    assert crypto_tools.coingecko_service.rate_limiter is limiter
+    assert get_service("coingecko") is instances["coingecko"]
+
+    with pytest.raises(KeyError):
+        lazy_service("no-such-service")
+
+
+async def test_close_services_closes_created_instances(instances, monkeypatch):
+    """Only created services are closed; the next use builds a new instance"""
+    closed = []
+
+    class FakeClient:
+        async def close(self):
+            closed.append(self)
+
+    monkeypatch.setitem(service_registry._FACTORIES, "openai", FakeClient)
+    proxy = lazy_service("openai")
+    first = get_service("openai")
+    proxy.note = "set through proxy"
+    assert first.note == "set through proxy"
+
+    await close_services()
+    assert closed == [first]
+    assert instances == {}
+
+    assert get_service("openai") is not first
@@ -0,0 +1,91 @@
+"""
+Unit tests for the Telegram stream renderer and incremental HTML conversion
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+from src.bot.stream_renderer import EditRateLimiter, StreamRenderer
+from src.utils import markdown_converter
+from src.utils.markdown_converter import (
+    IncrementalHTMLConverter,
+    convert_to_telegram_html,
+)
+
+REPLY = (
+    "## Bitcoin\n\n"
+    "**BTC** is at `$97,000`, _up_ 2% today.\n\n"
+    "```\nsupport: 95k\n\nresistance: 100k\n```\n\n"
+    "> Not financial advice\n\n"
+    "See [CoinGecko](https://coingecko.com)"
+)
+
+
+class FakeMessage:
+    """Message stub recording edits; each edit takes `delay` seconds"""
+
+    def __init__(self, delay: float = 0.0):
+        self.chat = SimpleNamespace(id=1)
+        self.delay = delay
+        self.edits = []
+
+    async def edit_text(self, text, parse_mode=None, **kwargs):
+        await asyncio.sleep(self.delay)
+        self.edits.append(text)
+
+
+def test_incremental_conversion_matches_full(monkeypatch):
+    """Streamed previews end equal to a full conversion; stable blocks convert once"""
+    converted = []
+    original = markdown_converter.convert_to_telegram_html
+
+    def counting(text):
+        converted.append(text)
+        return original(text)
+
+    monkeypatch.setattr(markdown_converter, "convert_to_telegram_html", counting)
+
+    converter = IncrementalHTMLConverter()
+    for end in range(1, len(REPLY) + 1, 7):
+        converter.render(REPLY[:end])
+    assert converter.render(REPLY) == original(REPLY)
+
+    # Blank line inside the code block is not a boundary
+    assert "```\nsupport: 95k\n\nresistance: 100k\n```\n\n" in converted
+    assert max(len(text) for text in converted) < len(REPLY) // 2
+
+
+async def test_slow_edits_do_not_block_stream_and_are_coalesced():
+    """feed() never waits for Telegram; buffered chunks go out in few edits"""
+    message = FakeMessage(delay=0.05)
+    renderer = StreamRenderer(message, limiter=EditRateLimiter(0.05, 100))
+
+    started = time.monotonic()
+    async with renderer:
+        for char in REPLY:
+            renderer.feed(char)
+            await asyncio.sleep(0)
+        feed_time = time.monotonic() - started
+        await asyncio.sleep(0.2)
+
+    assert feed_time < 0.05
+    assert 1 <= len(message.edits) <= 3
+    assert message.edits[-1] == convert_to_telegram_html(REPLY)
+
+    # Final text equal to the last preview is not re-sent
+    await renderer.edit(convert_to_telegram_html(REPLY))
+    assert len(message.edits) <= 3
+
+
+async def test_rate_limiter_spaces_edits_per_chat():
+    """Same chat waits for its interval, other chats only for the global one"""
+    limiter = EditRateLimiter(per_chat_interval=0.1, edits_per_second=1000)
+
+    started = time.monotonic()
+    await limiter.acquire(1)
+    await limiter.acquire(2)
+    assert time.monotonic() - started < 0.05
+
+    await limiter.acquire(1)
+    assert time.monotonic() - started >= 0.1
@@ -0,0 +1,78 @@
+"""
+Unit tests for the shared per-symbol supervisor market context
+"""
+
+import asyncio
+
+import pandas as pd
+
+from src.database.models import SupervisorEvent
+from src.services.supervisor_llm_advisor import SupervisorLLMAdvisor
+
+
+def _klines(count):
+    rows = [
+        {
+            "open": 100 + i,
+            "high": 102 + i,
+            "low": 99 + i,
+            "close": 101 + i,
+            "volume": 10 + i,
+        }
+        for i in range(count)
+    ]
+    return pd.DataFrame(rows)
+
+
+class FakeBinance:
+    def __init__(self):
+        self.calls = []
+
+    async def get_klines(self, symbol, interval, limit):
+        self.calls.append((symbol, interval, limit))
+        await asyncio.sleep(0.01)
+        return _klines(limit)
+
+
+async def test_one_fetch_per_timeframe_shared_across_positions():
+    """Concurrent contexts for one symbol cost a single fetch per timeframe"""
+    advisor = SupervisorLLMAdvisor()
+    advisor.binance = FakeBinance()
+
+    contexts = await asyncio.gather(
+        *(
+            advisor.build_market_context(
+                trade_id=f"t{i}",
+                symbol="BTCUSDT",
+                side="Long",
+                position_data={"mark_price": 120},
+                scenario_data={},
+                events=[SupervisorEvent.INVALIDATION_HIT],
+            )
+            for i in range(3)
+        )
+    )
+
+    assert sorted(advisor.binance.calls) == [
+        ("BTCUSDT", "1d", 7),
+        ("BTCUSDT", "1h", 24),
+        ("BTCUSDT", "4h", 12),
+    ]
+    assert [c.trade_id for c in contexts] == ["t0", "t1", "t2"]
+
+    context = contexts[0]
+    assert context.ohlcv_1h.candles_count == 24
+    assert context.trend_1h == "up"
+    # ATR over the last 14 1h candles, same as a separate limit=14 fetch
+    assert context.atr_pct == round(3 / 124 * 100, 3)
+    assert context.volume_ratio == round(33 / (sum(range(10, 33)) / 23), 2)
+
+    await advisor.build_market_context(
+        trade_id="t3",
+        symbol="BTCUSDT",
+        side="Short",
+        position_data={},
+        scenario_data={},
+        events=[],
+    )
+    assert len(advisor.binance.calls) == 3
@@ -0,0 +1,116 @@
+"""
+Unit tests for batched supervisor position sync
+"""
+
+import json
+from datetime import datetime, timedelta, UTC
+
+from sqlalchemy import event, select
+
+from src.database.models import ScenarioSnapshot, SupervisorAdvice
+from src.services import supervisor_service as supervisor_module
+from src.services.supervisor_service import SupervisorService
+
+
+def _scenario(trade_id):
+    return ScenarioSnapshot(
+        trade_id=trade_id,
+        user_id=1,
+        symbol="BTCUSDT",
+        timeframe="4h",
+        side="Long",
+        bias="long",
+        confidence=0.7,
+        entry_zone_low=99,
+        entry_zone_high=101,
+        stop_loss=95,
+        invalidation_price=96,
+        take_profits_json=json.dumps(
+            [{"level": 1, "price": 110}, {"level": 2, "price": 120}]
+        ),
+        valid_until=datetime.now(UTC) + timedelta(hours=12),
+    )
+
+
+def _position(trade_id, mark_price):
+    return {
+        "trade_id": trade_id,
+        "symbol": "BTCUSDT",
+        "side": "Long",
+        "qty": 1,
+        "entry_price": 100,
+        "mark_price": mark_price,
+        "unrealized_pnl": 0,
+        "pnl_pct": 0,
+        "leverage": 5,
+        "liq_price": None,
+        "sl_current": 95,
+        "tp_current": None,
+        "updated_at": datetime.now(UTC).isoformat(),
+    }
+
+
+async def test_sync_positions_batches_queries_and_commit(
+    test_db_engine, db_session, monkeypatch
+):
+    """Two SELECTs and one commit for the batch; cooldown and missing scenarios skipped"""
+    monkeypatch.setattr(supervisor_module, "LLM_ENABLED", False)
+
+    cooling = _scenario("cooling")
+    for trade_id in ("hit", "quiet"):
+        db_session.add(_scenario(trade_id))
+    db_session.add(cooling)
+    await db_session.flush()
+    db_session.add(
+        SupervisorAdvice(
+            scenario_id=cooling.id,
+            trade_id="cooling",
+            user_id=1,
+            market_summary="",
+            scenario_valid=True,
+            time_valid_left_min=60,
+            risk_state="safe",
+            price_at_creation=100,
+            recommendations_json="[]",
+            cooldown_until=datetime.now(UTC) + timedelta(hours=1),
+            expires_at=datetime.now(UTC) + timedelta(hours=1),
+        )
+    )
+    await db_session.commit()
+
+    statements = []
+    commits = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement.lstrip().split()[0].upper())
+
+    event.listen(test_db_engine.sync_engine, "before_cursor_execute", record)
+    event.listen(db_session.sync_session, "after_commit", lambda s: commits.append(1))
+    try:
+        packs = await SupervisorService().sync_positions(
+            db_session,
+            user_id=1,
+            positions=[
+                _position("hit", 95),  # invalidation hit
+                _position("quiet", 100),  # no events
+                _position("cooling", 95),  # in cooldown
+                _position("unknown", 95),  # no scenario
+            ],
+        )
+    finally:
+        event.remove(test_db_engine.sync_engine, "before_cursor_execute", record)
+
+    assert [pack.trade_id for pack in packs] == ["hit"]
+    assert statements.count("SELECT") == 2
+    assert len(commits) == 1
+
+    saved = (
+        (
+            await db_session.execute(
+                select(SupervisorAdvice.trade_id).order_by(SupervisorAdvice.id)
+            )
+        )
+        .scalars()
+        .all()
+    )
+    assert saved == ["cooling", "hit"]
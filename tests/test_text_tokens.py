@@ -0,0 +1,52 @@
+"""
+Unit tests for token counting and token-budgeted chat history
+"""
+
+from src.utils.text_tokens import (
+    MESSAGE_OVERHEAD_TOKENS,
+    count_tokens,
+    count_tokens_async,
+    ensure_token_counts,
+    fit_history_to_budget,
+)
+
+
+def test_fit_history_keeps_newest_messages():
+    """History is filled newest-first until the budget runs out"""
+    counts = [100, 50, 30, 20]  # oldest first
+    budget = 30 + 20 + 2 * MESSAGE_OVERHEAD_TOKENS
+
+    first_kept, used = fit_history_to_budget(counts, budget)
+
+    assert first_kept == 2
+    assert used == budget
+
+
+def test_fit_history_stops_at_first_message_that_does_not_fit():
+    """An older short message is not pulled in past a gap"""
+    counts = [1, 500, 10]
+
+    first_kept, _ = fit_history_to_budget(counts, 100)
+
+    assert first_kept == 2
+
+
+def test_fit_history_empty_budget():
+    """Zero budget drops all history"""
+    assert fit_history_to_budget([10, 10], 0) == (2, 0)
+
+
+async def test_async_count_matches_sync():
+    """Off-loop counting gives the same result for large inputs"""
+    text = "BTC ETH SOL " * 2000
+
+    assert await count_tokens_async(text) == count_tokens(text)
+    assert await count_tokens_async("") == 0
+
+
+async def test_ensure_token_counts_fills_missing():
+    """Stored counts are reused, missing ones are computed"""
+    counts = await ensure_token_counts(["hello world", "abc"], [42, None])
+
+    assert counts[0] == 42
+    assert counts[1] == count_tokens("abc")
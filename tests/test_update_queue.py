@@ -0,0 +1,145 @@
+"""
+Unit tests for webhook update delivery (dedup, partitioning, per-user order)
+"""
+
+import asyncio
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+
+from src.bot import update_queue
+from src.bot.update_queue import UpdateQueue, UpdateWorker, create_webhook_app
+from src.cache.redis_manager import RedisManager
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def queue():
+    manager = RedisManager()
+    manager._client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    manager._is_available = True
+    return UpdateQueue(redis_manager=manager, partitions=8)
+
+
+def _message(update_id, user_id, text="hi"):
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "from": {"id": user_id},
+            "chat": {"id": user_id},
+            "text": text,
+        },
+    }
+
+
+class RecordingDispatcher:
+    """Dispatcher stub: slow for user 1, records handling order"""
+
+    def __init__(self):
+        self.handled = []
+
+    async def feed_raw_update(self, bot, update):
+        user_id = update["message"]["from"]["id"]
+        await asyncio.sleep(0.05 if user_id == 1 else 0)
+        self.handled.append((user_id, update["update_id"]))
+
+
+async def test_push_deduplicates_and_partitions_by_user(queue):
+    """Redelivered update_id is dropped; a user's updates share one partition"""
+    assert await queue.push(_message(1, user_id=42))
+    assert not await queue.push(_message(1, user_id=42))
+    assert await queue.push(_message(2, user_id=42))
+
+    partition = queue.partition(_message(0, user_id=42))
+    assert queue.partition(_message(0, user_id=43)) != partition
+
+    first = await queue.pop([partition], timeout=1)
+    second = await queue.pop([partition], timeout=1)
+    assert [first["update_id"], second["update_id"]] == [1, 2]
+    assert await queue.pop([partition], timeout=1) is None
+
+    owners = [queue.worker_partitions(index, 3) for index in range(3)]
+    assert sorted(p for parts in owners for p in parts) == list(range(8))
+
+
+async def test_worker_keeps_order_per_user_and_runs_users_concurrently():
+    """User 2's update overtakes user 1's slow ones, user 1's stay in order"""
+    dispatcher = RecordingDispatcher()
+    worker = UpdateWorker(dispatcher, bot=None, concurrency=8)
+
+    for update in (_message(1, 1), _message(2, 1), _message(3, 2), _message(4, 1)):
+        worker.submit(update)
+    await worker.drain()
+
+    assert dispatcher.handled[0] == (2, 3)
+    assert [uid for user, uid in dispatcher.handled if user == 1] == [1, 2, 4]
+    assert worker._order_locks == {}
+
+
+async def test_webhook_checks_secret_and_falls_back_without_redis(queue, monkeypatch):
+    """Wrong secret is rejected; with Redis down the receiver handles the update"""
+    monkeypatch.setattr(update_queue, "WEBHOOK_SECRET", "s3cret")
+    dispatcher = RecordingDispatcher()
+    fallback = UpdateWorker(dispatcher, bot=None, concurrency=1)
+    queue.redis._is_available = False
+
+    async with TestClient(TestServer(create_webhook_app(queue, fallback))) as client:
+        denied = await client.post(update_queue.WEBHOOK_PATH, json=_message(1, 2))
+        assert denied.status == 401
+
+        accepted = await client.post(
+            update_queue.WEBHOOK_PATH,
+            json=_message(1, 2),
+            headers={"X-Telegram-Bot-Api-Secret-Token": "s3cret"},
+        )
+        assert accepted.status == 200
+
+        # Only slot is taken: ask Telegram to redeliver instead of piling up tasks
+        await fallback._slots.acquire()
+        busy = await client.post(
+            update_queue.WEBHOOK_PATH,
+            json=_message(2, 3),
+            headers={"X-Telegram-Bot-Api-Secret-Token": "s3cret"},
+        )
+        assert busy.status == 503
+        fallback._slots.release()
+
+    await fallback.drain()
+    assert dispatcher.handled == [(2, 1)]
+
+
+async def test_webhook_rejects_everything_without_secret(queue, monkeypatch):
+    """Unset WEBHOOK_SECRET fails closed"""
+    monkeypatch.setattr(update_queue, "WEBHOOK_SECRET", "")
+    fallback = UpdateWorker(RecordingDispatcher(), bot=None, concurrency=1)
+
+    async with TestClient(TestServer(create_webhook_app(queue, fallback))) as client:
+        response = await client.post(
+            update_queue.WEBHOOK_PATH,
+            json=_message(1, 2),
+            headers={"X-Telegram-Bot-Api-Secret-Token": ""},
+        )
+        assert response.status == 401
+    assert await queue.pop(list(range(queue.partitions)), timeout=1) is None
+
+
+async def test_pop_rotates_partitions(queue):
+    """A busy partition doesn't starve the others read by the same worker"""
+    partitions = [queue.partition(_message(0, user_id)) for user_id in (1, 2)]
+    assert partitions[0] != partitions[1]
+    for update_id in range(1, 5):
+        await queue.push(_message(update_id, user_id=1))
+    await queue.push(_message(10, user_id=2))
+
+    popped = [(await queue.pop(partitions, timeout=1))["update_id"] for _ in range(2)]
+    assert 10 in popped
+
+
+async def test_worker_count_clamped_to_partitions(queue):
+    """More workers than partitions would leave workers without partitions"""
+    assert queue.worker_count(queue.partitions + 5) == queue.partitions
+    assert queue.worker_count(2) == 2
+    assert queue.worker_partitions(0, queue.worker_count(queue.partitions + 5)) == [0]
+    assert await queue.pop([], timeout=0) is None
@@ -0,0 +1,166 @@
+"""
+Unit tests for batched usage accounting (cost tracking + points queue)
+"""
+
+import asyncio
+import os
+from datetime import datetime, UTC
+
+import pytest
+
+from src.database.models import PointsTransactionType
+from src.services import usage_recorder as usage_module
+from src.services.usage_recorder import (
+    CostEvent,
+    PointsEvent,
+    UsageRecorder,
+    decode_event,
+    encode_event,
+)
+
+
+@pytest.fixture
+async def recorder(tmp_path, monkeypatch):
+    """Running recorder with in-memory persistence"""
+    monkeypatch.setattr(usage_module, "USAGE_FLUSH_INTERVAL_SECONDS", 60)
+    recorder = UsageRecorder(spill_path=str(tmp_path / "spill.jsonl"))
+    recorder.persisted = []
+    recorder.fail = False
+    recorder.fail_points = False
+
+    async def persist(batch):
+        if recorder.fail:
+            raise ConnectionError("db down")
+        if recorder.fail_points:
+            # Cost rows committed, DB lost before the points awards
+            recorder.persisted.extend(e for e in batch if isinstance(e, CostEvent))
+            return [e for e in batch if isinstance(e, PointsEvent)]
+        recorder.persisted.extend(batch)
+        return []
+
+    monkeypatch.setattr(recorder, "_persist", persist)
+    recorder.start()
+    yield recorder
+    recorder.fail = False
+    await recorder.stop()
+
+
+def test_spill_encoding_roundtrip():
+    """Events survive the spill file format"""
+    cost = CostEvent(1, "openai", 120, 0.0042, "gpt-4o", None, datetime.now(UTC))
+    points = PointsEvent(
+        2,
+        PointsTransactionType.EARN_TEXT_REQUEST,
+        None,
+        "Анализ",
+        {"chat_id": 5},
+        "chat:2:5",
+    )
+
+    assert decode_event(encode_event(cost)) == cost
+    assert decode_event(encode_event(points)) == points
+
+
+async def test_events_are_queued_not_written(recorder):
+    """Request path only enqueues; flush writes the batch"""
+    await recorder.record_cost(None, user_id=1, service="openai", tokens=10, cost=0.01)
+    await recorder.record_points(None, user_id=1, transaction_type="earn_text_request")
+
+    assert recorder.persisted == []
+    assert await recorder.flush() == 2
+    assert [type(e) for e in recorder.persisted] == [CostEvent, PointsEvent]
+
+
+async def test_failed_flush_spills_and_replays(recorder):
+    """Events of a failed batch go to disk and are written on next flush"""
+    await recorder.record_cost(None, user_id=1, service="openai", tokens=10, cost=0.01)
+    recorder.fail = True
+    await recorder.flush()
+
+    assert recorder.persisted == []
+    recorder.fail = False
+    assert await recorder.flush() == 1
+    assert recorder.persisted[0].tokens == 10
+
+
+async def test_partial_failure_spills_only_unwritten_events(recorder):
+    """Committed cost rows aren't replayed; replay counts what it wrote"""
+    await recorder.record_cost(None, user_id=1, service="openai", tokens=10, cost=0.01)
+    await recorder.record_points(None, user_id=1, transaction_type="earn_text_request")
+    recorder.fail_points = True
+    assert await recorder.flush() == 1
+
+    # Replay fails again: nothing counted as replayed, events kept
+    await recorder.record_cost(None, user_id=1, service="openai", tokens=20, cost=0.02)
+    recorder.fail_points = False
+    recorder.fail = True
+    assert await recorder.flush() == 0
+
+    recorder.fail = False
+    assert await recorder.flush() == 2
+    assert [type(e) for e in recorder.persisted] == [CostEvent, PointsEvent, CostEvent]
+
+
+async def test_full_queue_spills_instead_of_blocking(tmp_path, monkeypatch):
+    """Backpressure: producer waits at most the enqueue timeout, then spills"""
+    monkeypatch.setattr(usage_module, "USAGE_QUEUE_MAX", 1)
+    monkeypatch.setattr(usage_module, "USAGE_ENQUEUE_TIMEOUT_SECONDS", 0.01)
+    recorder = UsageRecorder(spill_path=str(tmp_path / "spill.jsonl"))
+    recorder._writer_task = asyncio.create_task(
+        asyncio.sleep(60)
+    )  # Running, never flushes
+
+    for tokens in (1, 2):
+        await recorder.record_cost(
+            None, user_id=1, service="openai", tokens=tokens, cost=0.0
+        )
+
+    with open(recorder.spill_path, encoding="utf-8") as f:
+        spilled = [decode_event(line) for line in f]
+    assert [e.tokens for e in spilled] == [2]
+
+    recorder._writer_task.cancel()
+
+
+async def test_db_outage_spills_points_events(tmp_path, monkeypatch):
+    """earn_points raises on a dead DB for the recorder, so awards are spilled, not lost"""
+    from sqlalchemy.exc import OperationalError
+
+    from src.database import engine
+    from src.services.points_service import PointsService
+
+    class DeadSession:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+        async def execute(self, *args, **kwargs):
+            raise OperationalError("SELECT 1", {}, ConnectionRefusedError())
+
+        async def rollback(self):
+            pass
+
+    monkeypatch.setattr(engine, "get_session_maker", lambda: DeadSession)
+    recorder = UsageRecorder(spill_path=str(tmp_path / "spill.jsonl"))
+    event = PointsEvent(1, "earn_text_request", None, None, None, "chat:1:1")
+
+    assert await recorder._persist([event]) == [event]
+
+    # Other callers keep the old contract (None on failure)
+    assert (
+        await PointsService.earn_points(DeadSession(), 1, "earn_text_request") is None
+    )
+
+
+async def test_replay_takes_spill_file_under_lock(tmp_path):
+    """Replay moves the shared spill file to a per-process file while holding the lock"""
+    recorder = UsageRecorder(spill_path=str(tmp_path / "spill.jsonl"))
+    recorder._spill([PointsEvent(1, "earn_text_request", None, None, None, "a")])
+
+    replay_path, events = recorder._take_spill()
+
+    assert replay_path.endswith(f".replay.{os.getpid()}")
+    assert [e.transaction_id for e in events] == ["a"]
+    assert recorder._take_spill() is None